@@ -0,0 +1,137 @@
+#
+# Copyright (C) 2025 Intel Corporation.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+Cold start of the file watcher on a tree of --files files.
+
+Starts a FastAPI stub of the document backend in a separate process and
+times the initial sync of the tree:
+
+  before   every file posted in sequence with requests.post(), as the file
+           watcher did before the upload manifest
+  cold     FileChangeHandler.sync_existing_files() with an empty manifest
+  restart  the same with the manifest of the cold run
+
+Requires fastapi, uvicorn and python-multipart (see tests/requirements_dev.txt).
+
+Example:
+    python benchmark/file_watcher_benchmark.py --files 10000 --workers 4
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from file_watcher import file_watcher  # noqa: E402
+from file_watcher.file_watcher import FileChangeHandler, Manifest  # noqa: E402
+
+
+def serve(port):
+    import fastapi
+    import uvicorn
+
+    stats = {"uploads": 0, "bytes": 0}
+    app = fastapi.FastAPI()
+
+    @app.post("/documents")
+    async def upload(files: list[fastapi.UploadFile]):
+        for f in files:
+            stats["uploads"] += 1
+            stats["bytes"] += len(await f.read())
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", ws="none")
+
+
+def write_tree(root, count, size):
+    paths = []
+    for i in range(count):
+        directory = os.path.join(root, f"dir{i % 100}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"doc{i}.txt")
+        with open(path, "w") as f:
+            line = f"document {i} line\n"
+            f.write(line * max(1, size // len(line)))
+        paths.append(path)
+    return paths
+
+
+def upload_sequentially(paths):
+    for path in paths:
+        with open(path, "rb") as f:
+            requests.post(file_watcher.DOCUMENT_ENDPOINT, files={"files": (os.path.basename(path), f)})
+
+
+def sync(paths, manifest_path, workers):
+    handler = FileChangeHandler(set(paths), Manifest(manifest_path), max_workers=workers)
+    try:
+        handler.sync_existing_files(paths)
+    finally:
+        handler.close()
+        handler.manifest.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=4096, help="Bytes per file")
+    parser.add_argument("--workers", type=int, default=file_watcher.UPLOAD_WORKERS)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    backend = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)])
+    file_watcher.DOCUMENT_ENDPOINT = f"http://127.0.0.1:{port}/documents"
+    stats_url = f"http://127.0.0.1:{port}/stats"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(stats_url)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+
+        with tempfile.TemporaryDirectory() as root:
+            paths = write_tree(os.path.join(root, "docs"), args.files, args.size)
+            manifest_path = os.path.join(root, "manifest.db")
+            runs = [
+                ("before", lambda: upload_sequentially(paths)),
+                ("cold", lambda: sync(paths, manifest_path, args.workers)),
+                ("restart", lambda: sync(paths, manifest_path, args.workers)),
+            ]
+            print(f"{'run':>8} {'seconds':>8} {'uploads':>8} {'MB sent':>8}")
+            for name, run in runs:
+                before = requests.get(stats_url).json()
+                begin = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - begin
+                after = requests.get(stats_url).json()
+                print(f"{name:>8} {elapsed:>8.2f} {after['uploads'] - before['uploads']:>8}"
+                      f" {(after['bytes'] - before['bytes']) / 1e6:>8.1f}", flush=True)
+    finally:
+        backend.terminate()
+        backend.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,13 @@
 import os
 import time
 import logging
+import hashlib
+import sqlite3
+import threading
 import requests
 import signal
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -21,8 +26,13 @@ logging.basicConfig(
 IGNORED_EXTENSIONS = ['.swp', '.swx', '.tmp']
 IGNORED_SUFFIXES = ['~']
 IGNORED_TEMP_FILENAMES = ['4913']  # 4913 is a common temporary file suffix for vim
-DEBOUNCE_INTERVAL = 2.0 # seconds
+DEBOUNCE_INTERVAL = float(os.getenv("DEBOUNCE_INTERVAL", "2.0"))  # seconds
 DOCUMENT_ENDPOINT = os.getenv("DOCUMENT_ENDPOINT", "http://localhost:8888/documents")
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+MANIFEST_PATH = os.getenv(
+    "MANIFEST_PATH", os.path.join(os.path.expanduser("~"), ".hmi_file_watcher", "manifest.db")
+)
+HASH_CHUNK_SIZE = 1024 * 1024
 
 # Global flag for shutdown
 should_stop = False
@@ -36,12 +46,84 @@ def handle_shutdown(signum, func):
 signal.signal(signal.SIGINT, handle_shutdown)
 signal.signal(signal.SIGTERM, handle_shutdown)
 
+def file_digest(file_path):
+    """Returns the blake2b hex digest of the file content."""
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# --- Upload manifest ---
+class Manifest:
+    """
+    Persistent record of the files the backend at `endpoint` already has:
+    path -> (size, mtime_ns, blake2b digest) of the last uploaded content.
+    Entries of other endpoints are kept apart, so pointing the watcher to a
+    new backend uploads everything again.
+    """
+
+    def __init__(self, db_path=":memory:", endpoint=DOCUMENT_ENDPOINT):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.endpoint = endpoint
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            if db_path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "endpoint TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (endpoint, path))"
+            )
+
+    def get(self, path):
+        """Returns (size, mtime_ns, digest) of path, or None."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT size, mtime_ns, digest FROM files WHERE endpoint = ? AND path = ?",
+                (self.endpoint, path),
+            ).fetchone()
+
+    def put(self, path, size, mtime_ns, digest):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (self.endpoint, path, size, mtime_ns, digest),
+            )
+
+    def delete(self, path):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM files WHERE endpoint = ? AND path = ?", (self.endpoint, path))
+
+    def paths(self):
+        with self.lock:
+            return {row[0] for row in self.conn.execute(
+                "SELECT path FROM files WHERE endpoint = ?", (self.endpoint,)
+            )}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
 # --- File Event Handler ---
 class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, existing_files):
+    def __init__(self, existing_files, manifest=None, max_workers=UPLOAD_WORKERS, debounce=DEBOUNCE_INTERVAL):
         super().__init__()
-        self.last_modified = {}
         self.existing_files = existing_files
+        self.manifest = manifest or Manifest()
+        self.debounce = debounce
+        # Keep-alive connections, one per upload worker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        # Events of a path are coalesced until the path is quiet for `debounce` seconds
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.path_locks = {}
 
     def should_ignore(self, path):
         filename = os.path.basename(path)
@@ -55,69 +137,145 @@ class FileChangeHandler(FileSystemEventHandler):
         try:
             with open(file_path, 'rb') as f:
                 files = {'files': (os.path.basename(file_path), f)}
-                response = requests.post(DOCUMENT_ENDPOINT, files=files)
+                response = self.session.post(DOCUMENT_ENDPOINT, files=files)
                 if response.status_code == 200:
                     logging.info(f"Successfully sent {file_path} for context creation.")
+                    return True
                 else:
                     logging.warning(f"Failed to send {file_path}. Status code: {response.status_code}")
 
         except Exception as e:
             logging.error(f"Error sending {file_path} to API: {e}")
+        return False
 
     def delete_file_to_api(self, file_path):
         delete_document_url = f"{DOCUMENT_ENDPOINT}?document={os.path.basename(file_path)}"
 
         try:
-            response = requests.delete(delete_document_url)
+            response = self.session.delete(delete_document_url)
             if response.status_code == 204:
                 logging.info(f"Successfully deleted {file_path} from API.")
+                return True
             else:
                 logging.warning(f"Failed to delete {file_path}. Status code: {response.status_code}")
 
         except Exception as e:
             logging.error(f"Error deleting {file_path} from API: {e}")
+        return False
+
+    def sync_file(self, file_path):
+        """
+        Uploads the file unless the backend already has its content. Returns
+        True if the file was uploaded.
+        """
+        # One sync per path at a time, so that a slow upload is not raced by the next one
+        with self.pending_lock:
+            path_lock = self.path_locks.setdefault(file_path, threading.Lock())
+        with path_lock:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return False
+
+            if stat.st_size == 0:
+                logging.info(f"File {file_path} is created without content.")
+                return False
+
+            known = self.manifest.get(file_path)
+            if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                logging.debug(f"Skipping {file_path}, unchanged since the last upload.")
+                return False
+
+            try:
+                digest = file_digest(file_path)
+            except OSError as e:
+                logging.error(f"Error reading {file_path}: {e}")
+                return False
+            if known and known[2] == digest:
+                # Touched or rewritten with the same content
+                self.manifest.put(file_path, stat.st_size, stat.st_mtime_ns, digest)
+                logging.info(f"Skipping {file_path}, content unchanged.")
+                return False
+
+            if self.send_file_to_api(file_path):
+                self.manifest.put(file_path, stat.st_size, stat.st_mtime_ns, digest)
+                return True
+            return False
+
+    def schedule(self, file_path):
+        """Queues the path for a sync once it has been quiet for `debounce` seconds."""
+        with self.pending_lock:
+            self.pending[file_path] = time.monotonic() + self.debounce
+
+    def flush(self, force=False):
+        """
+        Submits the pending paths that are due, or all of them if `force`, to
+        the upload workers. Returns the futures of the submitted syncs.
+        """
+        now = time.monotonic()
+        with self.pending_lock:
+            due = [path for path, deadline in self.pending.items() if force or deadline <= now]
+            for path in due:
+                del self.pending[path]
+        return [self.executor.submit(self.sync_file, path) for path in due]
+
+    def sync_existing_files(self, file_paths):
+        """
+        Uploads the existing files the backend does not have yet, and deletes
+        from the backend the files removed while the watcher was not running.
+        Returns the number of uploaded files.
+        """
+        for file_path in self.manifest.paths() - set(file_paths):
+            logging.info(f"File deleted while not watching: {file_path}")
+            if self.delete_file_to_api(file_path):
+                self.manifest.delete(file_path)
+        futures = [self.executor.submit(self.sync_file, path) for path in file_paths]
+        uploaded = sum(future.result() for future in futures)
+        logging.info(f"Synced {len(futures)} existing files, uploaded {uploaded}.")
+        return uploaded
 
     def on_any_event(self, event):
         if event.is_directory or self.should_ignore(event.src_path):
             return
 
-        now = time.time()
-        last_modified_time = self.last_modified.get(event.src_path, 0)
-
         if event.event_type == 'created':
             logging.info(f"File created: {event.src_path}")
+            self.existing_files.add(event.src_path)
+            self.schedule(event.src_path)
 
         elif event.event_type == 'modified':
-            if now - last_modified_time < DEBOUNCE_INTERVAL:
-                return
-
-            self.last_modified[event.src_path] = now
-
-            logging.info(f"File modified: {event.src_path}")
+            logging.debug(f"File modified: {event.src_path}")
 
             # add file into the list if it is not exist previously
             # else skip
             if event.src_path not in self.existing_files:
                 self.existing_files.add(event.src_path)
 
-            # check if the file is not empty, send for context creation
-            # else return message and not sending for context creation
-            if os.path.getsize(event.src_path) > 0:
-                self.send_file_to_api(event.src_path)
-            else:
-                logging.info(f"File {event.src_path} is created without content.")
+            # empty files are skipped when the path is synced
+            self.schedule(event.src_path)
 
         elif event.event_type == 'deleted':
-            self.delete_file_to_api(event.src_path)
+            with self.pending_lock:
+                self.pending.pop(event.src_path, None)
+                self.path_locks.pop(event.src_path, None)
+            # a failed delete stays in the manifest and is retried on the next start
+            if self.delete_file_to_api(event.src_path):
+                self.manifest.delete(event.src_path)
             self.existing_files.discard(event.src_path)
             logging.info(f"File deleted: {event.src_path}")
 
+    def close(self):
+        for future in self.flush(force=True):
+            future.result()
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
 # --- File Watcher class to encapsulate observer logic
 class FileWatcher:
-    def __init__(self, watch_directory):
+    def __init__(self, watch_directory, manifest_path=MANIFEST_PATH):
         self.watch_directory = watch_directory
         self.existing_files = set()
-        self.event_handler = FileChangeHandler(self.existing_files)
+        self.event_handler = FileChangeHandler(self.existing_files, Manifest(manifest_path))
         self.observer = Observer()
 
     def list_existing_files(self):
@@ -132,22 +290,25 @@ class FileWatcher:
 
         # List existing files
         self.list_existing_files()
-        logging.info(f"Initial existing files: {self.existing_files}")
-
-        for file_path in self.existing_files:
-            self.event_handler.send_file_to_api(file_path)
+        logging.info(f"Initial existing files: {len(self.existing_files)}")
 
+        # Watch before the initial sync, so that no change made during the sync is missed
+        initial_files = list(self.existing_files)
         self.observer.schedule(self.event_handler, self.watch_directory, recursive=True)
         self.observer.start()
+        self.event_handler.sync_existing_files(initial_files)
 
         try:
             while not should_stop:
-                time.sleep(1)
+                time.sleep(0.2)
+                self.event_handler.flush()
 
         finally:
             logging.info("Stopping observer...")
             self.observer.stop()
             self.observer.join()
+            self.event_handler.close()
+            self.event_handler.manifest.close()
 
 
 # --- Entrypoint ---
@@ -5,23 +5,27 @@
 #
 
 import os
+import socket
+import threading
+import time
 import pytest
 import requests
 from unittest.mock import patch, mock_open, MagicMock
-from file_watcher.file_watcher import FileChangeHandler
+from file_watcher import file_watcher
+from file_watcher.file_watcher import FileChangeHandler, Manifest
 
 @pytest.fixture
 def handler():
     return FileChangeHandler(existing_files=set())
 
 @patch("builtins.open", new_callable=mock_open, read_data="file content")
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_send_file_to_api_success(mock_post, mock_file, handler):
     mock_post.return_value.status_code = 200
     handler.send_file_to_api("test.txt")
     mock_post.assert_called_once()
 
-@patch("requests.delete")
+@patch("requests.Session.delete")
 def test_delete_file_to_api_success(mock_delete, handler):
     mock_delete.return_value.status_code = 204
     handler.delete_file_to_api("test.txt")
@@ -33,15 +37,19 @@ def test_should_ignore(handler):
     assert handler.should_ignore("4913")
     assert not handler.should_ignore("file.txt")
 
-@patch("os.path.getsize", return_value=10)
-@patch.object(FileChangeHandler, "send_file_to_api")
-def test_on_modified_event(mock_send, mock_getsize, handler):
+@patch.object(FileChangeHandler, "send_file_to_api", return_value=True)
+def test_on_modified_event(mock_send, handler, tmp_path):
+    file_path = str(tmp_path / "file.txt")
+    with open(file_path, "w") as f:
+        f.write("file content")
     event = MagicMock()
     event.is_directory = False
-    event.src_path = "file.txt"
+    event.src_path = file_path
     event.event_type = "modified"
     handler.on_any_event(event)
-    mock_send.assert_called_once_with("file.txt")
+    for future in handler.flush(force=True):
+        future.result()
+    mock_send.assert_called_once_with(file_path)
 
 @patch.object(FileChangeHandler, "delete_file_to_api")
 def test_on_deleted_event(mock_delete, handler):
@@ -54,27 +62,41 @@ def test_on_deleted_event(mock_delete, handler):
     mock_delete.assert_called_once_with("file.txt")
     assert "file.txt" not in handler.existing_files
 
+def test_failed_delete_stays_in_the_manifest(handler):
+    handler.manifest.put("file.txt", 12, 1, "digest")
+    event = MagicMock(is_directory=False, src_path="file.txt", event_type="deleted")
+    with patch.object(FileChangeHandler, "delete_file_to_api", return_value=False):
+        handler.on_any_event(event)
+    # retried by sync_existing_files on the next start
+    assert handler.manifest.get("file.txt") == (12, 1, "digest")
+    with patch.object(FileChangeHandler, "delete_file_to_api", return_value=True):
+        handler.on_any_event(event)
+    assert handler.manifest.get("file.txt") is None
+
 @patch("builtins.open", new_callable=mock_open, read_data="file content")
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_send_file_to_api_failure(mock_post, mock_file, handler):
     mock_post.return_value.status_code = 500
     handler.send_file_to_api("test.txt")
     mock_post.assert_called_once()
 
-@patch("requests.delete")
+@patch("requests.Session.delete")
 def test_delete_file_to_api_failure(mock_delete, handler):
     mock_delete.return_value.status_code = 404
     handler.delete_file_to_api("nonexistent.txt")
     mock_delete.assert_called_once()
 
-@patch("os.path.getsize", return_value=0)
 @patch.object(FileChangeHandler, "send_file_to_api")
-def test_on_modified_event_empty_file(mock_send, mock_getsize, handler):
+def test_on_modified_event_empty_file(mock_send, handler, tmp_path):
+    file_path = str(tmp_path / "empty.txt")
+    open(file_path, "w").close()
     event = MagicMock()
     event.is_directory = False
-    event.src_path = "empty.txt"
+    event.src_path = file_path
     event.event_type = "modified"
     handler.on_any_event(event)
+    for future in handler.flush(force=True):
+        future.result()
     mock_send.assert_not_called()
 
 @patch.object(FileChangeHandler, "send_file_to_api")
@@ -96,7 +118,7 @@ def test_on_any_event_ignores_directory(handler):
     assert "dir/" not in handler.existing_files
 
 @patch("builtins.open", new_callable=mock_open, read_data="file content")
-@patch("requests.post", side_effect=requests.exceptions.ConnectionError)
+@patch("requests.Session.post", side_effect=requests.exceptions.ConnectionError)
 def test_send_file_to_api_connection_error(mock_post, mock_file, handler):
     try:
         handler.send_file_to_api("test.txt")
@@ -104,7 +126,7 @@ def test_send_file_to_api_connection_error(mock_post, mock_file, handler):
         pytest.fail("ConnectionError should be handled gracefully")
     mock_post.assert_called_once()
 
-@patch("requests.delete", side_effect=requests.exceptions.ConnectionError)
+@patch("requests.Session.delete", side_effect=requests.exceptions.ConnectionError)
 def test_delete_file_to_api_connection_error(mock_delete, handler):
     try:
         handler.delete_file_to_api("test.txt")
@@ -112,3 +134,105 @@ def test_delete_file_to_api_connection_error(mock_delete, handler):
         pytest.fail("ConnectionError should be handled gracefully")
     mock_delete.assert_called_once()
 
+
+
+# --- Tests against a local FastAPI stub of the document backend ---
+
+@pytest.fixture
+def backend(monkeypatch):
+    fastapi = pytest.importorskip("fastapi")
+    uvicorn = pytest.importorskip("uvicorn")
+    pytest.importorskip("multipart")
+
+    stats = {"uploads": 0, "bytes": 0, "deletes": [], "documents": {}}
+    app = fastapi.FastAPI()
+
+    @app.post("/documents")
+    async def upload(files: list[fastapi.UploadFile]):
+        for f in files:
+            content = await f.read()
+            stats["uploads"] += 1
+            stats["bytes"] += len(content)
+            stats["documents"][f.filename] = content
+        return {"status": "ok"}
+
+    @app.delete("/documents", status_code=204)
+    async def delete(document: str):
+        stats["deletes"].append(document)
+        stats["documents"].pop(document, None)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws="none"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    monkeypatch.setattr(file_watcher, "DOCUMENT_ENDPOINT", f"http://127.0.0.1:{port}/documents")
+    yield stats
+    server.should_exit = True
+    thread.join(5)
+
+def write_tree(root, count):
+    paths = []
+    for i in range(count):
+        directory = root / f"dir{i % 5}"
+        directory.mkdir(exist_ok=True)
+        path = directory / f"doc{i}.txt"
+        path.write_text(f"document {i}\n" * (i + 1))
+        paths.append(str(path))
+    return paths
+
+def sync(manifest_path, paths):
+    handler = FileChangeHandler(set(paths), Manifest(manifest_path), max_workers=4)
+    try:
+        return handler.sync_existing_files(paths)
+    finally:
+        handler.close()
+        handler.manifest.close()
+
+def test_restart_uploads_only_changed_content(backend, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    paths = write_tree(docs, 50)
+    manifest_path = str(tmp_path / "manifest.db")
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+
+    assert sync(manifest_path, paths) == 50
+    assert backend["uploads"] == 50
+    assert backend["bytes"] == total_bytes
+
+    # Restart: the backend already has everything
+    assert sync(manifest_path, paths) == 0
+    assert backend["uploads"] == 50
+
+    # Touched with the same content, rewritten with new content, deleted
+    os.utime(paths[0], ns=(time.time_ns(), time.time_ns() + 10**9))
+    with open(paths[1], "a") as f:
+        f.write("one more line\n")
+    os.remove(paths[2])
+    assert sync(manifest_path, paths[:2] + paths[3:]) == 1
+    assert backend["uploads"] == 51
+    assert backend["documents"]["doc1.txt"].endswith(b"one more line\n")
+    assert backend["deletes"] == ["doc2.txt"]
+
+def test_bursts_of_events_are_coalesced(backend, tmp_path):
+    handler = FileChangeHandler(set(), Manifest(), max_workers=2, debounce=0.2)
+    file_path = str(tmp_path / "report.txt")
+    try:
+        for i in range(20):
+            with open(file_path, "a") as f:
+                f.write(f"line {i}\n")
+            event = MagicMock(is_directory=False, src_path=file_path,
+                              event_type="created" if i == 0 else "modified")
+            handler.on_any_event(event)
+        # Still being written
+        assert handler.flush() == []
+        time.sleep(0.3)
+        for future in handler.flush():
+            assert future.result()
+        assert backend["uploads"] == 1
+        assert backend["documents"]["report.txt"].count(b"line") == 20
+    finally:
+        handler.close()
@@ -0,0 +1,225 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Low-overhead telemetry for the anomaly detection UDFs.
+
+UDF_TELEMETRY selects the mode:
+
+- off:     no per-stage timing and no per-point logging
+- sampled: one point in UDF_TELEMETRY_SAMPLE is timed and logged (default)
+- full:    every point is timed and logged
+
+Stage latencies are recorded in in-process histograms. Every
+UDF_TELEMETRY_INTERVAL_S seconds their count, mean, p50, p99 and max are
+written as one point per stage to the UDF_TELEMETRY_MEASUREMENT measurement
+of InfluxDB, or logged if no InfluxDB is configured. The per-point
+processing_time and end_end_time fields are only added with
+UDF_POINT_TIMING=true.
+
+Every sample app ships an identical copy of this module in its udfs folder,
+as the folder is the deployment package of the app's UDF (mounted into the
+Time Series Analytics microservice, zipped for the model registry or copied
+for Helm) and cannot import from outside it. tests/test_udf_telemetry.py
+checks that the copies match.
+"""
+
+import os
+import logging
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger()
+
+telemetry_mode = os.getenv('UDF_TELEMETRY', 'sampled').lower()
+sample_every = max(1, int(os.getenv('UDF_TELEMETRY_SAMPLE', "1000")))
+summary_interval_s = float(os.getenv('UDF_TELEMETRY_INTERVAL_S', "10"))
+summary_measurement = os.getenv('UDF_TELEMETRY_MEASUREMENT', 'udf_telemetry')
+point_timing = os.getenv('UDF_POINT_TIMING', 'false').upper() == 'TRUE'
+
+
+class Histogram:
+    """ HDR-style histogram of non-negative integer values (nanoseconds).
+
+    Values are bucketed by their power of two and split into 2**sub_bits
+    linear sub-buckets, so any recorded value is reported within
+    1 / 2**(sub_bits - 1) of its true value (0.8% for the default) with
+    a fixed memory footprint, whatever the range.
+    """
+
+    def __init__(self, sub_bits=7, max_bits=48):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.counts = [0] * ((max_bits - sub_bits + 2) * self.sub_count)
+        self.max_value = (1 << max_bits) - 1
+        self.reset()
+
+    def reset(self):
+        for i, count in enumerate(self.counts):
+            if count:
+                self.counts[i] = 0
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def _index(self, value):
+        bucket = value.bit_length() - self.sub_bits
+        if bucket <= 0:
+            return value
+        return (bucket << self.sub_bits) + (value >> bucket)
+
+    def _value(self, index):
+        bucket, sub = divmod(index, self.sub_count)
+        # middle of the sub-bucket, which is 2**bucket wide
+        return (sub << bucket) + ((1 << bucket) >> 1)
+
+    def record(self, value, count=1):
+        value = min(max(int(value), 0), self.max_value)
+        self.counts[self._index(value)] += count
+        self.total += count
+        self.sum += value * count
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        if not self.total:
+            return 0
+        target = max(1, round(self.total * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value(index), self.max)
+        return self.max
+
+
+class Telemetry:
+    """ Sampled logging, per-stage latency histograms and periodic summaries
+    for one UDF.
+
+        t = telemetry.start(len(points))   # None unless sampled
+        ...
+        t = telemetry.stage('decode', t, len(points))
+        ...
+        telemetry.stage('predict', t, len(points))
+
+    Stage times are recorded per point, divided evenly over the points
+    processed together.
+    """
+
+    def __init__(self, udf_name, mode=None, sample=None, interval_s=None, measurement=None):
+        self.udf_name = udf_name
+        self.mode = mode or telemetry_mode
+        self.sample_every = 1 if self.mode == 'full' else (sample or sample_every)
+        self.interval_s = summary_interval_s if interval_s is None else interval_s
+        self.measurement = measurement or summary_measurement
+        self.point_timing = point_timing
+        self.enabled = self.mode != 'off'
+        self.histograms = {}
+        self.points = 0
+        self.logged = 0
+        self._lock = threading.Lock()
+        self._influx = self._influx_config()
+        self._stop = threading.Event()
+        if self.enabled and self.interval_s > 0:
+            threading.Thread(target=self._report_loop, daemon=True).start()
+
+    @staticmethod
+    def _influx_config():
+        url = os.getenv('KAPACITOR_INFLUXDB_0_URLS_0')
+        if not url:
+            return None
+        return {
+            'url': url.rstrip('/') + '/write',
+            'params': {'db': os.getenv('INFLUXDB_DBNAME', 'datain'), 'precision': 'ns'},
+            'auth': (os.getenv('KAPACITOR_INFLUXDB_0_USERNAME', ''),
+                     os.getenv('KAPACITOR_INFLUXDB_0_PASSWORD', '')),
+        }
+
+    def start(self, points=1):
+        """ Counts the points and returns a start timestamp if one of them
+        is sampled, None otherwise.
+        """
+        if not self.enabled:
+            return None
+        before = self.points
+        self.points += points
+        if before // self.sample_every == self.points // self.sample_every:
+            return None
+        return time.perf_counter_ns()
+
+    def stage(self, name, t, points=1):
+        """ Records the time since t for the stage and returns the current
+        time, to be passed on to the next stage. A no-op if t is None.
+        """
+        if t is None:
+            return None
+        now = time.perf_counter_ns()
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record((now - t) // max(1, points), points)
+        return now
+
+    def log_point(self):
+        """ True if this point should be logged: every point in full mode,
+        one in sample_every in sampled mode, none when off.
+        """
+        if not self.enabled:
+            return False
+        self.logged += 1
+        return self.logged % self.sample_every == 0
+
+    def summary(self, reset=True):
+        """ Returns {stage: {count, mean_ns, p50_ns, p99_ns, max_ns}}. """
+        output = {}
+        with self._lock:
+            for name, histogram in self.histograms.items():
+                if not histogram.total:
+                    continue
+                output[name] = {
+                    'count': histogram.total,
+                    'mean_ns': histogram.sum // histogram.total,
+                    'p50_ns': histogram.percentile(50),
+                    'p99_ns': histogram.percentile(99),
+                    'max_ns': histogram.max,
+                }
+                if reset:
+                    histogram.reset()
+        return output
+
+    def _line_protocol(self, summary, timestamp):
+        udf = self.udf_name.replace(' ', r'\ ').replace(',', r'\,')
+        lines = []
+        for name, stats in summary.items():
+            fields = ','.join(f"{key}={value}i" for key, value in stats.items())
+            lines.append(f"{self.measurement},udf={udf},stage={name},mode={self.mode} "
+                         f"{fields},sample_every={self.sample_every}i {timestamp}")
+        return '\n'.join(lines)
+
+    def report(self):
+        summary = self.summary()
+        if not summary:
+            return
+        if self._influx is None:
+            logger.info("%s telemetry: %s", self.udf_name, summary)
+            return
+        try:
+            response = requests.post(self._influx['url'], params=self._influx['params'],
+                                     auth=self._influx['auth'], timeout=5,
+                                     data=self._line_protocol(summary, time.time_ns()))
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning("Failed to write %s telemetry: %s", self.udf_name, e)
+
+    def _report_loop(self):
+        while not self._stop.wait(self.interval_s):
+            self.report()
+
+    def close(self):
+        self._stop.set()
@@ -11,16 +11,16 @@ import os
 import logging
 import pickle
 import time
-import math
+import threading
 import warnings
-from collections import deque
+from operator import itemgetter
 from kapacitor.udf.agent import Agent, Handler
 from kapacitor.udf import udf_pb2
 import numpy as np
 import requests
 from sklearnex import patch_sklearn, config_context
 patch_sklearn()
-from sklearn.linear_model import LinearRegression
+from udf_telemetry import Telemetry
 
 warnings.filterwarnings(
     "ignore",
@@ -31,6 +31,15 @@ warnings.filterwarnings(
 log_level = os.getenv('KAPACITOR_LOGGING_LEVEL', 'INFO').upper()
 enable_benchmarking = os.getenv('ENABLE_BENCHMARKING', 'false').upper() == 'TRUE'
 total_no_pts = int(os.getenv('BENCHMARK_TOTAL_PTS', "0"))
+# 'sklearn', 'onnx', or 'auto' to pick the backend from the model file extension
+model_backend = os.getenv('UDF_MODEL_BACKEND', 'auto').lower()
+onnx_threads = int(os.getenv('UDF_ONNX_THREADS', "1"))
+# Points with an anomaly probability of at least this are anomalies
+anomaly_threshold = float(os.getenv('UDF_ANOMALY_THRESHOLD', "0.5"))
+# Points are scored in micro-batches of up to max_batch_size points,
+# and no point is held back for longer than max_batch_delay_ms
+max_batch_size = int(os.getenv('UDF_MAX_BATCH_SIZE', "64"))
+max_batch_delay_ms = float(os.getenv('UDF_MAX_BATCH_DELAY_MS', "10"))
 logging_level = getattr(logging, log_level, logging.INFO)
 
 # Configure logging
@@ -41,21 +50,83 @@ logging.basicConfig(
 
 logger = logging.getLogger()
 
+# Fields of the weld-data measurement, in the order the model was trained on
+FEATURES = ("Pressure", "CO2 Weld Flow", "Feed", "Primary Weld Current",
+            "Wire Consumed", "Secondary Weld Voltage")
+
+
+class SklearnBackend:
+    """ Pickled scikit-learn classifier, run with the Intel Extension for
+    Scikit-learn. """
+    def __init__(self, model_path):
+        with open(model_path, 'rb') as f:
+            self.model = pickle.load(f)
+        # column of the anomaly class in predict_proba
+        self.positive = list(self.model.classes_).index(1)
+
+    def predict(self, features):
+        """ Returns the anomaly probability of every row of features. """
+        with config_context(target_offload="auto", allow_fallback_to_host=True):
+            return self.model.predict_proba(features)[:, self.positive]
+
+
+class OnnxBackend:
+    """ ONNX export of the classifier, run with onnxruntime on the CPU. The
+    model must output the class probabilities as one [n, 2] tensor (skl2onnx
+    with zipmap disabled), see training/train_weld_model.py. """
+    def __init__(self, model_path):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = onnx_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        outputs = [output.name for output in self.session.get_outputs()]
+        self.output_name = 'probabilities' if 'probabilities' in outputs else outputs[-1]
+
+    def predict(self, features):
+        """ Returns the anomaly probability of every row of features. """
+        probabilities = self.session.run(
+            [self.output_name], {self.input_name: features.astype(np.float32)})[0]
+        return probabilities[:, 1]
+
+
+def load_backend(model_path, backend=None):
+    backend = backend or model_backend
+    if backend == 'auto':
+        backend = 'onnx' if model_path.endswith('.onnx') else 'sklearn'
+    if backend == 'onnx':
+        return OnnxBackend(model_path)
+    if backend == 'sklearn':
+        return SklearnBackend(model_path)
+    raise ValueError(f"unknown model backend {backend!r}, expected sklearn, onnx or auto")
+
+
 # Anomaly detection on the weld data
 class AnomalyDetectorHandler(Handler):
     """ Handler for the anomaly detection UDF. It processes incoming points
     and detects anomalies based on the weld data.
+
+    Points are buffered and scored with one model call per micro-batch;
+    each point gets an anomaly_status of 1 or 0.
     """
     def __init__(self, agent):
         self._agent = agent
-        # read the saved model and load it
-        def load_model(filename):
-            with open(filename, 'rb') as f:
-                model = pickle.load(f)
-            return model
         model_path = os.getenv('MODEL_PATH')
         model_path = os.path.abspath(model_path)
-        self.rf = load_model(model_path)
+        self.model = load_backend(model_path)
+        self.threshold = anomaly_threshold
+        self.telemetry = Telemetry('weld_anomaly_detector')
+
+        # field layout of the points -> getter of the feature fields
+        self._layouts = {}
+
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_delay = max_batch_delay_ms / 1000
+        # (point, start_time_ns, arrival_monotonic) waiting to be scored
+        self._pending = []
+        self._lock = threading.Condition()
+        if self.max_batch_size > 1 and self.max_batch_delay > 0:
+            threading.Thread(target=self._flush_loop, daemon=True).start()
 
     def info(self):
         """ Return the InfoResponse. Describing the properties of this Handler
@@ -75,6 +146,10 @@ class AnomalyDetectorHandler(Handler):
     def snapshot(self):
         """ Create a snapshot of the running state of the process.
         """
+        # Nothing to save, but buffered points are written out first so
+        # that none is lost if the process is restarted from this snapshot
+        with self._lock:
+            self._write_points(self._take())
         response = udf_pb2.Response()
         response.snapshot.snapshot = b''
         return response
@@ -95,38 +170,113 @@ class AnomalyDetectorHandler(Handler):
     def point(self, point):
         """ A point has arrived.
         """
-        # extract the values from the point
-        for point_data in point.fieldsDouble:
-            if point_data.key == "Pressure":
-                pressure = point_data.value
-            elif point_data.key == "CO2 Weld Flow":
-                co2_weld_flow = point_data.value
-            elif point_data.key == "Feed":
-                feed = point_data.value
-            elif point_data.key == "Primary Weld Current":
-                primary_weld_current = point_data.value
-            elif point_data.key == "Wire Consumed":
-                wire_consumed = point_data.value
-            elif point_data.key == "Secondary Weld Voltage":
-                secondary_weld_voltage = point_data.value
-            else:
-                continue
-
-        logger.info(f"Pressure: {pressure}, CO2 Weld Flow: {co2_weld_flow}, Feed: {feed}, \
-                    Primary Weld Current: {primary_weld_current}, Wire Consumed: {wire_consumed}, \
-                        Secondary Weld Voltage: {secondary_weld_voltage}")
-
-        # # write data back to db if it is an anomaly point or there is an alarm for the point
-        response = udf_pb2.Response()
-        response.point.CopyFrom(point)
-
-        self._agent.write_response(response, True)
+        start_time = time.time_ns()
+        with self._lock:
+            self._pending.append((point, start_time, time.monotonic()))
+            if len(self._pending) >= self.max_batch_size or self.max_batch_delay <= 0:
+                self._write_points(self._take())
+            elif len(self._pending) == 1:
+                self._lock.notify()
 
     def end_batch(self, end_req):
         """ The batch is complete.
         """
         raise Exception("not supported")
 
+    def _flush_loop(self):
+        """ Scores buffered points once the oldest one has waited
+        max_batch_delay, if the batch did not fill up before.
+        """
+        with self._lock:
+            while True:
+                if not self._pending:
+                    self._lock.wait()
+                    continue
+                remaining = self._pending[0][2] + self.max_batch_delay - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+                try:
+                    self._write_points(self._take())
+                except Exception as e:
+                    # Report like the agent does for errors raised by point()
+                    logger.exception("Failed to score buffered points")
+                    response = udf_pb2.Response()
+                    response.error.error = str(e)
+                    self._agent.write_response(response, True)
+
+    def _take(self):
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _feature_getter(self, keys):
+        """ Returns a getter of the FEATURES fields, in order, for points
+        with the given field keys, or None if a feature is missing.
+        """
+        positions = {key: i for i, key in enumerate(keys)}
+        if not all(name in positions for name in FEATURES):
+            return None
+        return itemgetter(*(positions[name] for name in FEATURES))
+
+    def features(self, point):
+        """ Returns the feature values of the point in FEATURES order, or
+        None if a feature is missing. A source writes the same fields in the
+        same order for every point, so the feature positions are resolved
+        once per field layout instead of matching every field by name.
+        """
+        fields = point.fieldsDouble
+        keys = tuple(kv.key for kv in fields)
+        try:
+            getter = self._layouts[keys]
+        except KeyError:
+            getter = self._layouts[keys] = self._feature_getter(keys)
+        if getter is None:
+            return None
+        return [kv.value for kv in getter(fields)]
+
+    def _write_points(self, pending):
+        """ Scores the points and writes them back in arrival order.
+        """
+        if not pending:
+            return
+        telemetry = self.telemetry
+        t = telemetry.start(len(pending))
+
+        rows = []
+        scored = []
+        for point, _, _ in pending:
+            row = self.features(point)
+            if row is None:
+                logger.error("Missing weld fields in point %s, expected %s. Skipping anomaly detection.",
+                             point.time, ", ".join(FEATURES))
+            else:
+                rows.append(row)
+            scored.append(row is not None)
+            if telemetry.log_point():
+                logger.info("Processing point %s: %s", point.time, row)
+        t = telemetry.stage('decode', t, len(pending))
+
+        anomalies = iter(())
+        if rows:
+            probabilities = self.model.predict(np.array(rows, dtype=np.float64))
+            anomalies = iter((probabilities >= self.threshold).tolist())
+        t = telemetry.stage('predict', t, len(pending))
+
+        point_timing = telemetry.point_timing
+        for i, ((point, start_time, _), analytic) in enumerate(zip(pending, scored)):
+            point.fieldsDouble.add(key = "analytic", value = float(analytic))
+            if analytic:
+                point.fieldsDouble.add(key = "anomaly_status", value = 1.0 if next(anomalies) else 0.0)
+            if point_timing:
+                time_now = time.time_ns()
+                point.fieldsDouble.add(key = 'processing_time', value = time_now-start_time)
+                point.fieldsDouble.add(key = 'end_end_time', value = time_now-point.time)
+
+            response = udf_pb2.Response()
+            response.point.CopyFrom(point)
+            self._agent.write_response(response, i == len(pending) - 1)
+        telemetry.stage('emit', t, len(pending))
+
 
 if __name__ == '__main__':
     # Create an agent
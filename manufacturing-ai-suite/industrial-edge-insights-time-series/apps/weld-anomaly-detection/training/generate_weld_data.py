@@ -0,0 +1,124 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Synthetic weld data with labeled anomalies.
+
+Writes rows with the fields of the weld-data measurement (see
+ingestor-data/weld-anomaly-detection.csv) and an "anomaly" label column.
+The data alternates between idle periods and welds. A weld runs at one of
+two current settings, with voltage, wire feed and shielding gas flow
+following the current. Anomalies are injected into welds as short events:
+
+  gas_loss        CO2 weld flow drops to 20 to 60%
+  current_surge   primary weld current rises by 15 to 50%
+  current_drop    primary weld current falls to 55 to 85%
+  arc_instability secondary weld voltage rises by 2 to 10 V and gets noisy
+  wire_stall      wire feed falls to 20 to 60% while the current stays on
+
+The milder events overlap with normal variation, so a model does not
+detect every one of them.
+
+Every row of an event is labeled 1, all other rows 0.
+
+Example:
+    python3 generate_weld_data.py --rows 100000 --output weld_synthetic.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ["Pressure", "CO2 Weld Flow", "Feed", "Primary Weld Current",
+            "Wire Consumed", "Secondary Weld Voltage"]
+ANOMALY_TYPES = ["gas_loss", "current_surge", "current_drop", "arc_instability", "wire_stall"]
+CURRENT_SETTINGS = [160.0, 270.0]
+
+
+def idle(rng, n):
+    return {
+        "Pressure": rng.normal(1.85, 0.05, n),
+        "CO2 Weld Flow": rng.normal(0.0, 0.02, n),
+        "Feed": np.zeros(n),
+        "Primary Weld Current": np.zeros(n),
+        "Wire Consumed": np.zeros(n),
+        "Secondary Weld Voltage": np.zeros(n),
+    }
+
+
+def weld(rng, n):
+    current = rng.choice(CURRENT_SETTINGS) + rng.normal(0, 8, n)
+    feed = np.clip(0.22 * current - 20 + rng.normal(0, 1.5, n), 0.15, None)
+    return {
+        "Pressure": np.abs(rng.normal(0.08, 0.05, n)),
+        "CO2 Weld Flow": rng.normal(rng.uniform(10.5, 14), 0.3, n),
+        "Feed": feed,
+        "Primary Weld Current": current,
+        "Wire Consumed": np.cumsum(feed) * 0.1,
+        "Secondary Weld Voltage": 16.5 + 0.015 * current + rng.normal(0, 0.5, n),
+    }
+
+
+def inject(rng, segment, kind, start, stop):
+    rows = slice(start, stop)
+    n = stop - start
+    if kind == "gas_loss":
+        segment["CO2 Weld Flow"][rows] *= rng.uniform(0.2, 0.6)
+    elif kind == "current_surge":
+        segment["Primary Weld Current"][rows] *= rng.uniform(1.15, 1.5)
+    elif kind == "current_drop":
+        segment["Primary Weld Current"][rows] *= rng.uniform(0.55, 0.85)
+    elif kind == "arc_instability":
+        segment["Secondary Weld Voltage"][rows] += rng.uniform(2, 10) + rng.normal(0, 1.5, n)
+    elif kind == "wire_stall":
+        segment["Feed"][rows] *= rng.uniform(0.2, 0.6)
+
+
+def generate(rows, anomaly_rate=0.05, seed=0):
+    """ Returns a DataFrame of the FEATURES and the anomaly label. """
+    rng = np.random.default_rng(seed)
+    segments = []
+    total = 0
+    while total < rows:
+        n = int(rng.integers(20, 80))
+        segment = idle(rng, n)
+        label = np.zeros(n, dtype=np.int8)
+        segments.append((segment, label))
+        total += n
+
+        n = int(rng.integers(200, 600))
+        segment = weld(rng, n)
+        label = np.zeros(n, dtype=np.int8)
+        # Events of 5 to 30 rows, about anomaly_rate of the weld rows
+        events = rng.poisson(anomaly_rate * n / 17.5)
+        for _ in range(events):
+            length = int(rng.integers(5, 31))
+            start = int(rng.integers(0, max(1, n - length)))
+            inject(rng, segment, rng.choice(ANOMALY_TYPES), start, start + length)
+            label[start:start + length] = 1
+        segments.append((segment, label))
+        total += n
+
+    data = pd.DataFrame({name: np.concatenate([s[name] for s, _ in segments]) for name in FEATURES})
+    data["anomaly"] = np.concatenate([label for _, label in segments])
+    return data.iloc[:rows].round(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--anomaly-rate', type=float, default=0.05, help='Fraction of weld rows in anomaly events')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='weld_synthetic.csv')
+    args = parser.parse_args()
+
+    data = generate(args.rows, args.anomaly_rate, args.seed)
+    data.to_csv(args.output, index=False)
+    print(f"Wrote {len(data)} rows, {int(data['anomaly'].sum())} anomalous, to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
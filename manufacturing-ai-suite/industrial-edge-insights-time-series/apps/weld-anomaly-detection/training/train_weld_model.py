@@ -0,0 +1,68 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Trains the weld anomaly classifier used by weld_anomaly_detector.py.
+
+Fits a random forest on labeled weld data (from generate_weld_data.py by
+default) and saves it as a pickle for the sklearn backend of the UDF and,
+with --onnx, as an ONNX model for the onnxruntime backend.
+
+Example:
+    python3 generate_weld_data.py --output weld_synthetic.csv
+    python3 train_weld_model.py --csv weld_synthetic.csv \\
+        --output ../time-series-analytics-config/models/weld_anomaly_detector.pkl \\
+        --onnx ../time-series-analytics-config/models/weld_anomaly_detector.onnx
+"""
+
+import argparse
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearnex import patch_sklearn
+patch_sklearn()
+from sklearn.ensemble import RandomForestClassifier
+
+from generate_weld_data import FEATURES
+
+
+def train(data, seed=0):
+    model = RandomForestClassifier(n_estimators=50, max_depth=12, random_state=seed, n_jobs=-1)
+    model.fit(data[FEATURES].to_numpy(dtype=np.float64), data["anomaly"].to_numpy())
+    # The UDF predicts small micro-batches, where a thread pool per call
+    # costs more than it saves
+    model.set_params(n_jobs=1)
+    return model
+
+
+def export_onnx(model, path):
+    from skl2onnx import to_onnx
+    # zipmap=False: the probabilities come out as one [n, 2] tensor
+    onnx_model = to_onnx(model, np.zeros((1, len(FEATURES)), dtype=np.float32),
+                         options={id(model): {'zipmap': False}})
+    with open(path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', required=True, help='Labeled weld data')
+    parser.add_argument('--output', default='weld_anomaly_detector.pkl')
+    parser.add_argument('--onnx', help='Also export the model to this ONNX file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    model = train(pd.read_csv(args.csv), args.seed)
+    with open(args.output, 'wb') as f:
+        pickle.dump(model, f)
+    print(f"Saved {args.output}")
+    if args.onnx:
+        export_onnx(model, args.onnx)
+        print(f"Saved {args.onnx}")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,8 @@ import logging
 import pickle
 import time
 import math
+import struct
+import threading
 import warnings
 from collections import deque
 from kapacitor.udf.agent import Agent, Handler
@@ -21,6 +23,7 @@ import requests
 from sklearnex import patch_sklearn, config_context
 patch_sklearn()
 from sklearn.linear_model import LinearRegression
+from udf_telemetry import Telemetry
 
 warnings.filterwarnings(
     "ignore",
@@ -31,6 +34,16 @@ warnings.filterwarnings(
 log_level = os.getenv('KAPACITOR_LOGGING_LEVEL', 'INFO').upper()
 enable_benchmarking = os.getenv('ENABLE_BENCHMARKING', 'false').upper() == 'TRUE'
 total_no_pts = int(os.getenv('BENCHMARK_TOTAL_PTS', "0"))
+# 'stream' or 'batch', must match the edge feeding the UDF in the TICK script
+edge_type = os.getenv('UDF_EDGE_TYPE', 'stream').lower()
+# Stream points are scored in micro-batches of up to max_batch_size points,
+# and no point is held back for longer than max_batch_delay_ms
+max_batch_size = int(os.getenv('UDF_MAX_BATCH_SIZE', "64"))
+max_batch_delay_ms = float(os.getenv('UDF_MAX_BATCH_DELAY_MS', "10"))
+# The anomaly windows are checkpointed to this file at most every
+# checkpoint_interval_s seconds and restored from it on start-up
+checkpoint_path = os.getenv('UDF_CHECKPOINT_PATH', '')
+checkpoint_interval_s = float(os.getenv('UDF_CHECKPOINT_INTERVAL_S', "30"))
 logging_level = getattr(logging, log_level, logging.INFO)
 
 # Configure logging
@@ -41,10 +54,122 @@ logging.basicConfig(
 
 logger = logging.getLogger()
 
+
+class SourceState:
+    """ Window of the last n_steps states and anomalies of one source,
+    so points from different turbines never share a window.
+    """
+    __slots__ = ('last_states', 'last_anomalies', 'last_coef')
+
+    def __init__(self, n_steps):
+        self.last_states = deque(n_steps*[0], n_steps)
+        self.last_anomalies = deque(n_steps*[0], n_steps)
+        self.last_coef = math.nan
+
+
+# Snapshot layout, little-endian:
+#   header  magic "WTAD", version u16, n_steps u16, number of sources u32
+#   source  name length u16 (0xffff for points without a source tag), name
+#           utf-8, states bitmask u8, anomalies bitmask u8 (bit i set if
+#           anomaly i is an (x, y) pair rather than the initial 0; bit 7 set
+#           if a regression coefficient follows), one (x, y) f64 pair per
+#           set anomaly bit, last regression coefficient f64
+SNAPSHOT_MAGIC = b'WTAD'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sHHI')
+NO_SOURCE = 0xffff
+HAS_COEF = 0x80
+_doubles = [struct.Struct(f'<{n}d') for n in range(16)]
+
+
+def encode_snapshot(states, n_steps):
+    """ Serializes {source: SourceState} to the snapshot format. """
+    if n_steps > 7:
+        raise ValueError("snapshots support windows of up to 7 steps")
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, n_steps, len(states))]
+    for source, state in states.items():
+        if source is None:
+            parts.append(struct.pack('<H', NO_SOURCE))
+        else:
+            name = source.encode()
+            parts.append(struct.pack('<H', len(name)))
+            parts.append(name)
+        states_mask = 0
+        anomalies_mask = 0
+        values = []
+        for i, (flag, anomaly) in enumerate(zip(state.last_states, state.last_anomalies)):
+            if flag:
+                states_mask |= 1 << i
+            if anomaly:
+                anomalies_mask |= 1 << i
+                values += anomaly
+        if not math.isnan(state.last_coef):
+            anomalies_mask |= HAS_COEF
+            values.append(state.last_coef)
+        parts.append(bytes((states_mask, anomalies_mask)))
+        parts.append(_doubles[len(values)].pack(*values))
+    return b''.join(parts)
+
+
+def decode_snapshot(data, n_steps):
+    """ Parses a snapshot into {source: SourceState}. Raises ValueError if
+    the data is not a snapshot of this version and window size.
+    """
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError("snapshot is truncated")
+    magic, version, steps, count = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not an anomaly detector snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+    if steps != n_steps:
+        raise ValueError(f"snapshot window has {steps} steps, expected {n_steps}")
+
+    states = {}
+    offset = SNAPSHOT_HEADER.size
+    try:
+        for _ in range(count):
+            (length,) = struct.unpack_from('<H', data, offset)
+            offset += 2
+            if length == NO_SOURCE:
+                source = None
+            else:
+                source = bytes(data[offset:offset + length]).decode()
+                offset += length
+            states_mask, anomalies_mask = data[offset], data[offset + 1]
+            offset += 2
+            pairs = bin(anomalies_mask & ~HAS_COEF).count('1')
+            doubles = _doubles[2 * pairs + bool(anomalies_mask & HAS_COEF)]
+            values = doubles.unpack_from(data, offset)
+            offset += doubles.size
+
+            state = SourceState(n_steps)
+            pair = 0
+            for i in range(n_steps):
+                state.last_states.append((states_mask >> i) & 1)
+                if (anomalies_mask >> i) & 1:
+                    state.last_anomalies.append((values[pair], values[pair + 1]))
+                    pair += 2
+                else:
+                    state.last_anomalies.append(0)
+            if anomalies_mask & HAS_COEF:
+                state.last_coef = values[-1]
+            states[source] = state
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"snapshot is corrupted: {e}") from e
+    if offset != len(data):
+        raise ValueError("snapshot has trailing data")
+    return states
+
+
 # Anomaly detection on the windturbine speed and generated power data
 class AnomalyDetectorHandler(Handler):
     """ Handler for the anomaly detection UDF. It processes incoming points
     and detects anomalies based on the wind speed and generated power data.
+
+    Each source (the "source" tag) keeps its own anomaly window. Stream
+    points are buffered and scored with one model call per micro-batch;
+    on a batch edge every Kapacitor batch is scored with one model call.
     """
     def __init__(self, agent):
         self._agent = agent
@@ -63,24 +188,43 @@ class AnomalyDetectorHandler(Handler):
 
         # hyper-params for anomaly classification
         self.n_steps = 3
-        self.last_states = deque(self.n_steps*[0], self.n_steps)
-        self.last_anomalies = deque(self.n_steps*[0], self.n_steps)
+        self.states = {}
         self.error_threshold = 0.15
         self.anomalies = []
         self.cut_in_speed = 3
         self.cut_out_speed = 14
         self.min_power_th = 50
 
+        self.telemetry = Telemetry('windturbine_anomaly_detector')
+
         self.points_received = {}
         global total_no_pts
         self.max_points = int(total_no_pts)
 
+        self.batch_edge = edge_type == 'batch'
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_delay = max_batch_delay_ms / 1000
+        # (point, start_time_ns, arrival_monotonic) waiting to be scored
+        self._pending = []
+        self._begin = None
+        self._lock = threading.Condition()
+
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval_s
+        self._last_checkpoint = time.monotonic()
+        if self.checkpoint_path:
+            self._warm_start()
+
+        if not self.batch_edge and self.max_batch_size > 1 and self.max_batch_delay > 0:
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+
     def info(self):
         """ Return the InfoResponse. Describing the properties of this Handler
         """
         response = udf_pb2.Response()
-        response.info.wants = udf_pb2.STREAM
-        response.info.provides = udf_pb2.STREAM
+        edge = udf_pb2.BATCH if self.batch_edge else udf_pb2.STREAM
+        response.info.wants = edge
+        response.info.provides = edge
         return response
 
     def init(self, init_req):
@@ -93,129 +237,270 @@ class AnomalyDetectorHandler(Handler):
     def snapshot(self):
         """ Create a snapshot of the running state of the process.
         """
+        with self._lock:
+            # Buffered stream points are written out first so that none is
+            # lost if the process is restarted from this snapshot
+            if not self.batch_edge:
+                self._write_points(self._take())
+            data = encode_snapshot(self.states, self.n_steps)
         response = udf_pb2.Response()
-        response.snapshot.snapshot = b''
+        response.snapshot.snapshot = data
         return response
 
     def restore(self, restore_req):
         """ Restore a previous snapshot.
         """
         response = udf_pb2.Response()
-        response.restore.success = False
-        response.restore.error = 'not implemented'
+        try:
+            states = decode_snapshot(restore_req.snapshot, self.n_steps)
+        except ValueError as e:
+            logger.error("Failed to restore snapshot: %s", e)
+            response.restore.success = False
+            response.restore.error = str(e)
+            return response
+        with self._lock:
+            self.states = states
+        logger.info("Restored the anomaly windows of %d sources", len(states))
+        response.restore.success = True
         return response
 
+    def _warm_start(self):
+        """ Restores the anomaly windows from the last checkpoint, if any.
+        """
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                self.states = decode_snapshot(f.read(), self.n_steps)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring checkpoint %s: %s", self.checkpoint_path, e)
+            return
+        logger.info("Restored the anomaly windows of %d sources from %s",
+                    len(self.states), self.checkpoint_path)
+
+    def _checkpoint(self):
+        """ Writes the anomaly windows to the checkpoint file, at most once
+        per checkpoint interval. The file is replaced atomically, so a crash
+        while writing leaves the previous checkpoint in place.
+        """
+        now = time.monotonic()
+        if now - self._last_checkpoint < self.checkpoint_interval:
+            return
+        self._last_checkpoint = now
+        tmp_path = self.checkpoint_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(encode_snapshot(self.states, self.n_steps))
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            logger.warning("Failed to write checkpoint %s: %s", self.checkpoint_path, e)
+
     def begin_batch(self, begin_req):
         """ A batch has begun.
         """
-        raise Exception("not supported")
+        with self._lock:
+            self._begin = begin_req
+            self._pending = []
 
     def point(self, point):
         """ A point has arrived.
         """
         start_time = time.time_ns()
-        check_for_anomalies = 1
-        server = None
-        x = None
-        y = None
-        for point_tag in point.tags:
-            if point_tag.key == "source":
-                server = point_tag.value
-                break
         global enable_benchmarking
         if enable_benchmarking:
+            server = self._source(point)
             if server not in self.points_received:
                 self.points_received[server] = 0
             if self.points_received[server] >= self.max_points:
                 return
             self.points_received[server] += 1
 
-        logger.info("Processing point %s %s for source %s", point.time, time.time(), server)
+        with self._lock:
+            self._pending.append((point, start_time, time.monotonic()))
+            if self.batch_edge:
+                return
+            if len(self._pending) >= self.max_batch_size or self.max_batch_delay <= 0:
+                self._write_points(self._take())
+            elif len(self._pending) == 1:
+                self._lock.notify()
+
+    def end_batch(self, end_req):
+        """ The batch is complete.
+        """
+        with self._lock:
+            pending = self._take()
+            response = udf_pb2.Response()
+            response.begin.CopyFrom(self._begin)
+            response.begin.size = len(pending)
+            self._agent.write_response(response)
+            self._write_points(pending, flush=False)
+            response = udf_pb2.Response()
+            response.end.CopyFrom(end_req)
+            self._agent.write_response(response, True)
+            self._begin = None
+
+    def _flush_loop(self):
+        """ Scores buffered stream points once the oldest one has waited
+        max_batch_delay, if the batch did not fill up before.
+        """
+        with self._lock:
+            while True:
+                if not self._pending:
+                    self._lock.wait()
+                    continue
+                remaining = self._pending[0][2] + self.max_batch_delay - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+                try:
+                    self._write_points(self._take())
+                except Exception as e:
+                    # Report like the agent does for errors raised by point()
+                    logger.exception("Failed to score buffered points")
+                    response = udf_pb2.Response()
+                    response.error.error = str(e)
+                    self._agent.write_response(response, True)
+
+    def _take(self):
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _source(self, point):
+        tags = list(point.tags)
+        if self._begin is not None:
+            tags += list(self._begin.tags)
+        for point_tag in tags:
+            if point_tag.key == "source":
+                return point_tag.value
+        return self._begin.group if self._begin is not None else None
+
+    def _state(self, source):
+        state = self.states.get(source)
+        if state is None:
+            state = self.states[source] = SourceState(self.n_steps)
+        return state
+
+    def _write_points(self, pending, flush=True):
+        """ Scores the points and writes them back in arrival order.
+        """
+        if not pending:
+            return
+        t = self.telemetry.start(len(pending))
+        t = self._score([point for point, _, _ in pending], t)
+
+        point_timing = self.telemetry.point_timing
+        for i, (point, start_time, _) in enumerate(pending):
+            if not any(kv.key == "anomaly_status" for kv in point.fieldsDouble):
+                point.fieldsDouble.add(key = "anomaly_status", value = 0.0)
+            if point_timing:
+                time_now = time.time_ns()
+                point.fieldsDouble.add(key = 'processing_time', value = time_now-start_time)
+                point.fieldsDouble.add(key = 'end_end_time', value = time_now-point.time)
+
+            response = udf_pb2.Response()
+            response.point.CopyFrom(point)
+            self._agent.write_response(response, flush and i == len(pending) - 1)
+        self.telemetry.stage('emit', t, len(pending))
+        logger.debug("Scored %d points in one batch", len(pending))
+        if self.checkpoint_path:
+            self._checkpoint()
+
+    def _score(self, points, t=None):
+        """ Adds the analytic and anomaly_status fields to the points. The
+        model is called once for all points that need a prediction; the
+        per-source anomaly windows are then updated in arrival order.
+
+        t is the telemetry start time of a sampled batch, or None. Returns
+        the time the scoring finished, for the next stage.
+        """
+        telemetry = self.telemetry
+        inputs = []
+        for point in points:
+            server = self._source(point)
+            if telemetry.log_point():
+                logger.info("Processing point %s %s for source %s", point.time, time.time(), server)
+            x = None
+            y = None
+            # extract the wind speed and power from the point
+            for point_data in point.fieldsDouble:
+                if point_data.key == self.x_name:
+                    x = point_data.value
+                elif point_data.key == self.y_name:
+                    y = point_data.value
+            inputs.append((server, x, y))
 
         def process_the_point(x,y):
             if (math.isnan(x) or math.isnan(y)):
-                self.last_states.append(0)
                 return 0
 
             if ((x<=self.cut_in_speed) or (x>self.cut_in_speed and y<self.min_power_th)
                  or (x>self.cut_out_speed)):
-                self.last_states.append(0)
                 return 0
 
             return 1
-        # extract the wind speed and power from the point
-        for point_data in point.fieldsDouble:
-            if point_data.key == self.x_name:
-                x = point_data.value
-            elif point_data.key == self.y_name:
-                y = point_data.value
-            else:
-                continue
-        # logger.info(f"Asset: {point.name}, x: {x}, y:{y}, cc:{self.enable_gcp_client}")
-
-        if x is not None and y is not None:
-            # check if the current point is an anomalous point
-            check_for_anomalies = process_the_point(x,y)
-            point.fieldsDouble.add(key = "analytic", value = True)
-            if check_for_anomalies:
-                y_pred = self.rf.predict(np.reshape(x,(-1,1)))
-                error = (y_pred[0]-y)/(y)
-                if error>self.error_threshold:
-                    self.last_states.append(1)
-                    self.last_anomalies.append((x,y))
-                else:
-                    self.last_states.append(0)
-
-                # check if there are consecutive 3 anomalies, and then filter out
-                # any false positives
-                if sum(self.last_states) == self.n_steps:
-                    x_feat = list(zip(*self.last_anomalies))[0]
-                    x_feat = np.reshape(x_feat, (-1,1))
-                    y_feat = list(zip(*self.last_anomalies))[1]
-
-                    with config_context(target_offload="auto", allow_fallback_to_host=True):
-                        lm = LinearRegression()
-                        lm.fit(x_feat, y_feat)
-
-                    if abs(lm.coef_)<200:
-                        self.anomalies.append((x,y))
-                        if error<0.3:
-                            point.fieldsDouble.add(key = "anomaly_status", value = 0.3)
-                            # anomaly_type="LOW"
-                        elif error<0.6:
-                            # anomaly_type = "MEDIUM"
-                            point.fieldsDouble.add(key = "anomaly_status", value = 0.6)
-                        else:
-                            # anomaly_type = "HIGH"
-                            point.fieldsDouble.add(key = "anomaly_status", value = 1)
-                    else:
-                        self.last_states.append(0)
-        else:
-            logger.error("No input received for %s %s, %s %s. Skipping anomaly detection."
-                         , self.x_name, x, self.y_name, y)
-            point.fieldsDouble.add(key = "analytic", value = False)
-
-        # write data back to db if it is an anomaly point or there is an alarm for the point
-        response = udf_pb2.Response()
-        if not any(kv.key == "anomaly_status" for kv in point.fieldsDouble):
-            point.fieldsDouble.add(key = "anomaly_status", value = 0.0)
-        time_now = time.time_ns()
-        point.fieldsDouble.add(key = 'processing_time', value = time_now-start_time)
-
-        point.fieldsDouble.add(key = 'end_end_time', value = time_now-point.time)
-        response.point.CopyFrom(point)
 
-        self._agent.write_response(response, True)
+        # check if the current points are anomalous points
+        checked = []
+        for point, (server, x, y) in zip(points, inputs):
+            if x is not None and y is not None:
+                point.fieldsDouble.add(key = "analytic", value = True)
+                checked.append(process_the_point(x,y))
+            else:
+                logger.error("No input received for %s %s, %s %s. Skipping anomaly detection."
+                             , self.x_name, x, self.y_name, y)
+                point.fieldsDouble.add(key = "analytic", value = False)
+                checked.append(None)
 
-        end_time = time.time_ns()
-        process_time = (end_time - start_time)/1000
-        logger.debug("Function point took %.4f milliseconds to complete.", process_time)
+        t = telemetry.stage('decode', t, len(points))
 
-    def end_batch(self, end_req):
-        """ The batch is complete.
-        """
-        raise Exception("not supported")
+        to_predict = [x for (_, x, _), check in zip(inputs, checked) if check]
+        predictions = iter(self.rf.predict(np.reshape(to_predict, (-1, 1)))) if to_predict else None
+        t = telemetry.stage('predict', t, len(points))
 
+        # update the anomaly windows in arrival order
+        for point, (server, x, y), check in zip(points, inputs, checked):
+            if check is None:
+                continue
+            state = self._state(server)
+            if not check:
+                state.last_states.append(0)
+                continue
+            y_pred = next(predictions)
+            error = (y_pred-y)/(y)
+            if error>self.error_threshold:
+                state.last_states.append(1)
+                state.last_anomalies.append((x,y))
+            else:
+                state.last_states.append(0)
+
+            # check if there are consecutive 3 anomalies, and then filter out
+            # any false positives
+            if sum(state.last_states) == self.n_steps:
+                x_feat = list(zip(*state.last_anomalies))[0]
+                x_feat = np.reshape(x_feat, (-1,1))
+                y_feat = list(zip(*state.last_anomalies))[1]
+
+                fit_start = None if t is None else time.perf_counter_ns()
+                with config_context(target_offload="auto", allow_fallback_to_host=True):
+                    lm = LinearRegression()
+                    lm.fit(x_feat, y_feat)
+                telemetry.stage('regression', fit_start)
+                state.last_coef = float(lm.coef_[0])
+
+                if abs(lm.coef_)<200:
+                    self.anomalies.append((x,y))
+                    if error<0.3:
+                        point.fieldsDouble.add(key = "anomaly_status", value = 0.3)
+                        # anomaly_type="LOW"
+                    elif error<0.6:
+                        # anomaly_type = "MEDIUM"
+                        point.fieldsDouble.add(key = "anomaly_status", value = 0.6)
+                    else:
+                        # anomaly_type = "HIGH"
+                        point.fieldsDouble.add(key = "anomaly_status", value = 1)
+                else:
+                    state.last_states.append(0)
+        return None if t is None else time.perf_counter_ns()
 
 if __name__ == '__main__':
     # Create an agent
@@ -0,0 +1,144 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Achieved rate, jitter and CPU of the MQTT publisher's CSV replay.
+
+Replays a CSV file through simulator/mqtt-publisher/replay.py at each
+--rates target rate with each --clients pool size for --duration seconds,
+and reports the achieved rate, the lateness of the messages against their
+deadlines (jitter) and the CPU use of the publisher process. A subscriber
+on the topic counts the delivered messages.
+
+Runs against the broker at --host/--port, e.g. a local mosquitto started
+with the sample app's mqtt-broker/mosquitto.conf, or an amqtt broker
+started in-process with --embedded (pip install amqtt). The embedded
+broker shares the CPU and the GIL with the publisher, so use an external
+broker for publisher numbers.
+
+Example:
+    python3 benchmark/mqtt_replay_benchmark.py --rates 1000 10000 50000 --clients 1 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'simulator', 'mqtt-publisher'))
+from replay import ClientPool, Replayer, Schedule, encoded_chunks  # noqa: E402
+
+CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'apps', 'wind-turbine-anomaly-detection',
+                   'ingestor-data', 'wind-turbine-anomaly-detection.csv')
+
+
+def start_embedded_broker(port):
+    from amqtt.broker import Broker
+    config = {
+        'listeners': {'default': {'type': 'tcp', 'bind': f'127.0.0.1:{port}'}},
+        'sys_interval': 0,
+        'auth': {'allow-anonymous': True},
+        'topic-check': {'enabled': False},
+    }
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(Broker(config, loop=loop).start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait(10)
+
+
+def connect(args, **callbacks):
+    client = mqtt.Client(client_id='', clean_session=True, protocol=mqtt.MQTTv311)
+    client.max_inflight_messages_set(args.inflight)
+    connected = threading.Event()
+    client.on_connect = lambda *a: connected.set()
+    for name, callback in callbacks.items():
+        setattr(client, name, callback)
+    client.connect(args.host, args.port, 60)
+    client.loop_start()
+    if not connected.wait(10):
+        raise RuntimeError(f"Cannot connect to the MQTT broker at {args.host}:{args.port}")
+    return client
+
+
+def run(args, chunks, rate, clients):
+    received = [0]
+
+    def on_message(client, userdata, message):
+        received[0] += 1
+
+    subscriber = connect(args, on_message=on_message)
+    subscriber.subscribe(args.topic, qos=0)
+    publishers = [connect(args) for _ in range(clients)]
+    reports = []
+    pool = ClientPool(publishers, args.qos, args.inflight)
+    replayer = Replayer(pool, args.topic, Schedule(rate, args.burst_mode), report_interval=1.0,
+                        on_report=reports.append)
+    time.sleep(0.5)
+
+    def forever():
+        while True:
+            yield from chunks
+
+    replayer.run(forever(), duration=args.duration)
+    pool.drain()
+    time.sleep(1)
+    for client in publishers + [subscriber]:
+        client.loop_stop()
+        client.disconnect()
+
+    # Skip the first second, which includes the start-up
+    reports = reports[1:] or reports
+    return {
+        'achieved': sum(r['messages'] for r in reports) / (len(reports) or 1),
+        'p50': max(r['jitter_p50_ms'] for r in reports),
+        'p99': max(r['jitter_p99_ms'] for r in reports),
+        'max': max(r['jitter_max_ms'] for r in reports),
+        'cpu': sum(r['cpu_percent'] for r in reports) / len(reports),
+        'delivered': received[0] / replayer.sent if replayer.sent else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=1883)
+    parser.add_argument('--embedded', action='store_true', help='Start an amqtt broker on --port')
+    parser.add_argument('--csv', default=CSV)
+    parser.add_argument('--topic', default='replay-benchmark')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--qos', type=int, default=0)
+    parser.add_argument('--inflight', type=int, default=100)
+    parser.add_argument('--burst-mode', default='steady', choices=Schedule.MODES)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    if args.embedded:
+        args.host = '127.0.0.1'
+        start_embedded_broker(args.port)
+    chunks = list(encoded_chunks(args.csv))
+
+    print(f"{'target/s':>9} {'clients':>7} {'achieved/s':>10} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}"
+          f" {'CPU %':>6} {'delivered':>9}")
+    for rate in args.rates:
+        for clients in args.clients:
+            r = run(args, chunks, rate, clients)
+            print(f"{rate:>9.0f} {clients:>7} {r['achieved']:>10.0f} {r['p50']:>7.3f} {r['p99']:>7.3f}"
+                  f" {r['max']:>7.2f} {r['cpu']:>6.0f} {r['delivered']:>9.1%}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
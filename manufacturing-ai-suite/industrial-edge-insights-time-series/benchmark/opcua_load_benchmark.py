@@ -0,0 +1,121 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Server CPU, delivered updates/s and latency of the OPC UA load generator.
+
+For every combination of --devices, --variables and --intervals, starts
+simulator/opcua-server/load_generator.py as a separate server process on
+localhost, subscribes to all of its variables with LatencyClient and
+measures for --duration seconds:
+
+  written/s    updates written by the server
+  delivered/s  updates received by the subscriber
+  CPU %        CPU use of the server process
+  p50/p99 ms   delay from the source timestamp of an update to its delivery,
+               including the wait for the next publish (up to one interval)
+  late         ticks that did not finish within their interval
+
+Example:
+    python3 benchmark/opcua_load_benchmark.py --devices 10 100 --variables 10 100 --intervals 1000 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+OPCUA_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'simulator', 'opcua-server')
+sys.path.insert(0, OPCUA_SERVER_DIR)
+from load_generator import LatencyClient  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    """ load_generator.py in a child process, with its JSON reports. """
+
+    def __init__(self, devices, variables, interval_ms, source, batch_size):
+        self.port = free_port()
+        self.reports = []
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(OPCUA_SERVER_DIR, 'load_generator.py'), '--host', '127.0.0.1',
+             '--port', str(self.port), '--devices', str(devices), '--variables', str(variables),
+             '--interval-ms', str(interval_ms), '--source', source, '--batch-size', str(batch_size),
+             '--report-interval', '1', '--json'],
+            stdout=subprocess.PIPE, text=True)
+        ready = self.process.stdout.readline()
+        if not ready:
+            raise RuntimeError("The OPC UA server did not start")
+        threading.Thread(target=self._read, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"opc.tcp://127.0.0.1:{self.port}/freeopcua/server/"
+
+    def _read(self):
+        for line in self.process.stdout:
+            self.reports.append(json.loads(line))
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(10)
+
+
+async def measure(server, interval_ms, warmup, duration):
+    client = LatencyClient(server.url, publishing_interval_ms=interval_ms)
+    await client.connect()
+    await asyncio.sleep(warmup)
+    client.reset()
+    first_report = len(server.reports)
+    await asyncio.sleep(duration)
+    result = client.report(duration)
+    await client.disconnect()
+    reports = server.reports[first_report:] or server.reports[-1:]
+    result['written_per_s'] = sum(r['updates_per_s'] for r in reports) / len(reports)
+    result['cpu_percent'] = sum(r['cpu_percent'] for r in reports) / len(reports)
+    result['late_ticks'] = reports[-1]['late_ticks'] - (server.reports[first_report - 1]['late_ticks']
+                                                        if first_report else 0)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--variables', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--intervals', type=float, nargs='+', default=[1000, 100], help='Publishing intervals, ms')
+    parser.add_argument('--source', default='sine')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'devices':>7} {'vars':>5} {'ms':>6} {'written/s':>10} {'delivered/s':>11} {'CPU %':>6}"
+          f" {'p50 ms':>8} {'p99 ms':>8} {'late':>5}")
+    for devices in args.devices:
+        for variables in args.variables:
+            for interval_ms in args.intervals:
+                server = ServerProcess(devices, variables, interval_ms, args.source, args.batch_size)
+                try:
+                    r = asyncio.run(measure(server, interval_ms, args.warmup, args.duration))
+                finally:
+                    server.stop()
+                print(f"{devices:>7} {variables:>5} {interval_ms:>6.0f} {r['written_per_s']:>10.0f}"
+                      f" {r['delivered_per_s']:>11.0f} {r['cpu_percent']:>6.0f} {r['latency_p50_ms']:>8.1f}"
+                      f" {r['latency_p99_ms']:>8.1f} {r['late_ticks']:>5}", flush=True)
+                time.sleep(0.5)
+
+
+if __name__ == '__main__':
+    main()
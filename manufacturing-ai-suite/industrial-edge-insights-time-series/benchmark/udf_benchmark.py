@@ -0,0 +1,234 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Standalone benchmark for the anomaly detector UDFs, without Kapacitor.
+
+Starts the UDF script as Kapacitor does and talks the UDF agent protocol
+(length-prefixed udf_pb2 messages over stdin/stdout) to it. Rows of a CSV
+file are sent as points tagged with 1, 10 and 100 sources, interleaved the
+way several turbines would arrive. For each source count and telemetry mode
+(UDF_TELEMETRY off, sampled and full) it reports:
+
+  points/s      sending as fast as the UDF accepts points
+  p50/p99 ms    per-point latency from sending a point to receiving it back,
+                with points paced at --rate points/s
+
+The UDF runs with ENABLE_BENCHMARKING=true and BENCHMARK_TOTAL_PTS set to
+the points sent per source. UDF_EDGE_TYPE, UDF_MAX_BATCH_SIZE and
+UDF_MAX_BATCH_DELAY_MS are passed through from the environment, as are
+UDF_TELEMETRY_SAMPLE and UDF_POINT_TIMING.
+
+Example:
+    python benchmark/udf_benchmark.py \\
+        --udf apps/wind-turbine-anomaly-detection/time-series-analytics-config/udfs/windturbine_anomaly_detector.py \\
+        --model apps/wind-turbine-anomaly-detection/time-series-analytics-config/models/windturbine_anomaly_detector.pkl \\
+        --csv apps/wind-turbine-anomaly-detection/ingestor-data/wind-turbine-anomaly-detection.csv
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+from kapacitor.udf import udf_pb2
+
+
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def read_varint(stream):
+    result = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise EOFError("UDF closed its output")
+        result |= (byte[0] & 0x7f) << shift
+        if not byte[0] & 0x80:
+            return result
+        shift += 7
+
+
+class UdfProcess:
+    """ A UDF script driven over the Kapacitor agent protocol. """
+
+    def __init__(self, udf, env):
+        self.proc = subprocess.Popen(
+            [sys.executable, udf], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, env=env)
+        self._write_lock = threading.Lock()
+
+    def send(self, request, flush=True):
+        data = request.SerializeToString()
+        with self._write_lock:
+            self.proc.stdin.write(encode_varint(len(data)) + data)
+            if flush:
+                self.proc.stdin.flush()
+
+    def receive(self):
+        size = read_varint(self.proc.stdout)
+        response = udf_pb2.Response()
+        response.ParseFromString(self.proc.stdout.read(size))
+        if response.WhichOneof('message') == 'error':
+            raise RuntimeError(f"UDF error: {response.error.error}")
+        return response
+
+    def handshake(self):
+        request = udf_pb2.Request()
+        request.info.SetInParent()
+        self.send(request)
+        info = self.receive().info
+        request = udf_pb2.Request()
+        request.init.SetInParent()
+        self.send(request)
+        if not self.receive().init.success:
+            raise RuntimeError("UDF init failed")
+        return info
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.terminate()
+        self.proc.wait()
+
+
+def load_rows(path):
+    rows = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            fields = {}
+            for key, value in row.items():
+                try:
+                    fields[key] = float(value)
+                except (TypeError, ValueError):
+                    continue
+            rows.append(fields)
+    return rows
+
+
+def run(args, rows, sources, rate, telemetry):
+    """ Sends the points and returns (elapsed seconds, per-point latencies). """
+    per_source = args.points // sources
+    env = dict(os.environ, MODEL_PATH=os.path.abspath(args.model), ENABLE_BENCHMARKING='true',
+               BENCHMARK_TOTAL_PTS=str(per_source), KAPACITOR_LOGGING_LEVEL=args.log_level,
+               UDF_TELEMETRY=telemetry)
+    udf = UdfProcess(args.udf, env)
+    batch_edge = udf.handshake().wants == udf_pb2.BATCH
+
+    total = per_source * sources
+    sent = {}
+    latencies = []
+    done = threading.Event()
+
+    def reader():
+        try:
+            while len(latencies) < total:
+                response = udf.receive()
+                if response.WhichOneof('message') != 'point':
+                    continue
+                point = response.point
+                source = next(tag.value for tag in point.tags if tag.key == 'source')
+                latencies.append(time.perf_counter() - sent.pop((source, point.time)))
+        finally:
+            done.set()
+
+    def point_request(i, s):
+        request = udf_pb2.Request()
+        point = request.point
+        point.name = args.measurement
+        point.time = time.time_ns()
+        point.tags.add(key='source', value=f"T{s}")
+        for key, value in rows[i % len(rows)].items():
+            point.fieldsDouble.add(key=key, value=value)
+        sent[(f"T{s}", point.time)] = time.perf_counter()
+        return request
+
+    def batch_request(kind, s):
+        request = udf_pb2.Request()
+        message = getattr(request, kind)
+        message.name = args.measurement
+        message.group = f"source=T{s}"
+        message.tags.add(key='source', value=f"T{s}")
+        return request
+
+    def requests():
+        if not batch_edge:
+            # Sources interleaved point by point, like live turbines
+            for i in range(per_source):
+                for s in range(sources):
+                    yield point_request(i, s)
+            return
+        # One Kapacitor batch per source and --batch-size points
+        for first in range(0, per_source, args.batch_size):
+            for s in range(sources):
+                yield batch_request('begin', s)
+                for i in range(first, min(first + args.batch_size, per_source)):
+                    yield point_request(i, s)
+                yield batch_request('end', s)
+
+    threading.Thread(target=reader, daemon=True).start()
+    begin = time.perf_counter()
+    interval = 1 / rate if rate else 0
+    points_sent = 0
+    for request in requests():
+        udf.send(request, flush=bool(interval))
+        if interval and request.WhichOneof('message') == 'point':
+            points_sent += 1
+            # Busy-wait: sleep() is too coarse for sub-millisecond intervals
+            while time.perf_counter() < begin + points_sent * interval:
+                pass
+    udf.proc.stdin.flush()
+
+    done.wait(args.timeout)
+    elapsed = time.perf_counter() - begin
+    udf.close()
+    if len(latencies) < total:
+        raise RuntimeError(f"Received {len(latencies)} of {total} points")
+    return elapsed, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--udf', required=True, help='UDF python script')
+    parser.add_argument('--model', required=True, help='Model file passed to the UDF as MODEL_PATH')
+    parser.add_argument('--csv', required=True, help='CSV file with the point fields')
+    parser.add_argument('--measurement', default='wind-turbine-data')
+    parser.add_argument('--sources', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--points', type=int, default=20000, help='Points per run, split over the sources')
+    parser.add_argument('--rate', type=float, default=1000, help='Paced rate for the latency run (points/s)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Points per source and Kapacitor batch on a batch edge')
+    parser.add_argument('--telemetry', nargs='+', default=['off', 'sampled', 'full'],
+                        choices=['off', 'sampled', 'full'], help='UDF_TELEMETRY modes to compare')
+    parser.add_argument('--log-level', default='INFO',
+                        help='KAPACITOR_LOGGING_LEVEL, INFO includes the per-point logging')
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    rows = load_rows(args.csv)
+    print(f"{'sources':>8} {'telemetry':>10} {'points/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for sources in args.sources:
+        for telemetry in args.telemetry:
+            elapsed, _ = run(args, rows, sources, 0, telemetry)
+            _, latencies = run(args, rows, sources, args.rate, telemetry)
+            print(f"{sources:>8} {telemetry:>10} {args.points // sources * sources / elapsed:>10.0f}"
+                  f" {np.percentile(latencies, 50) * 1000:>8.2f} {np.percentile(latencies, 99) * 1000:>8.2f}",
+                  flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Size and serialization time of the wind turbine UDF snapshot.
+
+Fills the anomaly windows of --sources sources with random states and
+anomalies and reports the snapshot size and the encode and decode time.
+pickle of the same windows is shown for reference.
+"""
+
+import argparse
+import importlib.util
+import math
+import os
+import pickle
+import random
+import sys
+import time
+
+UDF_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'apps', 'wind-turbine-anomaly-detection',
+    'time-series-analytics-config', 'udfs', 'windturbine_anomaly_detector.py')
+
+
+def load_udf():
+    sys.path.insert(0, os.path.dirname(UDF_PATH))
+    spec = importlib.util.spec_from_file_location('windturbine_anomaly_detector', UDF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_states(udf, sources, n_steps=3):
+    rng = random.Random(0)
+    states = {}
+    for i in range(sources):
+        state = udf.SourceState(n_steps)
+        for _ in range(n_steps):
+            state.last_states.append(rng.random() < 0.3)
+            if rng.random() < 0.5:
+                state.last_anomalies.append((rng.uniform(3, 14), rng.uniform(50, 3600)))
+        state.last_coef = rng.uniform(-500, 500) if rng.random() < 0.5 else math.nan
+        states[f"turbine-{i:05d}"] = state
+    return states
+
+
+def timed(fn, repeat):
+    best = math.inf
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - begin)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sources', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    udf = load_udf()
+    print(f"{'sources':>8} {'bytes':>10} {'encode ms':>10} {'decode ms':>10} {'pickle bytes':>13}")
+    for sources in args.sources:
+        states = make_states(udf, sources)
+        data, encode_ms = timed(lambda: udf.encode_snapshot(states, 3), args.repeat)
+        restored, decode_ms = timed(lambda: udf.decode_snapshot(data, 3), args.repeat)
+        assert len(restored) == sources
+        pickled = pickle.dumps({k: (list(v.last_states), list(v.last_anomalies), v.last_coef)
+                                for k, v in states.items()})
+        print(f"{sources:>8} {len(data):>10} {encode_ms:>10.2f} {decode_ms:>10.2f} {len(pickled):>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Throughput, latency and accuracy of the weld anomaly detector UDF.
+
+Replays labeled weld data through weld_anomaly_detector.py over the
+Kapacitor UDF agent protocol (see udf_benchmark.py), once per model file
+and micro-batch size. The data is generated with
+apps/weld-anomaly-detection/training/generate_weld_data.py unless --csv is
+given. For each run it reports:
+
+  points/s      sending as fast as the UDF accepts points
+  p50/p99 ms    per-point latency with points paced at --rate points/s
+  precision, recall, F1
+                of anomaly_status against the "anomaly" label
+
+Pass a .pkl model for the sklearn backend and an .onnx export of the same
+model for the onnxruntime backend, see train_weld_model.py.
+
+Example:
+    python benchmark/weld_udf_benchmark.py \\
+        --model weld_anomaly_detector.pkl weld_anomaly_detector.onnx
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from kapacitor.udf import udf_pb2
+
+from udf_benchmark import UdfProcess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+TRAINING_DIR = os.path.join(ROOT, 'apps', 'weld-anomaly-detection', 'training')
+UDF_PATH = os.path.join(ROOT, 'apps', 'weld-anomaly-detection', 'time-series-analytics-config',
+                        'udfs', 'weld_anomaly_detector.py')
+sys.path.insert(0, TRAINING_DIR)
+from generate_weld_data import FEATURES, generate  # noqa: E402
+
+
+def run(args, data, model, batch_size, rate):
+    """ Sends the rows and returns (elapsed seconds, latencies, anomaly_status by row). """
+    env = dict(os.environ, MODEL_PATH=os.path.abspath(model), KAPACITOR_LOGGING_LEVEL='WARNING',
+               UDF_MAX_BATCH_SIZE=str(batch_size))
+    udf = UdfProcess(args.udf, env)
+    udf.handshake()
+
+    total = len(data)
+    sent = [0.0] * total
+    latencies = []
+    status = np.full(total, -1, dtype=np.int8)
+    done = threading.Event()
+    # Row i is sent with time base + i, so responses map back to their row
+    base = time.time_ns()
+
+    def reader():
+        try:
+            received = 0
+            while received < total:
+                response = udf.receive()
+                if response.WhichOneof('message') != 'point':
+                    continue
+                point = response.point
+                i = point.time - base
+                latencies.append(time.perf_counter() - sent[i])
+                for kv in point.fieldsDouble:
+                    if kv.key == 'anomaly_status':
+                        status[i] = int(kv.value)
+                received += 1
+        finally:
+            done.set()
+
+    threading.Thread(target=reader, daemon=True).start()
+    rows = data[FEATURES].to_numpy(dtype=np.float64).tolist()
+    begin = time.perf_counter()
+    interval = 1 / rate if rate else 0
+    for i, row in enumerate(rows):
+        request = udf_pb2.Request()
+        point = request.point
+        point.name = args.measurement
+        point.time = base + i
+        for key, value in zip(FEATURES, row):
+            point.fieldsDouble.add(key=key, value=value)
+        sent[i] = time.perf_counter()
+        udf.send(request, flush=bool(interval))
+        if interval:
+            # Busy-wait: sleep() is too coarse for sub-millisecond intervals
+            while time.perf_counter() < begin + (i + 1) * interval:
+                pass
+    udf.proc.stdin.flush()
+
+    done.wait(args.timeout)
+    elapsed = time.perf_counter() - begin
+    udf.close()
+    if len(latencies) < total:
+        raise RuntimeError(f"Received {len(latencies)} of {total} points")
+    return elapsed, np.array(latencies), status
+
+
+def scores(labels, status):
+    true_positives = int(np.sum((status == 1) & (labels == 1)))
+    precision = true_positives / max(1, int(np.sum(status == 1)))
+    recall = true_positives / max(1, int(np.sum(labels == 1)))
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--udf', default=UDF_PATH, help='UDF python script')
+    parser.add_argument('--model', nargs='+', required=True, help='Model files (.pkl or .onnx) to compare')
+    parser.add_argument('--csv', help='Labeled weld data, generated if not given')
+    parser.add_argument('--points', type=int, default=20000, help='Rows generated if --csv is not given')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the generated rows')
+    parser.add_argument('--measurement', default='weld-data')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1, 64], help='UDF_MAX_BATCH_SIZE values')
+    parser.add_argument('--rate', type=float, default=1000, help='Paced rate for the latency run (points/s)')
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.csv) if args.csv else generate(args.points, seed=args.seed)
+    labels = data['anomaly'].to_numpy()
+    print(f"{len(data)} points, {int(labels.sum())} anomalous")
+    print(f"{'model':>30} {'batch':>6} {'points/s':>10} {'p50 ms':>8} {'p99 ms':>8}"
+          f" {'precision':>10} {'recall':>8} {'F1':>6}")
+    for model in args.model:
+        for batch_size in args.batch_size:
+            elapsed, _, status = run(args, data, model, batch_size, rate=0)
+            _, latencies, _ = run(args, data, model, batch_size, rate=args.rate)
+            precision, recall, f1 = scores(labels, status)
+            print(f"{os.path.basename(model):>30} {batch_size:>6} {len(data) / elapsed:>10.0f}"
+                  f" {np.percentile(latencies, 50) * 1000:>8.2f} {np.percentile(latencies, 99) * 1000:>8.2f}"
+                  f" {precision:>10.3f} {recall:>8.3f} {f1:>6.3f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -19,7 +19,8 @@ import ssl
 import socket
 import glob
 import paho.mqtt.client as mqtt
-import pandas as pd
+
+from replay import ClientPool, Replayer, Schedule, replay_file
 
 
 SERVICE = 'mqtt'
@@ -31,16 +32,6 @@ PROCS = []
 DATA_PUBLISH_WAIT_PERIOD = 10
 
 
-def g_tick(period=1):
-    """generate the tick
-    """
-    start_time = time.time()
-    period_count = 0
-    while True:
-        period_count += 1
-        yield max(start_time + period_count * period - time.time(), 0)
-
-
 def parse_args():
     """Parse command line arguments.
     """
@@ -68,54 +59,46 @@ def parse_args():
                      help='Output file path')
     a_p.add_argument('--service', default=SERVICE, type=str,
                      help='service tool for publish data')
+    a_p.add_argument('--rate_multiplier', default=1.0, type=float,
+                     help='Replay the CSV this many times faster than sampling_rate/subsample')
+    a_p.add_argument('--burst_mode', default='steady', choices=Schedule.MODES,
+                     help='steady: evenly spaced rows, batch: burst_size rows back to back, '
+                     'square: burst_on seconds at burst_factor times the rate, then burst_off seconds at the rate')
+    a_p.add_argument('--burst_size', default=10, type=int)
+    a_p.add_argument('--burst_factor', default=5.0, type=float)
+    a_p.add_argument('--burst_on', default=1.0, type=float, help='seconds')
+    a_p.add_argument('--burst_off', default=4.0, type=float, help='seconds')
+    a_p.add_argument('--clients', default=1, type=int,
+                     help='MQTT connections the CSV rows are published on')
+    a_p.add_argument('--inflight', default=100, type=int,
+                     help='Messages in flight per MQTT connection')
+    a_p.add_argument('--max_lag', default=1.0, type=float,
+                     help='Seconds behind schedule after which the backlog is dropped')
+    a_p.add_argument('--spin_us', default=0, type=float,
+                     help='Busy-wait the last microseconds before a deadline, for lower jitter')
+    a_p.add_argument('--report_interval', default=10.0, type=float,
+                     help='Seconds between rate and jitter reports')
     return a_p.parse_args()
 
 
-def stream_csv(mqttc, topic, subsample, sampling_rate, filename):
+def stream_csv(clients, topic, subsample, sampling_rate, filename, args):
     """
     Stream the csv file
     """
     continous_simulator_ingestion = os.getenv("CONTINUOUS_SIMULATOR_INGESTION", "true").lower()
 
+    rate = float(sampling_rate) / max(1, int(subsample)) * args.rate_multiplier
     print(f"\nMQTT Topic - {topic}\nSubsample - {subsample}\nSampling Rate - \
-          {sampling_rate}\nFilename - {filename}\n")
-    jencoder = json.JSONEncoder()
-    csv_data = pd.read_csv(filename, nrows=0)
-    columns = csv_data.columns.tolist()
-    chunk_size = 1000
+          {sampling_rate}\nReplay Rate - {rate} rows/s ({args.burst_mode})\nFilename - {filename}\n")
+    schedule = Schedule(rate, args.burst_mode, args.burst_size, args.burst_factor,
+                        args.burst_on, args.burst_off)
+    pool = ClientPool(clients, args.qos, args.inflight)
+    replayer = Replayer(pool, topic, schedule, max_lag=args.max_lag, spin=args.spin_us / 1e6,
+                        report_interval=args.report_interval)
+    replay_file(replayer, filename, subsample, continuous=continous_simulator_ingestion != "false")
+    print("End of data reached.")
     while True:
-        start_time = time.time()
-        row_served = 0
-
-        tick = g_tick(float(subsample) / float(sampling_rate))
-
-        for chunk in pd.read_csv(filename, chunksize=chunk_size):
-            for _, row in chunk.iterrows():
-
-                if subsample > 1 and (row_served % subsample) != 0:
-                    row_served += 1
-                    continue
-
-                try:
-                    msg = jencoder.encode({col: row[col] for col in columns})
-                    print("Publishing message", msg)
-                    mqttc.publish(topic, msg)
-                except (ValueError, IndexError):
-                    print(f"Skipping row {row_served}- {row} due to ValueError: {ValueError} \
-                          or IndexError: {IndexError}")
-                    continue
-
-                row_served += 1
-                time.sleep(next(tick))
-                if row_served % max(1, int(sampling_rate) // max(1, int(subsample))) == 0:
-                    print(f'{row_served} rows served in {time.time() - start_time:.2f} seconds')
-
-        print(f'{filename} Done! {row_served} rows served in {time.time() - start_time:.2f} \
-              seconds')
-        if continous_simulator_ingestion == "false":
-            print("End of data reached.")
-            while True:
-                time.sleep(1)
+        time.sleep(1)
 
 
 def send_json_cb(instance_id, host, port, topic, data, qos, service):
@@ -204,6 +187,24 @@ def on_connect(client, userdata, rc):
           "\n rc: ", rc)
 MQTTversion = mqtt.MQTTv31
 TLS_protocol_version = ssl.PROTOCOL_TLSv1_2
+
+
+def connect_client(host, port, inflight=20):
+    """ Connected MQTT client, with TLS if SECURE_MODE is true. """
+    client = mqtt.Client(client_id = '', clean_session = True, userdata = None,
+                         protocol = MQTTversion, transport="tcp" )
+    client.max_inflight_messages_set(inflight)
+    secure_mode = os.getenv('SECURE_MODE', 'false')
+    if secure_mode.lower() == "true":
+        context = ssl.SSLContext(protocol = TLS_protocol_version)
+        context.load_verify_locations(cafile="/run/secrets/ca_certificate.pem")
+        client.tls_set_context(context)
+        client.tls_insecure_set(True)
+    client.connect(host, port, 60)
+    client.loop_start()
+    return client
+
+
 def main():
     """Main method
     """
@@ -226,17 +227,11 @@ def main():
     else:
         csv_file_path = "/" + sample_app + ".csv"
     client = None
+    clients = []
     if int(args.streams) == 1:
-        client = mqtt.Client(client_id = '', clean_session = True, userdata = None,
-                             protocol = MQTTversion, transport="tcp" )
-        secure_mode = os.getenv('SECURE_MODE', 'false')
-        if secure_mode.lower() == "true":
-            context = ssl.SSLContext(protocol = TLS_protocol_version)
-            context.load_verify_locations(cafile="/run/secrets/ca_certificate.pem")
-            client.tls_set_context(context)
-            client.tls_insecure_set(True)
-        client.connect(args.host, args.port, 60)
-        client.loop_start()
+        clients = [connect_client(args.host, args.port, args.inflight)
+                   for _ in range(1 if args.json is not None else max(1, args.clients))]
+        client = clients[0]
 
     try:
         if args.json is not None:
@@ -250,11 +245,12 @@ def main():
                          args.port,
                          args.service)
         elif csv_file_path is not None:
-            stream_csv(client,
+            stream_csv(clients,
                        topic,
                        args.subsample,
                        args.sampling_rate,
-                       csv_file_path)
+                       csv_file_path,
+                       args)
 
         else:
             if not updated_topics:
@@ -263,7 +259,8 @@ def main():
     except KeyboardInterrupt:
         print('-- Quitting')
         if args.streams == 1:
-            client.loop_stop()
+            for mqtt_client in clients:
+                mqtt_client.loop_stop()
         else:
             for i in range(0, args.streams):
                 PROCS[i].close()
@@ -0,0 +1,338 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+High-rate CSV replay for the MQTT publisher.
+
+Rows are JSON-encoded a whole chunk at a time, published on a pool of MQTT
+clients and paced against absolute deadlines, so that being late for one
+message does not delay all the following ones.
+"""
+
+import threading
+import time
+from array import array
+
+import numpy as np
+import orjson
+import pandas as pd
+import paho.mqtt.client as mqtt
+
+
+CHUNK_SIZE = 10000
+# Encoded payloads of files up to this size are kept for the next passes
+CACHE_LIMIT_BYTES = 64 * 1024 * 1024
+
+
+def encode_chunk(chunk):
+    """ JSON-encodes every row of the DataFrame chunk, returns a list of bytes.
+    NaN values are encoded as null.
+    """
+    return [orjson.dumps(record) for record in chunk.to_dict('records')]
+
+
+def encoded_chunks(filename, subsample=1, chunk_size=CHUNK_SIZE):
+    """ Yields the encoded rows of the CSV file chunk by chunk, keeping one
+    row in subsample.
+    """
+    subsample = max(1, int(subsample))
+    first_row = 0
+    for chunk in pd.read_csv(filename, chunksize=chunk_size):
+        if subsample > 1:
+            # Keep the rows whose index in the file is a multiple of subsample
+            chunk = chunk.iloc[(-first_row) % subsample::subsample]
+        first_row += chunk_size
+        yield encode_chunk(chunk)
+
+
+class Schedule:
+    """ Time of every message relative to the start of the replay.
+
+    steady  messages evenly spaced at rate messages/s
+    batch   burst_size messages back to back, rate messages/s on average
+    square  burst_on seconds at rate * burst_factor, then burst_off seconds
+            at rate, repeated
+    """
+
+    MODES = ('steady', 'batch', 'square')
+
+    def __init__(self, rate, mode='steady', burst_size=10, burst_factor=5.0, burst_on=1.0, burst_off=4.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if mode not in self.MODES:
+            raise ValueError(f"unknown burst mode {mode!r}, expected one of {', '.join(self.MODES)}")
+        self.rate = rate
+        self.mode = mode
+        self.burst_size = max(1, int(burst_size))
+        self.burst_factor = burst_factor
+        self.burst_on = burst_on
+        self.burst_off = burst_off
+        self._on_messages = rate * burst_factor * burst_on
+        self._cycle_messages = self._on_messages + rate * burst_off
+
+    def time_of(self, n):
+        """ Seconds from the start at which message n is due. """
+        if self.mode == 'batch':
+            return (n - n % self.burst_size) / self.rate
+        if self.mode == 'square':
+            cycles, rest = divmod(n, self._cycle_messages)
+            if rest < self._on_messages:
+                offset = rest / (self.rate * self.burst_factor)
+            else:
+                offset = self.burst_on + (rest - self._on_messages) / self.rate
+            return cycles * (self.burst_on + self.burst_off) + offset
+        return n / self.rate
+
+    def target_rate(self):
+        """ Average messages/s of the schedule. """
+        if self.mode == 'square':
+            return self._cycle_messages / (self.burst_on + self.burst_off)
+        return self.rate
+
+
+class ClientPool:
+    """ Publishes round-robin over MQTT clients, each with at most inflight
+    messages that the client has not yet handed to the broker (QoS 0) or had
+    acknowledged (QoS 1 and 2). publish() blocks while the window is full,
+    for up to timeout seconds.
+
+    While the broker is unreachable, messages are dropped instead: those that
+    a disconnected client refuses, and those that find the window still full
+    after timeout, without waiting again until the window has room. Messages
+    that paho discards on reconnect leave the window as paho marks them
+    published, even without calling on_publish.
+
+    For QoS 1 and 2, create the clients with max_inflight_messages_set(inflight)
+    before connecting, so that paho does not queue part of the window itself.
+    """
+
+    DROP_ERRORS = (mqtt.MQTT_ERR_NO_CONN, mqtt.MQTT_ERR_CONN_LOST)
+
+    def __init__(self, clients, qos=0, inflight=100, timeout=5.0):
+        self.clients = clients
+        self.qos = qos
+        self.inflight = max(1, inflight)
+        self.timeout = timeout
+        self.published = 0
+        self.dropped = 0
+        self._dropping = False
+        # mid -> MQTTMessageInfo of the messages of each window
+        self._windows = [{} for _ in clients]
+        self._stalled = [False] * len(clients)
+        self._done = threading.Condition()
+        for client, window in zip(clients, self._windows):
+            client.on_publish = self._on_publish(window)
+        self._next = 0
+
+    def _on_publish(self, window):
+        # paho marks the message published only after on_publish returns
+        def on_publish(client, userdata, mid, *args):
+            with self._done:
+                window.pop(mid, None)
+                self._done.notify_all()
+        return on_publish
+
+    def _wait(self, ready, timeout):
+        """ Waits until ready() or timeout seconds, returns ready(). """
+        deadline = time.monotonic() + timeout
+        with self._done:
+            while not ready():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                # on_publish is not called for the messages dropped on reconnect: poll too
+                self._done.wait(min(remaining, 0.05))
+        return True
+
+    @staticmethod
+    def _left(info):
+        try:
+            return info.is_published()
+        except (RuntimeError, ValueError):
+            # paho gave up on the message, e.g. when the connection was lost
+            return True
+
+    def _prune(self, window):
+        for mid in [mid for mid, info in window.items() if self._left(info)]:
+            del window[mid]
+
+    def _has_room(self, window):
+        if len(window) >= self.inflight:
+            self._prune(window)
+        return len(window) < self.inflight
+
+    def _drop(self, reason):
+        self.dropped += 1
+        if not self._dropping:
+            self._dropping = True
+            print(f"Dropping messages: {reason}", flush=True)
+
+    def publish(self, topic, payload):
+        """ Publishes the payload, returns False if it was dropped. """
+        i = self._next
+        self._next = (i + 1) % len(self.clients)
+        client, window = self.clients[i], self._windows[i]
+        timeout = 0 if self._stalled[i] else self.timeout
+        self._stalled[i] = not self._wait(lambda: self._has_room(window), timeout)
+        if self._stalled[i]:
+            self._drop(f"no acknowledgement from the broker for {self.timeout} s")
+            return False
+        info = client.publish(topic, payload, qos=self.qos)
+        if info.rc in self.DROP_ERRORS:
+            self._drop(mqtt.error_string(info.rc))
+            return False
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise RuntimeError(f"MQTT publish failed: {mqtt.error_string(info.rc)}")
+        with self._done:
+            if not self._left(info):
+                window[info.mid] = info
+        self.published += 1
+        if self._dropping:
+            self._dropping = False
+            print(f"Publishing again, {self.dropped} messages dropped so far", flush=True)
+        return True
+
+    def drain(self, timeout=10):
+        """ Waits until every published message left its window. """
+        def empty():
+            for window in self._windows:
+                self._prune(window)
+            return not any(self._windows)
+        return self._wait(empty, timeout)
+
+
+class ReplayStats:
+    """ Lateness of every message against its deadline and the CPU time of
+    the process, per report interval.
+    """
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.reset(time.perf_counter())
+
+    def reset(self, now):
+        self.begin = now
+        self.cpu_begin = time.process_time()
+        self.lateness = array('d')
+        self.skipped = 0
+
+    def report(self, now):
+        elapsed = max(now - self.begin, 1e-9)
+        lateness = np.frombuffer(self.lateness, dtype=np.float64) * 1000 if self.lateness else np.zeros(1)
+        result = {
+            'target_rate': self.schedule.target_rate(),
+            'achieved_rate': len(self.lateness) / elapsed,
+            'jitter_p50_ms': float(np.percentile(lateness, 50)),
+            'jitter_p99_ms': float(np.percentile(lateness, 99)),
+            'jitter_max_ms': float(lateness.max()),
+            'cpu_percent': (time.process_time() - self.cpu_begin) / elapsed * 100,
+            'messages': len(self.lateness),
+            'skipped_s': self.skipped,
+        }
+        self.reset(now)
+        return result
+
+
+def format_report(report):
+    return (f"target {report['target_rate']:.0f} msg/s, achieved {report['achieved_rate']:.0f} msg/s, "
+            f"jitter p50 {report['jitter_p50_ms']:.3f} ms p99 {report['jitter_p99_ms']:.3f} ms "
+            f"max {report['jitter_max_ms']:.3f} ms, CPU {report['cpu_percent']:.0f}%")
+
+
+class Replayer:
+    """ Replays encoded rows on a ClientPool following a Schedule.
+
+    A message is sent at its deadline, start + schedule.time_of(n). When the
+    publisher falls behind, late messages are sent right away to catch up;
+    if it falls more than max_lag seconds behind, the schedule is moved
+    forward instead of sending the backlog as one burst.
+    """
+
+    def __init__(self, pool, topic, schedule, max_lag=1.0, spin=0.0, report_interval=10.0, on_report=None):
+        self.pool = pool
+        self.topic = topic
+        self.schedule = schedule
+        self.max_lag = max_lag
+        self.spin = spin
+        self.report_interval = report_interval
+        self.on_report = on_report or (lambda report: print(format_report(report), flush=True))
+        self.stats = ReplayStats(schedule)
+        self.sent = 0
+        self._start = None
+        self._next_report = None
+        self.stopped = threading.Event()
+
+    def _wait(self, deadline):
+        """ Sleeps until deadline, busy-waiting the last self.spin seconds. """
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while time.perf_counter() < deadline:
+            pass
+
+    def run(self, chunks, limit=None, duration=None):
+        """ Publishes the payloads of chunks, an iterable of lists of bytes.
+        Stops after limit messages, duration seconds or stop(). Returns the
+        number of messages sent.
+        """
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+            self._next_report = now + self.report_interval
+            self.stats.reset(now)
+        end = now + duration if duration else None
+        lateness = self.stats.lateness
+        time_of = self.schedule.time_of
+        publish = self.pool.publish
+        for chunk in chunks:
+            for payload in chunk:
+                if self.stopped.is_set() or (limit is not None and self.sent >= limit):
+                    return self.sent
+                deadline = self._start + time_of(self.sent)
+                now = time.perf_counter()
+                if now < deadline:
+                    self._wait(deadline)
+                    now = time.perf_counter()
+                elif now - deadline > self.max_lag:
+                    # Drift correction: give up on the backlog
+                    self.stats.skipped += now - deadline
+                    self._start += now - deadline
+                    deadline = now
+                if end is not None and now >= end:
+                    return self.sent
+                publish(self.topic, payload)
+                lateness.append(now - deadline)
+                self.sent += 1
+                if now >= self._next_report:
+                    self.on_report(self.stats.report(now))
+                    lateness = self.stats.lateness
+                    self._next_report = now + self.report_interval
+        return self.sent
+
+    def stop(self):
+        self.stopped.set()
+
+
+def replay_file(replayer, filename, subsample=1, continuous=True, cache_limit=CACHE_LIMIT_BYTES):
+    """ Replays the CSV file once, or forever if continuous. The encoded
+    rows are kept for the next passes if they fit in cache_limit bytes.
+    """
+    cache = []
+    cached_bytes = 0
+    start_time = time.time()
+    for chunk in encoded_chunks(filename, subsample):
+        if cache is not None:
+            cached_bytes += sum(map(len, chunk))
+            if cached_bytes <= cache_limit:
+                cache.append(chunk)
+            else:
+                cache = None
+        replayer.run([chunk])
+        if replayer.stopped.is_set():
+            return
+    print(f'{filename} Done! {replayer.sent} rows served ({replayer.pool.dropped} dropped) in {time.time() - start_time:.2f} seconds', flush=True)
+    while continuous and not replayer.stopped.is_set():
+        replayer.run(cache if cache is not None else encoded_chunks(filename, subsample))
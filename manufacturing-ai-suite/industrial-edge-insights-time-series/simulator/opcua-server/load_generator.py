@@ -0,0 +1,325 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""
+OPC UA load generator for the simulator.
+
+Adds N devices with M variables each to an asyncua server and updates all of
+them every publishing interval, with values taken from the columns of a CSV
+file or from synthetic waveforms. The updates of an interval are written with
+write_attribute_value() in batches on the server's event loop, so that the
+server keeps serving its clients between two batches.
+
+LatencyClient subscribes to the variables and measures the delay between the
+source timestamp of an update and its delivery to the client.
+
+Run standalone, the module starts a server with the load generator:
+    python3 load_generator.py --devices 10 --variables 100 --interval-ms 100
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import time
+from array import array
+
+import numpy as np
+import pandas as pd
+from asyncua import Client, Server, ua
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_URI = "urn:freeopcua:python:server"
+WAVEFORMS = ('sine', 'square', 'sawtooth', 'random')
+SOURCES = ('csv',) + WAVEFORMS
+
+
+class CsvSource:
+    """ Values of the numeric columns of a CSV file. Variable j of every
+    device replays column j modulo the number of columns, and device d starts
+    d * rows / devices rows into the file, so that devices do not update in
+    lockstep. The variables past the last column are named after their column
+    and their index.
+    """
+
+    def __init__(self, filename, devices, variables, columns=None):
+        data = pd.read_csv(filename)
+        data = data[list(columns)] if columns else data.select_dtypes('number')
+        if data.empty:
+            raise ValueError(f"{filename} has no numeric columns")
+        self.data = data.to_numpy(dtype=np.float64)
+        # Browse names must be unique within a device: the variables past the
+        # last column get their index appended to the name of their column
+        columns = data.shape[1]
+        self.names = [str(data.columns[j]) if j < columns else f"{data.columns[j % columns]}_{j}"
+                      for j in range(variables)]
+        rows = len(self.data)
+        self._offsets = (np.arange(devices) * rows // devices)[:, None]
+        self._columns = np.arange(variables) % data.shape[1]
+
+    def values(self, tick):
+        """ Returns the (devices, variables) values of the tick. """
+        rows = (tick + self._offsets) % len(self.data)
+        return self.data[rows, self._columns]
+
+
+class WaveformSource:
+    """ Synthetic values. Every variable has its own period, from 10 to 100
+    intervals, phase, amplitude and offset; random is a random walk.
+    """
+
+    def __init__(self, kind, devices, variables, seed=0):
+        if kind not in WAVEFORMS:
+            raise ValueError(f"unknown waveform {kind!r}, expected one of {', '.join(WAVEFORMS)}")
+        self.kind = kind
+        self.names = [f"{kind}_{j}" for j in range(variables)]
+        rng = np.random.default_rng(seed)
+        shape = (devices, variables)
+        self._period = rng.uniform(10, 100, shape)
+        self._phase = rng.uniform(0, 1, shape)
+        self._amplitude = rng.uniform(1, 100, shape)
+        self._offset = rng.uniform(-50, 50, shape)
+        self._rng = rng
+        self._walk = self._offset.copy()
+
+    def values(self, tick):
+        """ Returns the (devices, variables) values of the tick. """
+        if self.kind == 'random':
+            self._walk += self._rng.normal(0, 0.05, self._walk.shape) * self._amplitude
+            return self._walk
+        cycle = (tick / self._period + self._phase) % 1.0
+        if self.kind == 'sine':
+            wave = np.sin(2 * np.pi * cycle)
+        elif self.kind == 'square':
+            wave = np.where(cycle < 0.5, 1.0, -1.0)
+        else:
+            wave = 2 * cycle - 1
+        return self._offset + self._amplitude * wave
+
+
+def make_source(kind, devices, variables, csv=None, seed=0):
+    if kind == 'csv':
+        if not csv:
+            raise ValueError("the csv source needs a CSV file")
+        return CsvSource(csv, devices, variables)
+    return WaveformSource(kind, devices, variables, seed)
+
+
+class LoadGenerator:
+    """ Devices Device0..DeviceN-1 in a "Devices" folder, each with the
+    variables of the source, updated every interval seconds.
+    """
+
+    def __init__(self, server, idx, source, devices, variables, interval=1.0, batch_size=1000):
+        if devices < 1 or variables < 1:
+            raise ValueError(f"need at least one device and one variable, got {devices} and {variables}")
+        self.server = server
+        self.idx = idx
+        self.source = source
+        self.devices = devices
+        self.variables = variables
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.nodes = []
+        self.nodeids = []
+        self.written = 0
+        self.late_ticks = 0
+        self._stopped = asyncio.Event()
+
+    async def create_nodes(self, parent=None):
+        """ Adds the devices and their variables below parent, by default
+        the Objects folder, and returns the variable nodes.
+        """
+        parent = parent or self.server.nodes.objects
+        folder = await parent.add_folder(self.idx, "Devices")
+        values = self.source.values(0)
+        for d in range(self.devices):
+            device = await folder.add_object(self.idx, f"Device{d}")
+            for j, name in enumerate(self.source.names):
+                node = await device.add_variable(self.idx, name, float(values[d, j]), ua.VariantType.Double)
+                self.nodes.append(node)
+        self.nodeids = [node.nodeid for node in self.nodes]
+        logger.info("Added %d devices with %d variables, %s to %s", self.devices, self.variables,
+                    self.nodeids[0].to_string(), self.nodeids[-1].to_string())
+        return self.nodes
+
+    async def write(self, values):
+        """ Writes one value per variable, in batches of batch_size. """
+        timestamp = datetime.datetime.now(datetime.timezone.utc)
+        write = self.server.write_attribute_value
+        values = values.ravel().tolist()
+        for start in range(0, len(values), self.batch_size):
+            for nodeid, value in zip(self.nodeids[start:start + self.batch_size],
+                                     values[start:start + self.batch_size]):
+                await write(nodeid, ua.DataValue(ua.Variant(value, ua.VariantType.Double),
+                                                 SourceTimestamp=timestamp, ServerTimestamp=timestamp))
+            # Let the server handle its clients between two batches
+            await asyncio.sleep(0)
+        self.written += len(values)
+
+    async def run(self, duration=None, report_interval=10.0, on_report=None):
+        """ Updates the variables every interval until stop() or duration
+        seconds. Ticks are scheduled against absolute deadlines; a tick that
+        is still running at the next deadline makes the next one late, and
+        a tick more than one interval late is skipped.
+        """
+        on_report = on_report or (lambda report: logger.info("%s", format_report(report)))
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        end = start + duration if duration else None
+        report_start, cpu_start, written_start = start, time.process_time(), self.written
+        tick = 0
+        while not self._stopped.is_set():
+            now = loop.time()
+            if end is not None and now >= end:
+                break
+            await self.write(self.source.values(tick))
+            tick += 1
+            deadline = start + tick * self.interval
+            now = loop.time()
+            if now > deadline:
+                self.late_ticks += 1
+                if now - deadline > self.interval:
+                    # Skip the ticks that are already due
+                    tick = int((now - start) / self.interval) + 1
+                    deadline = start + tick * self.interval
+            if now - report_start >= report_interval:
+                on_report(self._report(now - report_start, cpu_start, written_start))
+                report_start, cpu_start, written_start = now, time.process_time(), self.written
+            try:
+                await asyncio.wait_for(self._stopped.wait(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def _report(self, elapsed, cpu_start, written_start):
+        return {
+            'variables': len(self.nodeids),
+            'interval_ms': self.interval * 1000,
+            'updates_per_s': (self.written - written_start) / elapsed,
+            'cpu_percent': (time.process_time() - cpu_start) / elapsed * 100,
+            'late_ticks': self.late_ticks,
+        }
+
+    def stop(self):
+        self._stopped.set()
+
+
+def format_report(report):
+    return (f"{report['variables']} variables every {report['interval_ms']:.0f} ms: "
+            f"{report['updates_per_s']:.0f} updates/s, CPU {report['cpu_percent']:.0f}%, "
+            f"{report['late_ticks']} late ticks")
+
+
+class LatencyClient:
+    """ Subscribes to the variables of the load generator and records the
+    delay from the source timestamp of every update to its delivery.
+
+    The delay includes the wait for the next publish of the subscription,
+    up to one publishing interval.
+    """
+
+    def __init__(self, url, publishing_interval_ms=100, queue_size=0):
+        self.url = url
+        self.publishing_interval_ms = publishing_interval_ms
+        self.queue_size = queue_size
+        self.client = Client(url)
+        self.latencies = array('d')
+        self.received = 0
+        self._subscription = None
+
+    async def connect(self, nodeids=None):
+        """ Connects and subscribes to nodeids, by default to every variable
+        of the devices of the load generator.
+        """
+        await self.client.connect()
+        if nodeids is None:
+            nodes = await self.browse_variables()
+        else:
+            nodes = [self.client.get_node(nodeid) for nodeid in nodeids]
+        self._subscription = await self.client.create_subscription(self.publishing_interval_ms, self)
+        # Create the monitored items in bounded requests
+        for start in range(0, len(nodes), 1000):
+            await self._subscription.subscribe_data_change(nodes[start:start + 1000], queuesize=self.queue_size)
+
+    async def browse_variables(self):
+        idx = await self.client.get_namespace_index(NAMESPACE_URI)
+        folder = await self.client.nodes.objects.get_child([f"{idx}:Devices"])
+        variables = []
+        for device in await folder.get_children():
+            variables.extend(await device.get_children())
+        return variables
+
+    def datachange_notification(self, node, val, data):
+        timestamp = data.monitored_item.Value.SourceTimestamp
+        if timestamp is not None:
+            self.latencies.append(time.time() - timestamp.replace(tzinfo=datetime.timezone.utc).timestamp())
+        self.received += 1
+
+    def reset(self):
+        self.latencies = array('d')
+        self.received = 0
+
+    def report(self, elapsed):
+        latencies = np.frombuffer(self.latencies, dtype=np.float64) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'delivered_per_s': self.received / elapsed,
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p99_ms': float(np.percentile(latencies, 99)),
+            'latency_max_ms': float(latencies.max()),
+        }
+
+    async def disconnect(self):
+        if self._subscription is not None:
+            await self._subscription.delete()
+        await self.client.disconnect()
+
+
+async def serve(args):
+    server = Server()
+    await server.init()
+    server.set_endpoint(f"opc.tcp://{args.host}:{args.port}/freeopcua/server/")
+    server.set_server_name("OPCUA Load Generator")
+    server.set_security_policy([ua.SecurityPolicyType.NoSecurity])
+    idx = await server.register_namespace(NAMESPACE_URI)
+    source = make_source(args.source, args.devices, args.variables, args.csv)
+    generator = LoadGenerator(server, idx, source, args.devices, args.variables, args.interval_ms / 1000,
+                              args.batch_size)
+    await generator.create_nodes()
+
+    def on_report(report):
+        print(json.dumps(report) if args.json else format_report(report), flush=True)
+
+    async with server:
+        print(json.dumps({'ready': len(generator.nodeids)}) if args.json else f"Serving on {server.endpoint.geturl()}",
+              flush=True)
+        await generator.run(args.duration, args.report_interval, on_report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=4840)
+    parser.add_argument('--devices', type=int, default=10)
+    parser.add_argument('--variables', type=int, default=10, help='Variables per device')
+    parser.add_argument('--interval-ms', type=float, default=1000, help='Publishing interval')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Writes between two yields to the clients')
+    parser.add_argument('--source', default='sine', choices=SOURCES)
+    parser.add_argument('--csv', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      'wind-turbine-anomaly-detection.csv'))
+    parser.add_argument('--duration', type=float, default=None)
+    parser.add_argument('--report-interval', type=float, default=10.0)
+    parser.add_argument('--json', action='store_true', help='Print the reports as JSON lines')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(serve(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@
 This script sets up an OPC UA server that simulates wind turbine data.
 It reads data from a CSV file and updates the server variables at regular intervals.
 """
+import asyncio
 import time
 import logging
 import os
@@ -15,6 +16,7 @@ import socket
 import pandas as pd
 from asyncua.sync import Server
 from asyncua import ua
+from load_generator import LoadGenerator, make_source
 
 # Configure logging
 
@@ -78,6 +80,14 @@ else:
 
 continuous_simulator_ingestion = (os.getenv("CONTINUOUS_SIMULATOR_INGESTION", "true")).lower()
 
+# Load generator: SIMULATOR_DEVICES devices with SIMULATOR_VARIABLES variables each,
+# updated every SIMULATOR_INTERVAL_MS, in addition to the MyObject variables
+simulator_devices = int(os.getenv("SIMULATOR_DEVICES", "0"))
+simulator_variables = int(os.getenv("SIMULATOR_VARIABLES", "10"))
+simulator_interval_ms = float(os.getenv("SIMULATOR_INTERVAL_MS", "1000"))
+simulator_source = os.getenv("SIMULATOR_SOURCE", "csv").lower()
+simulator_batch_size = int(os.getenv("SIMULATOR_BATCH_SIZE", "1000"))
+
 # Create a new namespace for your objects
 URI = "urn:freeopcua:python:server"
 idx = server.register_namespace(URI)
@@ -104,6 +114,22 @@ logger.info("grid_active_power Node ID:%s", grid_active_power.nodeid)
 logger.info("wind_speed Node ID:%s", wind_speed.nodeid)
 logger.info("alert_message Node ID:%s", alert_message.nodeid)
 
+generator = None
+if simulator_devices > 0:
+    source = make_source(simulator_source, simulator_devices, simulator_variables,
+                         csv='./wind-turbine-anomaly-detection.csv')
+    generator = LoadGenerator(server.aio_obj, idx, source, simulator_devices, simulator_variables,
+                              simulator_interval_ms / 1000, simulator_batch_size)
+    server.tloop.post(generator.create_nodes())
+    # Runs on the server's event loop, next to the updates below
+    generator_future = asyncio.run_coroutine_threadsafe(generator.run(), server.tloop.loop)
+
+    def log_generator_exit(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Load generator stopped", exc_info=future.exception())
+
+    generator_future.add_done_callback(log_generator_exit)
+
 # logger.info("Server started at {}".format(server.endpoint))
 i = 0
 try:
@@ -119,6 +145,8 @@ try:
         if i >= len(data):
             if continuous_simulator_ingestion == "false":
                 logger.info("End of data reached.")
+                if generator is not None:
+                    server.tloop.loop.call_soon_threadsafe(generator.stop)
                 grid_active_power.delete()
                 wind_speed.delete()
                 break
@@ -0,0 +1,233 @@
+#
+# Copyright (C) 2025 Intel Corporation.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("orjson")
+mqtt = pytest.importorskip("paho.mqtt.client")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "simulator", "mqtt-publisher"))
+from replay import ClientPool, Replayer, Schedule, encoded_chunks, replay_file  # noqa: E402
+
+APPS_DIR = os.path.join(os.path.dirname(__file__), "..", "apps")
+WIND_CSV = os.path.join(APPS_DIR, "wind-turbine-anomaly-detection", "ingestor-data",
+                        "wind-turbine-anomaly-detection.csv")
+TOPIC = "wind-turbine-data"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AmqttBroker:
+    """ amqtt broker on a localhost port, standing in for mosquitto. """
+
+    def __init__(self, port):
+        self.port = port
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        amqtt_broker = pytest.importorskip("amqtt.broker")
+        config = {
+            "listeners": {"default": {"type": "tcp", "bind": f"127.0.0.1:{self.port}"}},
+            "sys_interval": 0,
+            "auth": {"allow-anonymous": True},
+            "topic-check": {"enabled": False},
+        }
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            instance = amqtt_broker.Broker(config, loop=loop)
+            loop.run_until_complete(instance.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(instance.shutdown())
+            loop.close()
+
+        self._loop = loop
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        assert started.wait(10)
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+
+
+@pytest.fixture(scope="module")
+def broker():
+    instance = AmqttBroker(free_port()).start()
+    yield instance.port
+    instance.stop()
+
+
+def connect(port, inflight=100, **callbacks):
+    client = mqtt.Client(client_id="", clean_session=True, protocol=mqtt.MQTTv311)
+    client.max_inflight_messages_set(inflight)
+    connected = threading.Event()
+    client.on_connect = lambda *args: connected.set()
+    for name, callback in callbacks.items():
+        setattr(client, name, callback)
+    client.connect("127.0.0.1", port, 60)
+    client.loop_start()
+    assert connected.wait(10)
+    return client
+
+
+class Subscriber:
+    def __init__(self, port):
+        self.payloads = []
+        subscribed = threading.Event()
+        self.client = connect(port, on_message=lambda client, userdata, message: self.payloads.append(message.payload),
+                              on_subscribe=lambda *args: subscribed.set())
+        self.client.subscribe(TOPIC, qos=1)
+        assert subscribed.wait(10)
+
+    def wait_for(self, count, timeout=30):
+        deadline = time.monotonic() + timeout
+        while len(self.payloads) < count and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return len(self.payloads)
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def test_encoded_rows_match_the_csv():
+    rows = [json.loads(payload) for chunk in encoded_chunks(WIND_CSV, chunk_size=100) for payload in chunk]
+    with open(WIND_CSV) as f:
+        header = f.readline().strip().split(",")
+        first = [float(value) for value in f.readline().strip().split(",")]
+    assert list(rows[0]) == header
+    assert list(rows[0].values()) == pytest.approx(first)
+
+    # Subsampling keeps every third row of the file, across chunk borders
+    subsampled = [json.loads(payload) for chunk in encoded_chunks(WIND_CSV, 3, chunk_size=100) for payload in chunk]
+    assert subsampled == rows[::3]
+
+
+def test_schedules():
+    steady = Schedule(100)
+    assert steady.time_of(250) == pytest.approx(2.5)
+
+    batch = Schedule(100, "batch", burst_size=10)
+    assert [batch.time_of(n) for n in (0, 9, 10, 25)] == pytest.approx([0, 0, 0.1, 0.2])
+
+    square = Schedule(100, "square", burst_factor=5, burst_on=1, burst_off=4)
+    # 500 messages in the first second, then 400 in the next four
+    assert square.time_of(500) == pytest.approx(1.0)
+    assert square.time_of(900) == pytest.approx(5.0)
+    assert square.target_rate() == pytest.approx(180)
+
+    with pytest.raises(ValueError):
+        Schedule(100, "sawtooth")
+
+
+# amqtt runs in the test process, so QoS 1 acknowledgements limit the rate
+@pytest.mark.parametrize("qos, clients, rate", [(0, 1, 2000), (1, 4, 500)])
+def test_replay_reaches_target_rate(broker, qos, clients, rate):
+    subscriber = Subscriber(broker)
+    publishers = [connect(broker, inflight=50) for _ in range(clients)]
+    try:
+        pool = ClientPool(publishers, qos=qos, inflight=50)
+        reports = []
+        replayer = Replayer(pool, TOPIC, Schedule(rate), report_interval=0.5, on_report=reports.append)
+        sent = replayer.run(list(encoded_chunks(WIND_CSV)) * 2, limit=rate * 2)
+        assert pool.drain()
+        assert sent == rate * 2
+        assert subscriber.wait_for(rate * 2) == rate * 2
+
+        # Sanity bounds only: the broker shares the CPU with the rest of the
+        # suite. benchmark/mqtt_replay_benchmark.py measures rate and jitter.
+        steady = reports[1:]  # the first interval includes the start-up
+        assert steady
+        achieved = sum(report["achieved_rate"] for report in steady) / len(steady)
+        assert rate * 0.5 < achieved < rate * 1.5
+        assert max(report["jitter_p99_ms"] for report in steady) < 500
+    finally:
+        subscriber.close()
+        for client in publishers:
+            client.loop_stop()
+            client.disconnect()
+
+
+def test_drift_correction_drops_the_backlog(broker):
+    publisher = connect(broker)
+    try:
+        replayer = Replayer(ClientPool([publisher]), TOPIC, Schedule(1000), max_lag=0.05, report_interval=60)
+        replayer.run(encoded_chunks(WIND_CSV), limit=100)
+        time.sleep(0.5)  # publisher stalled
+        begin = time.perf_counter()
+        replayer.run(encoded_chunks(WIND_CSV), limit=200)
+        # Without the correction the 500 ms backlog would be sent at once
+        assert time.perf_counter() - begin == pytest.approx(0.1, abs=0.03)
+        assert replayer.stats.skipped == pytest.approx(0.5, abs=0.1)
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+
+
+def test_replay_file_once(broker):
+    subscriber = Subscriber(broker)
+    publisher = connect(broker)
+    try:
+        with open(WIND_CSV) as f:
+            rows = sum(1 for _ in f) - 1
+        replayer = Replayer(ClientPool([publisher], qos=1), TOPIC, Schedule(20000), report_interval=60)
+        replay_file(replayer, WIND_CSV, continuous=False)
+        assert replayer.sent == rows
+        assert subscriber.wait_for(rows) == rows
+    finally:
+        subscriber.close()
+        publisher.loop_stop()
+        publisher.disconnect()
+
+
+def test_replay_survives_a_broker_restart():
+    amqtt = AmqttBroker(free_port()).start()
+    publisher = connect(amqtt.port, inflight=10)
+    publisher.reconnect_delay_set(min_delay=1, max_delay=1)
+    reconnected = threading.Event()
+    publisher.on_connect = lambda *args: reconnected.set()
+    try:
+        pool = ClientPool([publisher], inflight=10, timeout=0.5)
+        replayer = Replayer(pool, TOPIC, Schedule(500), report_interval=60)
+        result = []
+        thread = threading.Thread(target=lambda: result.append(replayer.run(encoded_chunks(WIND_CSV), duration=5)))
+        thread.start()
+        time.sleep(1)
+        amqtt.stop()
+        time.sleep(1)
+        published = pool.published
+        amqtt.start()
+        assert reconnected.wait(10)
+
+        thread.join(15)
+        assert not thread.is_alive()
+        assert result == [replayer.sent]
+        assert pool.dropped > 0
+        # published again after the reconnect, and no permit of the window leaked
+        assert pool.published > published + 100
+        assert pool.drain(timeout=5)
+    finally:
+        publisher.loop_stop()
+        publisher.disconnect()
+        amqtt.stop()
@@ -0,0 +1,101 @@
+#
+# Copyright (C) 2025 Intel Corporation.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import asyncio
+import os
+import socket
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+asyncua = pytest.importorskip("asyncua")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "simulator", "opcua-server"))
+from load_generator import NAMESPACE_URI, CsvSource, LatencyClient, LoadGenerator, WaveformSource  # noqa: E402
+
+WIND_CSV = os.path.join(os.path.dirname(__file__), "..", "apps", "wind-turbine-anomaly-detection",
+                        "ingestor-data", "wind-turbine-anomaly-detection.csv")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_csv_source_replays_the_columns():
+    data = pd.read_csv(WIND_CSV)
+    source = CsvSource(WIND_CSV, devices=4, variables=3)
+    assert source.names == list(data.columns) + [f"{data.columns[0]}_2"]
+
+    rows = len(data)
+    values = source.values(5)
+    assert values.shape == (4, 3)
+    for d in range(4):
+        row = data.iloc[(5 + d * rows // 4) % rows]
+        assert values[d].tolist() == pytest.approx([row.iloc[0], row.iloc[1], row.iloc[0]])
+    # Wraps around at the end of the file
+    assert source.values(rows).tolist() == source.values(0).tolist()
+
+    # Browse names stay unique when the variables wrap around the columns more than once
+    names = CsvSource(WIND_CSV, devices=1, variables=10).names
+    assert len(set(names)) == 10
+
+
+def test_rejects_empty_devices():
+    with pytest.raises(ValueError):
+        LoadGenerator(None, 2, WaveformSource("sine", 1, 0), devices=1, variables=0)
+    with pytest.raises(ValueError):
+        LoadGenerator(None, 2, WaveformSource("sine", 0, 1), devices=0, variables=1)
+
+
+@pytest.mark.parametrize("kind", ["sine", "square", "sawtooth"])
+def test_waveforms_stay_in_range(kind):
+    source = WaveformSource(kind, devices=3, variables=4)
+    values = np.stack([source.values(tick) for tick in range(200)])
+    low = source._offset - source._amplitude
+    high = source._offset + source._amplitude
+    assert np.all(values >= low - 1e-9) and np.all(values <= high + 1e-9)
+    if kind == "square":
+        assert np.all(np.isclose(values, low) | np.isclose(values, high))
+    # Every variable changes over time
+    assert np.all(values.std(axis=0) > 0)
+
+    with pytest.raises(ValueError):
+        WaveformSource("triangle", 1, 1)
+
+
+async def serve_and_subscribe(devices, variables, interval, duration):
+    server = asyncua.Server()
+    await server.init()
+    server.set_endpoint(f"opc.tcp://127.0.0.1:{free_port()}/freeopcua/server/")
+    idx = await server.register_namespace(NAMESPACE_URI)
+    generator = LoadGenerator(server, idx, WaveformSource("sine", devices, variables), devices, variables,
+                              interval, batch_size=7)
+    await generator.create_nodes()
+    async with server:
+        client = LatencyClient(server.endpoint.geturl(), publishing_interval_ms=interval * 1000)
+        await client.connect()
+        await asyncio.sleep(0.5)  # initial values
+        client.reset()
+        await generator.run(duration, report_interval=60)
+        await asyncio.sleep(interval * 4)
+        await client.disconnect()
+    return generator, client
+
+
+def test_subscribers_receive_every_update():
+    devices, variables, interval, duration = 4, 5, 0.05, 1.0
+    generator, client = asyncio.run(serve_and_subscribe(devices, variables, interval, duration))
+
+    ticks = duration / interval
+    assert generator.written == pytest.approx(ticks * devices * variables, rel=0.1)
+    # Each variable changes on every tick, so every update is delivered
+    assert client.received == pytest.approx(generator.written, rel=0.05)
+    report = client.report(duration)
+    assert 0 <= report["latency_p50_ms"] <= report["latency_p99_ms"] < 500
@@ -0,0 +1,78 @@
+#
+# Copyright (C) 2025 Intel Corporation.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import importlib.util
+import os
+import random
+
+import pytest
+
+pytest.importorskip("requests")
+
+APPS_DIR = os.path.join(os.path.dirname(__file__), "..", "apps")
+TELEMETRY_PATH = os.path.join(APPS_DIR, "wind-turbine-anomaly-detection",
+                              "time-series-analytics-config", "udfs", "udf_telemetry.py")
+spec = importlib.util.spec_from_file_location("udf_telemetry", TELEMETRY_PATH)
+udf_telemetry = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(udf_telemetry)
+
+
+def test_sample_apps_ship_the_same_module():
+    # each udfs folder is a self-contained deployment package, so the module is copied, not shared
+    with open(TELEMETRY_PATH, "rb") as f:
+        expected = f.read()
+    for app in os.listdir(APPS_DIR):
+        path = os.path.join(APPS_DIR, app, "time-series-analytics-config", "udfs", "udf_telemetry.py")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                assert f.read() == expected, f"{path} differs from {TELEMETRY_PATH}"
+
+
+def test_histogram_percentiles_within_one_percent():
+    rng = random.Random(0)
+    values = sorted(int(rng.lognormvariate(10, 1.5)) for _ in range(50000))
+    histogram = udf_telemetry.Histogram()
+    for value in values:
+        histogram.record(value)
+
+    for percent in (50, 90, 99, 99.9):
+        exact = values[round(len(values) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.01)
+    assert histogram.max == values[-1]
+    assert histogram.total == len(values)
+
+
+def test_sampled_mode_times_one_point_in_n():
+    telemetry = udf_telemetry.Telemetry("udf", mode="sampled", sample=100, interval_s=0)
+    for _ in range(1000):
+        t = telemetry.start()
+        telemetry.stage("decode", t)
+    # Batches count every point they hold
+    for _ in range(10):
+        t = telemetry.start(50)
+        telemetry.stage("predict", t, 50)
+
+    summary = telemetry.summary()
+    assert summary["decode"]["count"] == 10
+    assert summary["predict"]["count"] == 5 * 50
+    assert sum(telemetry.log_point() for _ in range(1000)) == 10
+    assert telemetry.summary() == {}
+
+
+def test_off_mode_records_nothing():
+    telemetry = udf_telemetry.Telemetry("udf", mode="off", interval_s=0)
+    assert telemetry.start() is None
+    assert telemetry.stage("decode", None) is None
+    assert not telemetry.log_point()
+    assert telemetry.summary() == {}
+
+
+def test_summary_line_protocol():
+    telemetry = udf_telemetry.Telemetry("weld udf", mode="full", interval_s=0, measurement="telemetry")
+    summary = {"emit": {"count": 2, "mean_ns": 150, "p50_ns": 100, "p99_ns": 200, "max_ns": 200}}
+    assert telemetry._line_protocol(summary, 42) == (
+        r"telemetry,udf=weld\ udf,stage=emit,mode=full "
+        "count=2i,mean_ns=150i,p50_ns=100i,p99_ns=200i,max_ns=200i,sample_every=1i 42")
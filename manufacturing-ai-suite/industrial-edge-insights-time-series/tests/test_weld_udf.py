@@ -0,0 +1,129 @@
+#
+# Copyright (C) 2025 Intel Corporation.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import importlib.util
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+udf_pb2 = pytest.importorskip("kapacitor.udf.udf_pb2")
+pytest.importorskip("sklearnex")
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..", "apps", "weld-anomaly-detection")
+UDF_PATH = os.path.join(APP_DIR, "time-series-analytics-config", "udfs", "weld_anomaly_detector.py")
+TRAINING_DIR = os.path.join(APP_DIR, "training")
+sys.path.insert(0, TRAINING_DIR)
+from generate_weld_data import FEATURES, generate  # noqa: E402
+from train_weld_model import export_onnx, train  # noqa: E402
+
+
+class RecordingAgent:
+    def __init__(self):
+        self.responses = []
+
+    def write_response(self, response, flush=False):
+        self.responses.append(response)
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train(generate(20000, seed=0))
+
+
+@pytest.fixture(scope="module")
+def model_path(model, tmp_path_factory):
+    path = tmp_path_factory.mktemp("model") / "weld_anomaly_detector.pkl"
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def test_data():
+    return generate(2000, seed=1)
+
+
+def load_udf(monkeypatch, model_path, batch_size):
+    monkeypatch.setenv("MODEL_PATH", model_path)
+    monkeypatch.setenv("UDF_TELEMETRY", "off")
+    monkeypatch.syspath_prepend(os.path.dirname(UDF_PATH))
+    spec = importlib.util.spec_from_file_location("weld_anomaly_detector", UDF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "max_batch_size", batch_size)
+    # Batches are only written when full, so the output does not depend on timing
+    monkeypatch.setattr(module, "max_batch_delay_ms", 60000)
+    return module
+
+
+def make_point(i, fields):
+    point = udf_pb2.Point()
+    point.time = i
+    for key, value in fields:
+        point.fieldsDouble.add(key=key, value=value)
+    return point
+
+
+def field(response, key):
+    return next((kv.value for kv in response.point.fieldsDouble if kv.key == key), None)
+
+
+def run(udf, data):
+    agent = RecordingAgent()
+    handler = udf.AnomalyDetectorHandler(agent)
+    for i, row in enumerate(data[FEATURES].to_numpy().tolist()):
+        handler.point(make_point(i, zip(FEATURES, row)))
+    handler.snapshot()  # writes out the last, partial batch
+    return [field(response, "anomaly_status") for response in agent.responses]
+
+
+def test_batched_scoring_detects_labeled_anomalies(monkeypatch, model_path, test_data):
+    single = run(load_udf(monkeypatch, model_path, 1), test_data)
+    batched = run(load_udf(monkeypatch, model_path, 64), test_data)
+    assert batched == single
+
+    status = np.array(batched)
+    labels = test_data["anomaly"].to_numpy()
+    true_positives = np.sum((status == 1) & (labels == 1))
+    assert true_positives / status.sum() > 0.9
+    assert true_positives / labels.sum() > 0.7
+
+
+def test_features_follow_the_field_names(monkeypatch, model_path, test_data):
+    udf = load_udf(monkeypatch, model_path, 1)
+    handler = udf.AnomalyDetectorHandler(RecordingAgent())
+    row = test_data[FEATURES].to_numpy()[100].tolist()
+
+    shuffled = make_point(0, [("extra", -1.0)] + list(reversed(list(zip(FEATURES, row)))))
+    assert handler.features(shuffled) == row
+    assert handler.features(make_point(1, zip(FEATURES, row))) == row
+    assert handler.features(make_point(2, zip(FEATURES[1:], row[1:]))) is None
+
+
+def test_points_missing_fields_pass_through(monkeypatch, model_path):
+    udf = load_udf(monkeypatch, model_path, 1)
+    agent = RecordingAgent()
+    handler = udf.AnomalyDetectorHandler(agent)
+    handler.point(make_point(0, [("Feed", 1.0)]))
+    assert field(agent.responses[0], "analytic") == 0
+    assert field(agent.responses[0], "anomaly_status") is None
+
+
+def test_onnx_backend_matches_sklearn(monkeypatch, model, model_path, test_data, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    onnx_path = str(tmp_path / "weld_anomaly_detector.onnx")
+    export_onnx(model, onnx_path)
+
+    udf = load_udf(monkeypatch, onnx_path, 64)
+    assert isinstance(udf.AnomalyDetectorHandler(RecordingAgent()).model, udf.OnnxBackend)
+    onnx_status = np.array(run(udf, test_data))
+    sklearn_status = np.array(run(load_udf(monkeypatch, model_path, 64), test_data))
+    # float32 inference may flip points right at the threshold
+    assert np.mean(onnx_status != sklearn_status) < 0.001
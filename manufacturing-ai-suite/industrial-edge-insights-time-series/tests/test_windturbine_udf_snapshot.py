@@ -0,0 +1,180 @@
+#
+# Copyright (C) 2025 Intel Corporation.
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import csv
+import importlib.util
+import os
+import pickle
+
+import pytest
+
+udf_pb2 = pytest.importorskip("kapacitor.udf.udf_pb2")
+pytest.importorskip("sklearnex")
+from sklearn.linear_model import LinearRegression
+
+APP_DIR = os.path.join(os.path.dirname(__file__), "..", "apps", "wind-turbine-anomaly-detection")
+UDF_PATH = os.path.join(APP_DIR, "time-series-analytics-config", "udfs", "windturbine_anomaly_detector.py")
+REPLAY_CSV = os.path.join(APP_DIR, "ingestor-data", "wind-turbine-anomaly-detection.csv")
+TRAINING_CSV = os.path.join(APP_DIR, "training", "T1.csv")
+SOURCES = ["T1", "T2", "T3"]
+
+
+class RecordingAgent:
+    def __init__(self):
+        self.responses = []
+
+    def write_response(self, response, flush=False):
+        self.responses.append(response)
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    x, y = [], []
+    with open(TRAINING_CSV, newline="") as f:
+        for row in csv.DictReader(f):
+            x.append([float(row["wind_speed"])])
+            y.append(float(row["grid_activepower"]))
+    path = tmp_path_factory.mktemp("model") / "windturbine_anomaly_detector.pkl"
+    with open(path, "wb") as f:
+        pickle.dump(LinearRegression().fit(x, y), f)
+    return str(path)
+
+
+@pytest.fixture
+def udf(monkeypatch, model_path):
+    monkeypatch.setenv("MODEL_PATH", model_path)
+    monkeypatch.setenv("UDF_TELEMETRY", "off")
+    monkeypatch.syspath_prepend(os.path.dirname(UDF_PATH))
+    spec = importlib.util.spec_from_file_location("windturbine_anomaly_detector", UDF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # Score every point on arrival, so the output does not depend on timing
+    monkeypatch.setattr(module, "max_batch_size", 1)
+    return module
+
+
+def replay_points(start=0, stop=3000):
+    """ CSV rows as points, round-robin over SOURCES. The UDF adds its
+    fields to the points it receives, so every run needs new points.
+    """
+    with open(REPLAY_CSV, newline="") as f:
+        rows = list(csv.DictReader(f))
+    for i in range(start, stop):
+        row = rows[i]
+        point = udf_pb2.Point()
+        point.time = i
+        point.tags.add(key="source", value=SOURCES[i % len(SOURCES)])
+        for key, value in row.items():
+            point.fieldsDouble.add(key=key, value=float(value))
+        yield point
+
+
+def alerts(responses):
+    output = []
+    for response in responses:
+        status = next(kv.value for kv in response.point.fieldsDouble if kv.key == "anomaly_status")
+        source = next(kv.value for kv in response.point.tags if kv.key == "source")
+        output.append((response.point.time, source, status))
+    return output
+
+
+def run(udf, points):
+    agent = RecordingAgent()
+    handler = udf.AnomalyDetectorHandler(agent)
+    for point in points:
+        handler.point(point)
+    return handler, agent
+
+
+def first_alert(responses):
+    return next(i for i, (_, _, status) in enumerate(alerts(responses)) if status > 0)
+
+
+def test_restart_from_snapshot_keeps_alerts(udf):
+    _, expected = run(udf, replay_points())
+
+    # Kill the handler mid-stream right before the first alert, while the
+    # source's window holds the anomalous states that lead up to it
+    kill_at = first_alert(expected.responses)
+    handler, before = run(udf, replay_points(stop=kill_at))
+    snapshot = handler.snapshot().snapshot.snapshot
+
+    agent = RecordingAgent()
+    restarted = udf.AnomalyDetectorHandler(agent)
+    request = udf_pb2.RestoreRequest(snapshot=snapshot)
+    assert restarted.restore(request).restore.success
+    for point in replay_points(start=kill_at):
+        restarted.point(point)
+
+    assert alerts(before.responses + agent.responses) == alerts(expected.responses)
+
+
+def test_warm_start_from_checkpoint(udf, tmp_path, monkeypatch):
+    # The reference run must not leave a checkpoint behind
+    _, expected = run(udf, replay_points())
+    kill_at = first_alert(expected.responses)
+
+    checkpoint = str(tmp_path / "windturbine.ckpt")
+    monkeypatch.setattr(udf, "checkpoint_path", checkpoint)
+    monkeypatch.setattr(udf, "checkpoint_interval_s", 0)
+    before = RecordingAgent()
+    handler = udf.AnomalyDetectorHandler(before)
+    assert handler.states == {}  # cold start
+    for point in replay_points(stop=kill_at):
+        handler.point(point)
+    del handler  # no snapshot, the process dies
+
+    after = RecordingAgent()
+    restarted = udf.AnomalyDetectorHandler(after)
+    assert set(restarted.states) == set(SOURCES)
+    for point in replay_points(start=kill_at):
+        restarted.point(point)
+    assert alerts(before.responses + after.responses) == alerts(expected.responses)
+
+
+def test_cold_restart_loses_alert(udf):
+    # Without restoring, the alert at the kill point is missed
+    _, expected = run(udf, replay_points())
+    kill_at = first_alert(expected.responses)
+    _, after = run(udf, replay_points(start=kill_at))
+    assert alerts(after.responses)[0][2] == 0
+
+
+def test_checkpoint_write_frequency_is_bounded(udf, tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / "windturbine.ckpt")
+    monkeypatch.setattr(udf, "checkpoint_path", checkpoint)
+    monkeypatch.setattr(udf, "checkpoint_interval_s", 3600)
+    writes = []
+    monkeypatch.setattr(udf, "encode_snapshot", lambda *a: writes.append(a) or b"")
+    run(udf, replay_points())
+    assert writes == []
+
+
+def test_restore_rejects_other_versions(udf):
+    handler, _ = run(udf, replay_points(stop=30))
+    snapshot = bytearray(handler.snapshot().snapshot.snapshot)
+    snapshot[4] = udf.SNAPSHOT_VERSION + 1
+
+    response = handler.restore(udf_pb2.RestoreRequest(snapshot=bytes(snapshot)))
+    assert not response.restore.success
+    assert "version" in response.restore.error
+    assert set(handler.states) == set(SOURCES)
+
+
+def test_snapshot_round_trip(udf):
+    state = udf.SourceState(3)
+    state.last_states.extend([1, 0, 1])
+    state.last_anomalies.extend([(5.5, 900.0), 0, (6.1, 1010.5)])
+    state.last_coef = 123.25
+    states = {"T1": state, None: udf.SourceState(3)}
+
+    restored = udf.decode_snapshot(udf.encode_snapshot(states, 3), 3)
+    assert list(restored) == ["T1", None]
+    assert list(restored["T1"].last_states) == [1, 0, 1]
+    assert list(restored["T1"].last_anomalies) == [(5.5, 900.0), 0, (6.1, 1010.5)]
+    assert restored["T1"].last_coef == 123.25
+    with pytest.raises(ValueError):
+        udf.decode_snapshot(udf.encode_snapshot(states, 3)[:-1], 3)
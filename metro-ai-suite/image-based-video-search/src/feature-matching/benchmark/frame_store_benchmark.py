@@ -0,0 +1,117 @@
+"""
+Compare the flat per-detection snapshot layout with the content-addressed
+FrameStore for dense multi-object frames.
+
+For every message the legacy layout decodes the frame and saves it once per
+detection as static/{timestamp}_{label}.jpg; the FrameStore writes each
+distinct frame once and keeps objects as bbox references. Reports bytes
+written to disk and per-message latency for both.
+"""
+
+import argparse
+import base64
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image  # noqa: E402
+
+from frame_store import FrameStore  # noqa: E402
+
+LABELS = ["car", "person", "bus", "truck", "bicycle"]
+
+
+def make_frames(count, width, height, repeat):
+    """Return base64 JPEG frames; each distinct frame is published `repeat` times in a row."""
+    frames = []
+    for _ in range(count):
+        image = Image.effect_noise((width, height), 64).convert("RGB")
+        buffered = io.BytesIO()
+        image.save(buffered, format="JPEG", quality=90)
+        frames.extend([base64.b64encode(buffered.getvalue()).decode()] * repeat)
+    return frames
+
+
+def make_objects(objects, width, height):
+    return [
+        {
+            "label": random.choice(LABELS),
+            "bbox": [random.randrange(width // 2), random.randrange(height // 2), width // 4, height // 4],
+        }
+        for _ in range(objects)
+    ]
+
+
+def count_files(path):
+    return sum(len(filenames) for _, _, filenames in os.walk(path))
+
+
+def run_legacy(root, frames, objects):
+    latencies = []
+    written = 0
+    for timestamp, frame in enumerate(frames):
+        start = time.perf_counter()
+        image = Image.open(io.BytesIO(base64.b64decode(frame)))
+        for obj in objects:
+            frame_path = os.path.join(root, f"{timestamp}_{obj['label']}.jpg")
+            image.save(frame_path)
+            written += os.path.getsize(frame_path)
+        latencies.append(time.perf_counter() - start)
+    return latencies, written
+
+
+def run_store(root, frames, objects, max_bytes):
+    store = FrameStore(root=root, max_bytes=max_bytes)
+    latencies = []
+    for frame in frames:
+        start = time.perf_counter()
+        frame_key = None
+        refs = []
+        for obj in objects:
+            if frame_key is None:
+                frame_key = store.put(base64.b64decode(frame))
+            refs.append((f"static/{frame_key}.jpg", obj["bbox"]))
+        latencies.append(time.perf_counter() - start)
+    return latencies, store.total_bytes
+
+
+def report(name, latencies, written, files):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:>7}: {written / 1024**2:8.2f} MiB written, {files} files on disk, "
+        f"mean {statistics.mean(latencies) * 1000:.2f} ms/msg, p99 {p99 * 1000:.2f} ms/msg"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100, help="Distinct frames to generate")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each frame is republished")
+    parser.add_argument("--objects", type=int, default=16, help="Detections per frame")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--max-bytes", type=int, default=0, help="FrameStore byte budget, 0 for unlimited")
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.width, args.height, args.repeat)
+    objects = make_objects(args.objects, args.width, args.height)
+    print(f"{len(frames)} messages, {args.objects} objects each, {args.width}x{args.height}")
+
+    with tempfile.TemporaryDirectory() as root:
+        latencies, written = run_legacy(root, frames, objects)
+        report("legacy", latencies, written, count_files(root))
+
+    with tempfile.TemporaryDirectory() as root:
+        latencies, written = run_store(root, frames, objects, args.max_bytes)
+        report("store", latencies, written, count_files(root))
+
+
+if __name__ == "__main__":
+    main()
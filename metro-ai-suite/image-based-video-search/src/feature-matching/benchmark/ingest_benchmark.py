@@ -0,0 +1,170 @@
+"""
+Replay recorded MQTT payloads into Milvus and report sustained inserts/s for
+per-object inserts versus the batched ingest buffer.
+
+Record payloads from a running deployment with:
+
+    mosquitto_sub -h <broker> -t edge_video_analytics_results > payloads.jsonl
+
+or generate a synthetic file with --generate. Pass --milvus-uri with a local
+file path (e.g. ./bench.db) to run against Milvus Lite; without it an
+in-process stub that simulates a fixed per-call round trip is used.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ingest import IngestBuffer  # noqa: E402
+from payload import load_payload, load_tensor  # noqa: E402
+
+COLLECTION_NAME = "ingest_benchmark"
+
+
+class StubMilvusClient:
+    """
+    In-process stand-in for MilvusClient that charges a fixed round trip per
+    insert call plus a small per-row cost.
+    """
+
+    def __init__(self, call_latency=0.002, row_latency=0.00001):
+        self.call_latency = call_latency
+        self.row_latency = row_latency
+        self.rows = 0
+        self.calls = 0
+
+    def insert(self, collection_name, data):
+        time.sleep(self.call_latency + self.row_latency * len(data))
+        self.rows += len(data)
+        self.calls += 1
+        return {"insert_count": len(data)}
+
+
+def generate_payloads(path, count, objects, dim):
+    """Write `count` synthetic GVA payloads with `objects` detections each."""
+    with open(path, "w") as f:
+        for i in range(count):
+            payload = {
+                "metadata": {
+                    "time": 1700000000000 + i,
+                    "objects": [
+                        {
+                            "detection": {"label": random.choice(["car", "person", "bus"]), "confidence": 0.9},
+                            "tensors": [
+                                {"layer_name": "prob", "data": [random.random() for _ in range(dim)]}
+                            ],
+                        }
+                        for _ in range(objects)
+                    ],
+                }
+            }
+            f.write(json.dumps(payload) + "\n")
+
+
+def load_payloads(path):
+    with open(path, "rb") as f:
+        return [line for line in f if line.strip()]
+
+
+def rows_from_payload(raw, confidence_threshold, strict=False):
+    """Validate a payload and build Milvus rows the same way server.on_message does."""
+    payload = load_payload(json.loads(raw), strict=strict)
+    metadata = payload["metadata"]
+    timestamp = metadata["time"]
+    rows = []
+    for obj in metadata.get("objects", []):
+        label_name = obj.get("detection", {}).get("label", "unknown").lower().replace(" ", "_")
+        confidence = obj.get("detection", {}).get("confidence", 0)
+        for tensor in obj.get("tensors", []):
+            tensor = load_tensor(tensor, strict=strict)
+            if tensor.get("layer_name") == "prob" and confidence > confidence_threshold:
+                rows.append(
+                    {
+                        "vector": tensor["data"],
+                        "filename": f"static/{timestamp}_{label_name}.jpg",
+                        "label": label_name,
+                        "timestamp": timestamp,
+                    }
+                )
+    return rows
+
+
+def make_client(args, dim):
+    if not args.milvus_uri:
+        return StubMilvusClient(call_latency=args.stub_latency_ms / 1000.0)
+
+    from milvus_utils import create_collection, get_milvus_client
+
+    client = get_milvus_client(uri=args.milvus_uri)
+    create_collection(milvus_client=client, collection_name=COLLECTION_NAME, dim=dim, drop_old=True)
+    return client
+
+
+def run_per_object(client, messages, args):
+    rows = 0
+    for raw in messages:
+        for row in rows_from_payload(raw, args.confidence_threshold, args.strict):
+            client.insert(collection_name=COLLECTION_NAME, data=[row])
+            rows += 1
+    return rows
+
+
+def run_batched(client, messages, args):
+    buffer = IngestBuffer(
+        insert_fn=lambda rows: client.insert(collection_name=COLLECTION_NAME, data=rows),
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        max_queue=len(messages) + 1,
+    ).start()
+    for raw in messages:
+        buffer.put(rows_from_payload(raw, args.confidence_threshold, args.strict))
+    buffer.stop()
+    return buffer.metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", default="payloads.jsonl", help="File with one MQTT payload per line")
+    parser.add_argument("--generate", type=int, default=0, help="Generate this many synthetic payloads first")
+    parser.add_argument("--objects", type=int, default=8, help="Detections per synthetic payload")
+    parser.add_argument("--dim", type=int, default=int(os.getenv("MODEL_DIM", 1000)), help="Vector dimension")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the payload file this many times")
+    parser.add_argument("--mode", choices=["per-object", "batched", "both"], default="both")
+    parser.add_argument("--milvus-uri", default=None, help="Milvus Lite file or server URI (default: in-process stub)")
+    parser.add_argument("--stub-latency-ms", type=float, default=2.0, help="Per-insert round trip of the stub")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("INGEST_BATCH_SIZE", 256)))
+    parser.add_argument("--flush-interval", type=float, default=float(os.getenv("INGEST_FLUSH_INTERVAL", 0.5)))
+    parser.add_argument("--confidence-threshold", type=float, default=float(os.getenv("CONFIDENCE_THRESHOLD", 0.4)))
+    parser.add_argument("--strict", action="store_true", help="Validate with the marshmallow schemas")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_payloads(args.payloads, args.generate, args.objects, args.dim)
+
+    messages = load_payloads(args.payloads) * args.repeat
+    modes = ["per-object", "batched"] if args.mode == "both" else [args.mode]
+
+    print(f"Replaying {len(messages)} messages against {args.milvus_uri or 'stub'}")
+    for mode in modes:
+        client = make_client(args, args.dim)
+        start = time.perf_counter()
+        if mode == "per-object":
+            rows = run_per_object(client, messages, args)
+            calls = rows
+        else:
+            metrics = run_batched(client, messages, args)
+            rows, calls = metrics.rows_inserted, metrics.flushes
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode:>10}: {rows} rows in {elapsed:.2f}s, {calls} insert calls, "
+            f"{rows / elapsed if elapsed else 0:.0f} inserts/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
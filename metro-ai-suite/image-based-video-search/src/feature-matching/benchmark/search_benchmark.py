@@ -0,0 +1,190 @@
+"""
+Recall versus latency for Milvus index configurations.
+
+Builds a synthetic collection of random vectors (1M x 512-d by default),
+computes exact top-k neighbours with numpy as ground truth, then rebuilds the
+vector index for every configuration and measures search latency and recall.
+Results are printed as CSV and plotted to --plot when matplotlib is available.
+
+Milvus Lite (--milvus-uri pointing to a local file) only supports FLAT,
+IVF_FLAT and AUTOINDEX; other configurations are skipped there. Point
+--milvus-uri at a Milvus server (e.g. http://localhost:19530) to include HNSW.
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from milvus_utils import (  # noqa: E402
+    INDEX_PARAMS,
+    create_collection,
+    get_batch_search_results,
+    get_milvus_client,
+    get_search_params,
+)
+
+COLLECTION_NAME = "search_benchmark"
+
+# (index type, build params, search params to sweep)
+CONFIGS = [
+    ("FLAT", {}, [{}]),
+    ("AUTOINDEX", {}, [{}]),
+    ("IVF_FLAT", {"nlist": 1024}, [{"nprobe": n} for n in (1, 4, 16, 64)]),
+    ("HNSW", {"M": 16, "efConstruction": 200}, [{"ef": ef} for ef in (16, 32, 64, 128, 256)]),
+]
+
+
+def random_vectors(rng, count, dim):
+    return rng.standard_normal((count, dim), dtype=np.float32)
+
+
+def ground_truth(rng, queries, count, dim, limit, chunk):
+    """Exact cosine top-k over the same vectors that were inserted, regenerated chunk by chunk."""
+    normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, count, chunk):
+        vectors = random_vectors(rng, min(chunk, count - start), dim)
+        scores = normalized @ (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).T
+        ids = np.broadcast_to(np.arange(start, start + len(vectors)), scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return [set(row) for row in best_ids]
+
+
+def build_collection(client, rng, count, dim, chunk):
+    create_collection(milvus_client=client, collection_name=COLLECTION_NAME, dim=dim, drop_old=True, index_type="FLAT")
+    for start in range(0, count, chunk):
+        vectors = random_vectors(rng, min(chunk, count - start), dim)
+        client.insert(
+            collection_name=COLLECTION_NAME,
+            data=[{"vector": v, "seq": start + i} for i, v in enumerate(vectors)],
+        )
+        print(f"inserted {start + len(vectors)}/{count}", end="\r", flush=True)
+    print()
+    # Seal the segments so the indexes below are built over all vectors
+    client.flush(collection_name=COLLECTION_NAME)
+
+
+def rebuild_index(client, index_type, build_params):
+    client.release_collection(collection_name=COLLECTION_NAME)
+    client.drop_index(collection_name=COLLECTION_NAME, index_name="vector")
+    index_params = client.prepare_index_params()
+    index_params.add_index(
+        field_name="vector",
+        index_type=index_type,
+        metric_type="COSINE",
+        params={**INDEX_PARAMS.get(index_type, {}), **build_params},
+    )
+    client.create_index(collection_name=COLLECTION_NAME, index_params=index_params)
+    client.load_collection(collection_name=COLLECTION_NAME)
+
+
+def measure(client, queries, truth, index_type, search_params, limit, batch):
+    params = get_search_params(index_type, ef=search_params.get("ef"), nprobe=search_params.get("nprobe"))
+    latencies = []
+    hits = []
+    for start in range(0, len(queries), batch):
+        begin = time.perf_counter()
+        results = get_batch_search_results(
+            client,
+            COLLECTION_NAME,
+            queries[start:start + batch],
+            output_fields=["seq"],
+            search_params=params,
+            consistency_level="Eventually",
+            limit=limit,
+        )
+        latencies.append((time.perf_counter() - begin) / len(results))
+        hits.extend({hit["entity"]["seq"] for hit in result} for result in results)
+    recall = statistics.mean(len(h & t) / limit for h, t in zip(hits, truth))
+    latencies.sort()
+    return recall, statistics.mean(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def plot(rows, path):
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping the plot")
+        return
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for index_type in dict.fromkeys(row["index_type"] for row in rows):
+        series = [row for row in rows if row["index_type"] == index_type]
+        ax.plot([r["mean_ms"] for r in series], [r["recall"] for r in series], marker="o", label=index_type)
+        for r in series:
+            if r["search_params"]:
+                ax.annotate(r["search_params"], (r["mean_ms"], r["recall"]), fontsize=7)
+    ax.set_xlabel("mean latency per query (ms)")
+    ax.set_ylabel("recall@k")
+    ax.set_xscale("log")
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"plot written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--milvus-uri", default="./search_benchmark.db", help="Milvus Lite file or server URI")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Vectors in the collection")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--batch", type=int, default=1, help="Query vectors per search request")
+    parser.add_argument("--chunk", type=int, default=10_000, help="Vectors generated and inserted at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default="search_benchmark.csv")
+    parser.add_argument("--plot", default="search_benchmark.png")
+    args = parser.parse_args()
+
+    client = get_milvus_client(uri=args.milvus_uri)
+    queries = random_vectors(np.random.default_rng(args.seed + 1), args.queries, args.dim)
+
+    build_collection(client, np.random.default_rng(args.seed), args.count, args.dim, args.chunk)
+    truth = ground_truth(np.random.default_rng(args.seed), queries, args.count, args.dim, args.limit, args.chunk)
+
+    rows = []
+    writer = csv.DictWriter(sys.stdout, ["index_type", "search_params", "recall", "mean_ms", "p99_ms"])
+    writer.writeheader()
+    for index_type, build_params, sweep in CONFIGS:
+        try:
+            rebuild_index(client, index_type, build_params)
+        except Exception as e:
+            print(f"skipping {index_type}: {e}", file=sys.stderr)
+            continue
+        for search_params in sweep:
+            recall, mean, p99 = measure(client, queries, truth, index_type, search_params, args.limit, args.batch)
+            row = {
+                "index_type": index_type,
+                "search_params": ",".join(f"{k}={v}" for k, v in search_params.items()),
+                "recall": round(recall, 4),
+                "mean_ms": round(mean * 1000, 3),
+                "p99_ms": round(p99 * 1000, 3),
+            }
+            writer.writerow(row)
+            rows.append(row)
+
+    with open(args.csv, "w", newline="") as f:
+        file_writer = csv.DictWriter(f, writer.fieldnames)
+        file_writer.writeheader()
+        file_writer.writerows(rows)
+    plot(rows, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Content-addressed storage for frames published with detections
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+_KEY_PATTERN = re.compile(r"^([0-9a-f]{32})\.jpg$")
+
+
+class FrameStore:
+    """
+    Stores every distinct frame once, keyed by a blake2b hash of its bytes, in
+    a sharded directory tree under `root`:
+
+        <root>/frames/ab/cd/abcd....jpg
+
+    Objects detected in a frame reference it by key plus their bounding box,
+    so no per-object files are written. Frames are evicted least recently
+    used first once the total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, root, max_bytes=0):
+        """
+        Args:
+            root (str): Directory the store lives in.
+            max_bytes (int): Byte budget for stored frames, 0 for unlimited.
+        """
+        self.root = root
+        self.frames_dir = os.path.join(root, "frames")
+        self.max_bytes = int(max_bytes)
+        self.total_bytes = 0
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.frames_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key_for(data):
+        """Return the content key for the given frame bytes."""
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _path_for_key(self, key):
+        return os.path.join(self.frames_dir, key[:2], key[2:4], f"{key}.jpg")
+
+    def _load_index(self):
+        # Rebuild the LRU order from disk, oldest write first
+        entries = []
+        for dirpath, _, filenames in os.walk(self.frames_dir):
+            for filename in filenames:
+                match = _KEY_PATTERN.match(filename)
+                if not match:
+                    continue
+                stat = os.stat(os.path.join(dirpath, filename))
+                entries.append((stat.st_mtime, match.group(1), stat.st_size))
+        for _, key, size in sorted(entries):
+            self._lru[key] = size
+            self.total_bytes += size
+
+    def put(self, data):
+        """
+        Store a frame if it is not stored yet.
+
+        Args:
+            data (bytes): The encoded frame. JPEG data is written as-is, other
+                formats are re-encoded to JPEG.
+
+        Returns:
+            str: The content key of the frame.
+        """
+        key = self.key_for(data)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return key
+
+        image = Image.open(io.BytesIO(data))
+        if image.format != "JPEG":
+            buffered = io.BytesIO()
+            image.convert("RGB").save(buffered, format="JPEG")
+            data = buffered.getvalue()
+
+        path = self._path_for_key(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if key not in self._lru:
+                self._lru[key] = len(data)
+                self.total_bytes += len(data)
+            self._lru.move_to_end(key)
+            self._evict()
+        return key
+
+    def _evict(self):
+        while self.max_bytes and self.total_bytes > self.max_bytes and len(self._lru) > 1:
+            key, size = self._lru.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path_for_key(key))
+            except FileNotFoundError:
+                pass
+            logging.debug(f"Evicted frame {key} ({size} bytes).")
+
+    def resolve(self, filename):
+        """
+        Resolve a file name served under /static/ to a path on disk.
+
+        Args:
+            filename (str): Either `<key>.jpg` or a file written before the
+                store existed.
+
+        Returns:
+            str | None: The path, or None if the frame is not stored.
+        """
+        match = _KEY_PATTERN.match(filename)
+        if match:
+            key = match.group(1)
+            with self._lock:
+                if key not in self._lru:
+                    return None
+                self._lru.move_to_end(key)
+            return self._path_for_key(key)
+
+        path = os.path.join(self.root, os.path.basename(filename))
+        return path if os.path.isfile(path) else None
+
+    def read_crop(self, filename, bbox):
+        """
+        Render the region of a stored frame covered by a bounding box.
+
+        Args:
+            filename (str): The frame file name, see `resolve`.
+            bbox (tuple): Pixel box as (x, y, width, height).
+
+        Returns:
+            bytes | None: The JPEG-encoded crop, or None if the frame is not stored.
+        """
+        path = self.resolve(filename)
+        if path is None:
+            return None
+        x, y, w, h = bbox
+        with Image.open(path) as image:
+            crop = image.crop((x, y, x + w, y + h))
+            buffered = io.BytesIO()
+            crop.convert("RGB").save(buffered, format="JPEG")
+        return buffered.getvalue()
+
+    def clear(self):
+        """Remove every stored frame, including files from the flat legacy layout."""
+        with self._lock:
+            for entry in os.listdir(self.root):
+                path = os.path.join(self.root, entry)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            self._lru.clear()
+            self.total_bytes = 0
+            os.makedirs(self.frames_dir, exist_ok=True)
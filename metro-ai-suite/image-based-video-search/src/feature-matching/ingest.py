@@ -0,0 +1,213 @@
+"""
+Buffered Milvus ingest for detections received over MQTT
+"""
+
+import logging
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+def _remaining(deadline):
+    """Seconds left until a time.monotonic() deadline, None without one."""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+class IngestMetrics:
+    """
+    Prometheus-style counters and gauges for the ingest buffer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows_enqueued = 0
+        self.rows_inserted = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.flush_seconds_sum = 0.0
+        self.last_flush_seconds = 0.0
+        self.rows_per_second = 0.0
+        self._last_flush_end = time.monotonic()
+
+    @property
+    def queue_depth(self):
+        """Rows accepted by the buffer but not yet inserted or dropped."""
+        return self.rows_enqueued - self.rows_inserted - self.rows_dropped
+
+    def record_enqueued(self, count):
+        with self._lock:
+            self.rows_enqueued += count
+
+    def record_dropped(self, count):
+        with self._lock:
+            self.rows_dropped += count
+
+    def record_flush(self, count, seconds, ok=True):
+        now = time.monotonic()
+        with self._lock:
+            self.flushes += 1
+            self.flush_seconds_sum += seconds
+            self.last_flush_seconds = seconds
+            if ok:
+                self.rows_inserted += count
+                elapsed = now - self._last_flush_end
+                self.rows_per_second = count / elapsed if elapsed > 0 else 0.0
+            else:
+                self.flush_errors += 1
+                self.rows_dropped += count
+            self._last_flush_end = now
+
+    def render(self, prefix="ibvs_ingest"):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix prepended to every metric name.
+
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        with self._lock:
+            samples = [
+                ("rows_enqueued_total", "counter", "Rows accepted into the ingest buffer.", self.rows_enqueued),
+                ("rows_inserted_total", "counter", "Rows inserted into Milvus.", self.rows_inserted),
+                ("rows_dropped_total", "counter", "Rows dropped because the buffer was full or a flush failed.", self.rows_dropped),
+                ("flushes_total", "counter", "Insert calls issued by the writer thread.", self.flushes),
+                ("flush_errors_total", "counter", "Insert calls that raised an error.", self.flush_errors),
+                ("flush_seconds_sum", "counter", "Total time spent in insert calls.", self.flush_seconds_sum),
+                ("flush_seconds", "gauge", "Duration of the most recent insert call.", self.last_flush_seconds),
+                ("rows_per_second", "gauge", "Insert rate measured over the most recent flush interval.", self.rows_per_second),
+                ("queue_depth", "gauge", "Rows waiting to be inserted.", self.queue_depth),
+            ]
+        lines = []
+        for name, kind, description, value in samples:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class IngestBuffer:
+    """
+    Collects rows from many MQTT messages and inserts them into Milvus from a
+    dedicated writer thread, flushing when either the batch size is reached or
+    the flush interval has elapsed since the first pending row.
+    """
+
+    def __init__(self, insert_fn, batch_size=256, flush_interval=0.5, max_queue=10000):
+        """
+        Args:
+            insert_fn (callable): Called with a list of row dicts for every flush.
+            batch_size (int): Number of pending rows that triggers a flush.
+            flush_interval (float): Maximum time in seconds a row waits before it is flushed.
+            max_queue (int): Maximum number of messages waiting for the writer thread.
+        """
+        self.insert_fn = insert_fn
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.metrics = IngestMetrics()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="milvus-ingest", daemon=True)
+            self._thread.start()
+        return self
+
+    def put(self, rows):
+        """
+        Queue the rows extracted from one message. Never blocks the caller; rows
+        are dropped and counted when the queue is full.
+
+        Returns:
+            bool: True if the rows were queued.
+        """
+        if not rows:
+            return True
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            self.metrics.record_dropped(len(rows))
+            logging.warning(f"Ingest queue full, dropped {len(rows)} rows.")
+            return False
+        self.metrics.record_enqueued(len(rows))
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Insert everything queued so far and wait for the writer thread to finish.
+
+        Returns:
+            bool: True if the flush completed within the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(_remaining(deadline))
+
+    def stop(self, timeout=None):
+        """
+        Flush the remaining rows and stop the writer thread.
+
+        Returns:
+            bool: True if the writer thread stopped within the timeout.
+        """
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logging.warning("Ingest queue still full, writer thread not stopped.")
+            return False
+        self._thread.join(_remaining(deadline))
+        if self._thread.is_alive():
+            return False
+        self._thread = None
+        return True
+
+    def _insert(self, pending):
+        start = time.perf_counter()
+        try:
+            self.insert_fn(pending)
+        except Exception as e:
+            self.metrics.record_flush(len(pending), time.perf_counter() - start, ok=False)
+            logging.error(f"Failed to insert {len(pending)} rows into Milvus: {str(e)}")
+            return
+        self.metrics.record_flush(len(pending), time.perf_counter() - start)
+        logging.debug(f"Inserted {len(pending)} rows into Milvus.")
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP or isinstance(item, threading.Event):
+                if pending:
+                    self._insert(pending)
+                    pending, deadline = [], None
+                if item is _STOP:
+                    return
+                item.set()
+                continue
+
+            if item:
+                pending.extend(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                self._insert(pending)
+                pending, deadline = [], None
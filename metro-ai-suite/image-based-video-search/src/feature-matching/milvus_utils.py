@@ -1,4 +1,15 @@
-from pymilvus import MilvusClient
+from pymilvus import DataType, MilvusClient
+
+# Default build parameters per index type
+INDEX_PARAMS = {
+    "AUTOINDEX": {},
+    "FLAT": {},
+    "IVF_FLAT": {"nlist": 1024},
+    "IVF_SQ8": {"nlist": 1024},
+    "HNSW": {"M": 16, "efConstruction": 200},
+}
+
+CONSISTENCY_LEVELS = ("Strong", "Bounded", "Session", "Eventually")
 
 
 class CollectionExists(RuntimeError):
@@ -10,7 +21,12 @@ def get_milvus_client(uri: str, token: str = None) -> MilvusClient:
 
 
 def create_collection(
-    milvus_client: MilvusClient, collection_name: str, dim: int, drop_old: bool = True
+    milvus_client: MilvusClient,
+    collection_name: str,
+    dim: int,
+    drop_old: bool = True,
+    index_type: str = "AUTOINDEX",
+    index_params: dict = None,
 ):
     if milvus_client.has_collection(collection_name) and drop_old:
         milvus_client.drop_collection(collection_name)
@@ -18,20 +34,72 @@ def create_collection(
         raise CollectionExists(
             f"Collection {collection_name} already exists. Set drop_old=True to create a new one instead."
         )
+    if index_type == "AUTOINDEX" and not index_params:
+        return milvus_client.create_collection(
+            collection_name=collection_name,
+            dimension=dim,
+            metric_type="COSINE",
+            consistency_level="Strong",
+            auto_id=True,
+        )
+
+    schema = MilvusClient.create_schema(auto_id=True, enable_dynamic_field=True)
+    schema.add_field(field_name="id", datatype=DataType.INT64, is_primary=True)
+    schema.add_field(field_name="vector", datatype=DataType.FLOAT_VECTOR, dim=dim)
+
+    vector_index = milvus_client.prepare_index_params()
+    vector_index.add_index(
+        field_name="vector",
+        index_type=index_type,
+        metric_type="COSINE",
+        params={**INDEX_PARAMS.get(index_type, {}), **(index_params or {})},
+    )
     return milvus_client.create_collection(
         collection_name=collection_name,
-        dimension=dim,
-        metric_type="COSINE",
+        schema=schema,
+        index_params=vector_index,
         consistency_level="Strong",
-        auto_id=True,
     )
 
 
-def get_search_results(milvus_client, collection_name, query_vector, output_fields):
-    search_res = milvus_client.search(
+def get_search_params(index_type: str = "AUTOINDEX", ef: int = None, nprobe: int = None):
+    """Build search params, keeping only the knobs that apply to the index type."""
+    params = {}
+    if index_type == "HNSW" and ef:
+        params["ef"] = ef
+    if index_type.startswith("IVF") and nprobe:
+        params["nprobe"] = nprobe
+    return {"metric_type": "COSINE", "params": params}
+
+
+def get_batch_search_results(
+    milvus_client,
+    collection_name,
+    query_vectors,
+    output_fields,
+    search_params=None,
+    consistency_level=None,
+    limit=10,
+):
+    kwargs = {"consistency_level": consistency_level} if consistency_level else {}
+    return milvus_client.search(
         collection_name=collection_name,
-        data=[query_vector],
-        search_params={"metric_type": "COSINE", "params": {}},
+        data=query_vectors,
+        limit=limit,
+        search_params=search_params or get_search_params(),
         output_fields=output_fields,
+        **kwargs,
+    )
+
+
+def get_search_results(
+    milvus_client, collection_name, query_vector, output_fields, search_params=None, consistency_level=None
+):
+    return get_batch_search_results(
+        milvus_client,
+        collection_name,
+        [query_vector],
+        output_fields,
+        search_params=search_params,
+        consistency_level=consistency_level,
     )
-    return search_res
@@ -0,0 +1,203 @@
+"""
+Fast-path validation for GVA metadata payloads received over MQTT
+
+The checks mirror PayloadSchema, MetadataSchema and TensorSchema for JSON
+decoded input: the same payloads are accepted and rejected, and rejections
+raise marshmallow's ValidationError. Tensor data is converted straight into
+a `np.float32` array instead of being validated element by element. Set
+`strict=True` to run the marshmallow schemas instead.
+"""
+
+import math
+
+import numpy as np
+from marshmallow import ValidationError
+
+from schemas import PayloadSchema, TensorSchema
+
+_payload_schema = PayloadSchema()
+_tensor_schema = TensorSchema()
+
+
+def _not_null(value):
+    if value is None:
+        raise ValidationError("Field may not be null.")
+
+
+def _int(value):
+    _not_null(value)
+    if value is True or value is False:
+        raise ValidationError("Not a valid integer.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Not a valid integer.")
+    except OverflowError:
+        raise ValidationError("Number too large.")
+
+
+def _float(value):
+    _not_null(value)
+    if value is True or value is False:
+        raise ValidationError("Not a valid number.")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Not a valid number.")
+    except OverflowError:
+        raise ValidationError("Number too large.")
+    if math.isnan(value) or math.isinf(value):
+        raise ValidationError("Special numeric values (nan or infinity) are not permitted.")
+    return value
+
+
+def _str(value):
+    _not_null(value)
+    if not isinstance(value, str):
+        raise ValidationError("Not a valid string.")
+    return value
+
+
+def _dict(value):
+    _not_null(value)
+    if not isinstance(value, dict):
+        raise ValidationError("Not a valid mapping type.")
+    return value
+
+
+def _raw(value):
+    _not_null(value)
+    return value
+
+
+def _list(item):
+    def load(value):
+        _not_null(value)
+        if not isinstance(value, list):
+            raise ValidationError("Not a valid list.")
+        return [item(v) for v in value]
+
+    return load
+
+
+def _float_array(value):
+    """Convert a list of numbers to a 1-D float32 array, rejecting what List(Float) rejects."""
+    _not_null(value)
+    if not isinstance(value, list):
+        raise ValidationError("Not a valid list.")
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        # Ragged nested lists
+        array = None
+    if array is None or array.ndim != 1 or array.dtype.kind not in "iuf" or bool in map(type, value):
+        # Uncommon input (strings, nulls, nested lists, bools): check every element
+        array = np.asarray(_list(_float)(value), dtype=np.float64)
+    elif array.dtype.kind == "f" and not np.isfinite(array).all():
+        raise ValidationError("Special numeric values (nan or infinity) are not permitted.")
+    return array.astype(np.float32)
+
+
+def _load(value, fields, required=()):
+    if not isinstance(value, dict):
+        raise ValidationError({"_schema": ["Invalid input type."]})
+    errors = {}
+    result = {}
+    for key, item in value.items():
+        load = fields.get(key)
+        if load is None:
+            errors[key] = ["Unknown field."]
+            continue
+        try:
+            result[key] = load(item)
+        except ValidationError as e:
+            errors[key] = e.messages
+    for key in required:
+        if key not in value:
+            errors[key] = ["Missing data for required field."]
+    if errors:
+        raise ValidationError(errors)
+    return result
+
+
+_TENSOR_FIELDS = {
+    "data": _float_array,
+    "layer_name": _str,
+    "dims": _list(_int),
+    "model_name": _str,
+    "name": _str,
+    "precision": _str,
+    "layout": _str,
+    "label_id": _int,
+    "confidence": _float,
+}
+
+_METADATA_FIELDS = {
+    "time": _int,
+    "objects": _list(_dict),
+    "caps": _str,
+    "frame_id": _int,
+    "width": _int,
+    "height": _int,
+    "encoding_level": _int,
+    "pipeline": _dict,
+    "encoding_type": _str,
+    "img_format": _str,
+    "gva_meta": _list(_dict),
+    "img_handle": _str,
+    "channels": _int,
+    "resolution": _dict,
+    "tags": _dict,
+    "timestamp": _int,
+}
+
+
+def _metadata(value):
+    return _load(value, _METADATA_FIELDS, required=("time",))
+
+
+_PAYLOAD_FIELDS = {
+    "metadata": _metadata,
+    "blob": _raw,
+}
+
+
+def load_payload(payload, strict=False):
+    """
+    Validate a decoded MQTT payload.
+
+    Args:
+        payload (dict): The JSON-decoded payload.
+        strict (bool): Validate with PayloadSchema instead of the fast path.
+
+    Returns:
+        dict: The validated payload.
+
+    Raises:
+        ValidationError: If the payload does not match PayloadSchema.
+    """
+    if strict:
+        return _payload_schema.load(payload)
+    return _load(payload, _PAYLOAD_FIELDS, required=("metadata",))
+
+
+def load_tensor(tensor, strict=False):
+    """
+    Validate a tensor of a detected object.
+
+    Args:
+        tensor (dict): The tensor as found in the payload metadata.
+        strict (bool): Validate with TensorSchema instead of the fast path.
+
+    Returns:
+        dict: The validated tensor, with `data` as a 1-D `np.float32` array.
+
+    Raises:
+        ValidationError: If the tensor does not match TensorSchema.
+    """
+    if strict:
+        tensor = _tensor_schema.load(tensor)
+        if "data" in tensor:
+            tensor["data"] = np.asarray(tensor["data"], dtype=np.float32)
+        return tensor
+    return _load(tensor, _TENSOR_FIELDS)
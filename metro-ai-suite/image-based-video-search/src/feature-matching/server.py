@@ -7,26 +7,33 @@ import io
 import json
 import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from typing import Annotated
 
 import httpx  # For sending HTTP requests
 import numpy as np
 import paho.mqtt.client as mqtt
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from marshmallow import ValidationError
 from PIL import Image
 from pymilvus import Collection, CollectionSchema, DataType, FieldSchema
 
 from encoder import Base64ImageProcessor
+from frame_store import FrameStore
+from ingest import IngestBuffer
 from milvus_utils import (
+    CONSISTENCY_LEVELS,
     CollectionExists,
     create_collection,
+    get_batch_search_results,
     get_milvus_client,
-    get_search_results,
+    get_search_params,
 )
-from schemas import PayloadSchema, TensorSchema
+from payload import load_payload, load_tensor
 
 load_dotenv()
 
@@ -35,6 +42,14 @@ COLLECTION_NAME = os.getenv("COLLECTION_NAME")
 MILVUS_ENDPOINT = os.getenv("MILVUS_ENDPOINT")
 MILVUS_TOKEN = os.getenv("MILVUS_TOKEN")
 
+# Milvus Index and Search Settings
+MILVUS_INDEX_TYPE = os.getenv("MILVUS_INDEX_TYPE", "AUTOINDEX")
+MILVUS_INDEX_PARAMS = json.loads(os.getenv("MILVUS_INDEX_PARAMS") or "{}")
+MILVUS_SEARCH_EF = int(os.getenv("MILVUS_SEARCH_EF", 0))
+MILVUS_SEARCH_NPROBE = int(os.getenv("MILVUS_SEARCH_NPROBE", 0))
+MILVUS_CONSISTENCY_LEVEL = os.getenv("MILVUS_CONSISTENCY_LEVEL", "Strong")
+SEARCH_OUTPUT_FIELDS = ["filename", "bbox", "label", "timestamp"]
+
 # Model Settings
 MODEL_DIM = os.getenv("MODEL_DIM")
 
@@ -46,9 +61,28 @@ MQTT_TOPIC = os.getenv("MQTT_TOPIC")
 # Detection Settings
 CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", 0.4))
 
+# Validate payloads with the marshmallow schemas instead of the fast path
+STRICT_VALIDATION = os.getenv("STRICT_VALIDATION", "false").lower() == "true"
+
+# Ingest Settings
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", 0.5))
+INGEST_MAX_QUEUE = int(os.getenv("INGEST_MAX_QUEUE", 10000))
+
+# Pipeline Server Settings
+PIPELINE_SERVER_URL = os.getenv("PIPELINE_SERVER_URL", "http://ibvs-dlstreamer-pipeline-server:8080")
+PIPELINE_STATUS_TTL = float(os.getenv("PIPELINE_STATUS_TTL", 30))
+
+# Frame Store Settings
+FRAME_STORE_DIR = os.getenv("FRAME_STORE_DIR", "static")
+FRAME_STORE_MAX_BYTES = int(os.getenv("FRAME_STORE_MAX_BYTES", 2 * 1024**3))
+
 # Create Milvus Client
 milvus_client = get_milvus_client(uri=MILVUS_ENDPOINT, token=MILVUS_TOKEN)
 
+# Create the frame store shared by MQTT ingest and the static endpoints
+frame_store = FrameStore(root=FRAME_STORE_DIR, max_bytes=FRAME_STORE_MAX_BYTES)
+
 # Create MQTT Client
 mqtt_client = mqtt.Client()
 
@@ -59,10 +93,20 @@ try:
         collection_name=COLLECTION_NAME,
         dim=int(MODEL_DIM),
         drop_old=False,
+        index_type=MILVUS_INDEX_TYPE,
+        index_params=MILVUS_INDEX_PARAMS,
     )
 except CollectionExists:
     print(f"Collection {COLLECTION_NAME} already exists. Will not create a new one.")
 
+# Create the ingest buffer that batches inserts on a writer thread
+ingest_buffer = IngestBuffer(
+    insert_fn=lambda rows: milvus_client.insert(collection_name=COLLECTION_NAME, data=rows),
+    batch_size=INGEST_BATCH_SIZE,
+    flush_interval=INGEST_FLUSH_INTERVAL,
+    max_queue=INGEST_MAX_QUEUE,
+).start()
+
 
 # Define the on_connect callback
 def on_connect(client, userdata, flags, rc):
@@ -72,52 +116,56 @@ def on_connect(client, userdata, flags, rc):
 
 # Define the on_message callback
 def on_message(client, userdata, message):
-    payload = json.loads(message.payload.decode())
-    timestamp = payload["metadata"]["time"]
-    metadata = payload.get("metadata", {})
-
     try:
         # Parse and validate the payload
-        payload = json.loads(message.payload.decode())
-        validated_payload = PayloadSchema().load(payload)
+        payload = json.loads(message.payload)
+        validated_payload = load_payload(payload, strict=STRICT_VALIDATION)
 
         # Extract metadata and objects
         metadata = validated_payload["metadata"]
         timestamp = metadata["time"]
         objects = metadata.get("objects", [])
-        frame = payload.get("blob", None)  # Get the frame from the blob
+        frame = validated_payload.get("blob", None)  # Get the frame from the blob
+
+        if not frame:
+            logging.warning("Payload without frame skipped.")
+            return
 
         # Prepare data for Milvus insertion
         to_insert = []
-
-        if frame:
-            # Decode the frame
-            image_bytes = base64.b64decode(frame)
-            image = Image.open(io.BytesIO(image_bytes))
+        frame_key = None
 
         for obj in objects:
             tensors = obj.get("tensors", [])
             label_name = obj.get("detection", {}).get("label", "unknown").lower().replace(" ", "_")
             confidence = obj.get("detection", {}).get("confidence", 0)
+            bbox = [int(obj.get(k, 0)) for k in ("x", "y", "w", "h")]
             for tensor in tensors:
                 try:
                     # Validate tensor schema
-                    validated_tensor = TensorSchema().load(tensor)
+                    validated_tensor = load_tensor(tensor, strict=STRICT_VALIDATION)
 
                     # Process only tensors with layer_name == "prob"
-                    if validated_tensor["layer_name"] == "prob":
-                        tensor_data = validated_tensor["data"]
+                    if validated_tensor.get("layer_name") == "prob":
+                        tensor_data = validated_tensor.get("data")
+
+                        # A vector of the wrong size would fail the whole batched insert
+                        if tensor_data is None or tensor_data.shape != (int(MODEL_DIM),):
+                            logging.warning(f"Tensor without a {MODEL_DIM}-d vector skipped.")
+                            continue
 
                         if confidence > CONFIDENCE_THRESHOLD:
-                            # Save the frame as an image
-                            frame_path = f"static/{timestamp}_{label_name}.jpg"
-                            image.save(frame_path)
+                            # Store the frame once; every object references it by key and bbox
+                            if frame_key is None:
+                                frame_key = frame_store.put(base64.b64decode(frame))
+                            frame_path = f"static/{frame_key}.jpg"
 
                             # Prepare data for Milvus
                             to_insert.append(
                                 {
                                 "vector": tensor_data,
                                 "filename": frame_path,
+                                "bbox": bbox,
                                 "label": label_name,
                                 "timestamp": timestamp,
                                 }
@@ -125,13 +173,9 @@ def on_message(client, userdata, message):
                 except ValidationError as e:
                     logging.warning(f"Invalid tensor skipped: {e.messages}")
                     continue
-            # Insert data into Milvus
-            if to_insert:
-                milvus_client.insert(
-                    collection_name=COLLECTION_NAME,
-                    data=to_insert,
-                )
-                logging.info(f"Inserted tensors into Milvus.")
+
+        # Hand the rows over to the writer thread
+        ingest_buffer.put(to_insert)
 
     except ValidationError as e:
         logging.error(f"Invalid payload: {e.messages}")
@@ -148,43 +192,60 @@ mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
 # Start the MQTT client loop in a separate thread
 mqtt_client.loop_start()
 
-# Create static folder if it doesn't exist
-os.makedirs("static", exist_ok=True)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One HTTP client with a keep-alive pool shared by all requests
+    app.state.http_client = httpx.AsyncClient(base_url=PIPELINE_SERVER_URL)
+    yield
+    await app.state.http_client.aclose()
+    # Insert whatever is still buffered before shutting down
+    mqtt_client.loop_stop()
+    ingest_buffer.stop(timeout=10)
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Initialize the Base64ImageProcessor with the desired size
 processor = Base64ImageProcessor(size=(224, 224))
 
 
-@app.post("/search/")
-async def search(
-    images: Annotated[list[UploadFile], File(description="Upload an image")]
-):
+# Cached id of the running search_image pipeline
+_search_pipeline = {"id": None, "checked_at": 0.0}
+
+
+async def get_search_pipeline_id(client: httpx.AsyncClient, refresh: bool = False):
+    """
+    Return the id of a running search_image pipeline, starting one if needed.
+    The result is cached for PIPELINE_STATUS_TTL seconds.
+    """
+    now = time.monotonic()
+    if not refresh and _search_pipeline["id"] and now - _search_pipeline["checked_at"] < PIPELINE_STATUS_TTL:
+        return _search_pipeline["id"]
+
     # Step 0: Check if a search_image pipeline is already running
     pipeline_id = None
     try:
-        async with httpx.AsyncClient() as client:
-            # Fetch pipelines status
-            response = await client.get("http://ibvs-dlstreamer-pipeline-server:8080/pipelines/status")
-            response.raise_for_status()
-            pipelines = response.json()
-            
-            # Check if a search_image pipeline is already running
-            for pipeline in pipelines:
-
-                # Ignore the pipelines that are not running
-                if pipeline["state"] != "RUNNING":
-                    continue
+        # Fetch pipelines status
+        response = await client.get("/pipelines/status")
+        response.raise_for_status()
+        pipelines = response.json()
+
+        # Check if a search_image pipeline is already running
+        for pipeline in pipelines:
+
+            # Ignore the pipelines that are not running
+            if pipeline["state"] != "RUNNING":
+                continue
 
-                _pipeline_response = await client.get(f"http://ibvs-dlstreamer-pipeline-server:8080/pipelines/{pipeline['id']}")
-                _pipeline_response.raise_for_status()
-                _pipeline_response_json = _pipeline_response.json()
+            _pipeline_response = await client.get(f"/pipelines/{pipeline['id']}")
+            _pipeline_response.raise_for_status()
+            _pipeline_response_json = _pipeline_response.json()
 
-                # If the pipeline is search_image, save the pipeline_id and break
-                if _pipeline_response_json["request"]["pipeline"]["version"] == "search_image":
-                    pipeline_id = pipeline['id']
-                    break
+            # If the pipeline is search_image, save the pipeline_id and break
+            if _pipeline_response_json["request"]["pipeline"]["version"] == "search_image":
+                pipeline_id = pipeline['id']
+                break
 
     except httpx.RequestError as e:
         # Ignore the error and continue
@@ -192,101 +253,142 @@ async def search(
 
     # Step 1: When the search_image pipeline is not running, start the pipeline with sync mode as true
     if not pipeline_id:
-        pipeline_endpoint = "http://ibvs-dlstreamer-pipeline-server:8080/pipelines/user_defined_pipelines/search_image"
-        body = {"sync": True}
+        response = await client.post("/pipelines/user_defined_pipelines/search_image", json={"sync": True})
+        response.raise_for_status()  # Raise HTTP error for non-2xx responses
+        pipeline_id = response.text
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(pipeline_endpoint, json=body)
-                response.raise_for_status()  # Raise HTTP error for non-2xx responses
-
-                pipeline_id = (
-                    response.text.strip()
-                )  # Use `.strip()` to remove any extra whitespace
-
-        except httpx.RequestError as e:
-            return {
-                "error": f"An error occurred while making the pipeline request: {str(e)}"
-            }
-
-    # Step 2: Process the uploaded images
-    # Process the uploaded images
-    results = []
-    for image in images:
-        # Read the uploaded image
-        _bytes = await image.read()
-
-        # Convert bytes to a PIL image
-        img = Image.open(io.BytesIO(_bytes))
-
-        # Process the image using the Base64ImageProcessor
-        base64_image = processor.process_image_to_base64(img)
-
-        # Append the Base64 string to the results
-        results.append({"base64_image": base64_image})
-    # Extract the Base64 string
-    base64_image = results[0]["base64_image"]  # Access the value of "base64_image"
-
-    # Step 3: Send data to the second pipeline
-    # Ensure pipeline_id has no extra quotes
-    pipeline_id = pipeline_id.strip('"').strip()  # Remove surrounding quotes, if any
-    second_pipeline_endpoint = (
-        f"http://ibvs-dlstreamer-pipeline-server:8080/pipelines/user_defined_pipelines/search_image/{pipeline_id}"
-    )
+    # Ensure pipeline_id has no extra quotes or whitespace
+    pipeline_id = pipeline_id.strip().strip('"').strip()
+    _search_pipeline.update(id=pipeline_id, checked_at=time.monotonic())
+    return pipeline_id
+
+
+async def extract_feature_vector(client: httpx.AsyncClient, image: UploadFile):
+    """
+    Run an uploaded image through the search_image pipeline.
 
-    second_pipeline_body = {
+    Returns:
+        list | None: The feature vector of the first detected object, or None.
+    """
+    # Convert the upload to a resized Base64 JPEG
+    img = Image.open(io.BytesIO(await image.read()))
+    base64_image = processor.process_image_to_base64(img)
+
+    body = {
         "source": {"data": base64_image, "type": "base64_image"},
         "include_feature_vector": True,
         "publish_frame": True,
     }
 
+    # Retry once with a fresh pipeline id in case the cached pipeline was stopped
+    for refresh in (False, True):
+        pipeline_id = await get_search_pipeline_id(client, refresh=refresh)
+        response = await client.post(f"/pipelines/user_defined_pipelines/search_image/{pipeline_id}", json=body)
+        if response.status_code < 400 or refresh:
+            break
+    response.raise_for_status()  # Raise HTTP error for non-2xx responses
+
+    result = json.loads(response.json())
+    objects = result.get("metadata", {}).get("objects", [])
+
+    # Return the first tensor with layer_name == "prob"
+    for obj in objects:
+        for tensor in obj.get("tensors", []):
+            if tensor.get("layer_name") == "prob" and tensor.get("data"):
+                return tensor["data"]
+    return None
+
+
+def _consistency_level(consistency_level: str):
+    consistency_level = consistency_level or MILVUS_CONSISTENCY_LEVEL
+    if consistency_level not in CONSISTENCY_LEVELS:
+        raise HTTPException(
+            status_code=422, detail=f"consistency_level must be one of {', '.join(CONSISTENCY_LEVELS)}"
+        )
+    return consistency_level
+
+
+def search_vectors(query_vectors, consistency_level: str):
+    """Search all query vectors in one Milvus request."""
+    return get_batch_search_results(
+        milvus_client=milvus_client,
+        collection_name=COLLECTION_NAME,
+        query_vectors=query_vectors,
+        output_fields=SEARCH_OUTPUT_FIELDS,
+        search_params=get_search_params(MILVUS_INDEX_TYPE, ef=MILVUS_SEARCH_EF, nprobe=MILVUS_SEARCH_NPROBE),
+        consistency_level=consistency_level,
+    )
+
+
+@app.post("/search/")
+async def search(
+    images: Annotated[list[UploadFile], File(description="Upload an image")],
+    consistency_level: Annotated[str, Query(description="Milvus consistency level")] = None,
+):
+    consistency_level = _consistency_level(consistency_level)
+
+    # Only the first image is used as the query
     try:
-        async with httpx.AsyncClient() as client:
-            second_response = await client.post(
-                second_pipeline_endpoint, json=second_pipeline_body
-            )
-            second_response.raise_for_status()  # Raise HTTP error for non-2xx responses
-
-            second_pipeline_result = second_response.json()  # Parse the response
-            second_pipeline_result_parsed = json.loads(second_pipeline_result)
-            objects = second_pipeline_result_parsed.get("metadata", {}).get("objects", [])
-
-            # Initialize a list to store tensor data
-            tensor_data_list = []
-
-            # Iterate through objects and extract tensor data
-            for obj in objects:
-                tensors = obj.get("tensors", [])
-                for tensor in tensors:
-                    if tensor.get("layer_name") == "prob":  # Filter by layer_name
-                        tensor_data = tensor.get("data", [])
-                        if tensor_data:
-                            tensor_data_list.append(tensor_data)
-            # Print the extracted tensor data
-            print("Extracted Tensor Data:", tensor_data_list[0])
+        query_vector = await extract_feature_vector(app.state.http_client, images[0])
+    except httpx.HTTPError as e:
+        return {"error": f"An error occurred while making the pipeline request: {str(e)}"}
+
+    if query_vector is None:
+        return {"error": "No object detected in the query image"}
 
-    except httpx.RequestError as e:
-        return {
-            "error": f"An error occurred while making the second pipeline request: {str(e)}"
-        }
-    
     try:
-        results = get_search_results(
-            milvus_client=milvus_client,
-            collection_name=COLLECTION_NAME,
-            query_vector=tensor_data_list[0],
-            output_fields=["filename", "label", "timestamp"],
-        )
-        return results
+        return search_vectors([query_vector], consistency_level)
     except Exception as e:
         logging.error(f"Search failed: {str(e)}")
         return {"error": "Search failed"}
 
 
+@app.post("/search/batch")
+async def search_batch(
+    images: Annotated[list[UploadFile], File(description="Upload one or more images")],
+    consistency_level: Annotated[str, Query(description="Milvus consistency level")] = None,
+):
+    """
+    Search with every uploaded image in one vectorized Milvus request. Returns
+    one list of hits per image, empty when no object was detected in it.
+    """
+    consistency_level = _consistency_level(consistency_level)
+
+    query_vectors = []
+    try:
+        for image in images:
+            query_vectors.append(await extract_feature_vector(app.state.http_client, image))
+    except httpx.HTTPError as e:
+        return {"error": f"An error occurred while making the pipeline request: {str(e)}"}
+
+    found = [vector for vector in query_vectors if vector is not None]
+    if not found:
+        return [[] for _ in images]
+
+    try:
+        hits = iter(search_vectors(found, consistency_level))
+    except Exception as e:
+        logging.error(f"Search failed: {str(e)}")
+        return {"error": "Search failed"}
+
+    return [next(hits) if vector is not None else [] for vector in query_vectors]
+
+
 @app.get("/static/{filename}")
-async def get_image(filename: str):
-    file_path = f"static/{filename}"
-    if os.path.exists(file_path):
+async def get_image(filename: str, bbox: str = None):
+    # Render only the object when a bbox reference "x,y,w,h" is given
+    if bbox:
+        try:
+            x, y, w, h = (int(v) for v in bbox.split(","))
+        except ValueError:
+            return JSONResponse(status_code=400, content={"message": "Invalid bbox"})
+        crop = frame_store.read_crop(filename, (x, y, w, h))
+        if crop is not None:
+            return Response(content=crop, media_type="image/jpeg")
+        return JSONResponse(status_code=404, content={"message": "File not found"})
+
+    file_path = frame_store.resolve(filename)
+    if file_path:
         return FileResponse(file_path)
     else:
         return JSONResponse(status_code=404, content={"message": "File not found"})
@@ -295,18 +397,25 @@ async def get_image(filename: str):
 @app.post("/clear/")
 async def clear():
     print("Clearing collection")
+    # Waits for the writer thread, off the event loop
+    await run_in_threadpool(ingest_buffer.flush, timeout=10)
     create_collection(
         milvus_client=milvus_client,
         collection_name=COLLECTION_NAME,
         dim=int(MODEL_DIM),
         drop_old=True,
+        index_type=MILVUS_INDEX_TYPE,
+        index_params=MILVUS_INDEX_PARAMS,
     )
 
-    for file in os.listdir("static"):
-        os.remove(os.path.join("static", file))
+    frame_store.clear()
 
     return JSONResponse(status_code=200, content={"message": "Success"})
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(ingest_buffer.metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/healthz")
 def health():
     return {"status": "ok"}
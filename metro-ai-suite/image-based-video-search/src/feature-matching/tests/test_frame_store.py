@@ -0,0 +1,111 @@
+import io
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from frame_store import FrameStore  # noqa: E402
+
+
+def encoded_frame(seed, image_format="JPEG", size=(64, 48)):
+    image = Image.new("RGB", size, (seed * 40 % 256, seed * 90 % 256, seed * 10 % 256))
+    buffered = io.BytesIO()
+    image.save(buffered, format=image_format)
+    return buffered.getvalue()
+
+
+def stored_files(store):
+    return sorted(
+        os.path.join(dirpath, filename)
+        for dirpath, _, filenames in os.walk(store.frames_dir)
+        for filename in filenames
+    )
+
+
+def stored_keys(store):
+    # from the files, as resolve() would make the frames the most recently used
+    return {os.path.basename(path)[:-4] for path in stored_files(store)}
+
+
+def test_identical_frames_are_stored_once(tmp_path):
+    store = FrameStore(str(tmp_path))
+    frame = encoded_frame(1)
+    key = store.put(frame)
+    assert store.put(frame) == key
+    assert store.put(encoded_frame(2)) != key
+
+    assert len(stored_files(store)) == 2
+    path = store.resolve(f"{key}.jpg")
+    assert path == os.path.join(store.frames_dir, key[:2], key[2:4], f"{key}.jpg")
+    with open(path, "rb") as f:
+        assert f.read() == frame
+    assert store.total_bytes == sum(os.path.getsize(path) for path in stored_files(store))
+
+
+def test_other_formats_are_stored_as_jpeg(tmp_path):
+    store = FrameStore(str(tmp_path))
+    png = encoded_frame(3, "PNG")
+    key = store.put(png)
+    # keyed by the bytes received, so the same PNG maps to the same frame
+    assert key == FrameStore.key_for(png)
+    with Image.open(store.resolve(f"{key}.jpg")) as image:
+        assert image.format == "JPEG"
+    assert store.total_bytes == os.path.getsize(store.resolve(f"{key}.jpg"))
+
+
+def test_least_recently_used_frames_are_evicted_first(tmp_path):
+    frames = [encoded_frame(seed) for seed in range(4)]
+    # room for any three of them
+    store = FrameStore(str(tmp_path), max_bytes=3 * max(len(frame) for frame in frames))
+    keys = [store.put(frame) for frame in frames[:3]]
+
+    # using frame 0, by storing it again or serving it, makes frame 1 the oldest
+    store.put(frames[0])
+    store.put(frames[3])
+    assert stored_keys(store) == {keys[0], keys[2], store.key_for(frames[3])}
+    assert store.resolve(f"{keys[1]}.jpg") is None
+
+    store.resolve(f"{keys[2]}.jpg")
+    store.put(frames[1])
+    assert stored_keys(store) == {keys[1], keys[2], store.key_for(frames[3])}
+
+    assert store.total_bytes == sum(os.path.getsize(path) for path in stored_files(store))
+    assert store.total_bytes <= store.max_bytes
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    store = FrameStore(str(tmp_path))
+    keys = [store.put(encoded_frame(seed)) for seed in range(3)]
+    # oldest write first
+    for age, key in enumerate(reversed(keys)):
+        path = store.resolve(f"{key}.jpg")
+        os.utime(path, (1000 - age, 1000 - age))
+
+    frame = encoded_frame(7)
+    reopened = FrameStore(str(tmp_path), max_bytes=store.total_bytes + len(frame) - 1)
+    assert reopened.total_bytes == store.total_bytes
+    new_key = reopened.put(frame)
+    assert stored_keys(reopened) == {keys[1], keys[2], new_key}
+
+
+def test_legacy_flat_files_and_crops(tmp_path):
+    store = FrameStore(str(tmp_path))
+    with open(tmp_path / "person_1700000000.jpg", "wb") as f:
+        f.write(encoded_frame(4))
+    assert store.resolve("person_1700000000.jpg") == str(tmp_path / "person_1700000000.jpg")
+    assert store.resolve("../person_1700000000.jpg") == str(tmp_path / "person_1700000000.jpg")
+    assert store.resolve("missing.jpg") is None
+    assert store.resolve(f"{'0' * 32}.jpg") is None
+
+    key = store.put(encoded_frame(5))
+    crop = store.read_crop(f"{key}.jpg", (10, 5, 20, 30))
+    with Image.open(io.BytesIO(crop)) as image:
+        assert image.size == (20, 30)
+    assert store.read_crop(f"{'0' * 32}.jpg", (0, 0, 1, 1)) is None
+
+    store.clear()
+    assert store.total_bytes == 0
+    assert store.resolve(f"{key}.jpg") is None
+    assert store.resolve("person_1700000000.jpg") is None
+    assert os.path.isdir(store.frames_dir)
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from ingest import IngestBuffer
+
+
+class RecordingInsert:
+    """insert_fn that records the batches, optionally blocking until released or failing."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, rows):
+        self.release.wait()
+        if self.fail:
+            raise RuntimeError("milvus down")
+        self.batches.append(list(rows))
+
+
+def rows(start, count):
+    return [{"id": i} for i in range(start, start + count)]
+
+
+@pytest.fixture
+def insert():
+    return RecordingInsert()
+
+
+def test_flushes_full_batches(insert):
+    buffer = IngestBuffer(insert, batch_size=4, flush_interval=60).start()
+    buffer.put(rows(0, 3))
+    buffer.put(rows(3, 3))
+    assert buffer.flush(timeout=5)
+    # the batch size triggered the first insert, flush the remaining rows
+    assert insert.batches == [rows(0, 6)]
+    buffer.put(rows(6, 4))
+    assert buffer.flush(timeout=5)
+    assert insert.batches == [rows(0, 6), rows(6, 4)]
+    assert buffer.stop(timeout=5)
+    assert buffer.metrics.rows_inserted == 10
+    assert buffer.metrics.queue_depth == 0
+
+
+def test_flushes_after_the_interval(insert):
+    buffer = IngestBuffer(insert, batch_size=100, flush_interval=0.05).start()
+    buffer.put(rows(0, 2))
+    deadline = time.monotonic() + 5
+    while not insert.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert insert.batches == [rows(0, 2)]
+    buffer.stop(timeout=5)
+
+
+def test_stop_inserts_the_pending_rows(insert):
+    buffer = IngestBuffer(insert, batch_size=100, flush_interval=60).start()
+    buffer.put(rows(0, 5))
+    assert buffer.stop(timeout=5)
+    assert insert.batches == [rows(0, 5)]
+    # stopping twice is a no-op
+    assert buffer.stop(timeout=5)
+
+
+def test_put_drops_rows_when_the_queue_is_full(insert):
+    buffer = IngestBuffer(insert, max_queue=2)
+    assert buffer.put(rows(0, 1)) and buffer.put(rows(1, 1))
+    assert not buffer.put(rows(2, 3))
+    assert buffer.metrics.rows_dropped == 3
+    assert buffer.put([])
+
+
+def test_flush_and_stop_honor_their_timeout_on_a_full_queue(insert):
+    insert.release.clear()
+    buffer = IngestBuffer(insert, batch_size=1, max_queue=1).start()
+    buffer.put(rows(0, 1))
+    time.sleep(0.05)  # the writer thread is now blocked in the insert
+    buffer.put(rows(1, 1))
+
+    start = time.monotonic()
+    assert not buffer.flush(timeout=0.1)
+    assert not buffer.stop(timeout=0.1)
+    assert time.monotonic() - start < 1
+
+    insert.release.set()
+    assert buffer.stop(timeout=5)
+    assert insert.batches == [rows(0, 1), rows(1, 1)]
+
+
+def test_failed_insert_counts_dropped_rows():
+    buffer = IngestBuffer(RecordingInsert(fail=True), batch_size=2).start()
+    buffer.put(rows(0, 2))
+    assert buffer.flush(timeout=5)
+    assert buffer.stop(timeout=5)
+    assert buffer.metrics.flush_errors == 1
+    assert buffer.metrics.rows_dropped == 2
+    assert buffer.metrics.queue_depth == 0
@@ -0,0 +1,148 @@
+import json
+
+import numpy as np
+import pytest
+from marshmallow import ValidationError
+
+from payload import load_payload, load_tensor
+
+VECTOR = [0.25, 0.5, 1, -2, 3.75]
+
+VALID_TENSORS = [
+    {},
+    {"data": VECTOR, "layer_name": "prob"},
+    {"data": [], "layer_name": "prob"},
+    {"data": [1, 2, 3]},
+    {"data": ["1.5", 2, "3"]},
+    {"data": [2**63, 1]},
+    {"data": VECTOR, "dims": [1, 5], "label_id": 3, "confidence": 0.9},
+    {"dims": [1.0, "5"], "label_id": 3.7, "confidence": "0.5"},
+    {"model_name": "resnet", "name": "x", "precision": "FP32", "layout": "NC"},
+]
+
+INVALID_TENSORS = [
+    [],
+    "tensor",
+    None,
+    {"data": None},
+    {"data": "1,2,3"},
+    {"data": {"0": 1}},
+    {"data": [1, None, 3]},
+    {"data": [1, True, 3]},
+    {"data": [True, False]},
+    {"data": [1, "x", 3]},
+    {"data": [1, float("nan")]},
+    {"data": [1, float("inf")]},
+    {"data": ["nan"]},
+    {"data": [10**400]},
+    {"data": [[1, 2], [3, 4]]},
+    {"data": [[1, 2], [3]]},
+    {"data": [1, [2]]},
+    {"layer_name": 1},
+    {"layer_name": None},
+    {"dims": [1.5, "x"]},
+    {"dims": "1,5"},
+    {"label_id": "3.0"},
+    {"label_id": True},
+    {"confidence": float("nan")},
+    {"unknown": 1},
+    {"data": VECTOR, "layer_name": "prob", "extra": "field"},
+]
+
+VALID_PAYLOADS = [
+    {"metadata": {"time": 1}},
+    {"metadata": {"time": "17"}, "blob": "aGVsbG8="},
+    {"metadata": {"time": 1, "objects": []}, "blob": ""},
+    {
+        "metadata": {
+            "time": 1,
+            "objects": [{"detection": {"label": "car", "confidence": 0.9}, "tensors": [{"data": VECTOR}]}],
+            "caps": "video/x-raw",
+            "frame_id": 3,
+            "width": 640,
+            "height": 480,
+            "encoding_level": 85,
+            "pipeline": {"name": "search_image"},
+            "encoding_type": "jpeg",
+            "img_format": "BGR",
+            "gva_meta": [],
+            "img_handle": "abc",
+            "channels": 3,
+            "resolution": {"width": 640, "height": 480},
+            "tags": {},
+            "timestamp": 123,
+        }
+    },
+]
+
+INVALID_PAYLOADS = [
+    None,
+    [],
+    "payload",
+    {},
+    {"blob": "aGVsbG8="},
+    {"metadata": None},
+    {"metadata": []},
+    {"metadata": {}},
+    {"metadata": {"time": None}},
+    {"metadata": {"time": "now"}},
+    {"metadata": {"time": True}},
+    {"metadata": {"time": 1}, "blob": None},
+    {"metadata": {"time": 1}, "extra": 1},
+    {"metadata": {"time": 1, "extra": 1}},
+    {"metadata": {"time": 1, "objects": {}}},
+    {"metadata": {"time": 1, "objects": [1]}},
+    {"metadata": {"time": 1, "objects": None}},
+    {"metadata": {"time": 1, "caps": 1}},
+    {"metadata": {"time": 1, "pipeline": []}},
+    {"metadata": {"time": 1, "width": "wide"}},
+]
+
+
+def _outcome(load, value, strict):
+    try:
+        return True, load(value, strict=strict)
+    except ValidationError:
+        return False, None
+
+
+@pytest.mark.parametrize(
+    "tensor, valid", [(t, True) for t in VALID_TENSORS] + [(t, False) for t in INVALID_TENSORS]
+)
+def test_tensor_paths_agree(tensor, valid):
+    fast_ok, fast = _outcome(load_tensor, tensor, strict=False)
+    strict_ok, strict = _outcome(load_tensor, tensor, strict=True)
+    assert fast_ok == strict_ok == valid
+    if fast_ok:
+        assert fast.keys() == strict.keys()
+        for key in fast:
+            if key == "data":
+                assert fast["data"].dtype == strict["data"].dtype == np.float32
+                np.testing.assert_array_equal(fast["data"], strict["data"])
+            else:
+                assert fast[key] == strict[key]
+
+
+@pytest.mark.parametrize(
+    "payload, valid", [(p, True) for p in VALID_PAYLOADS] + [(p, False) for p in INVALID_PAYLOADS]
+)
+def test_payload_paths_agree(payload, valid):
+    fast_ok, fast = _outcome(load_payload, payload, strict=False)
+    strict_ok, strict = _outcome(load_payload, payload, strict=True)
+    assert fast_ok == strict_ok == valid
+    if fast_ok:
+        assert fast == strict
+
+
+def test_tensor_data_is_float32_vector():
+    tensor = load_tensor(json.loads(json.dumps({"data": VECTOR, "layer_name": "prob"})))
+    assert tensor["data"].dtype == np.float32
+    assert tensor["data"].shape == (len(VECTOR),)
+    np.testing.assert_array_equal(tensor["data"], np.asarray(VECTOR, dtype=np.float32))
+
+
+def test_payload_error_names_field():
+    with pytest.raises(ValidationError) as e:
+        load_payload({"metadata": {"time": "now"}, "extra": 1})
+    assert set(e.value.messages) == {"metadata", "extra"}
+    assert "time" in e.value.messages["metadata"]
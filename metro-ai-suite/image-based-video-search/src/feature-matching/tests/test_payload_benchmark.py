@@ -0,0 +1,43 @@
+import json
+import random
+
+import pytest
+
+from payload import load_payload, load_tensor
+
+OBJECTS = 16
+MODEL_DIM = 1000
+
+
+@pytest.fixture(scope="module")
+def message():
+    payload = {
+        "metadata": {
+            "time": 1700000000000,
+            "objects": [
+                {
+                    "detection": {"label": "car", "confidence": 0.9},
+                    "tensors": [{"layer_name": "prob", "data": [random.random() for _ in range(MODEL_DIM)]}],
+                }
+                for _ in range(OBJECTS)
+            ],
+        },
+        "blob": "",
+    }
+    return json.dumps(payload).encode()
+
+
+def _decode(message, strict):
+    payload = load_payload(json.loads(message), strict=strict)
+    return [
+        load_tensor(tensor, strict=strict)["data"]
+        for obj in payload["metadata"]["objects"]
+        for tensor in obj["tensors"]
+    ]
+
+
+@pytest.mark.parametrize("strict", [False, True], ids=["fast", "strict"])
+def test_decode_message(benchmark, message, strict):
+    benchmark.group = f"decode {OBJECTS} objects x {MODEL_DIM}-d"
+    vectors = benchmark(_decode, message, strict)
+    assert len(vectors) == OBJECTS
@@ -0,0 +1,184 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from da.avatar2d.face_compositor import mask_to_alpha
+from da.util.log import logger
+
+PACK_VERSION = 1
+PACK_DIR = "pack"
+INDEX_FILE = "index.json"
+# checksums always checked at load, those of the blocks only on verify
+METADATA_FILES = ("coords.npy", "mask_coords.npy", "mask_index.npy")
+BLOCK_FILES = ("frames.npy", "masks.npy", "latents.npy")
+
+
+class AssetPackError(Exception):
+    pass
+
+
+@dataclass
+class AvatarAssets:
+    frames: list  # BGR frames, or an array of them
+    coords: list  # face boxes (x1, y1, x2, y2)
+    masks: list  # blending masks of the crop boxes
+    mask_coords: list  # crop boxes (x1, y1, x2, y2)
+    latents: list  # vae latents of the faces, torch tensors
+
+
+def sorted_images(folder):
+    images = glob.glob(os.path.join(folder, '*.[jpJP][pnPN]*[gG]'))
+    return sorted(images, key=lambda x: int(os.path.splitext(os.path.basename(x))[0]))
+
+
+def read_images(img_list, desc):
+    # read_imgs of ext.musetalk.utils.preprocessing, which loads the pose model on import
+    return [cv2.imread(img_path) for img_path in tqdm(img_list, desc=desc)]
+
+
+def read_avatar_images(avatar_path):
+    """ Assets of an avatar from the prepare_material output: png frames and masks, pickles and latents.pt """
+    latents = torch.load(os.path.join(avatar_path, "latents.pt"))
+    with open(os.path.join(avatar_path, "coords.pkl"), 'rb') as f:
+        coords = pickle.load(f)
+    frames = read_images(sorted_images(os.path.join(avatar_path, "full_imgs")), "reading frames")
+    with open(os.path.join(avatar_path, "mask_coords.pkl"), 'rb') as f:
+        mask_coords = pickle.load(f)
+    masks = read_images(sorted_images(os.path.join(avatar_path, "mask")), "reading masks")
+    return AvatarAssets(frames, coords, masks, mask_coords, latents)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 22), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pack_avatar(avatar_path):
+    """
+    Writes the assets of a prepared avatar to <avatar_path>/pack: the frames and the masks in two
+    contiguous blocks, boxes and latents in .npy files, and a JSON index with their checksums. The
+    images are converted one at a time, the index is written last.
+    """
+    pack_path = os.path.join(avatar_path, PACK_DIR)
+    os.makedirs(pack_path, exist_ok=True)
+    index_path = os.path.join(pack_path, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    frame_paths = sorted_images(os.path.join(avatar_path, "full_imgs"))
+    mask_paths = sorted_images(os.path.join(avatar_path, "mask"))
+    if not frame_paths or len(frame_paths) != len(mask_paths):
+        raise AssetPackError(f"{avatar_path}: {len(frame_paths)} frames and {len(mask_paths)} masks")
+
+    with open(os.path.join(avatar_path, "coords.pkl"), 'rb') as f:
+        coords = np.asarray(pickle.load(f), dtype=np.int64).reshape(-1, 4)
+    with open(os.path.join(avatar_path, "mask_coords.pkl"), 'rb') as f:
+        mask_coords = np.asarray(pickle.load(f), dtype=np.int64).reshape(-1, 4)
+    if len(coords) != len(frame_paths) or len(mask_coords) != len(frame_paths):
+        raise AssetPackError(f"{avatar_path}: {len(frame_paths)} frames, {len(coords)} face boxes "
+                             f"and {len(mask_coords)} crop boxes")
+    latents = torch.load(os.path.join(avatar_path, "latents.pt"))
+    latents = np.stack([latent.cpu().numpy() for latent in latents])
+
+    first = cv2.imread(frame_paths[0])
+    frames = np.lib.format.open_memmap(os.path.join(pack_path, "frames.npy"), mode="w+", dtype=np.uint8,
+                                       shape=(len(frame_paths),) + first.shape)
+    for i, path in enumerate(tqdm(frame_paths, desc="packing frames")):
+        frame = first if i == 0 else cv2.imread(path)
+        if frame.shape != first.shape:
+            raise AssetPackError(f"{path}: frame of shape {frame.shape}, {first.shape} expected")
+        frames[i] = frame
+    frames.flush()
+    del frames
+
+    # masks differ in size, they have the size of their crop box: one flat block, offsets and shapes in mask_index
+    mask_shapes = np.stack([mask_coords[:, 3] - mask_coords[:, 1], mask_coords[:, 2] - mask_coords[:, 0]], axis=1)
+    mask_sizes = mask_shapes.prod(axis=1)
+    mask_index = np.concatenate([(np.cumsum(mask_sizes) - mask_sizes)[:, None], mask_shapes], axis=1)
+    masks = np.lib.format.open_memmap(os.path.join(pack_path, "masks.npy"), mode="w+", dtype=np.uint8,
+                                      shape=(int(mask_sizes.sum()),))
+    for path, (offset, height, width) in zip(tqdm(mask_paths, desc="packing masks"), mask_index.tolist()):
+        mask = mask_to_alpha(cv2.imread(path))
+        if mask.shape != (height, width):
+            raise AssetPackError(f"{path}: mask of shape {mask.shape}, crop box of {(height, width)}")
+        masks[offset:offset + height * width] = mask.ravel()
+    masks.flush()
+    del masks
+
+    np.save(os.path.join(pack_path, "coords.npy"), coords)
+    np.save(os.path.join(pack_path, "mask_coords.npy"), mask_coords)
+    np.save(os.path.join(pack_path, "mask_index.npy"), mask_index)
+    np.save(os.path.join(pack_path, "latents.npy"), latents)
+
+    index = {
+        "version": PACK_VERSION,
+        "frames": len(frame_paths),
+        "files": {name: {"size": os.path.getsize(os.path.join(pack_path, name)),
+                         "sha256": file_sha256(os.path.join(pack_path, name))}
+                  for name in METADATA_FILES + BLOCK_FILES},
+    }
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_path + ".tmp", index_path)
+    logger.info(f"packed {len(frame_paths)} frames of {avatar_path} to {pack_path}")
+    return pack_path
+
+
+def load_pack(pack_path, verify=False):
+    """
+    Memory-maps an asset pack. The sizes of all the files and the checksums of the boxes are
+    checked, the checksums of the frames, masks and latents only with verify, as that reads them all.
+    """
+    index_path = os.path.join(pack_path, INDEX_FILE)
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        raise AssetPackError(f"{index_path}: {e}")
+    if index.get("version") != PACK_VERSION:
+        raise AssetPackError(f"{index_path}: version {index.get('version')}, {PACK_VERSION} expected")
+
+    for name, info in index["files"].items():
+        path = os.path.join(pack_path, name)
+        if not os.path.isfile(path) or os.path.getsize(path) != info["size"]:
+            raise AssetPackError(f"{path}: missing or not of {info['size']} bytes")
+        if (verify or name in METADATA_FILES) and file_sha256(path) != info["sha256"]:
+            raise AssetPackError(f"{path}: checksum mismatch")
+
+    frames = np.load(os.path.join(pack_path, "frames.npy"), mmap_mode="r")
+    masks_block = np.load(os.path.join(pack_path, "masks.npy"), mmap_mode="r")
+    coords = np.load(os.path.join(pack_path, "coords.npy"))
+    mask_coords = np.load(os.path.join(pack_path, "mask_coords.npy"))
+    mask_index = np.load(os.path.join(pack_path, "mask_index.npy"))
+    # copy on write, torch wants writable arrays
+    latents = np.load(os.path.join(pack_path, "latents.npy"), mmap_mode="c")
+    if not len(frames) == len(coords) == len(mask_coords) == len(mask_index) == index["frames"]:
+        raise AssetPackError(f"{pack_path}: inconsistent frame counts")
+
+    masks = [masks_block[offset:offset + height * width].reshape(height, width)
+             for offset, height, width in mask_index.tolist()]
+    return AvatarAssets(frames, [tuple(box) for box in coords.tolist()], masks,
+                        [list(box) for box in mask_coords.tolist()],
+                        [torch.from_numpy(latent) for latent in latents])
+
+
+def load_avatar_assets(avatar_path):
+    """ The asset pack of the avatar when there is a valid one, its png frames and masks otherwise """
+    pack_path = os.path.join(avatar_path, PACK_DIR)
+    if os.path.exists(os.path.join(pack_path, INDEX_FILE)):
+        try:
+            return load_pack(pack_path)
+        except AssetPackError as e:
+            logger.warning(f"ignoring asset pack: {e}")
+    return read_avatar_images(avatar_path)
@@ -13,9 +13,11 @@ import numpy as np
 import torch
 from tqdm import tqdm
 
+from da.avatar2d.asset_pack import load_avatar_assets
+from da.avatar2d.face_compositor import FaceCompositor
 from da.util.log import logger
-from ext.musetalk.utils.blending import get_image_prepare_material, get_image_blending
-from ext.musetalk.utils.preprocessing import read_imgs, get_landmark_and_bbox
+from ext.musetalk.utils.blending import get_image_prepare_material
+from ext.musetalk.utils.preprocessing import get_landmark_and_bbox
 from ext.musetalk.utils.utils import load_all_model, datagen
 
 
@@ -93,17 +95,17 @@ class Avatar:
 
             logger.info(f"Loading Avatar {self.avatar_id} from {self.avatar_path}")
 
-            self.input_latent_list_cycle = torch.load(self.latents_out_path)
-            with open(self.coords_path, 'rb') as f:
-                self.coord_list_cycle = pickle.load(f)
-            input_img_list = glob.glob(os.path.join(self.full_imgs_path, '*.[jpJP][pnPN]*[gG]'))
-            input_img_list = sorted(input_img_list, key=lambda x: int(os.path.splitext(os.path.basename(x))[0]))
-            self.frame_list_cycle = read_imgs(input_img_list)
-            with open(self.mask_coords_path, 'rb') as f:
-                self.mask_coords_list_cycle = pickle.load(f)
-            input_mask_list = glob.glob(os.path.join(self.mask_out_path, '*.[jpJP][pnPN]*[gG]'))
-            input_mask_list = sorted(input_mask_list, key=lambda x: int(os.path.splitext(os.path.basename(x))[0]))
-            self.mask_list_cycle = read_imgs(input_mask_list)
+            # memory-mapped when the avatar was packed with pack_2d_avatar.py
+            assets = load_avatar_assets(self.avatar_path)
+            self.input_latent_list_cycle = assets.latents
+            self.coord_list_cycle = assets.coords
+            self.frame_list_cycle = assets.frames
+            self.mask_coords_list_cycle = assets.mask_coords
+            self.mask_list_cycle = assets.masks
+
+        # blending masks and regions of every frame, worked out once
+        self.compositor = FaceCompositor(self.frame_list_cycle, self.coord_list_cycle, self.mask_list_cycle,
+                                         self.mask_coords_list_cycle)
 
     def prepare_material(self):
         with open(self.avatar_info_path, "w") as f:
@@ -188,7 +190,6 @@ class Avatar:
 
             frame_idx = self.idx % (len(self.coord_list_cycle))
             bbox = self.coord_list_cycle[frame_idx]
-            ori_frame = self.frame_list_cycle[frame_idx].copy()
 
             try:
                 x1, y1, x2, y2 = bbox
@@ -196,9 +197,7 @@ class Avatar:
             except:
                 continue
 
-            mask = self.mask_list_cycle[frame_idx]
-            mask_crop_box = self.mask_coords_list_cycle[frame_idx]
-            combine_frame = get_image_blending(ori_frame, res_frame, bbox, mask, mask_crop_box)
+            combine_frame = self.compositor.compose(frame_idx, res_frame)
             output_frame_queue.put(combine_frame)
 
             self.idx += 1
@@ -6,7 +6,6 @@ import numpy as np
 from da.avatar2d.avatar_ov import AvatarOV
 from da.util.log import logger
 from da.util.woker import PipelineWorker, WorkerType
-from ext.musetalk.utils.blending import get_image_blending
 
 
 class CombineFaceWorker(PipelineWorker):
@@ -30,13 +29,11 @@ class CombineFaceWorker(PipelineWorker):
 
             if face_frame is None:
                 # No face generated, use original img.
-                ori_frame = self.avatar.frame_list_cycle[frame_idx].copy()
-                self.frame_output_queue.put(ori_frame)
+                self.frame_output_queue.put(self.avatar.compositor.original(frame_idx))
                 continue
 
             # Face generated
             bbox = self.avatar.coord_list_cycle[frame_idx]
-            ori_frame = self.avatar.frame_list_cycle[frame_idx].copy()
 
             try:
                 x1, y1, x2, y2 = bbox
@@ -45,7 +42,5 @@ class CombineFaceWorker(PipelineWorker):
                 logger.error(f"Error resizing frame: {e}")
                 continue
 
-            mask = self.avatar.mask_list_cycle[frame_idx]
-            mask_crop_box = self.avatar.mask_coords_list_cycle[frame_idx]
-            combine_frame = get_image_blending(ori_frame, res_frame, bbox, mask, mask_crop_box)
+            combine_frame = self.avatar.compositor.compose(frame_idx, res_frame)
             self.frame_output_queue.put(combine_frame)
@@ -0,0 +1,94 @@
+import numpy as np
+
+PRECISIONS = ("uint8", "float32", "float16")
+
+
+def mask_to_alpha(mask):
+    """
+    The blending alpha of a mask image as PIL reads it: 8-bit luma of a 3-channel mask, taken in
+    the channel order of the array like Image.fromarray(mask).convert("L") does.
+    """
+    if mask.ndim == 2:
+        return mask
+    mask = mask.astype(np.uint32)
+    return ((mask[..., 0] * 19595 + mask[..., 1] * 38470 + mask[..., 2] * 7471 + 0x8000) >> 16).astype(np.uint8)
+
+
+class FaceCompositor:
+    """
+    Pastes generated faces into the avatar frames, like get_image_blending, with the per-frame
+    alpha masks and regions worked out once at avatar load. The alphas are views of the masks
+    where possible, so a memory-mapped avatar is only read as its frames are shown.
+
+    Only the face box of a frame differs from the original frame, so the blend runs on that region
+    alone, with the rounding of PIL's paste: (dst * (255 - alpha) + src * alpha) / 255. "float32" and
+    the "uint8" fixed-point math are bit exact with PIL, "float16" is up to a level off.
+    """
+
+    def __init__(self, frames, coords, masks, mask_coords, precision="float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision}")
+        self.frames = frames
+        self.precision = precision
+        self.regions = [self._region(frame, bbox, mask, crop_box)
+                        for frame, bbox, mask, crop_box in zip(frames, coords, masks, mask_coords)]
+
+    def _region(self, frame, bbox, mask, crop_box):
+        """ (blended rectangle in the frame and in the resized face, alpha) of a frame """
+        x, y, x1, y1 = [int(v) for v in bbox]
+        x_s, y_s, x_e, y_e = [int(v) for v in crop_box]
+        height, width = frame.shape[:2]
+        # the face is pasted in the crop box, which is pasted in the frame
+        left, top = max(x, x_s, 0), max(y, y_s, 0)
+        right, bottom = min(x1, x_e, width), min(y1, y_e, height)
+        if right <= left or bottom <= top:
+            return None, None, None
+
+        # a view of single channel masks, like those of a memory-mapped asset pack
+        alpha = mask_to_alpha(mask)[top - y_s:bottom - y_s, left - x_s:right - x_s]
+        frame_roi = (slice(top, bottom), slice(left, right))
+        face_roi = (slice(top - y, bottom - y), slice(left - x, right - x))
+        return frame_roi, face_roi, alpha
+
+    def original(self, frame_idx, out=None):
+        """ The frame without a generated face, copied to out or to a new array """
+        frame = self.frames[frame_idx]
+        if out is None:
+            return frame.copy()
+        np.copyto(out, frame)
+        return out
+
+    def compose(self, frame_idx, face, out=None):
+        """
+        :param frame_idx: index of the avatar frame
+        :param face: generated face, BGR, already resized to the face box of the frame
+        :param out: preallocated frame to write to, a new array if None
+        :return: the blended frame
+        """
+        frame_roi, face_roi, alpha = self.regions[frame_idx]
+        out = self.original(frame_idx, out)
+        if frame_roi is None:
+            return out
+
+        dst = out[frame_roi]
+        src = face[face_roi]
+        alpha = alpha.astype(np.uint16 if self.precision == "uint8" else self.precision)[..., None]
+        inverse = 255 - alpha
+        if self.precision == "uint8":
+            # PIL's DIV255: the rounded division by 255 in 16 bits
+            value = dst * inverse
+            value += src * alpha
+            value += 128
+            value += value >> 8
+            value >>= 8
+            dst[...] = value
+        else:
+            blended = dst.astype(self.precision)
+            blended *= inverse
+            weighted = src.astype(self.precision)
+            weighted *= alpha
+            blended += weighted
+            blended *= 1 / 255
+            np.rint(blended, out=blended)
+            dst[...] = blended
+        return out
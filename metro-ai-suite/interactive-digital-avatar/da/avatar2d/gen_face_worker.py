@@ -2,7 +2,7 @@ from queue import Queue, Empty
 
 import numpy as np
 
-from da.avatar2d.avatar_ov import AvatarOV, pad_array_to_batch_size
+from da.avatar2d.avatar_ov import AvatarOV
 from da.util.woker import PipelineWorker, WorkerType
 
 
@@ -23,12 +23,22 @@ class GenFaceWorker(PipelineWorker):
         idx_len = len(self.avatar.input_latent_list_cycle)
 
         while self._is_running():
+            # faces of the batches inferred meanwhile
+            for src_idxs, recon in self.avatar.unet_vae.results():
+                self._put_faces(recon, src_idxs)
+
             try:
                 whisper_batch = self.whisper_input_queue.get_nowait()
             except Empty:
                 whisper_batch = None
 
             if whisper_batch is None:
+                if self.avatar.unet_vae.pending:
+                    # the faces of the utterance go before the original imgs
+                    for src_idxs, recon in self.avatar.unet_vae.results(wait=True):
+                        self._put_faces(recon, src_idxs)
+                    continue
+
                 # No audio input, tell combine face worker output original img by set face to None.
                 self.face_output_queue.put((None, idx))
                 idx = (idx + 1) % idx_len
@@ -42,17 +52,9 @@ class GenFaceWorker(PipelineWorker):
 
             latent_batch = np.concatenate([self.avatar.input_latent_list_cycle[i].numpy() for i in src_idxs])
 
-            # Pad to batch size
-            actual_batch_size = whisper_batch.shape[0]
-            if actual_batch_size < self.avatar.batch_size:
-                whisper_batch = pad_array_to_batch_size(whisper_batch, self.avatar.batch_size)
-                latent_batch = pad_array_to_batch_size(latent_batch, self.avatar.batch_size)
-
-            recon = self.avatar.unet_vae_ov((whisper_batch, latent_batch, self.avatar.timesteps))[0]
-
-            # un-pad
-            if actual_batch_size < self.avatar.batch_size:
-                recon = recon[:actual_batch_size]
+            # inferred while the faces of the previous batches are put
+            self.avatar.unet_vae.submit(whisper_batch, latent_batch, self.avatar.timesteps, src_idxs)
 
-            for face_frame, i in zip(recon, src_idxs):
-                self.face_output_queue.put((face_frame, i))
+    def _put_faces(self, recon, src_idxs):
+        for face_frame, i in zip(recon, src_idxs):
+            self.face_output_queue.put((face_frame, i))
@@ -0,0 +1,151 @@
+import threading
+from collections import deque
+
+import numpy as np
+import openvino as ov
+
+
+def pad_array_to_batch_size(input_array, target_batch_size):
+    current_batch_size = input_array.shape[0]
+    if current_batch_size >= target_batch_size:
+        return input_array
+
+    # Calculate the padding needed
+    padding_size = target_batch_size - current_batch_size
+    padding_array = np.zeros((padding_size, *input_array.shape[1:]), dtype=input_array.dtype)
+
+    # Concatenate the input array with the padding array
+    padded_array = np.concatenate((input_array, padding_array), axis=0)
+
+    return padded_array
+
+
+def reshape_batch(model, batch_size):
+    """ Sets the batch of the batched inputs of the model (all but the timestep), -1 for a dynamic batch """
+    shapes = {}
+    for model_input in model.inputs:
+        shape = model_input.get_partial_shape()
+        if shape.rank.get_length() > 1:
+            shape[0] = batch_size
+            shapes[model_input] = shape
+    model.reshape(shapes)
+    return model
+
+
+class UnetVaeInfer:
+    """
+    The musetalk unet-vae IR, (audio feature, latent, timestep) to BGR faces, for any number of frames.
+
+    With batch_sizes, the model is compiled once per batch size and a request runs on the smallest
+    one that holds it, padded; requests larger than the largest one are split. Without, the batch is
+    dynamic and nothing is padded, where the device supports dynamic shapes (CPU).
+
+    submit() runs the batches on an AsyncInferQueue of infer_requests requests, so the caller
+    prepares the next batch while the previous ones run; results() returns the finished requests in
+    the order they were submitted.
+
+    :param model_path: IR exported by da.util.musetalk_torch2ov, of any static batch
+    :param performance_hint: LATENCY, THROUGHPUT, or None for the device default
+    :param num_streams: NUM_STREAMS of the device, None for its default
+    :param infer_requests: parallel infer requests, 0 for the optimal number of the compiled model
+    """
+
+    def __init__(self, model_path, device, batch_sizes=(4,), performance_hint=None, num_streams=None,
+                 infer_requests=0):
+        core = ov.Core()
+        config = {}
+        if performance_hint:
+            config["PERFORMANCE_HINT"] = performance_hint
+        if num_streams:
+            config["NUM_STREAMS"] = str(num_streams)
+
+        self.batch_sizes = sorted(batch_sizes) if batch_sizes else None
+        self.compiled = {}
+        for batch_size in self.batch_sizes or [-1]:
+            model = reshape_batch(core.read_model(model_path), batch_size)
+            self.compiled[batch_size] = core.compile_model(model, device, config)
+
+        self._queues = {}
+        for batch_size, compiled in self.compiled.items():
+            jobs = infer_requests or compiled.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+            queue = ov.AsyncInferQueue(compiled, jobs)
+            queue.set_callback(self._on_done)
+            self._queues[batch_size] = queue
+
+        self._lock = threading.Lock()
+        self._pending = deque()  # (sequence, userdata, part count) in submission order
+        self._outputs = {}  # sequence: list of finished parts
+        self._sequence = 0
+
+    def split(self, count):
+        """ (frames, compiled batch size) of the batches of a request of count frames """
+        if self.batch_sizes is None:
+            return [(count, -1)]
+        largest = self.batch_sizes[-1]
+        parts = [largest] * (count // largest)
+        if count % largest:
+            parts.append(count % largest)
+        return [(part, next(size for size in self.batch_sizes if size >= part)) for part in parts]
+
+    def _inputs(self, audio_feature, latent, timestep, batch_size):
+        if batch_size != -1:
+            audio_feature = pad_array_to_batch_size(audio_feature, batch_size)
+            latent = pad_array_to_batch_size(latent, batch_size)
+        return [audio_feature, latent, timestep]
+
+    def infer(self, audio_feature, latent, timestep):
+        """ Faces of the frames, synchronously """
+        faces = []
+        start = 0
+        for frames, batch_size in self.split(len(audio_feature)):
+            inputs = self._inputs(audio_feature[start:start + frames], latent[start:start + frames], timestep,
+                                  batch_size)
+            faces.append(self.compiled[batch_size](inputs)[0][:frames])
+            start += frames
+        return faces[0] if len(faces) == 1 else np.concatenate(faces)
+
+    def _on_done(self, request, userdata):
+        sequence, part, frames = userdata
+        face = request.get_output_tensor(0).data[:frames].copy()
+        with self._lock:
+            self._outputs[sequence][part] = face
+
+    def submit(self, audio_feature, latent, timestep, userdata=None):
+        """ Starts the inference of the frames, returned with userdata by results() """
+        parts = self.split(len(audio_feature))
+        with self._lock:
+            sequence = self._sequence
+            self._sequence += 1
+            self._outputs[sequence] = [None] * len(parts)
+            self._pending.append((sequence, userdata, len(parts)))
+        start = 0
+        for part, (frames, batch_size) in enumerate(parts):
+            inputs = self._inputs(audio_feature[start:start + frames], latent[start:start + frames], timestep,
+                                  batch_size)
+            # blocks while all the infer requests are busy
+            self._queues[batch_size].start_async(inputs, (sequence, part, frames))
+            start += frames
+
+    def results(self, wait=False):
+        """
+        The (userdata, faces) of the submitted requests that finished, in submission order: up to the
+        first one still running, or all of them with wait.
+        """
+        if wait:
+            for queue in self._queues.values():
+                queue.wait_all()
+        finished = []
+        with self._lock:
+            while self._pending:
+                sequence, userdata, _ = self._pending[0]
+                faces = self._outputs[sequence]
+                if any(face is None for face in faces):
+                    break
+                self._pending.popleft()
+                del self._outputs[sequence]
+                finished.append((userdata, faces[0] if len(faces) == 1 else np.concatenate(faces)))
+        return finished
+
+    @property
+    def pending(self):
+        return len(self._pending)
@@ -44,6 +44,10 @@ class ov:
     Config for OpenVINO models
     """
     device = str()
+    unet_batch_sizes = list()
+    performance_hint = str()
+    num_streams = int()
+    infer_requests = int()
 
 
 class mic:
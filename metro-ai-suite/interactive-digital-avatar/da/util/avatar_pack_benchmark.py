@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from da.avatar2d.asset_pack import PACK_DIR, load_avatar_assets, pack_avatar, read_avatar_images
+from da.avatar2d.face_compositor import FaceCompositor
+
+
+def synthetic_avatar_folder(avatar_path, frames=3000, height=512, width=512, seed=0):
+    """
+    Writes what prepare_material saves for an avatar: full_imgs and mask pngs, coords.pkl,
+    mask_coords.pkl and latents.pt, for a face moving a little over a gradient.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(avatar_path, "full_imgs"), exist_ok=True)
+    os.makedirs(os.path.join(avatar_path, "mask"), exist_ok=True)
+    background = np.zeros((height, width, 3), dtype=np.uint8)
+    background[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)
+    background[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    size = height // 3
+    coords, mask_coords, latents = [], [], []
+    for i in range(frames):
+        x = width // 2 - size // 2 + int(8 * np.sin(i / 20))
+        y = height // 3 + int(4 * np.cos(i / 15))
+        frame = background.copy()
+        cv2.circle(frame, (x + size // 2, y + size // 2), size // 2, (40, 90, 200), -1)
+        cv2.imwrite(os.path.join(avatar_path, "full_imgs", f"{i:08d}.png"), frame)
+
+        # crop box of get_crop_box with expand 1.2, and a blurred lower face mask of its size
+        s = int(size // 2 * 1.2)
+        x_c, y_c = x + size // 2, y + size // 2
+        mask = np.zeros((2 * s, 2 * s), dtype=np.uint8)
+        cv2.ellipse(mask, (s, s), (size // 2, size // 2), 0, 0, 180, 255, -1)
+        mask = cv2.GaussianBlur(mask, (int(0.1 * 2 * s // 2 * 2) + 1,) * 2, 0)
+        cv2.imwrite(os.path.join(avatar_path, "mask", f"{i:08d}.png"), mask)
+
+        coords.append((x, y, x + size, y + size))
+        mask_coords.append([x_c - s, y_c - s, x_c + s, y_c + s])
+        latents.append(torch.from_numpy(rng.standard_normal((1, 8, 32, 32), dtype=np.float32)))
+
+    with open(os.path.join(avatar_path, "coords.pkl"), "wb") as f:
+        pickle.dump(coords, f)
+    with open(os.path.join(avatar_path, "mask_coords.pkl"), "wb") as f:
+        pickle.dump(mask_coords, f)
+    torch.save(latents, os.path.join(avatar_path, "latents.pt"))
+
+
+def drop_page_cache(folder):
+    """ Evicts the files of the folder from the page cache, for a cold load """
+    for root, _, files in os.walk(folder):
+        for name in files:
+            fd = os.open(os.path.join(root, name), os.O_RDONLY)
+            try:
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return int(status["VmRSS"].split()[0]) / 1024, int(status["VmHWM"].split()[0]) / 1024
+
+
+def measure(avatar_path, loader):
+    """ Load time and memory of this process after loading the avatar and building its compositor """
+    before, _ = rss_mb()
+    start = time.perf_counter()
+    assets = read_avatar_images(avatar_path) if loader == "png" else load_avatar_assets(avatar_path)
+    FaceCompositor(assets.frames, assets.coords, assets.masks, assets.mask_coords)
+    elapsed = time.perf_counter() - start
+    rss, peak = rss_mb()
+    return {"seconds": elapsed, "rss_mb": rss - before, "peak_rss_mb": peak - before}
+
+
+def measure_in_process(avatar_path, loader, cold):
+    if cold:
+        drop_page_cache(avatar_path)
+    output = subprocess.run([sys.executable, "-m", "da.util.avatar_pack_benchmark", "--measure", loader,
+                             "--avatar_path", avatar_path], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="cold and warm load of a synthetic avatar, pngs against a pack")
+    parser.add_argument("--frames", default=3000, type=int)
+    parser.add_argument("--height", default=512, type=int)
+    parser.add_argument("--width", default=512, type=int)
+    parser.add_argument("--avatar_path", type=str, help="keep the synthetic avatar in this folder")
+    parser.add_argument("--measure", choices=["png", "pack"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.avatar_path, args.measure)))
+        sys.exit()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        avatar_path = args.avatar_path or tmp_dir
+        if not os.path.exists(os.path.join(avatar_path, "coords.pkl")):
+            start = time.perf_counter()
+            synthetic_avatar_folder(avatar_path, args.frames, args.height, args.width)
+            print(f"wrote {args.frames} frames of {args.width}x{args.height} in {time.perf_counter() - start:.0f} s")
+        if not os.path.exists(os.path.join(avatar_path, PACK_DIR)):
+            start = time.perf_counter()
+            pack_avatar(avatar_path)
+            print(f"packed in {time.perf_counter() - start:.1f} s")
+
+        for loader in ("png", "pack"):
+            for cold in (True, False):
+                result = measure_in_process(avatar_path, loader, cold)
+                print(f"{loader} {'cold' if cold else 'warm'}: {result['seconds']:.2f} s, "
+                      f"RSS +{result['rss_mb']:.0f} MB, peak RSS +{result['peak_rss_mb']:.0f} MB")
+    finally:
+        shutil.rmtree(tmp_dir)
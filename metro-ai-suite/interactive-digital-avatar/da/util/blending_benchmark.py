@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from da.avatar2d.face_compositor import PRECISIONS, FaceCompositor
+from ext.musetalk.utils.blending import get_crop_box, get_image_blending
+
+RESOLUTIONS = {"512p": (512, 512), "1080p": (1080, 1920)}
+
+
+def synthetic_avatar(height, width, frames=8, seed=0, three_channel_masks=True):
+    """
+    Avatar frames with face boxes, crop boxes and blurred lower face masks like
+    get_image_prepare_material makes them, and generated faces at the size of the face boxes.
+    The face of the last frame is at the border, so its crop box is partly outside the frame.
+    """
+    rng = np.random.default_rng(seed)
+    frame_list, coord_list, mask_list, mask_coords_list, face_list = [], [], [], [], []
+    for i in range(frames):
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        size = int(height * rng.uniform(0.3, 0.4))
+        if i == frames - 1:
+            x, y = width - size - 2, height - size - 2
+        else:
+            x, y = int(rng.integers(0, width - size)), int(rng.integers(0, height - size))
+        bbox = (x, y, x + size, y + size + int(rng.integers(0, 10)))
+        crop_box, s = get_crop_box(bbox, 1.2)
+
+        # lower half of an ellipse around the face, blurred like get_image_prepare_material
+        mask = np.zeros((2 * s, 2 * s), dtype=np.uint8)
+        cv2.ellipse(mask, (s, s), (size // 2, size // 2), 0, 0, 180, 255, -1)
+        kernel = int(0.1 * 2 * s // 2 * 2) + 1
+        mask = cv2.GaussianBlur(mask, (kernel, kernel), 0)
+        if three_channel_masks:
+            # as read_imgs loads the saved masks
+            mask = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+
+        frame_list.append(frame)
+        coord_list.append(bbox)
+        mask_list.append(mask)
+        mask_coords_list.append(crop_box)
+        face_list.append(rng.integers(0, 256, (bbox[3] - bbox[1], bbox[2] - bbox[0], 3), dtype=np.uint8))
+    return frame_list, coord_list, mask_list, mask_coords_list, face_list
+
+
+def pil_frames_per_second(avatar, count):
+    frame_list, coord_list, mask_list, mask_coords_list, face_list = avatar
+    start = time.perf_counter()
+    for i in range(count):
+        idx = i % len(frame_list)
+        get_image_blending(frame_list[idx].copy(), face_list[idx], coord_list[idx], mask_list[idx],
+                           mask_coords_list[idx])
+    return count / (time.perf_counter() - start)
+
+
+def compositor_frames_per_second(avatar, count, precision, preallocated):
+    frame_list, coord_list, mask_list, mask_coords_list, face_list = avatar
+    compositor = FaceCompositor(frame_list, coord_list, mask_list, mask_coords_list, precision)
+    out = np.empty_like(frame_list[0]) if preallocated else None
+    start = time.perf_counter()
+    for i in range(count):
+        idx = i % len(frame_list)
+        compositor.compose(idx, face_list[idx], out)
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="frames/s of get_image_blending and of FaceCompositor")
+    parser.add_argument("--frames", default=200, type=int, help="frames blended per measure")
+    args = parser.parse_args()
+
+    for name, (height, width) in RESOLUTIONS.items():
+        avatar = synthetic_avatar(height, width)
+        print(f"{name}: PIL {pil_frames_per_second(avatar, args.frames):.0f} frames/s")
+        for precision in PRECISIONS:
+            for preallocated in (False, True):
+                fps = compositor_frames_per_second(avatar, args.frames, precision, preallocated)
+                output = "preallocated output" if preallocated else "new output"
+                print(f"{name}: compositor {precision}, {output} {fps:.0f} frames/s")
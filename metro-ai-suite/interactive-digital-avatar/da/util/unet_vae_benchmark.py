@@ -0,0 +1,148 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import openvino as ov
+import openvino.opset13 as ops
+
+from da.avatar2d.unet_vae import UnetVaeInfer, pad_array_to_batch_size
+
+
+def save_synthetic_unet_vae(xml_path, batch_size=4, channels=32, seed=0):
+    """
+    Saves a small random model of the unet-vae IR of da.util.musetalk_torch2ov: audio_feature
+    (b, 50, 384), video_feature (b, 8, 32, 32) and timestep (1) to (b, 256, 256, 3) uint8 faces, of a
+    static batch. Convolutions and three 2x upsamplings stand for the unet and the vae decoder.
+    """
+    rng = np.random.default_rng(seed)
+
+    def weight(*shape):
+        return ops.constant((rng.standard_normal(shape) / np.sqrt(np.prod(shape[1:]))).astype(np.float32))
+
+    audio = ops.parameter([batch_size, 50, 384], np.float32, name="audio_feature")
+    video = ops.parameter([batch_size, 8, 32, 32], np.float32, name="video_feature")
+    timestep = ops.parameter([1], np.float32, name="timestep")
+
+    # audio condition, one value per channel
+    cond = ops.matmul(ops.reduce_mean(audio, [1], keep_dims=False), weight(384, channels), False, False)
+    cond = ops.reshape(cond, [0, channels, 1, 1], special_zero=True)
+    x = ops.convolution(video, weight(channels, 8, 3, 3), [1, 1], [1, 1], [1, 1], [1, 1])
+    x = ops.relu(ops.add(ops.add(x, cond), ops.reshape(timestep, [1, 1, 1, 1], special_zero=False)))
+    for out_channels in (channels, channels // 2, channels // 4):
+        x = ops.convolution_backprop_data(x, weight(x.get_output_partial_shape(0)[1].get_length(),
+                                                    out_channels, 2, 2), [2, 2])
+        x = ops.relu(ops.convolution(x, weight(out_channels, out_channels, 3, 3), [1, 1], [1, 1], [1, 1], [1, 1]))
+    x = ops.convolution(x, weight(3, channels // 4, 3, 3), [1, 1], [1, 1], [1, 1], [1, 1])
+    x = ops.multiply(ops.sigmoid(x), ops.constant(np.float32(255)))
+    x = ops.convert(ops.round(x, "half_to_even"), ov.Type.u8)
+    faces = ops.transpose(x, ops.constant(np.array([0, 2, 3, 1], dtype=np.int64)))
+
+    model = ov.Model([faces], [audio, video, timestep], "synthetic_unet_vae")
+    ov.save_model(model, xml_path)
+    return xml_path
+
+
+def utterance_batches(utterances=40, min_frames=5, max_frames=100, batch_size=4, seed=0):
+    """ Frame counts of the batches of whisper chunks the gen face worker gets for utterances of random length """
+    rng = np.random.default_rng(seed)
+    batches = []
+    for frames in rng.integers(min_frames, max_frames, utterances):
+        batches += [batch_size] * (frames // batch_size) + ([frames % batch_size] if frames % batch_size else [])
+    return batches
+
+
+def synthetic_inputs(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((frames, 50, 384), dtype=np.float32),
+            rng.standard_normal((frames, 8, 32, 32), dtype=np.float32))
+
+
+class FixedBatch:
+    """ What AvatarOV did: the IR compiled as is, every batch padded to its batch """
+
+    def __init__(self, xml_path, device, batch_size=4):
+        self.batch_size = batch_size
+        self.compiled = ov.compile_model(xml_path, device)
+
+    def infer(self, audio_feature, latent, timestep):
+        frames = len(audio_feature)
+        inputs = (pad_array_to_batch_size(audio_feature, self.batch_size),
+                  pad_array_to_batch_size(latent, self.batch_size), timestep)
+        return self.compiled(inputs)[0][:frames]
+
+
+def postprocess(faces, size=(180, 180)):
+    """ What the combine face worker does to a face before blending it """
+    return [cv2.resize(face, size) for face in faces]
+
+
+def run(infer, batches, audio, latent, timestep, asynchronous):
+    """ Frames/s over the batches, with the preprocessing of the gen face worker and the resize of the faces """
+    latents = np.split(latent, len(latent))
+    start = time.perf_counter()
+    frames = 0
+    for count in batches:
+        idxs = [(frames + i) % len(latents) for i in range(count)]
+        latent_batch = np.concatenate([latents[i] for i in idxs])
+        audio_batch = audio[idxs]
+        if asynchronous:
+            infer.submit(audio_batch, latent_batch, timestep)
+            for _, faces in infer.results():
+                postprocess(faces)
+        else:
+            postprocess(infer.infer(audio_batch, latent_batch, timestep))
+        frames += count
+    if asynchronous:
+        for _, faces in infer.results(wait=True):
+            postprocess(faces)
+    return frames / (time.perf_counter() - start)
+
+
+CONFIGS = [
+    # name, batch sizes (None for the fixed batch of the IR, [] for a dynamic one), hint, streams, requests, async
+    ("fixed b4, padded", None, None, None, 1, False),
+    ("batch sizes 1/2/4", [1, 2, 4], None, None, 1, False),
+    ("dynamic batch", [], None, None, 1, False),
+    ("1/2/4, async 2 requests", [1, 2, 4], None, None, 2, True),
+    ("dynamic, async 2 requests", [], None, None, 2, True),
+    ("dynamic, async 4 requests, LATENCY", [], "LATENCY", None, 4, True),
+    ("dynamic, async, THROUGHPUT", [], "THROUGHPUT", None, 0, True),
+    ("dynamic, async 4 requests, 2 streams", [], None, 2, 4, True),
+]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="frames/s of the unet-vae inference on a synthetic model")
+    parser.add_argument("--device", default="CPU", type=str)
+    parser.add_argument("--model", type=str, help="an unet-vae IR, a synthetic one otherwise")
+    parser.add_argument("--utterances", default=40, type=int)
+    parser.add_argument("--batch_size", default=4, type=int, help="frames per batch of whisper chunks")
+    parser.add_argument("--repeat", default=2, type=int)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        xml_path = args.model or save_synthetic_unet_vae(os.path.join(tmp_dir, "unet-vae-b4.xml"))
+        batches = utterance_batches(args.utterances, batch_size=args.batch_size)
+        audio, latent = synthetic_inputs(256)
+        timestep = np.array([0])
+        print(f"{sum(batches)} frames in {len(batches)} batches of up to {args.batch_size} on {args.device}")
+
+        for name, batch_sizes, hint, streams, requests, asynchronous in CONFIGS:
+            if batch_sizes is None:
+                infer = FixedBatch(xml_path, args.device)
+            else:
+                try:
+                    infer = UnetVaeInfer(xml_path, args.device, batch_sizes, hint, streams, requests)
+                except RuntimeError as e:
+                    print(f"{name}: not supported on {args.device}, {str(e).splitlines()[0]}")
+                    continue
+            run(infer, batches[:8], audio, latent, timestep, asynchronous)  # warm up
+            fps = max(run(infer, batches, audio, latent, timestep, asynchronous) for _ in range(args.repeat))
+            print(f"{name}: {fps:.1f} frames/s")
+    finally:
+        shutil.rmtree(tmp_dir)
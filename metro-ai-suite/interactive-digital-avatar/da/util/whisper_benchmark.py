@@ -0,0 +1,106 @@
+import argparse
+import os
+import tempfile
+import time
+from dataclasses import asdict
+
+import numpy as np
+import torch
+
+from ext.musetalk.whisper.audio2feature import Audio2Feature
+from ext.musetalk.whisper.whisper.audio import SAMPLE_RATE
+from ext.musetalk.whisper.whisper.model import ModelDimensions, Whisper
+
+# dimensions of whisper tiny, with a small text decoder the encoder features never use
+TINY_DIMS = ModelDimensions(n_mels=80, n_audio_ctx=1500, n_audio_state=384, n_audio_head=6, n_audio_layer=4,
+                            n_vocab=64, n_text_ctx=16, n_text_state=384, n_text_head=6, n_text_layer=1)
+
+
+def save_random_model(model_path, dims=TINY_DIMS, seed=0):
+    """ Saves a randomly initialized whisper checkpoint that load_model reads. """
+    torch.manual_seed(seed)
+    model = Whisper(dims)
+    torch.save({"dims": asdict(dims), "model_state_dict": model.state_dict()}, model_path)
+
+
+def synthetic_speech(seconds, seed=0):
+    """ 16kHz waveform of voiced syllables: harmonics of a wandering pitch, with pauses and noise. """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t) + 10 * np.sin(2 * np.pi * 3.1 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 2.5 * t), 0, None) * (np.sin(2 * np.pi * 0.2 * t) > -0.6)
+    audio = 0.3 * envelope * voiced + 0.01 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def feature2chunks_loop(audio_processor, feature_array, fps, audio_feat_length=[2, 2]):
+    """ The former per-frame loop of Audio2Feature.feature2chunks. """
+    whisper_chunks = []
+    whisper_idx_multiplier = 50. / fps
+    i = 0
+    while 1:
+        start_idx = int(i * whisper_idx_multiplier)
+        selected_feature, selected_idx = audio_processor.get_sliced_feature(feature_array=feature_array, vid_idx=i,
+                                                                            audio_feat_length=audio_feat_length,
+                                                                            fps=fps)
+        whisper_chunks.append(selected_feature)
+        i += 1
+        if start_idx > len(feature_array):
+            break
+    return whisper_chunks
+
+
+def chunks_time(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def real_time_factor(function, audio, repeat):
+    function(audio)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(audio)
+    return (time.perf_counter() - start) / repeat / (len(audio) / SAMPLE_RATE)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="real-time factor of the whisper feature extraction")
+    parser.add_argument("--model_path", default="resource/musetalk_models/whisper/tiny.pt",
+                        help="whisper checkpoint, a random tiny model if it does not exist")
+    parser.add_argument("--ov_path", default="resource/musetalk_models/whisper/tiny-encoder.xml",
+                        help="encoder IR from da.util.whisper_torch2ov, skipped if it does not exist")
+    parser.add_argument("--ov_device", default="CPU")
+    parser.add_argument("--batch_size", default=4, type=int, help="30s windows encoded together")
+    parser.add_argument("--seconds", default=[5, 30, 120], type=float, nargs="+", help="clip durations")
+    parser.add_argument("--repeat", default=3, type=int)
+    parser.add_argument("--fps", default=25, type=float, help="video fps of the feature chunks")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = args.model_path
+        if not os.path.isfile(model_path):
+            model_path = os.path.join(tmp_dir, "tiny.pt")
+            save_random_model(model_path)
+            print(f"{args.model_path} not found, using a random tiny model")
+        audio_processor = Audio2Feature(model_path=model_path, batch_size=args.batch_size)
+
+        paths = [("transcribe", audio_processor.audio2feat_transcribe), ("encoder", audio_processor.audio2feat)]
+        if os.path.isfile(args.ov_path):
+            audio_processor_ov = Audio2Feature(model_path=model_path, batch_size=args.batch_size)
+            audio_processor_ov.load_ov_encoder(args.ov_path, args.ov_device)
+            paths.append((f"openvino {args.ov_device}", audio_processor_ov.audio2feat))
+
+        for seconds in args.seconds:
+            audio = synthetic_speech(seconds)
+            rtfs = [(name, real_time_factor(function, audio, args.repeat)) for name, function in paths]
+            print(f"{seconds:g}s clip: " + ", ".join(f"{name} RTF {rtf:.4f}" for name, rtf in rtfs))
+
+            features = audio_processor.audio2feat(audio)
+            loop = chunks_time(lambda: feature2chunks_loop(audio_processor, features, args.fps), args.repeat)
+            vectorized = chunks_time(lambda: audio_processor.feature2chunks(features, args.fps), args.repeat)
+            print(f"{seconds:g}s clip: feature2chunks at {args.fps:g} fps, loop {loop * 1000:.2f} ms, "
+                  f"vectorized {vectorized * 1000:.2f} ms")
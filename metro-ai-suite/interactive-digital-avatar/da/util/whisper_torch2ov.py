@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import openvino as ov
+import torch
+
+from ext.musetalk.whisper.whisper import load_model
+from ext.musetalk.whisper.whisper.audio import N_FRAMES, N_MELS
+
+
+class WhisperEncoderProxy(torch.nn.Module):
+    """
+    The whisper audio encoder, returning the output of every layer as Audio2Feature reads it
+    from transcribe: (batch, n_layer + 1, n_audio_ctx, n_audio_state)
+    """
+
+    def __init__(self, encoder):
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, mel):
+        x = torch.nn.functional.gelu(self.encoder.conv1(mel))
+        x = torch.nn.functional.gelu(self.encoder.conv2(x))
+        x = x.permute(0, 2, 1)
+        x = x + self.encoder.positional_embedding
+        embeddings = [x]
+        for block in self.encoder.blocks:
+            x = block(x)
+            embeddings.append(x)
+        return torch.stack(embeddings, dim=1)
+
+
+def export_encoder(model_path, xml_path, compress_to_fp16=False):
+    model = WhisperEncoderProxy(load_model(model_path, device="cpu").encoder)
+    model.eval()
+
+    # the batch of 30s windows is dynamic
+    ov_model = ov.convert_model(model, example_input=torch.zeros(1, N_MELS, N_FRAMES),
+                                input=[(-1, N_MELS, N_FRAMES)])
+    Path(xml_path).parent.mkdir(parents=True, exist_ok=True)
+    ov.save_model(ov_model, xml_path, compress_to_fp16=compress_to_fp16)
+
+
+if __name__ == '__main__':
+    work_dir = "resource/musetalk_models/whisper"
+    export_encoder(f'{work_dir}/tiny.pt', f'{work_dir}/tiny-encoder.xml')
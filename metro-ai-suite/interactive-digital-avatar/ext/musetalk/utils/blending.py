@@ -3,7 +3,8 @@ import numpy as np
 import cv2
 from face_parsing import FaceParsing
 
-fp = FaceParsing()
+# loaded on the first face_seg, blending alone does not need the parsing model
+fp = None
 
 def get_crop_box(box, expand):
     x, y, x1, y1 = box
@@ -14,6 +15,9 @@ def get_crop_box(box, expand):
     return crop_box, s
 
 def face_seg(image):
+    global fp
+    if fp is None:
+        fp = FaceParsing()
     seg_image = fp(image)
     if seg_image is None:
         print("error, no person_segment")
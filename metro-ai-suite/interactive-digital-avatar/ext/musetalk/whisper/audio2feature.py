@@ -1,7 +1,10 @@
 import os
 from .whisper import load_model
+from .whisper.audio import N_FRAMES, log_mel_spectrogram, pad_or_trim
 import soundfile as sf
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import torch
 import time
 import sys
 sys.path.append("..")
@@ -9,9 +12,23 @@ sys.path.append("..")
 class Audio2Feature():
     def __init__(self, 
                  whisper_model_type="tiny",
-                 model_path="./models/whisper/tiny.pt"):
+                 model_path="./models/whisper/tiny.pt",
+                 batch_size=4):
         self.whisper_model_type = whisper_model_type
         self.model = load_model(model_path) #
+        # number of 30s windows encoded together
+        self.batch_size = batch_size
+        self.encoder_ov = None
+
+    def load_ov_encoder(self, ov_path, device="CPU", config=None):
+        """
+        Run the audio encoder with an OpenVINO IR exported by da.util.whisper_torch2ov
+        :param ov_path: path of the encoder xml
+        :param device: OpenVINO device
+        :param config: compile properties, e.g. {"INFERENCE_PRECISION_HINT": "f32"} on CPUs that default to bf16
+        """
+        import openvino as ov
+        self.encoder_ov = ov.compile_model(ov_path, device, config)
 
     def get_sliced_feature(self,
                            feature_array, 
@@ -78,23 +95,130 @@ class Audio2Feature():
         return selected_feature,selected_idx
     
 
-    def feature2chunks(self,feature_array,fps,audio_feat_length = [2,2]):
-        whisper_chunks = []
-        whisper_idx_multiplier = 50./fps 
-        i = 0
-        while 1:
-            start_idx = int(i * whisper_idx_multiplier)
-            selected_feature,selected_idx = self.get_sliced_feature(feature_array= feature_array,vid_idx = i,audio_feat_length=audio_feat_length,fps=fps)
-            #print(f"i:{i},selected_idx {selected_idx}")
-            whisper_chunks.append(selected_feature)
+    def num_chunks(self,length,fps):
+        """
+        Number of video frames feature2chunks makes from `length` features: it stops after the
+        first frame whose start index is past the features
+        """
+        whisper_idx_multiplier = 50./fps
+        i = int(length / whisper_idx_multiplier)
+        while int(i * whisper_idx_multiplier) <= length:
             i += 1
-            if start_idx>len(feature_array):
-                break
+        while i > 0 and int((i - 1) * whisper_idx_multiplier) > length:
+            i -= 1
+        return i + 1
+
+    def chunk_indices(self,first,last,length,fps,audio_feat_length=[2,2]):
+        """
+        Feature rows of the windows of video frames first to last - 1, as get_sliced_feature picks them
+        :return: array of shape (last - first, 2 * (audio_feat_length[0] + audio_feat_length[1] + 1))
+        """
+        centers = (np.arange(first, last) * 50 / fps).astype(np.int64)
+        offsets = np.arange(-audio_feat_length[0]*2, (audio_feat_length[1]+1)*2)
+        return np.clip(centers[:, None] + offsets, 0, length - 1)
+
+    def feature2chunks(self,feature_array,fps,audio_feat_length = [2,2]):
+        """
+        Audio windows of all video frames. When 50/fps is a whole number of features, as at 25 fps,
+        the windows are a read-only view of the edge padded features, gathered at once otherwise
+        :return: array of shape (frames, 50, 384)
+        """
+        length = len(feature_array)
+        frames = self.num_chunks(length, fps)
+        step = 50 / fps
+        if step.is_integer():
+            step = int(step)
+            left = audio_feat_length[0]*2
+            width = left + (audio_feat_length[1]+1)*2
+            right = max(step * (frames - 1) + width - left - length, 0)
+            padded = np.pad(feature_array, ((left, right),) + ((0, 0),) * (feature_array.ndim - 1), mode="edge")
+            windows = sliding_window_view(padded, width, axis=0)[::step][:frames]
+            # (frames, ..., width) to (frames, width, ...), still a view
+            return np.moveaxis(windows, -1, 1).reshape(frames, -1, feature_array.shape[-1])
+        indices = self.chunk_indices(0, frames, length, fps, audio_feat_length)
+        return feature_array[indices].reshape(frames, -1, feature_array.shape[-1])
+
+    def feature2chunks_stream(self,feature_blocks,fps,audio_feat_length = [2,2]):
+        """
+        feature2chunks on features that come in blocks, e.g. from audio2feat_stream: yields the
+        windows of the video frames that are complete after every block, and of the last frames
+        at the end. The concatenated chunks are those of feature2chunks on the whole features.
+        """
+        # last row of a window, from its center
+        right = (audio_feat_length[1]+1)*2 - 1
+        rows = None
+        base = 0  # index of rows[0] in the features
+        length = 0
+        emitted = 0
+        for block in feature_blocks:
+            rows = block if rows is None else np.concatenate([rows, block])
+            length += len(block)
+            # frames whose window ends inside the features so far do not change anymore
+            centers = (np.arange(emitted, self.num_chunks(length, fps)) * 50 / fps).astype(np.int64)
+            ready = int(np.count_nonzero(centers + right <= length - 1))
+            if ready:
+                indices = self.chunk_indices(emitted, emitted + ready, length, fps, audio_feat_length)
+                yield rows[indices - base].reshape(ready, -1, rows.shape[-1])
+                emitted += ready
+                # keep the rows the next windows still need
+                start = max(int(emitted * 50 / fps) - audio_feat_length[0]*2, 0)
+                rows = rows[start - base:]
+                base = start
+        if rows is None:
+            return
+        indices = self.chunk_indices(emitted, self.num_chunks(length, fps), length, fps, audio_feat_length)
+        if len(indices):
+            yield rows[indices - base].reshape(len(indices), -1, rows.shape[-1])
 
-        return whisper_chunks
+    def audio2chunks_stream(self,audio,fps,audio_feat_length = [2,2]):
+        """ Chunks of feature2chunks, yielded while the rest of the audio is still being encoded """
+        return self.feature2chunks_stream(self.audio2feat_stream(audio), fps, audio_feat_length)
+
+    def encode(self, mel):
+        """
+        Run the audio encoder on a batch of 30s windows
+        :param mel: torch tensor of log-mel windows, shape (batch, 80, 3000)
+        :return: embeddings of every encoder layer, shape (batch, 1500, n_layer + 1, 384)
+        """
+        if self.encoder_ov is not None:
+            embeddings = self.encoder_ov(mel.numpy())[0]
+        else:
+            device = self.model.device
+            # same precision as transcribe: fp16 on gpu, fp32 on cpu
+            dtype = torch.float32 if device.type == "cpu" else torch.float16
+            with torch.no_grad():
+                _, embeddings = self.model.encoder(mel.to(device).to(dtype), include_embeddings=True)
+        return embeddings.transpose(0,2,1,3)
+
+    def audio2feat_stream(self,audio):
+        """
+        audio2feat, yielding the features of every batch of 30s windows once it is encoded
+        """
+        # the log-mel is normalized over the whole audio, as in transcribe
+        mel = log_mel_spectrogram(audio)
+        num_frames = mel.shape[-1]
+        starts = list(range(0, num_frames, N_FRAMES))
+        for i in range(0, len(starts), self.batch_size):
+            batch_starts = starts[i:i + self.batch_size]
+            windows = torch.stack([pad_or_trim(mel[:, start:start + N_FRAMES], N_FRAMES) for start in batch_starts])
+            embeddings = self.encode(windows)
+            embed_list = []
+            for encoder_embeddings, start_idx in zip(embeddings, batch_starts):
+                end_idx = min(start_idx + N_FRAMES, num_frames)
+                emb_end_idx = int((end_idx - start_idx)/2)
+                embed_list.append(encoder_embeddings[:emb_end_idx])
+            yield np.concatenate(embed_list, axis=0)
+
+    def audio2feat(self,audio):
+        """
+        Encoder features of the audio, 2 rows per 20ms mel frame pair (50 per second)
+        :param audio: path of the audio file, or the 16kHz waveform
+        :return: array of shape (frames, n_layer + 1, 384)
+        """
+        return np.concatenate(list(self.audio2feat_stream(audio)), axis=0)
 
-    def audio2feat(self,audio_path):
-        # get the sample rate of the audio
+    def audio2feat_transcribe(self,audio_path):
+        # the former path, one 30s window at a time through transcribe
         result = self.model.transcribe(audio_path)
         embed_list = []
         for emb in result['segments']:
@@ -0,0 +1,40 @@
+import argparse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Pack a prepared avatar into memory-mapped blocks for a fast startup.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        "--avatar_id",
+        "-ai",
+        type=str,
+        default="my-avatar",
+        help="Id of the avatar saved by prepare_2d_avatar.py."
+    )
+
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Only check the checksums of all the blocks of an existing pack."
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    from da.avatar2d.asset_pack import PACK_DIR, load_pack, pack_avatar
+
+    args = parse_args()
+    avatar_path = f"./output/avatars2d/{args.avatar_id}"
+    if args.verify:
+        assets = load_pack(f"{avatar_path}/{PACK_DIR}", verify=True)
+        print(f"{avatar_path}/{PACK_DIR}: {len(assets.frames)} frames, checksums ok")
+    else:
+        pack_avatar(avatar_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from da.avatar2d.asset_pack import (PACK_DIR, AssetPackError, load_avatar_assets, load_pack,  # noqa: E402
+                                    pack_avatar, read_avatar_images)
+from da.avatar2d.face_compositor import FaceCompositor, mask_to_alpha  # noqa: E402
+from da.util.avatar_pack_benchmark import synthetic_avatar_folder  # noqa: E402
+
+
+@pytest.fixture
+def avatar_path(tmp_path):
+    path = str(tmp_path / "avatar")
+    synthetic_avatar_folder(path, frames=12, height=96, width=128)
+    return path
+
+
+def flip_byte(path, position):
+    with open(path, "r+b") as f:
+        f.seek(position)
+        value = f.read(1)[0]
+        f.seek(position)
+        f.write(bytes([value ^ 0xFF]))
+
+
+def test_pack_matches_the_png_assets(avatar_path):
+    pack_path = pack_avatar(avatar_path)
+    expected = read_avatar_images(avatar_path)
+    assets = load_pack(pack_path, verify=True)
+
+    assert isinstance(assets.frames, np.memmap)
+    np.testing.assert_array_equal(assets.frames, np.stack(expected.frames))
+    assert len(assets.masks) == len(expected.masks)
+    for mask, expected_mask in zip(assets.masks, expected.masks):
+        np.testing.assert_array_equal(mask, mask_to_alpha(expected_mask))
+    assert assets.coords == [tuple(box) for box in expected.coords]
+    assert assets.mask_coords == expected.mask_coords
+    for latent, expected_latent in zip(assets.latents, expected.latents):
+        assert latent.shape == expected_latent.shape
+        assert (latent == expected_latent).all()
+
+    # the same blended frames
+    face = np.full((32, 32, 3), 200, dtype=np.uint8)
+    compositor = FaceCompositor(assets.frames, assets.coords, assets.masks, assets.mask_coords)
+    expected_compositor = FaceCompositor(expected.frames, expected.coords, expected.masks, expected.mask_coords)
+    np.testing.assert_array_equal(compositor.compose(3, face), expected_compositor.compose(3, face))
+
+
+def test_corrupted_pack(avatar_path):
+    pack_path = pack_avatar(avatar_path)
+
+    # the checksums of the frames are only read on verify
+    flip_byte(os.path.join(pack_path, "frames.npy"), 1000)
+    load_pack(pack_path)
+    with pytest.raises(AssetPackError, match="checksum"):
+        load_pack(pack_path, verify=True)
+
+    # those of the boxes always
+    flip_byte(os.path.join(pack_path, "coords.npy"), os.path.getsize(os.path.join(pack_path, "coords.npy")) - 1)
+    with pytest.raises(AssetPackError, match="checksum"):
+        load_pack(pack_path)
+    # the avatar falls back to the png files
+    assert isinstance(load_avatar_assets(avatar_path).frames, list)
+
+    pack_avatar(avatar_path)
+    with open(os.path.join(pack_path, "masks.npy"), "r+b") as f:
+        f.truncate(100)
+    with pytest.raises(AssetPackError, match="bytes"):
+        load_pack(pack_path)
+
+
+def test_no_pack(avatar_path):
+    assert not os.path.exists(os.path.join(avatar_path, PACK_DIR))
+    assert len(load_avatar_assets(avatar_path).frames) == 12
+    with pytest.raises(AssetPackError):
+        load_pack(os.path.join(avatar_path, PACK_DIR))
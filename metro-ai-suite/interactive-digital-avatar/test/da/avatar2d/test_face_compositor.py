@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torchvision")
+
+from da.avatar2d.face_compositor import FaceCompositor  # noqa: E402
+from da.util.blending_benchmark import synthetic_avatar  # noqa: E402
+from ext.musetalk.utils.blending import get_image_blending  # noqa: E402
+
+
+@pytest.mark.parametrize("precision,max_difference", [("uint8", 0), ("float32", 0), ("float16", 1)])
+@pytest.mark.parametrize("three_channel_masks", [True, False])
+def test_compositor_matches_pil(precision, max_difference, three_channel_masks):
+    frame_list, coord_list, mask_list, mask_coords_list, face_list = synthetic_avatar(
+        240, 320, three_channel_masks=three_channel_masks)
+    compositor = FaceCompositor(frame_list, coord_list, mask_list, mask_coords_list, precision)
+
+    for idx, face in enumerate(face_list):
+        expected = get_image_blending(frame_list[idx].copy(), face, coord_list[idx], mask_list[idx],
+                                      mask_coords_list[idx])
+        frame = compositor.compose(idx, face)
+        difference = np.abs(frame.astype(np.int16) - expected.astype(np.int16))
+        assert difference.max() <= max_difference
+    # the avatar frames are left as they are
+    assert not np.shares_memory(frame, frame_list[-1])
+
+
+def test_preallocated_output():
+    frame_list, coord_list, mask_list, mask_coords_list, face_list = synthetic_avatar(64, 96, frames=3)
+    compositor = FaceCompositor(frame_list, coord_list, mask_list, mask_coords_list)
+
+    out = np.empty_like(frame_list[0])
+    assert compositor.compose(1, face_list[1], out) is out
+    np.testing.assert_array_equal(out, compositor.compose(1, face_list[1]))
+    assert compositor.original(2, out) is out
+    np.testing.assert_array_equal(out, frame_list[2])
+
+    with pytest.raises(ValueError):
+        FaceCompositor(frame_list, coord_list, mask_list, mask_coords_list, "int4")
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("openvino")
+
+from da.avatar2d.unet_vae import UnetVaeInfer  # noqa: E402
+from da.util.unet_vae_benchmark import FixedBatch, save_synthetic_unet_vae, synthetic_inputs  # noqa: E402
+
+TIMESTEP = np.array([0])
+
+
+@pytest.fixture(scope="module")
+def xml_path(tmp_path_factory):
+    return save_synthetic_unet_vae(str(tmp_path_factory.mktemp("unet_vae") / "unet-vae-b4.xml"), channels=8)
+
+
+def assert_faces_close(faces, expected):
+    assert faces.shape == expected.shape and faces.dtype == np.uint8
+    # kernels of other batches may round a few values differently
+    assert np.abs(faces.astype(np.int16) - expected).max() <= 1
+
+
+@pytest.mark.parametrize("batch_sizes", [(4,), (1, 2, 4), (2, 8), ()])
+def test_matches_the_padded_fixed_batch(xml_path, batch_sizes):
+    audio, latent = synthetic_inputs(11)
+    fixed = FixedBatch(xml_path, "CPU")
+    infer = UnetVaeInfer(xml_path, "CPU", batch_sizes)
+    for frames in (1, 3, 4, 11):
+        expected = np.concatenate([fixed.infer(audio[i:min(i + 4, frames)], latent[i:min(i + 4, frames)], TIMESTEP)
+                                   for i in range(0, frames, 4)])
+        assert_faces_close(infer.infer(audio[:frames], latent[:frames], TIMESTEP), expected)
+
+
+def test_split(xml_path):
+    infer = UnetVaeInfer(xml_path, "CPU", [4, 1, 2])
+    assert infer.split(3) == [(3, 4)]
+    assert infer.split(2) == [(2, 2)]
+    assert infer.split(9) == [(4, 4), (4, 4), (1, 1)]
+    assert UnetVaeInfer(xml_path, "CPU", []).split(9) == [(9, -1)]
+
+
+@pytest.mark.parametrize("batch_sizes", [(1, 2, 4), ()])
+def test_async_results_in_submission_order(xml_path, batch_sizes):
+    audio, latent = synthetic_inputs(40, seed=1)
+    infer = UnetVaeInfer(xml_path, "CPU", batch_sizes, performance_hint="THROUGHPUT", infer_requests=3)
+    counts = [4, 1, 3, 9, 2, 4, 1, 6, 4, 2, 4]
+    starts = np.cumsum([0] + counts)
+
+    results = []
+    for i, count in enumerate(counts):
+        infer.submit(audio[starts[i]:starts[i + 1]], latent[starts[i]:starts[i + 1]], TIMESTEP, userdata=i)
+        results += infer.results()
+    results += infer.results(wait=True)
+
+    assert infer.pending == 0
+    assert [userdata for userdata, _ in results] == list(range(len(counts)))
+    for i, faces in results:
+        expected = infer.infer(audio[starts[i]:starts[i + 1]], latent[starts[i]:starts[i + 1]], TIMESTEP)
+        np.testing.assert_array_equal(faces, expected)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from da.util.whisper_benchmark import feature2chunks_loop, save_random_model, synthetic_speech  # noqa: E402
+from ext.musetalk.whisper.audio2feature import Audio2Feature  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("whisper") / "tiny.pt")
+    save_random_model(path)
+    return path
+
+
+@pytest.mark.parametrize("seconds,batch_size", [(5, 4), (30, 4), (65, 2), (65, 1)])
+def test_encoder_matches_transcribe(model_path, seconds, batch_size):
+    audio_processor = Audio2Feature(model_path=model_path, batch_size=batch_size)
+    audio = synthetic_speech(seconds)
+
+    expected = audio_processor.audio2feat_transcribe(audio)
+    features = audio_processor.audio2feat(audio)
+    # 50 features per second, layers of whisper tiny
+    assert features.shape == expected.shape == (seconds * 50, 5, 384)
+    np.testing.assert_allclose(features, expected, rtol=1e-4, atol=1e-4)
+
+    chunks = audio_processor.feature2chunks(features, fps=25)
+    assert len(chunks) == seconds * 25 + 2
+
+    streamed = np.concatenate(list(audio_processor.audio2chunks_stream(audio, fps=25)))
+    np.testing.assert_array_equal(streamed, chunks)
+
+
+def test_openvino_encoder_matches_transcribe(model_path, tmp_path):
+    pytest.importorskip("openvino")
+    from da.util.whisper_torch2ov import export_encoder
+
+    xml_path = str(tmp_path / "tiny-encoder.xml")
+    export_encoder(model_path, xml_path)
+    audio_processor = Audio2Feature(model_path=model_path, batch_size=2)
+    audio = synthetic_speech(65)
+    expected = audio_processor.audio2feat_transcribe(audio)
+
+    audio_processor.load_ov_encoder(xml_path, config={"INFERENCE_PRECISION_HINT": "f32"})
+    np.testing.assert_allclose(audio_processor.audio2feat(audio), expected, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("fps", [12, 20, 24, 25, 29.97, 30, 50, 60])
+@pytest.mark.parametrize("length", [1, 2, 9, 50, 251, 1500, 3250])
+def test_feature2chunks_matches_the_loop(fps, length):
+    # the chunk methods do not use the model
+    audio_processor = Audio2Feature.__new__(Audio2Feature)
+    rng = np.random.default_rng(length)
+    features = rng.standard_normal((length, 2, 384)).astype(np.float32)
+
+    expected = np.stack(feature2chunks_loop(audio_processor, features, fps))
+    chunks = audio_processor.feature2chunks(features, fps)
+    np.testing.assert_array_equal(chunks, expected)
+    if fps in (25, 50):
+        # windows at a whole number of features apart are a view
+        assert np.shares_memory(chunks, chunks.base) and not chunks.flags.writeable
+
+    for audio_feat_length in ([1, 1], [3, 2]):
+        np.testing.assert_array_equal(audio_processor.feature2chunks(features, fps, audio_feat_length),
+                                      np.stack(feature2chunks_loop(audio_processor, features, fps, audio_feat_length)))
+
+    # the features in random blocks, some empty
+    cuts = np.sort(rng.integers(0, length + 1, 4))
+    blocks = np.split(features, cuts)
+    streamed = list(audio_processor.feature2chunks_stream(iter(blocks), fps))
+    np.testing.assert_array_equal(np.concatenate(streamed), expected)
@@ -1,237 +1,346 @@
-import numpy as np
-import pickle
-import cv2
 import os
 import csv
+import json
 import argparse
 
-### plot gt and detection results in same image
-
-## compare the distance of center point
-def compare_center_distance(detections, gts):
-    num_frame = len(detections)
-
-    errors_percentages =[]
-
-    for i in range(num_frame):
-        frame_detection = detections[i]
-        frame_gt = gts[i]
-
-        print("frameId: ", frame_detection['frameId'])
-        print("detections: ", frame_detection['detections'])
-        print("gts: ", frame_gt['gts'])
-
-
-        # find gt for each detection and compute the nearst distance
-        
-        for detection in frame_detection['detections']:
-            radar_cx = detection['radar_cx']
-            radar_cy = detection['radar_cy']
-            group = detection['group']
-
-            distances =[]
-
-            ## remove useless frame_detection
-            if radar_cx == 0.0 and radar_cy == 0.0:
-                continue
-
-            for gt in frame_gt['gts']:
-                gt_cx = gt['gt_xc']
-                gt_cy = gt['gt_yc']
-
-                ## change gt , radar to same coordinates
-                temp = gt_cx
-                gt_cx = gt_cy
-                gt_cy= -temp
-                gt_group = gt['group']
-                
-                # compute the distance of nearest gt if exsit
-
-                distance = np.sqrt((radar_cx - gt_cx) ** 2 + (radar_cy - gt_cy) ** 2)
-                distances.append(distance)
-                print("frameId: ", i, "group: ", group, "gt_group: ", gt_group, "radar_cx: ", radar_cx, "radar_cy: ", radar_cy, "gt_cx: ", gt_cx, "gt_cy: ", gt_cy, "distance: ", distance)
-            
-            # find the nearest distance for each detection
-            min_dist_detction = min(distances)
-            print('**distance for detection**: ', "frameId: ", i, "radar_cx: ", radar_cx, "radar_cy: ", radar_cy, "min dist: ", min_dist_detction)
-            
-            error_percentage = min_dist_detction / (np.sqrt(radar_cx**2+radar_cy**2)) *100
-            print('error_percentage: ', error_percentage)
-
-            if error_percentage < 20:
-                errors_percentages.append(error_percentage)
-    
-    average_error = np.mean(errors_percentages)
-    print('average error: ', average_error)
-
-
-            
-
-        
-
-
-def accuracy_benchmark(img_dir, output_dir, gt_file_path, tracking_file_path):
-    # read tracking csv files 
-
-    frame_detections = []  # save radar detection results(tracking results)
-    frame_gts = [] # save gt results
-
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+## compare tracking results with gt by the distance of center points
+
+# default match gate, in meters
+MAX_DISTANCE = 2.0
+# scenes with more gt or tracked objects than this are matched through a KD-tree
+KDTREE_MIN_OBJECTS = 64
+# assignment problems with more cells than this are split into connected components
+DENSE_ASSIGNMENT_CELLS = 4096
+# errors larger than this, relative to the range of the tracked object, are left out of the average errors
+ERROR_PERCENTAGE_LIMIT = 20
+
+
+def read_tracking_results(tracking_file_path):
+    """
+    Reads radarResults.csv, returns one (frameId, positions, ids) per row with
+    the tracked objects in the same coordinates as the gt. Objects at (0, 0)
+    are empty slots of the tracker and are dropped. ids is None if the
+    row does not have one radarID per object.
+    """
+    frames = []
     with open(tracking_file_path, mode='r') as detection_file:
         tracking_csv_reader = csv.reader(detection_file)
 
         # skip the header
         next(tracking_csv_reader)
         for row in tracking_csv_reader:
-            print(row)
-            frameId = row[0]
-            radarRois = row[1]
-            radarSizes = row[2]
-            radarStates = row[3]
-            radarId = row[4]
-
-            # Clean and split the radarRois and radarSizes strings
-            parts = radarRois.split()
-            radarSize = radarSizes.split()
-
-            if len(parts) % 4 == 0:
-                num_groups = len(parts) // 4
-                frame_data = {
-                    'frameId': frameId,
-                    'detections': []
-                }
-                for i in range(num_groups):
-                    try:
-                        # radar_x, radar_y actually is the center coordinates of the radar box
-                        radar_x, radar_y, vx, vy = map(float, parts[i*4:(i+1)*4])
-                        w, h = map(float, radarSize[i*2:(i+1)*2])
-
-                        # align with garnet park demo
-                        radar_y = -radar_y  # for plot
-                        xSize = 4.2
-                        ySize = 1.7
-
-                        radar_x1 = radar_x + xSize / 2
-                        radar_y1 = radar_y - ySize / 2
-
-                        radar_x2 = radar_x - xSize / 2
-                        radar_y2 = radar_y + ySize / 2
-                        detection = {
-                            'group': i + 1,
-                            'radar_x1': radar_x1,
-                            'radar_y1': radar_y1,
-                            'radar_x2': radar_x2,
-                            'radar_y2': radar_y2,
-                            'radar_cx': radar_x,
-                            'radar_cy': radar_y
-                        }
-
-                        frame_data['detections'].append(detection)
-                        print("boxes left: ", (radar_x1, radar_y1), "boxes right: ", (radar_x2, radar_y2))
-                    except ValueError as e:
-                        print(f"Error converting to float: {e}")
-                        print(f"Problematic data: {parts[i*4:(i+1)*4]}")
-                frame_detections.append(frame_data)
+            frameId = row[0].strip()
+            radarRois = row[1].split()
+            radarIds = row[4].split() if len(row) > 4 else []
+
+            positions = np.empty((0, 2))
+            ids = np.empty(0, dtype=np.int64)
+            if len(radarRois) % 4 == 0:
+                try:
+                    # radar_x, radar_y, vx, vy; radar_x, radar_y is the center of the radar box
+                    rois = np.array(radarRois, dtype=np.float64).reshape(-1, 4)
+                    # align with garnet park demo
+                    positions = np.stack([rois[:, 0], -rois[:, 1]], axis=1)
+                    ids = np.array(radarIds, dtype=np.int64) if len(radarIds) == len(rois) else None
+                except ValueError as e:
+                    print(f"Error converting frame {frameId}: {e}")
             else:
-                print(f"Invalid number of coordinates in radarRois: {radarRois}")
+                print(f"Invalid number of coordinates in radarRois: {row[1]}")
+
+            valid = (positions[:, 0] != 0.0) | (positions[:, 1] != 0.0)
+            frames.append((frameId, positions[valid], ids[valid] if ids is not None else None))
+    return frames
 
-    
+
+def read_ground_truth(gt_file_path):
+    """
+    Reads radar_gt.csv written by read_GT_plot_multiple.py, returns one
+    (frameId, positions, ids) per row. ids is None unless the file has a
+    fourth column with the track id of every gt box.
+    """
+    frames = []
     with open(gt_file_path, mode='r') as gt_file:
         gt_csv_reader = csv.reader(gt_file)
 
         # skip the header
         next(gt_csv_reader)
         for row in gt_csv_reader:
-            print(row)
             frameId = row[0]
             radar_rois = row[1]
-            class_labels = row[2]
+            gt_ids = row[3].split() if len(row) > 3 else []
 
             # Clean and split the radar_rois string
             radar_rois_cleaned = radar_rois.replace('[', '').replace(']', '').replace(',', ' ')
             parts_gt = radar_rois_cleaned.split()
-            # parts_gt = radar_rois.split()
-            labels_gt = class_labels.split()
 
+            positions = np.empty((0, 2))
             if len(parts_gt) % 6 == 0:
-                num_groups_gt = len(parts_gt) // 6
-                frame_data = {
-                    'frameId': frameId,
-                    'gts': []
-                }
-                for i in range(num_groups_gt):
-                    try:
-                        gt_x1, gt_y1, gt_x2, gt_y2, gt_xc, gt_yc = map(float, parts_gt[i*6:(i+1)*6])
-                        ## compute center point of bounding box
-
-                        gt = {
-                            'group': i + 1,
-                            'gt_x1': gt_x1,
-                            'gt_y1': gt_y1,
-                            'gt_x2': gt_x2,
-                            'gt_y2': gt_y2,
-                            'gt_xc': gt_xc,
-                            'gt_yc': gt_yc
-                        }
-                        frame_data['gts'].append(gt)
-                        print("gt boxes left: ", (gt_x1, gt_y1), "gt boxes right: ", (gt_x2, gt_y2))
-                    except ValueError as e:
-                        print(f"Error converting to float: {e}")
-                        print(f"Problematic data: {parts_gt[i*4:(i+1)*4]}")
-                frame_gts.append(frame_data)
+                try:
+                    # x1, y1, x2, y2, xc, yc of each box
+                    boxes = np.array(parts_gt, dtype=np.float64).reshape(-1, 6)
+                    ## change gt to the radar coordinates
+                    positions = np.stack([boxes[:, 5], -boxes[:, 4]], axis=1)
+                except ValueError as e:
+                    print(f"Error converting frame {frameId}: {e}")
             else:
-                print(f"Invalid number of coordinates in radar_rois: {radar_rois}")    
-
-
-        print('len detections: ', len(frame_detections))
-        print('len gts: ', len(frame_gts))
-
-        compare_center_distance(frame_detections, frame_gts)
-
-
-
-
-
-
-        
-
+                print(f"Invalid number of coordinates in radar_rois: {radar_rois}")
+
+            ids = np.array(gt_ids, dtype=np.int64) if len(row) > 3 and len(gt_ids) == len(positions) else None
+            frames.append((frameId, positions, ids))
+    return frames
+
+
+def nearest_distances(gts, tracks):
+    """ Distance from every tracked object to its nearest gt object, without a gate. """
+    if max(len(gts), len(tracks)) <= KDTREE_MIN_OBJECTS:
+        return np.sqrt(((gts[:, None, :] - tracks[None, :, :]) ** 2).sum(axis=2)).min(axis=0)
+    return cKDTree(gts).query(tracks)[0]
+
+
+def error_percentages(distances, tracks):
+    """ Errors relative to the range of the tracked objects, in percent, those below ERROR_PERCENTAGE_LIMIT. """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        errors = distances / np.hypot(tracks[:, 0], tracks[:, 1]) * 100
+    return errors[errors < ERROR_PERCENTAGE_LIMIT]
+
+
+def candidate_pairs(gts, tracks, max_distance):
+    """
+    Returns (gt rows, track rows, distances) of the gt and tracked objects
+    closer than max_distance: from the full distance matrix, or from a
+    KD-tree in large scenes.
+    """
+    if max(len(gts), len(tracks)) <= KDTREE_MIN_OBJECTS:
+        distances = np.sqrt(((gts[:, None, :] - tracks[None, :, :]) ** 2).sum(axis=2))
+        rows, cols = np.nonzero(distances <= max_distance)
+        return rows, cols, distances[rows, cols]
+    pairs = cKDTree(gts).sparse_distance_matrix(cKDTree(tracks), max_distance, output_type='ndarray')
+    return pairs['i'].astype(np.intp), pairs['j'].astype(np.intp), pairs['v']
+
+
+def _assign_dense(rows, cols, costs, shape, unmatched_cost):
+    matrix = np.full(shape, unmatched_cost, dtype=np.float64)
+    edges = np.full(shape, -1, dtype=np.intp)
+    matrix[rows, cols] = costs
+    edges[rows, cols] = np.arange(len(rows))
+    chosen = edges[linear_sum_assignment(matrix)]
+    return chosen[chosen >= 0]
+
+
+def assign(rows, cols, costs, unmatched_cost, shape=None):
+    """
+    Minimum cost one-to-one assignment (Hungarian) restricted to the edges
+    (rows[k], cols[k]) of cost costs[k]; any other pair costs unmatched_cost.
+    Returns the indices of the chosen edges. Large problems are solved per
+    connected component of the edges. shape, the number of rows and columns,
+    saves renumbering them in small problems.
+    """
+    if not len(rows):
+        return np.empty(0, dtype=np.intp)
+    if shape is not None and shape[0] * shape[1] <= DENSE_ASSIGNMENT_CELLS:
+        return _assign_dense(rows, cols, costs, shape, unmatched_cost)
+    row_ids, row_index = np.unique(rows, return_inverse=True)
+    col_ids, col_index = np.unique(cols, return_inverse=True)
+    n, m = len(row_ids), len(col_ids)
+    if n * m <= DENSE_ASSIGNMENT_CELLS:
+        return _assign_dense(row_index, col_index, costs, (n, m), unmatched_cost)
+
+    graph = coo_matrix((np.ones(len(rows)), (row_index, n + col_index)), shape=(n + m, n + m))
+    _, labels = connected_components(graph, directed=False)
+    edge_labels = labels[row_index]
+    order = np.argsort(edge_labels, kind='stable')
+    chosen = []
+    for edges in np.split(order, np.flatnonzero(np.diff(edge_labels[order])) + 1):
+        if len(edges) == 1:
+            chosen.append(edges)
+            continue
+        _, r = np.unique(row_index[edges], return_inverse=True)
+        _, c = np.unique(col_index[edges], return_inverse=True)
+        chosen.append(edges[_assign_dense(r, c, costs[edges], (r.max() + 1, c.max() + 1), unmatched_cost)])
+    return np.concatenate(chosen)
+
+
+class MotAccumulator:
+    """
+    CLEAR MOT and identity metrics of a tracker against the gt, fed one frame
+    at a time. A gt object and a tracked object match if their centers are
+    at most max_distance apart. As in CLEAR MOT, a gt object keeps the track
+    it matched last while it stays within the gate, the other objects are
+    matched by minimum total distance. Without gt ids, id switches and IDF1
+    are not computed.
+
+    average_error is the error of the original benchmark: every tracked object
+    against its nearest gt object, with no gate and no one-to-one matching.
+    gated_average_error is the same over the matches only.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.frames = 0
+        self.num_gt = 0
+        self.num_tracks = 0
+        self.matches = 0
+        self.id_switches = 0
+        self.total_distance = 0.0
+        self.errors = []
+        self.gated_errors = []
+        self.identities = True
+        self.last_match = {}
+        self.id_pairs = []
+
+    def update(self, gts, gt_ids, tracks, track_ids):
+        """ Adds a frame, returns (gt rows, track rows, distances) of its matches. """
+        self.frames += 1
+        self.num_gt += len(gts)
+        self.num_tracks += len(tracks)
+        identities = gt_ids is not None and track_ids is not None
+        self.identities &= identities
+        if not len(gts) or not len(tracks):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0)
+
+        self.errors.append(error_percentages(nearest_distances(gts, tracks), tracks))
+        rows, cols, distances = candidate_pairs(gts, tracks, self.max_distance)
+        kept = np.empty(0, dtype=np.intp)
+        if identities:
+            self.id_pairs.append(np.stack([gt_ids[rows], track_ids[cols]], axis=1))
+            if self.last_match:
+                last = np.array([self.last_match.get(gt_id, -1) for gt_id in gt_ids[rows].tolist()], dtype=np.int64)
+                kept = np.flatnonzero((last == track_ids[cols]) & (last >= 0))
+                if len(kept) > 1 and (np.bincount(rows[kept]).max() > 1 or np.bincount(cols[kept]).max() > 1):
+                    # two gt objects may have last matched the same track: keep the closest
+                    kept = kept[np.argsort(distances[kept], kind='stable')]
+                    kept = kept[np.unique(cols[kept], return_index=True)[1]]
+                    kept = kept[np.unique(rows[kept], return_index=True)[1]]
+
+        if len(kept):
+            free_rows = np.ones(len(gts), dtype=bool)
+            free_cols = np.ones(len(tracks), dtype=bool)
+            free_rows[rows[kept]] = False
+            free_cols[cols[kept]] = False
+            free = np.flatnonzero(free_rows[rows] & free_cols[cols])
+        else:
+            free = np.arange(len(rows))
+        # larger than any sum of matched distances: match as many objects as possible first
+        unmatched_cost = self.max_distance * (len(free) + 1) + 1.0
+        chosen = free[assign(rows[free], cols[free], distances[free], unmatched_cost, (len(gts), len(tracks)))]
+        matched = np.concatenate([kept, chosen]) if len(kept) else chosen
+        rows, cols, distances = rows[matched], cols[matched], distances[matched]
+
+        self.matches += len(matched)
+        self.total_distance += float(distances.sum())
+        self.gated_errors.append(error_percentages(distances, tracks[cols]))
+        if identities:
+            for gt_id, track_id in zip(gt_ids[rows].tolist(), track_ids[cols].tolist()):
+                if self.last_match.get(gt_id, track_id) != track_id:
+                    self.id_switches += 1
+                self.last_match[gt_id] = track_id
+        return rows, cols, distances
+
+    def identity_matches(self):
+        """ IDTP: frames in which the gt ids and track ids of a one-to-one id matching are within the gate. """
+        if not self.id_pairs:
+            return 0
+        pairs, counts = np.unique(np.concatenate(self.id_pairs), axis=0, return_counts=True)
+        chosen = assign(pairs[:, 0], pairs[:, 1], -counts.astype(np.float64), 0.0)
+        return int(counts[chosen].sum())
+
+    def summary(self):
+        misses = self.num_gt - self.matches
+        false_positives = self.num_tracks - self.matches
+        summary = {
+            "frames": self.frames,
+            "max_distance": self.max_distance,
+            "gt": self.num_gt,
+            "tracks": self.num_tracks,
+            "matches": self.matches,
+            "false_positives": false_positives,
+            "misses": misses,
+            "id_switches": self.id_switches if self.identities else None,
+            "mota": None,
+            "motp": self.total_distance / self.matches if self.matches else None,
+            "idf1": None,
+            "idp": None,
+            "idr": None,
+        }
+        if self.num_gt:
+            summary["mota"] = 1 - (misses + false_positives + (summary["id_switches"] or 0)) / self.num_gt
+        if self.identities and self.num_gt + self.num_tracks:
+            idtp = self.identity_matches()
+            summary["idf1"] = 2 * idtp / (self.num_gt + self.num_tracks)
+            summary["idp"] = idtp / self.num_tracks if self.num_tracks else None
+            summary["idr"] = idtp / self.num_gt if self.num_gt else None
+        for key, errors in (("average_error", self.errors), ("gated_average_error", self.gated_errors)):
+            errors = np.concatenate(errors) if errors else np.empty(0)
+            summary[key] = float(errors.mean()) if len(errors) else None
+        return summary
+
+
+def _percent(value):
+    return "n/a" if value is None else f"{value * 100:.2f}%"
+
+
+def format_summary(summary):
+    motp = "n/a" if summary["motp"] is None else f"{summary['motp']:.3f} m"
+    id_switches = "n/a" if summary["id_switches"] is None else summary["id_switches"]
+    average_error = "n/a" if summary["average_error"] is None else summary["average_error"]
+    gated_average_error = "n/a" if summary["gated_average_error"] is None else summary["gated_average_error"]
+    lines = [
+        f"frames: {summary['frames']}, gt objects: {summary['gt']}, tracked objects: {summary['tracks']}",
+        f"matches: {summary['matches']}, false positives: {summary['false_positives']},"
+        f" misses: {summary['misses']}, id switches: {id_switches}",
+        f"MOTA: {_percent(summary['mota'])}, MOTP: {motp} (gate {summary['max_distance']} m)",
+        f"IDF1: {_percent(summary['idf1'])}, IDP: {_percent(summary['idp'])}, IDR: {_percent(summary['idr'])}",
+        f"average error: {average_error}",
+        f"gated average error: {gated_average_error} (matches only)",
+    ]
+    return "\n".join(lines)
+
+
+def compare_center_distance(detections, gts, max_distance=MAX_DISTANCE, quiet=False):
+    """ Matches the tracking results with the gt frame by frame, returns the summary of the metrics. """
+    if len(detections) != len(gts):
+        print(f"{len(detections)} frames of tracking results for {len(gts)} frames of gt,"
+              f" comparing the first {min(len(detections), len(gts))}")
+    accumulator = MotAccumulator(max_distance)
+    for (frameId, tracks, track_ids), (gt_frameId, gt_positions, gt_ids) in zip(detections, gts):
+        rows, cols, distances = accumulator.update(gt_positions, gt_ids, tracks, track_ids)
+        if not quiet:
+            matches = " ".join(f"{track_ids[col] if track_ids is not None else col + 1}->{gt_ids[row] if gt_ids is not None else row + 1}:{distance:.2f}"
+                               for row, col, distance in zip(rows, cols, distances))
+            print(f"frameId: {frameId} gt: {len(gt_positions)} tracks: {len(tracks)} matches: [{matches}]")
+    return accumulator.summary()
+
+
+def accuracy_benchmark(gt_file_path, tracking_file_path, max_distance=MAX_DISTANCE, quiet=False):
+    frame_detections = read_tracking_results(tracking_file_path)
+    frame_gts = read_ground_truth(gt_file_path)
+    summary = compare_center_distance(frame_detections, frame_gts, max_distance, quiet)
+    print(format_summary(summary))
+    return summary
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Read radar gt and detection results and compute accuracy")
     parser.add_argument("--folder_path", required=True, type=str, help="Path to the gt and tracking results")
-    
+    parser.add_argument("--max_distance", default=MAX_DISTANCE, type=float,
+                        help="Largest distance in meters between a gt and a tracked object that match")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary, not the matches of every frame")
+    parser.add_argument("--json", type=str, help="Also write the summary to this JSON file")
+
     args = parser.parse_args()
     folder_path = args.folder_path
 
-    ### params
-    ## birdview shape
-    resolution = 100/512
-    width = 512
-    height = 256
-
-    ## original image shape
-    ori_img_width = 640
-    ori_img_height = 480
-
-    ## origin coordinates
-    x_min = 0.0
-    x_min_pixel = x_min/resolution
-    origin_row = int(height + x_min_pixel)
-    origin_col = int(width/2)
-    print("origin_row: ", origin_row)
-    print("origin_col: ", origin_col)
-
-    # Define the directories containing the ground truth and images
-    gt_dir = os.path.join(folder_path, "gt")
-    img_dir = os.path.join(folder_path, "left")
-    output_dir = os.path.join(folder_path, "gt_images") # new directory for saving gt images
-
-    # Create the output directory if it does not exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
     # CSV file setup
     gt_file_path = os.path.join(folder_path, 'radar_gt.csv')
     tracking_file_path = os.path.join(folder_path, 'radarResults.csv')
 
-    accuracy_benchmark(img_dir, output_dir, gt_file_path, tracking_file_path)
+    summary = accuracy_benchmark(gt_file_path, tracking_file_path, args.max_distance, args.quiet)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
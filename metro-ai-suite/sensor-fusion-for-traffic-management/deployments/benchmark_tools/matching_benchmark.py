@@ -0,0 +1,114 @@
+import os
+import csv
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from accuracy_benchmark import compare_center_distance, format_summary, read_ground_truth, read_tracking_results
+
+## time the accuracy benchmark on a generated dataset, and the nearest gt loops it replaced
+
+
+def generate_dataset(folder_path, frames=100000, objects=8, seed=0):
+    """
+    Writes radar_gt.csv (with gt track ids) and radarResults.csv for objects
+    driving across the radar field of view. The tracker output is the gt
+    with noise, misses, false positives, empty slots and now and then a new
+    track id for an object.
+    """
+    rng = np.random.default_rng(seed)
+    # radar coordinates: x ahead, y to the left
+    start = np.stack([rng.uniform(5, 60, objects), rng.uniform(-15, 15, objects)], axis=1)
+    speed = np.stack([rng.uniform(-0.5, 0.5, objects), rng.uniform(-0.1, 0.1, objects)], axis=1)
+    track_ids = np.arange(objects)
+    next_track_id = objects
+
+    with open(os.path.join(folder_path, 'radar_gt.csv'), 'w', newline='') as gt_file, \
+            open(os.path.join(folder_path, 'radarResults.csv'), 'w') as tracking_file:
+        gt_writer = csv.writer(gt_file)
+        gt_writer.writerow(["Frame Num", "radar_rois", "Class Lables", "Track IDs"])
+        tracking_file.write("frameId,radarRoi,radarSize,radarState,radarID,\n")
+        gt_ids = np.arange(objects)
+        positions = start.copy()
+        for frame in range(frames):
+            positions += speed
+            # objects leaving the field of view come back as new gt objects
+            out = (positions[:, 0] < 3) | (positions[:, 0] > 70) | (np.abs(positions[:, 1]) > 20)
+            if out.any():
+                positions[out] = np.stack([rng.uniform(5, 60, out.sum()), rng.uniform(-15, 15, out.sum())], axis=1)
+                gt_ids[out] = gt_ids.max() + 1 + np.arange(out.sum())
+                track_ids[out] = next_track_id + np.arange(out.sum())
+                next_track_id += out.sum()
+            switched = rng.random(objects) < 0.001
+            track_ids[switched] = next_track_id + np.arange(switched.sum())
+            next_track_id += switched.sum()
+
+            # gt boxes in the coordinates of read_GT_plot_multiple.py: xc = -y, yc = x
+            rois = [[round(-y - 1, 2), round(x - 2, 2), round(-y + 1, 2), round(x + 2, 2), round(-y, 4), round(x, 4)]
+                    for x, y in positions.tolist()]
+            gt_writer.writerow([f"{frame:06}", rois, ["car"] * objects, " ".join(map(str, gt_ids))])
+
+            seen = rng.random(objects) > 0.05
+            tracked = positions[seen] + rng.normal(0, 0.3, (seen.sum(), 2))
+            ids = track_ids[seen]
+            if rng.random() < 0.1:
+                tracked = np.vstack([tracked, [rng.uniform(5, 60), rng.uniform(-15, 15)]])
+                ids = np.append(ids, next_track_id)
+                next_track_id += 1
+            # empty slots of the tracker
+            tracked = np.vstack([tracked, [[0.0, 0.0]]])
+            ids = np.append(ids, 0)
+            # the tracking results have y pointing to the right
+            radar_rois = "   ".join(f"{x:.6f} {-y:.6f} 0.000000 0.000000" for x, y in tracked)
+            radar_sizes = "   ".join("4.200000 1.700000" for _ in tracked)
+            tracking_file.write(f"{frame} ,{radar_rois}   ,{radar_sizes}   ,{' '.join('2' for _ in tracked)} ,"
+                                f"{' '.join(map(str, ids))} ,\n")
+
+
+def nearest_gt_loops(detections, gts):
+    """ The per-object loops of the former compare_center_distance, without its prints. """
+    errors_percentages = []
+    for (_, tracks, _), (_, gt_positions, _) in zip(detections, gts):
+        for radar_cx, radar_cy in tracks.tolist():
+            distances = []
+            for gt_cx, gt_cy in gt_positions.tolist():
+                distances.append(np.sqrt((radar_cx - gt_cx) ** 2 + (radar_cy - gt_cy) ** 2))
+            if not distances:
+                continue
+            error_percentage = min(distances) / (np.sqrt(radar_cx**2 + radar_cy**2)) * 100
+            if error_percentage < 20:
+                errors_percentages.append(error_percentage)
+    return np.mean(errors_percentages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the accuracy benchmark matcher on a generated dataset")
+    parser.add_argument("--frames", default=100000, type=int, help="Number of generated frames")
+    parser.add_argument("--objects", default=8, type=int, help="Number of gt objects in every frame")
+    parser.add_argument("--folder_path", type=str, help="Keep the generated dataset in this folder")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folder_path = args.folder_path or tmp_dir
+        os.makedirs(folder_path, exist_ok=True)
+        start = time.perf_counter()
+        generate_dataset(folder_path, args.frames, args.objects)
+        print(f"generated {args.frames} frames in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        detections = read_tracking_results(os.path.join(folder_path, 'radarResults.csv'))
+        gts = read_ground_truth(os.path.join(folder_path, 'radar_gt.csv'))
+        print(f"read: {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        nearest_gt_loops(detections, gts)
+        elapsed = time.perf_counter() - start
+        print(f"nearest gt loops: {elapsed:.2f} s, {args.frames / elapsed:.0f} frames/s")
+
+        start = time.perf_counter()
+        summary = compare_center_distance(detections, gts, quiet=True)
+        elapsed = time.perf_counter() - start
+        print(f"matching and metrics: {elapsed:.2f} s, {args.frames / elapsed:.0f} frames/s")
+        print(format_summary(summary))
@@ -1,19 +1,24 @@
-from code import interact
 import os
-from termios import VLNEXT
-import threading
-import platform
-import re
-import signal
-import subprocess
+import csv
 import time
-from logger_create import create_logger
+import errno
+import struct
+import signal
+import platform
+import threading
 import argparse
+from logger_create import create_logger
 
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
 
-parser = argparse.ArgumentParser(description='cpu utilization monitor')
-parser.add_argument('-p', '--process_name', default="HceAI", type=str, help='process name')
-args = parser.parse_args()
+# Binary output: a header, then one record per process or thread and sample:
+# time (s), pid, tid (0 for the whole process), cpu (%), rss (KiB), voluntary and
+# non-voluntary context switches
+BINARY_MAGIC = b'CPUSAMP1'
+BINARY_RECORD = struct.Struct('<dIIfQQQ')
+CSV_FIELDS = ['time', 'pid', 'tid', 'name', 'cpu_percent', 'rss_kb', 'voluntary_ctxt_switches',
+              'nonvoluntary_ctxt_switches']
 
 
 def logger_cpu():
@@ -30,87 +35,269 @@ def logger_cpu():
     return logger
 
 
-logger = logger_cpu()
+def find_pids(process_name):
+    """ Pids of the processes whose name (as shown by top) contains process_name. """
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/comm') as f:
+                if process_name in f.read():
+                    pids.append(int(entry))
+        except OSError:
+            pass
+    return pids
 
-def run(cmd):
-    return os.system(cmd) # nosec
 
+class ProcFile:
+    """ A /proc file kept open and re-read from the start, one pread() per sample. """
 
-def pipe_run(cmd):
-    return subprocess.getstatusoutput(cmd) # nosec
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
 
+    def read(self):
+        return os.pread(self.fd, 4096, 0)
 
-class TopMonitorThread(threading.Thread):
-    def __init__(self, interval=10):
-        super(TopMonitorThread, self).__init__()
-        self.peak_cpu_rate = 0
-        self.peak_ram = 0
-        self.stopped = False
+    def close(self):
+        os.close(self.fd)
+
+
+def parse_stat(data):
+    """ Returns (name, utime + stime in ticks, rss in pages) of a /proc/<pid>/stat line. """
+    right = data.rindex(b')')
+    name = data[data.index(b'(') + 1:right].decode(errors='replace')
+    fields = data[right + 2:].split()
+    # fields[0] is field 3 (state) of proc(5)
+    return name, int(fields[11]) + int(fields[12]), int(fields[21])
+
+
+def parse_ctxt_switches(data):
+    voluntary = nonvoluntary = 0
+    for line in data.splitlines():
+        if line.startswith(b'voluntary_ctxt_switches:'):
+            voluntary = int(line.split()[1])
+        elif line.startswith(b'nonvoluntary_ctxt_switches:'):
+            nonvoluntary = int(line.split()[1])
+    return voluntary, nonvoluntary
+
+
+class ProcSampler:
+    """
+    Samples the CPU use, RSS and context switches of processes, and
+    optionally of each of their threads, from /proc/<pid>/stat,
+    /proc/<pid>/status and /proc/<pid>/task/<tid>/... every interval
+    seconds on a timer.
+
+    sample() returns one row per process (tid 0) and thread:
+    (time, pid, tid, name, cpu %, rss KiB, voluntary, non-voluntary context
+    switches). CPU use is over the time since the previous sample, so it
+    is 0 for the first sample of a process or thread. Threads share the
+    RSS of their process.
+    """
+
+    def __init__(self, pids=(), process_name=None, interval=1.0, threads=False, rescan_interval=5.0):
+        self.pids = set(pids)
+        self.process_name = process_name
         self.interval = interval
-    
-    def reset(self):
+        self.threads = threads
+        self.rescan_interval = rescan_interval
+        self.files = {}
+        self.previous = {}
+        self.last_rescan = None
+        self.stopped = threading.Event()
+
+    def _file(self, path):
+        f = self.files.get(path)
+        if f is None:
+            f = self.files[path] = ProcFile(path)
+        return f
+
+    def _drop(self, prefix):
+        for path in [path for path in self.files if path.startswith(prefix)]:
+            self.files.pop(path).close()
+
+    def _forget(self, pid):
+        """ Closes the files and drops the samples of a process that is no longer sampled. """
+        self._drop(f'/proc/{pid}/')
+        self.pids.discard(pid)
+        for key in [key for key in self.previous if key[0] == pid]:
+            del self.previous[key]
+
+    def _rescan(self, now):
+        if self.process_name and (self.last_rescan is None or now - self.last_rescan >= self.rescan_interval):
+            pids = set(find_pids(self.process_name))
+            for pid in self.pids - pids:
+                self._forget(pid)
+            self.pids = pids
+            self.last_rescan = now
+
+    def _read(self, base):
+        """ Returns (name, ticks, rss pages, voluntary, non-voluntary) of a process or thread. """
+        name, ticks, rss = parse_stat(self._file(base + '/stat').read())
+        voluntary, nonvoluntary = parse_ctxt_switches(self._file(base + '/status').read())
+        return name, ticks, rss, voluntary, nonvoluntary
+
+    def _row(self, now, pid, tid, base):
+        name, ticks, rss, voluntary, nonvoluntary = self._read(base)
+        key = (pid, tid)
+        cpu = 0.0
+        if key in self.previous:
+            last_time, last_ticks = self.previous[key]
+            if now > last_time:
+                cpu = (ticks - last_ticks) / CLK_TCK / (now - last_time) * 100
+        self.previous[key] = (now, ticks)
+        return (now, pid, tid, name, cpu, rss * PAGE_KB, voluntary, nonvoluntary)
+
+    def sample(self):
+        now = time.monotonic()
+        self._rescan(now)
+        rows = []
+        for pid in sorted(self.pids):
+            base = f'/proc/{pid}'
+            try:
+                rows.append(self._row(now, pid, 0, base))
+                if self.threads:
+                    tids = [int(tid) for tid in os.listdir(base + '/task')]
+                    for tid in sorted(tids):
+                        try:
+                            rows.append(self._row(now, pid, tid, f'{base}/task/{tid}'))
+                        except OSError as e:
+                            if e.errno not in (errno.ENOENT, errno.ESRCH):
+                                raise
+                            self._drop(f'{base}/task/{tid}/')
+                            self.previous.pop((pid, tid), None)
+            except OSError as e:
+                if e.errno not in (errno.ENOENT, errno.ESRCH):
+                    raise
+                # The process exited
+                self._forget(pid)
+        return rows
+
+    def run(self, on_sample, duration=None):
+        """ Calls on_sample(rows) every interval until stop() or duration seconds. """
+        start = time.monotonic()
+        deadline = start
+        while not self.stopped.is_set():
+            on_sample(self.sample())
+            deadline += self.interval
+            now = time.monotonic()
+            if deadline < now:
+                # Skip the samples missed while suspended or overloaded
+                deadline = now + self.interval - (now - deadline) % self.interval
+            if duration is not None and deadline - start > duration:
+                break
+            self.stopped.wait(deadline - now)
+
+    def stop(self):
+        self.stopped.set()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_FIELDS)
+        self.start = time.time() - time.monotonic()
+
+    def write(self, rows):
+        self.writer.writerows((round(self.start + row[0], 3),) + row[1:4] + (round(row[4], 1),) + row[5:]
+                              for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class BinaryWriter:
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(BINARY_MAGIC)
+        self.start = time.time() - time.monotonic()
+
+    def write(self, rows):
+        self.file.write(b''.join(BINARY_RECORD.pack(self.start + row[0], *row[1:3], *row[4:]) for row in rows))
+
+    def close(self):
+        self.file.close()
+
+
+def read_binary(path):
+    """ Yields the (time, pid, tid, cpu, rss_kb, voluntary, non-voluntary) records of a binary output. """
+    with open(path, 'rb') as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f'{path} is not a record_cpu_usage.py binary output')
+        data = f.read()
+    yield from BINARY_RECORD.iter_unpack(data[:len(data) - len(data) % BINARY_RECORD.size])
+
+
+def open_writer(path):
+    return BinaryWriter(path) if path.endswith('.bin') else CsvWriter(path)
+
+
+class PeakLogger:
+    """ Logs the total CPU and RSS of the processes and their peaks, as the top based monitor did. """
+
+    def __init__(self, logger):
+        self.logger = logger
         self.peak_cpu_rate = 0
         self.peak_ram = 0
-        self.stopped = False
- 
-    def run(self):
-        self.reset()
-        print('Start top monitor thread!')
-
-        end = time.time()
-        while not self.stopped:
-            if time.time() - end < self.interval:
-                continue
-            end = time.time()
-            '''
-            1625393 smarted+  20   0   17.2g   4.1g  93820 S 700.0   1.6   3817:19 HceAILLInfServe
-            1625282 smarted+  20   0   17.4g   3.8g  94024 S 635.0   1.5   3944:00 HceAILLInfServe
-            1621264 smarted+  20   0   17.8g   4.1g  93540 S 500.0   1.6   3593:05 HceAILLInfServe
-            1621201 smarted+  20   0   17.7g   4.0g  93708 S 425.0   1.6   3693:30 HceAILLInfServe
-            1621103 smarted+  20   0   17.8g   3.7g  93944 S 225.0   1.5   3636:49 HceAILLInfServe
-            1625106 smarted+  20   0   17.6g   4.1g  94004 S 180.0   1.6   3638:34 HceAILLInfServe
-            1621199 smarted+  20   0   17.7g   3.7g  93880 S 145.0   1.5   3697:48 HceAILLInfServe
-            1625868 smarted+  20   0   16.2g   3.6g  75808 S   0.0   1.4   3626:11 HceAILLInfServe
-
-            '''
-            r = os.popen("top -n 1 -b | grep {}".format(args.process_name)) # nosec
-            top_info = r.readlines()
-            cur_cpu_rate = 0
-            cur_ram = 0
-            active_pods = 0
-            for ln in top_info:
-                tmp = ln.strip().split()
-                cur_cpu_rate += int(float(tmp[8]))
-                if 'g' in tmp[5]:
-                    cur_ram += float(tmp[5].replace('g', ''))
-                if float(tmp[8]) > 0:
-                    active_pods += 1
-            if cur_cpu_rate > self.peak_cpu_rate:
-                self.peak_cpu_rate = cur_cpu_rate
-            if cur_ram > self.peak_ram:
-                self.peak_ram = cur_ram
-
-            logger.info("cpu: {}% (peak_cpu: {}%)\r".format(cur_cpu_rate, self.peak_cpu_rate))
-            logger.info("ram: {:.02f}g (peak_ram: {:.02f}g)\r".format(cur_ram, self.peak_ram))
-
-        print('Stop top monitor thread!')
- 
-    def stop(self):
-        print('Send signal to stop top monitor thread!')
-        self.stopped = True
+        self.cur_cpu_rate = 0
+        self.cur_ram = 0
+
+    def update(self, rows):
+        processes = [row for row in rows if row[2] == 0]
+        self.cur_cpu_rate = int(sum(row[4] for row in processes))
+        self.cur_ram = sum(row[5] for row in processes) / 1024 / 1024
+        self.peak_cpu_rate = max(self.peak_cpu_rate, self.cur_cpu_rate)
+        self.peak_ram = max(self.peak_ram, self.cur_ram)
+
+    def log(self):
+        self.logger.info("cpu: {}% (peak_cpu: {}%)\r".format(self.cur_cpu_rate, self.peak_cpu_rate))
+        self.logger.info("ram: {:.02f}g (peak_ram: {:.02f}g)\r".format(self.cur_ram, self.peak_ram))
+
 
 def main():
+    parser = argparse.ArgumentParser(description='cpu utilization monitor')
+    parser.add_argument('-p', '--process_name', default="HceAI", type=str, help='process name')
+    parser.add_argument('--pid', type=int, nargs='+', help='pids to monitor instead of the processes named process_name')
+    parser.add_argument('-i', '--interval', default=10.0, type=float, help='sampling interval in seconds')
+    parser.add_argument('--log_interval', default=10.0, type=float, help='seconds between two log lines')
+    parser.add_argument('-t', '--threads', action='store_true', help='also sample every thread')
+    parser.add_argument('-o', '--output', help='write every sample to this file, binary if it ends with .bin, else CSV')
+    parser.add_argument('-d', '--duration', type=float, help='stop after this many seconds')
+    args = parser.parse_args()
+
+    logger = logger_cpu()
     logger.info("CPU utilization monitoring start...")
 
-    topMonitor = TopMonitorThread()
-    topMonitor.start()
-    while True:
-        pass
-        
-    topMonitor.stop()
-    topMonitor.join()
+    sampler = ProcSampler(args.pid or (), None if args.pid else args.process_name, args.interval, args.threads)
+    writer = open_writer(args.output) if args.output else None
+    peak_logger = PeakLogger(logger)
+    log_every = max(1, round(args.log_interval / args.interval))
+    samples = [0]
 
+    def on_sample(rows):
+        if writer:
+            writer.write(rows)
+        peak_logger.update(rows)
+        samples[0] += 1
+        if samples[0] % log_every == 0:
+            peak_logger.log()
 
+    signal.signal(signal.SIGINT, lambda signum, frame: sampler.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: sampler.stop())
+    try:
+        sampler.run(on_sample, args.duration)
+    finally:
+        sampler.close()
+        if writer:
+            writer.close()
+        logger.info("CPU utilization monitoring stop.")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,88 @@
+import os
+import cv2
+import time
+import shutil
+import tempfile
+import numpy as np
+import argparse
+
+from generate_disparity import DISPARITY_MODES, stereo_reconstruct
+from pipeline import default_workers
+
+
+def generate_stereo_dataset(dataset_folder: str, sequences: int = 2, pairs: int = 16, height: int = 480,
+                            width: int = 640, disparity: int = 16, seed: int = 0):
+    """
+    Function:
+        Write a synthetic RADDet like dataset: stereo_image/part<n>/<frame>.jpg
+        with the left and right images side by side, and sensors_para with
+        identity rectification maps. The right image is the left one shifted
+        by disparity pixels, and by twice as much in a box in the middle.
+
+    Outputs:
+        stereo image folder, sensors parameter folder
+    """
+    rng = np.random.default_rng(seed)
+    stereo_image_folder = os.path.join(dataset_folder, "stereo_image")
+    sensors_para_folder = os.path.join(dataset_folder, "sensors_para")
+    registration_matrix_folder = os.path.join(sensors_para_folder, "registration_matrix")
+    stereo_para_folder = os.path.join(sensors_para_folder, "stereo_para")
+    os.makedirs(registration_matrix_folder, exist_ok=True)
+    os.makedirs(stereo_para_folder, exist_ok=True)
+
+    map_x, map_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    maps = np.stack([map_x, map_y])
+    np.save(os.path.join(registration_matrix_folder, "registration_matrix.npy"), np.eye(3))
+    np.save(os.path.join(stereo_para_folder, "left_maps.npy"), maps)
+    np.save(os.path.join(stereo_para_folder, "right_maps.npy"), maps)
+    np.save(os.path.join(stereo_para_folder, "ProjLeft.npy"), np.eye(3, 4))
+    np.save(os.path.join(stereo_para_folder, "ProjRight.npy"), np.eye(3, 4))
+    np.save(os.path.join(stereo_para_folder, "roiL.npy"), np.array([width, 0, width, height]))
+    np.save(os.path.join(stereo_para_folder, "roiR.npy"), np.array([width, 0, width, height]))
+    np.save(os.path.join(stereo_para_folder, "Q.npy"), np.eye(4))
+
+    frame = 0
+    for sequence in range(sequences):
+        folder = os.path.join(stereo_image_folder, f"part{sequence + 1}")
+        os.makedirs(folder, exist_ok=True)
+        for _ in range(pairs):
+            # textured scene, wider than the image so both views are filled
+            texture = rng.integers(0, 256, (height // 4, (width + 4 * disparity) // 4, 3), dtype=np.uint8)
+            texture = cv2.resize(texture, (width + 4 * disparity, height), interpolation=cv2.INTER_CUBIC)
+            # a point at x in the left image is at x - disparity in the right image
+            left = texture[:, disparity:disparity + width]
+            right = texture[:, 2 * disparity:2 * disparity + width].copy()
+            top, bottom, start, end = height // 4, 3 * height // 4, width // 4, 3 * width // 4
+            right[top:bottom, start - 2 * disparity:end - 2 * disparity] = left[top:bottom, start:end]
+            cv2.imwrite(os.path.join(folder, f"{frame:06}.jpg"), cv2.hconcat([left, right]),
+                        [cv2.IMWRITE_JPEG_QUALITY, 95])
+            frame += 1
+    return stereo_image_folder, sensors_para_folder
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pairs/s of generate_disparity.py from 1 to N workers")
+    parser.add_argument("--pairs", default=32, type=int, help="stereo pairs per sequence.")
+    parser.add_argument("--sequences", default=2, type=int, help="number of sequences.")
+    parser.add_argument("--workers", default=default_workers(), type=int, help="largest number of workers.")
+    parser.add_argument("--disparity", default="sgbm", choices=DISPARITY_MODES, help="disparity mode.")
+    parser.add_argument("--downscale", default=1, type=int, help="disparity downscale factor.")
+    args = parser.parse_args()
+
+    dataset_folder = tempfile.mkdtemp()
+    try:
+        stereo_image_folder, sensors_para_folder = generate_stereo_dataset(dataset_folder, args.sequences, args.pairs)
+        total = args.sequences * args.pairs
+        baseline = None
+        workers = 1
+        while True:
+            start = time.perf_counter()
+            stereo_reconstruct(stereo_image_folder, sensors_para_folder, workers, args.disparity, args.downscale)
+            rate = total / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{workers} workers: {rate:.1f} pairs/s, x{rate / baseline:.2f}")
+            if workers >= args.workers:
+                break
+            workers = min(workers * 2, args.workers)
+    finally:
+        shutil.rmtree(dataset_folder)
@@ -1,25 +1,14 @@
 import os
 import cv2
+import hashlib
 from glob import glob
 import numpy as np
 from pathlib import Path
 import argparse
 
-parser = argparse.ArgumentParser(description="")
-parser.add_argument(
-    "--stereo_image_folder",
-    required=True,
-    type=str,
-    help="stereo image folder.",
-)
-parser.add_argument(
-    "--sensors_para_folder",
-    required=True,
-    type=str,
-    help="sensors parameter folder.",
-)
+from pipeline import Manifest, run_tasks
 
-args = parser.parse_args()
+DISPARITY_MODES = ("none", "sgbm", "wls")
 
 
 def checkoutDir(dir_name: str):
@@ -58,6 +47,72 @@ class Config(object):
         self.save_disparity = True
 
 
+class DisparityMatcher(object):
+    """
+    Function:
+        Semi-Global Block Matching of rectified image pairs, with the matchers
+        and the WLS filter built once and reused for every pair.
+
+    Args:
+        wls                 ->          refine the disparity with a right matcher and a WLS filter (opencv-contrib)
+        downscale           ->          match images downscaled by this factor: the disparity map has the
+                                        downscaled size, its values are in pixels of the full size images
+    """
+
+    def __init__(self, wls: bool = True, downscale: int = 1) -> None:
+        win_size = 7
+        min_disp = 0
+        # num_disp = 16*10 # Needs to be divisible by 16
+        num_disp = max(16, 64 // downscale // 16 * 16)  # Needs to be divisible by 16
+        self.downscale = downscale
+
+        # other modes: MODE_SGBM, MODE_HH, MODE_SGBM_3WAY, MODE_HH4, where MODE_HH is
+        # for the image size (640, 480). and also some HD pics
+        self.left_matcher = cv2.StereoSGBM_create(
+            minDisparity=min_disp,
+            numDisparities=num_disp,
+            blockSize=win_size,
+            uniquenessRatio=10,
+            speckleWindowSize=150,
+            speckleRange=1,
+            disp12MaxDiff=0,
+            P1=8 * 3 * win_size**2,  # 8*3*win_size**2,
+            P2=32 * 3 * win_size**2,
+            preFilterCap=0,
+            # mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY) #32*3*win_size**2)
+            mode=cv2.STEREO_SGBM_MODE_HH,
+        )
+
+        self.right_matcher = None
+        self.wls_filter = None
+        if wls:
+            self.right_matcher = cv2.ximgproc.createRightMatcher(self.left_matcher)
+            lmbda = 8000
+            sigma = 1.2
+
+            self.wls_filter = cv2.ximgproc.createDisparityWLSFilter(matcher_left=self.left_matcher)
+            self.wls_filter.setLambda(lmbda)
+            self.wls_filter.setSigmaColor(sigma)
+
+    def shape(self, image_shape):
+        """ Shape of the disparity map of images of image_shape (height, width) """
+        return image_shape[0] // self.downscale, image_shape[1] // self.downscale
+
+    def compute(self, Left_Remap, Right_Remap):
+        if self.downscale > 1:
+            height, width = self.shape(Left_Remap.shape)
+            Left_Remap = cv2.resize(Left_Remap, (width, height), interpolation=cv2.INTER_AREA)
+            Right_Remap = cv2.resize(Right_Remap, (width, height), interpolation=cv2.INTER_AREA)
+
+        ############ left_matcher is the traditional matcher (default) #############
+        disparity = self.left_matcher.compute(Left_Remap, Right_Remap)
+        if self.wls_filter is not None:
+            disparity_right = self.right_matcher.compute(Right_Remap, Left_Remap)
+            disparity = self.wls_filter.filter(disparity, Left_Remap, None, disparity_right)
+
+        return disparity.astype(np.float32) * (self.downscale / 16.0)
+
+
 def SBGMBuildDisparity(Left_Remap, Right_Remap):
     """
     Functionality:
@@ -70,46 +125,7 @@ def SBGMBuildDisparity(Left_Remap, Right_Remap):
     Outputs:
         disparity                           ->          disparity maps
     """
-    win_size = 7
-    min_disp = 0
-    # num_disp = 16*10 # Needs to be divisible by 16
-    num_disp = 64  # Needs to be divisible by 16
-
-    # other modes: MODE_SGBM, MODE_HH, MODE_SGBM_3WAY, MODE_HH4, where MODE_HH is
-    # for the image size (640, 480). and also some HD pics
-    left_matcher = cv2.StereoSGBM_create(
-        minDisparity=min_disp,
-        numDisparities=num_disp,
-        blockSize=win_size,
-        uniquenessRatio=10,
-        speckleWindowSize=150,
-        speckleRange=1,
-        disp12MaxDiff=0,
-        P1=8 * 3 * win_size**2,  # 8*3*win_size**2,
-        P2=32 * 3 * win_size**2,
-        preFilterCap=0,
-        # mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY) #32*3*win_size**2)
-        mode=cv2.STEREO_SGBM_MODE_HH,
-    )
-
-    right_matcher = cv2.ximgproc.createRightMatcher(left_matcher)
-    lmbda = 8000
-    sigma = 1.2
-    visual_multiplier = 1.0
-
-    wls_filter = cv2.ximgproc.createDisparityWLSFilter(matcher_left=left_matcher)
-    wls_filter.setLambda(lmbda)
-    wls_filter.setSigmaColor(sigma)
-
-    ############ left_matcher is the traditional matcher (default) #############
-    disparity_left = left_matcher.compute(Left_Remap, Right_Remap)
-    disparity_right = right_matcher.compute(Right_Remap, Left_Remap)
-
-    filtered_img = wls_filter.filter(disparity_left, Left_Remap, None, disparity_right).astype(np.float32) / 16.0
-
-    # filtered_img = disparity_left.astype(np.float32) / 16.0
-
-    return filtered_img
+    return DisparityMatcher(wls=True).compute(Left_Remap, Right_Remap)
 
 
 def DisparityNormalization(disparity_map):
@@ -123,38 +139,69 @@ def DisparityNormalization(disparity_map):
     return disparity_map
 
 
-def DisparityBuilding(image_path: str, config: Config):
+def StereoRectify(image, config: Config):
     """
     Functionality:
-        Using StereoBM and StereoSGBM for building disparity map with sepecific frames.
+        Split a stereo image into its left and right images, then undistort and rectify them.
     """
+    image_left = image[0 : config.roi_l[3], 0 : config.roi_l[2]]
+    image_right = image[0 : config.roi_r[3], config.roi_l[2] : config.roi_l[2] + config.roi_r[2]]
 
-    disparity_image = image_path.replace("stereo_image", "disparity")
-    disparity_image = disparity_image.replace(".jpg", ".tif")
+    left_rect = cv2.remap(image_left, config.left_maps[0], config.left_maps[1], cv2.INTER_LINEAR)
+    right_rect = cv2.remap(image_right, config.right_maps[0], config.right_maps[1], cv2.INTER_LINEAR)
+    return left_rect, right_rect
 
-    img_num = int(image_path[-10:-4])
-    # define a display size, for avoiding over-sized
-    display_shape = (640, 480)
+
+def DisparityBuilding(image_path: str, config: Config):
+    """
+    Functionality:
+        Using StereoBM and StereoSGBM for building disparity map with sepecific frames.
+    """
 
     # read left and right images
     image = cv2.imread(image_path)
-    image_left = image[0 : config.roi_l[3], 0 : config.roi_l[2]]
-    image_right = image[0 : config.roi_r[3], config.roi_l[2] : config.roi_l[2] + config.roi_r[2]]
 
-    # using the parameters to undistort and rectify the images (transfer to gray for better disparity)
-    left_rect = cv2.remap(image_left, config.left_maps[0], config.left_maps[1], cv2.INTER_LINEAR)
-    left_rect_gray = cv2.cvtColor(left_rect.copy(), cv2.COLOR_BGR2GRAY)
-    right_rect = cv2.remap(image_right, config.right_maps[0], config.right_maps[1], cv2.INTER_LINEAR)
-    right_rect_gray = cv2.cvtColor(right_rect.copy(), cv2.COLOR_BGR2GRAY)
+    # using the parameters to undistort and rectify the images
+    left_rect, right_rect = StereoRectify(image, config)
 
-    # disparity of BM
-    # disparity_map_sec = BMBuildDisparity(left_rect_gray, right_rect_gray, roiL, roiR)
     # disparity of SGBM
     disparity_map = SBGMBuildDisparity(left_rect, right_rect)
 
     return disparity_map, left_rect
 
 
+# state of a worker process, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(sensors_para_folder: str, disparity: str, downscale: int):
+    # one process per core, no threads inside each process
+    cv2.setNumThreads(1)
+    _worker["config"] = Config(sensors_para_folder)
+    _worker["matcher"] = DisparityMatcher(disparity == "wls", downscale) if disparity != "none" else None
+    _worker["shards"] = {}
+
+
+def _process_pair(task):
+    """
+    Functionality:
+        Write the rectified left image of a stereo image and, if enabled, its
+        disparity map at its index in the memory-mapped shard of its sequence.
+    """
+    folder, index, image_path, left_image_path, shard_path = task
+    image = cv2.imread(image_path)
+    left_rect, right_rect = StereoRectify(image, _worker["config"])
+    cv2.imwrite(left_image_path, left_rect)
+
+    if shard_path is not None:
+        shard = _worker["shards"].get(shard_path)
+        if shard is None:
+            shard = _worker["shards"][shard_path] = np.load(shard_path, mmap_mode="r+")
+        shard[index] = _worker["matcher"].compute(left_rect, right_rect)
+        shard.flush()
+    return folder, index, os.path.basename(image_path)
+
+
 def convert2bin(sensors_para_folder: str):
     config = Config(sensors_para_folder)
     registration_matrix_folder = os.path.join(sensors_para_folder, "registration_matrix")
@@ -180,7 +227,31 @@ def convert2bin(sensors_para_folder: str):
     q.tofile(os.path.join(stereo_para_folder, "Q.bin"))
 
 
-def stereo_reconstruct(stereo_image_folder: str, sensors_para_folder: str):
+def stereo_reconstruct(
+    stereo_image_folder: str,
+    sensors_para_folder: str,
+    workers: int = None,
+    disparity: str = "none",
+    downscale: int = 1,
+    resume: bool = False,
+):
+    """
+    Functionality:
+        Write the rectified left image of every stereo image of every sequence
+        (sub folder) of stereo_image_folder to the "left" folder. With
+        disparity "sgbm" or "wls", also write the disparity maps of each
+        sequence to a single float32 .npy array of shape (pairs, height, width)
+        in the "disparity" folder, with the image names in a .txt file.
+
+        The pairs of all sequences are processed by a pool of workers worker
+        processes. A manifest in each left image folder records the processed
+        pairs: with resume, they are skipped.
+
+    Outputs:
+        number of processed pairs of each sequence
+    """
+    if disparity not in DISPARITY_MODES:
+        raise ValueError(f"disparity must be one of {DISPARITY_MODES}, not {disparity}")
     config = Config(sensors_para_folder)
     items = os.listdir(stereo_image_folder)
     items = sorted(items)
@@ -189,32 +260,109 @@ def stereo_reconstruct(stereo_image_folder: str, sensors_para_folder: str):
         if not os.path.isfile(os.path.join(stereo_image_folder, item)):
             folders.append(item)
 
-    for folder in folders:
-        stereo_image_folder2 = Path(stereo_image_folder).joinpath(folder)
-        # disparity_image_folder = str(stereo_image_folder2).replace("stereo_image", "disparity")
-        # checkoutDir(disparity_image_folder)
-
-        left_image_folder = str(stereo_image_folder2).replace("stereo_image", "left")
-        checkoutDir(left_image_folder)
+    disparity_folder = str(Path(stereo_image_folder)).replace("stereo_image", "disparity")
+    disparity_shape = None
+    if disparity != "none":
+        os.makedirs(disparity_folder, exist_ok=True)
+        disparity_shape = DisparityMatcher(False, downscale).shape(config.left_maps[0].shape[:2])
+
+    manifests = {}
+    tasks = []
+    try:
+        for folder in folders:
+            stereo_image_folder2 = Path(stereo_image_folder).joinpath(folder)
+            stereo_images = sorted(list(Path(stereo_image_folder2).glob("*.jpg")))
+            names = [image_path.name for image_path in stereo_images]
+            params = {
+                "disparity": disparity,
+                "downscale": downscale,
+                "pairs": len(names),
+                "names": hashlib.sha1("\n".join(names).encode()).hexdigest(),
+            }
+
+            left_image_folder = str(stereo_image_folder2).replace("stereo_image", "left")
+            shard_path = None
+            if disparity != "none":
+                shard_path = os.path.join(disparity_folder, folder + ".npy")
+            manifest_path = os.path.join(left_image_folder, "manifest.jsonl")
+            resumable = resume and os.path.exists(manifest_path) and (shard_path is None or os.path.exists(shard_path))
+            if resumable:
+                manifest = Manifest(manifest_path, params, resume=True)
+            if not resumable or not manifest.resumed:
+                if resumable:
+                    manifest.close()
+                checkoutDir(left_image_folder)
+                manifest = Manifest(manifest_path, params)
+                if shard_path is not None:
+                    # the workers write their rows of the shard in place
+                    np.lib.format.open_memmap(
+                        shard_path, mode="w+", dtype=np.float32, shape=(len(names),) + disparity_shape
+                    )
+                    with open(os.path.join(disparity_folder, folder + ".txt"), "w") as f:
+                        f.write("\n".join(names) + "\n")
+            manifests[folder] = manifest
+
+            for index, image_path in enumerate(stereo_images):
+                left_image_path = str(image_path).replace("stereo_image", "left")
+                if image_path.name not in manifest.done or not os.path.exists(left_image_path):
+                    tasks.append((folder, index, str(image_path), left_image_path, shard_path))
+
+        processed = {folder: 0 for folder in folders}
+        for folder, index, name in run_tasks(
+            _process_pair, tasks, workers, _init_worker, (sensors_para_folder, disparity, downscale), chunksize=2
+        ):
+            manifests[folder].add(name, index=index)
+            processed[folder] += 1
+    finally:
+        for manifest in manifests.values():
+            manifest.close()
 
-        stereo_images = sorted(list(Path(stereo_image_folder2).glob("*.jpg")))
-        for image_path in stereo_images:
-            # disparity_map, left_rect = DisparityBuilding(str(image_path), config)
-
-            # read left and right images
-            image = cv2.imread(image_path)
-            image_left = image[0 : config.roi_l[3], 0 : config.roi_l[2]]
-            # using the parameters to undistort and rectify the images (transfer to gray for better disparity)
-            left_rect = cv2.remap(image_left, config.left_maps[0], config.left_maps[1], cv2.INTER_LINEAR)
+    for folder in folders:
+        skipped = len(manifests[folder].done) - processed[folder]
+        print(f"{folder}: {processed[folder]} pairs processed" + (f", {skipped} already done" if skipped else ""))
+    return processed
 
-            # disparity_image_path = str(image_path).replace("stereo_image", "disparity")
-            # disparity_image_path = disparity_image_path.replace(".jpg", ".tif")
-            # cv2.imwrite(disparity_image_path, disparity_map)
 
-            left_image_path = str(image_path).replace("stereo_image", "left")
-            cv2.imwrite(left_image_path, left_rect)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="")
+    parser.add_argument(
+        "--stereo_image_folder",
+        required=True,
+        type=str,
+        help="stereo image folder.",
+    )
+    parser.add_argument(
+        "--sensors_para_folder",
+        required=True,
+        type=str,
+        help="sensors parameter folder.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes, default: the number of cores.",
+    )
+    parser.add_argument(
+        "--disparity",
+        default="none",
+        choices=DISPARITY_MODES,
+        help="also compute disparity maps, with SGBM or SGBM and a WLS filter.",
+    )
+    parser.add_argument(
+        "--downscale",
+        default=1,
+        type=int,
+        help="compute the disparity on images downscaled by this factor.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip the pairs the manifest of a previous run with the same options records as processed.",
+    )
 
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    stereo_reconstruct(args.stereo_image_folder, args.sensors_para_folder)
+    stereo_reconstruct(
+        args.stereo_image_folder, args.sensors_para_folder, args.workers, args.disparity, args.downscale, args.resume
+    )
     convert2bin(args.sensors_para_folder)
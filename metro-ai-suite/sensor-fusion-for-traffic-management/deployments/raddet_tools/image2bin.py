@@ -5,21 +5,7 @@ import numpy as np
 from pathlib import Path
 import argparse
 
-parser = argparse.ArgumentParser(description="")
-parser.add_argument(
-    "--dataset_folder",
-    required=True,
-    type=str,
-    help="dataset folder.",
-)
-parser.add_argument(
-    "--save_folder",
-    required=True,
-    type=str,
-    help="save folder.",
-)
-
-args = parser.parse_args()
+from pipeline import Manifest, run_tasks
 
 
 def checkoutDir(dir_name: str):
@@ -63,11 +49,83 @@ def encode_img(img, flag):
     return img_encode
 
 
-def image2bin(dataset_folder: str, save_folder: str):
+def radar2bin(file_path: str, save_path: str):
+    radar = np.load(file_path)
+    radar = radar.astype(np.complex64)
+    radar = radar.reshape((256, 64, 8))
+    raw_adc = np.zeros(radar.shape, dtype="complex64", order="C")
+    # w, h, d = radar.shape
+    # for c in range(d):
+    #     temp = int((c%4)*2+c/4)
+    #     radar[:,:,c] = radar[:,:,temp]
+    dataTmp1 = radar[:, :, 0:-1:2]
+    dataTmp2 = radar[:, :, 1::2]
+    raw_adc[:, :, 0:4] = (dataTmp1 - dataTmp2) / 2
+    raw_adc[:, :, 4:8] = (dataTmp1 + dataTmp2) / 2
+    radar = raw_adc
+    radar = np.flipud(radar)
+    radar = radar.transpose((1, 2, 0))
+    radar.tofile(save_path)
+
+
+def left_image2bin(image_path: str, save_path: str):
+    left_image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    left_image = encode_img(left_image, True)
+    # disparity_image_path = image_path.replace("left", "disparity")
+    # disparity_image_path = disparity_image_path.replace(".jpg", ".tif")
+    # disparity_image = cv2.imread(disparity_image_path, cv2.IMREAD_UNCHANGED)
+
+    left_image.tofile(save_path)
+    # disparity_image.tofile(
+    #     os.path.join(disparity_save_folder, os.path.basename(image_path).replace(".jpg", ".bin"))
+    # )
+
+
+def _init_worker():
+    # one process per core, no threads inside each process
+    cv2.setNumThreads(1)
+
+
+def _task_name(task):
+    kind, _, save_path = task
+    return kind + "/" + os.path.basename(save_path)
+
+
+def _convert(task):
+    kind, source_path, save_path = task
+    if kind == "radar":
+        radar2bin(source_path, save_path)
+    else:
+        left_image2bin(source_path, save_path)
+    return _task_name(task)
+
+
+def left_images(left_folder: str):
+    items = os.listdir(left_folder)
+    items = sorted(items)
+    folders = []
+    for item in items:
+        if not os.path.isfile(os.path.join(left_folder, item)):
+            folders.append(item)
+    images = []
+    for folder in folders:
+        images += sorted(glob(os.path.join(left_folder, folder, "*.jpg")))
+    return images
+
+
+def image2bin(dataset_folder: str, save_folder: str, workers: int = None, resume: bool = False):
+    """
+    Functionality:
+        Convert the radar ADC data and the left images of the dataset to the
+        bin files of the multi sensor input, on a pool of worker processes. A
+        manifest in save_folder records the converted files: with resume,
+        they are skipped.
+
+    Outputs:
+        number of converted files
+    """
     radar_save_folder = os.path.join(save_folder, "radar")
-    checkoutDir(radar_save_folder)
     bgr_save_folder = os.path.join(save_folder, "bgr")
-    checkoutDir(bgr_save_folder)
     # disparity_save_folder = os.path.join(save_folder, "depth")
     # checkoutDir(disparity_save_folder)
 
@@ -79,69 +137,65 @@ def image2bin(dataset_folder: str, save_folder: str):
 
     radar_files = glob(os.path.join(radar_folder, "[!._]*.npy"))
     radar_files = sorted(radar_files)
+    images = left_images(bgr_train_folder) + left_images(bgr_test_folder)
+
+    manifest_path = os.path.join(save_folder, "manifest.jsonl")
+    params = {"dataset_folder": os.path.abspath(dataset_folder)}
+    manifest = None
+    if resume and os.path.exists(manifest_path):
+        manifest = Manifest(manifest_path, params, resume=True)
+        if not manifest.resumed:
+            manifest.close()
+            manifest = None
+    if manifest is None:
+        checkoutDir(radar_save_folder)
+        checkoutDir(bgr_save_folder)
+        manifest = Manifest(manifest_path, params)
+
+    tasks = []
     for file_path in radar_files:
-        radar = np.load(file_path)
-        radar = radar.astype(np.complex64)
-        radar = radar.reshape((256, 64, 8))
-        raw_adc = np.zeros(radar.shape, dtype="complex64", order="C")
-        # w, h, d = radar.shape
-        # for c in range(d):
-        #     temp = int((c%4)*2+c/4)
-        #     radar[:,:,c] = radar[:,:,temp]
-        dataTmp1 = radar[:, :, 0:-1:2]
-        dataTmp2 = radar[:, :, 1::2]
-        raw_adc[:, :, 0:4] = (dataTmp1 - dataTmp2) / 2
-        raw_adc[:, :, 4:8] = (dataTmp1 + dataTmp2) / 2
-        radar = raw_adc
-        radar = np.flipud(radar)
-        radar = radar.transpose((1, 2, 0))
-        radar.tofile(os.path.join(radar_save_folder, os.path.basename(file_path).replace(".npy", ".bin")))
-
-    items = os.listdir(bgr_train_folder)
-    items = sorted(items)
-    folders = []
-    for item in items:
-        if not os.path.isfile(os.path.join(bgr_train_folder, item)):
-            folders.append(item)
-    for folder in folders:
-        bgr_train_folder2 = os.path.join(bgr_train_folder, folder)
-        # disparity_train_folder2 = bgr_train_folder2.replace("left", "disparity")
-
-        left_images = sorted(glob(os.path.join(bgr_train_folder2, "*.jpg")))
-        for image_path in left_images:
-            left_image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
-            left_image = encode_img(left_image, True)
-            # disparity_image_path = image_path.replace("left", "disparity")
-            # disparity_image_path = disparity_image_path.replace(".jpg", ".tif")
-            # disparity_image = cv2.imread(disparity_image_path, cv2.IMREAD_UNCHANGED)
-
-            left_image.tofile(os.path.join(bgr_save_folder, os.path.basename(image_path).replace(".jpg", ".bin")))
-            # disparity_image.tofile(
-            #     os.path.join(disparity_save_folder, os.path.basename(image_path).replace(".jpg", ".bin"))
-            # )
-
-    items = os.listdir(bgr_test_folder)
-    items = sorted(items)
-    folders = []
-    for item in items:
-        if not os.path.isfile(os.path.join(bgr_test_folder, item)):
-            folders.append(item)
-    for folder in folders:
-        bgr_test_folder2 = os.path.join(bgr_test_folder, folder)
-
-        left_images = sorted(glob(os.path.join(bgr_test_folder2, "*.jpg")))
-        for image_path in left_images:
-            left_image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
-            left_image = encode_img(left_image, True)
-            # disparity_image_path = image_path.replace("left", "disparity")
-            # disparity_image_path = disparity_image_path.replace(".jpg", ".tif")
-            # disparity_image = cv2.imread(disparity_image_path, cv2.IMREAD_UNCHANGED)
-
-            left_image.tofile(os.path.join(bgr_save_folder, os.path.basename(image_path).replace(".jpg", ".bin")))
-            # disparity_image.tofile(
-            #     os.path.join(disparity_save_folder, os.path.basename(image_path).replace(".jpg", ".bin"))
-            # )
+        save_path = os.path.join(radar_save_folder, os.path.basename(file_path).replace(".npy", ".bin"))
+        tasks.append(("radar", file_path, save_path))
+    for image_path in images:
+        save_path = os.path.join(bgr_save_folder, os.path.basename(image_path).replace(".jpg", ".bin"))
+        tasks.append(("bgr", image_path, save_path))
+    tasks = [task for task in tasks if _task_name(task) not in manifest.done or not os.path.exists(task[2])]
+
+    converted = 0
+    with manifest:
+        for name in run_tasks(_convert, tasks, workers, _init_worker, chunksize=4):
+            manifest.add(name)
+            converted += 1
+    skipped = len(manifest.done) - converted
+    print(f"{converted} files converted" + (f", {skipped} already done" if skipped else ""))
+    return converted
 
 
 if __name__ == "__main__":
-    image2bin(args.dataset_folder, args.save_folder)
+    parser = argparse.ArgumentParser(description="")
+    parser.add_argument(
+        "--dataset_folder",
+        required=True,
+        type=str,
+        help="dataset folder.",
+    )
+    parser.add_argument(
+        "--save_folder",
+        required=True,
+        type=str,
+        help="save folder.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes, default: the number of cores.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip the files the manifest of a previous run records as converted.",
+    )
+
+    args = parser.parse_args()
+
+    image2bin(args.dataset_folder, args.save_folder, args.workers, args.resume)
@@ -0,0 +1,116 @@
+import os
+import json
+import multiprocessing
+
+
+def default_workers():
+    """
+    Function:
+        Number of cores this process may run on
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class Manifest(object):
+    """
+    Function:
+        Record of the items a step already processed, one JSON line per item,
+        so that an interrupted run can resume where it stopped. The first line
+        holds the parameters of the run: a manifest written with other
+        parameters is not resumed.
+
+    Args:
+        path                ->          manifest file
+        params              ->          parameters of the run (JSON serializable)
+        resume              ->          keep the items of an existing manifest with the same parameters
+    """
+
+    def __init__(self, path: str, params: dict, resume: bool = False) -> None:
+        self.path = path
+        self.params = params
+        self.done = None
+        if resume:
+            self.done, length = self._load()
+        if self.done is not None:
+            # drop the truncated last line of an interrupted run
+            self.file = open(path, "r+")
+            self.file.truncate(length)
+            self.file.seek(length)
+        else:
+            self.done = {}
+            self.file = open(path, "w")
+            self._write({"params": params})
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None, 0
+        header = False
+        done = {}
+        length = 0
+        with open(self.path) as f:
+            for i, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith("\n"):
+                    break
+                if i == 0:
+                    if record.get("params") != self.params:
+                        return None, 0
+                    header = True
+                else:
+                    done[record["name"]] = record
+                length += len(line.encode())
+        return (done, length) if header else (None, 0)
+
+    @property
+    def resumed(self):
+        return bool(self.done)
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def add(self, name: str, **info):
+        record = {"name": name, **info}
+        self.done[name] = record
+        self._write(record)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_tasks(function, tasks, workers=None, initializer=None, initargs=(), chunksize=1):
+    """
+    Function:
+        Runs function(task) for every task on a pool of worker processes and
+        yields the results as they complete. The pool pulls tasks from a
+        shared queue, so fast and slow tasks balance over the workers. With a
+        single worker, the tasks run in this process.
+
+    Args:
+        function            ->          function of a task, a module level function so it can be pickled
+        tasks               ->          list of tasks
+        workers             ->          number of processes, default: the number of cores
+        initializer         ->          called with initargs once in every worker, before its first task
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or len(tasks) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield function(task)
+        return
+
+    with multiprocessing.Pool(min(workers, len(tasks)), initializer, initargs) as pool:
+        yield from pool.imap_unordered(function, tasks, chunksize)
@@ -1,91 +1,38 @@
-import json
-import matplotlib.pyplot as plt
+import sys
 import argparse
 
-def main(json_file):
-    latencies = []
-
-    # read json file
-    with open(json_file) as f:
-        json_data = json.load(f)
-
-    frame_latencies = []
-
-    for frame in json_data["TimeStamps"]:
-        time_stamps = {ts["name"]: int(ts["timeStamp"]) for ts in frame["TimeStamp"]}
-        latencies = {}
-
-        if "decodeIn" in time_stamps and "decodeOut" in time_stamps:
-            latencies["decode"] = time_stamps["decodeOut"] - time_stamps["decodeIn"]
-        if "detectionIn" in time_stamps and "detectionOut" in time_stamps:
-            latencies["detection"] = time_stamps["detectionOut"] - time_stamps["detectionIn"]
-        # if "detectionIn" in time_stamps and "inferenceOut" in time_stamps:
-        #     latencies["inference"] = time_stamps["inferenceOut"] - time_stamps["detectionIn"]
-        if "RadarPreprocessIn" in time_stamps and "RadarPreprocessOut" in time_stamps:
-            latencies["RadarPreprocess"] = time_stamps["RadarPreprocessOut"] - time_stamps["RadarPreprocessIn"]
-        if "RadarDetectionIn" in time_stamps and "RadarDetectionOut" in time_stamps:
-            latencies["RadarDetection"] = time_stamps["RadarDetectionOut"] - time_stamps["RadarDetectionIn"]
-        if "RadarClusteringIn" in time_stamps and "RadarClusteringOut" in time_stamps:
-            latencies["RadarClustering"] = time_stamps["RadarClusteringOut"] - time_stamps["RadarClusteringIn"]
-        if "RadarTrackingIn" in time_stamps and "RadarTrackingOut" in time_stamps:
-            latencies["RadarTracking"] = time_stamps["RadarTrackingOut"] - time_stamps["RadarTrackingIn"]    
-                                                                                                     
-        if "RadarReaderIn" in time_stamps and "RadarReaderOut" in time_stamps:
-            latencies["RadarReader"] = time_stamps["RadarReaderOut"] - time_stamps["RadarReaderIn"]
-        if "MediaTrackerIn" in time_stamps and "MediaTrackerOut" in time_stamps:
-            latencies["MediaTracker"] = time_stamps["MediaTrackerOut"] - time_stamps["MediaTrackerIn"]
-        if "coordinateTransIn" in time_stamps and "coordinateTransOut" in time_stamps:
-            latencies["coordinateTrans"] = time_stamps["coordinateTransOut"] - time_stamps["coordinateTransIn"]
-        if "track2trackIn" in time_stamps and "track2trackOut" in time_stamps:
-            latencies["track2track"] = time_stamps["track2trackOut"] - time_stamps["track2trackIn"]
-        if "postFusionIn" in time_stamps and "postFusionOut" in time_stamps:
-            latencies["postFusion"] = time_stamps["postFusionOut"] - time_stamps["postFusionIn"]
-            latencies["e2e"] = time_stamps["postFusionOut"] - time_stamps["decodeIn"]
-        ##
-        if "postFusion" in latencies and "e2e" in latencies:
-            frame_latencies.append(latencies)
-
-    # compute the average latency of each component
-    if frame_latencies:
-        num_frame = len(frame_latencies)
-        # check existence of each key
-
-        decode_avg_latency = round(sum([frame.get("decode", 0) for frame in frame_latencies]) / num_frame, 2)
-        detection_avg_latency = round(sum([frame.get("detection", 0) for frame in frame_latencies]) / num_frame, 2)
-        # inference_avg_latency = round(sum([frame.get("inference", 0) for frame in frame_latencies]) / num_frame, 2)
-        radar_preprocess_avg_latency = round(sum([frame.get("RadarPreprocess", 0) for frame in frame_latencies]) / num_frame, 2)
-        radar_detection_avg_latency = round(sum([frame.get("RadarDetection", 0) for frame in frame_latencies]) / num_frame, 2)
-        radar_clustering_avg_latency = round(sum([frame.get("RadarClustering", 0) for frame in frame_latencies]) / num_frame, 2)
-        radar_tracking_avg_latency = round(sum([frame.get("RadarTracking", 0) for frame in frame_latencies]) / num_frame, 2)
-        
-        RadarReader_avg_latency = abs(round(sum([frame.get("RadarReader", 0) for frame in frame_latencies]) / num_frame, 2))
-        MediaTracker_avg_latency = round(sum([frame.get("MediaTracker", 0) for frame in frame_latencies]) / num_frame, 2)
-        coordinateTrans_avg_latency = round(sum([frame.get("coordinateTrans", 0) for frame in frame_latencies]) / num_frame, 2)
-        track2track_avg_latency = round(sum([frame.get("track2track", 0) for frame in frame_latencies]) / num_frame, 2)
-        postFusion_avg_latency = round(sum([frame.get("postFusion", 0) for frame in frame_latencies]) / num_frame, 2)
-        e2e_avg_latency = round(sum([frame.get("e2e", 0) for frame in frame_latencies]) / num_frame, 2)
-
-
-        print(f"decode_avg_latency: {decode_avg_latency} ms")
-        print(f"detection_avg_latency: {detection_avg_latency} ms")
-        # print(f"inference_avg_latency: {inference_avg_latency} ms")
-        print(f"radar_preprocess_avg_latency: {radar_preprocess_avg_latency} ms")
-        print(f"radar_detection_avg_latency: {radar_detection_avg_latency} ms")
-        print(f"radar_clustering_avg_latency: {radar_clustering_avg_latency} ms")
-        print(f"radar_tracking_avg_latency: {radar_tracking_avg_latency} ms")
-        print(f"RadarReader_avg_latency: {RadarReader_avg_latency} ms")
-        print(f"MediaTracker_avg_latency: {MediaTracker_avg_latency} ms")
-        print(f"coordinateTrans_avg_latency: {coordinateTrans_avg_latency} ms")
-        print(f"track2track_avg_latency: {track2track_avg_latency} ms")
-        print(f"postFusion_avg_latency: {postFusion_avg_latency} ms")
-        print(f"e2e_avg_latency: {e2e_avg_latency} ms")
-
-    if RadarReader_avg_latency == 0.0:
+from profiling_analysis import analyze, compare, format_comparison, format_summary, load_summary, write_json
+
+LEGACY_NAMES = {
+    "RadarPreprocess": "radar_preprocess",
+    "RadarDetection": "radar_detection",
+    "RadarClustering": "radar_clustering",
+    "RadarTracking": "radar_tracking",
+}
+
+
+def average_latencies(summary):
+    # average over all frames, a stage missing from a frame counts as 0
+    averages = {}
+    for stage, stats in summary["stages"].items():
+        averages[stage] = round(stats["mean"] * stats["count"] / summary["frames"], 2)
+    return averages
+
+
+def print_averages(averages):
+    for stage in ["decode", "detection", "RadarPreprocess", "RadarDetection", "RadarClustering", "RadarTracking",
+                  "RadarReader", "MediaTracker", "coordinateTrans", "track2track", "postFusion", "e2e"]:
+        print(f"{LEGACY_NAMES.get(stage, stage)}_avg_latency: {averages.get(stage, 0.0)} ms")
+
+
+def plot_averages(averages):
+    import matplotlib.pyplot as plt
+
+    if averages.get("RadarReader", 0.0) == 0.0:
         components = ['decode', 'detection', 'RadarPreprocess', 'RadarDetection','RadarClustering','RadarTracking','MediaTracker', 'coordinateTrans', 'postFusion', 'e2e']
-        latencies = [decode_avg_latency, detection_avg_latency, radar_preprocess_avg_latency,radar_detection_avg_latency, radar_clustering_avg_latency, radar_tracking_avg_latency, MediaTracker_avg_latency, coordinateTrans_avg_latency, postFusion_avg_latency, e2e_avg_latency]
     else:
         components = ['decode', 'detection', 'RadarReader', 'MediaTracker', 'coordinateTrans', 'postFusion', 'e2e']
-        latencies = [decode_avg_latency, detection_avg_latency, RadarReader_avg_latency, MediaTracker_avg_latency, coordinateTrans_avg_latency, postFusion_avg_latency, e2e_avg_latency]
+    latencies = [averages.get(component, 0.0) for component in components]
 
     plt.figure(figsize=(10, 6))
     plt.bar(components, latencies, color='skyblue')
@@ -103,8 +50,47 @@ def main(json_file):
 
     plt.show()
 
+
+def main(json_file, budget_ms=None, csv_file=None, summary_file=None, plot=True):
+    summary = analyze(json_file, budget_ms, csv_file)
+    if not summary["frames"]:
+        print(f"No frame of {json_file} went through postFusion.")
+        return summary
+
+    averages = average_latencies(summary)
+    if "RadarReader" in averages:
+        averages["RadarReader"] = abs(averages["RadarReader"])
+    print_averages(averages)
+    print()
+    print(format_summary(summary))
+
+    if summary_file:
+        write_json(summary, summary_file)
+    if plot:
+        plot_averages(averages)
+    return summary
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Process performance data JSON file.')
     parser.add_argument('json_file', type=str, help='Path to the JSON file containing performance data')
+    parser.add_argument('--budget-ms', type=float, help='Frame budget, frames with a longer e2e latency are deadline misses')
+    parser.add_argument('--csv', help='Write the per-frame latencies, critical path and deadline misses to this CSV file')
+    parser.add_argument('--json', help='Write the summary to this JSON file')
+    parser.add_argument('--no-plot', action='store_true', help='Do not plot the average latencies')
+    parser.add_argument('--baseline', help='Time stamp log or summary JSON of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Regression threshold: increase of a percentile of a stage, in percent')
+    parser.add_argument('--min-delta-ms', type=float, default=0.0,
+                        help='Ignore increases smaller than this, in ms')
     args = parser.parse_args()
-    main(args.json_file)
\ No newline at end of file
+
+    summary = main(args.json_file, args.budget_ms, args.csv, args.json, plot=not args.no_plot and not args.baseline)
+    if args.baseline and summary["frames"]:
+        rows = compare(load_summary(args.baseline), summary, args.threshold, min_delta=args.min_delta_ms)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold}%")
+            sys.exit(1)
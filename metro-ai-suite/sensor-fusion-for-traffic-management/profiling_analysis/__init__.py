@@ -0,0 +1,15 @@
+"""
+Latency analysis of the time stamp logs of the sensor fusion pipeline:
+per-stage percentiles and jitter, critical path of every frame, frame
+budget misses and comparison of two runs. profiling.py is the command line.
+"""
+
+from .analysis import (ProfileAnalyzer, analyze, compare, format_comparison, format_summary, latency_stats,
+                       load_summary, write_json)
+from .timestamps import STAGES, STAGE_NAMES, critical_path, iter_frames, stage_latencies, time_stamps
+
+__all__ = [
+    "STAGES", "STAGE_NAMES", "ProfileAnalyzer", "analyze", "compare", "critical_path", "format_comparison",
+    "format_summary", "iter_frames", "latency_stats", "load_summary", "stage_latencies", "time_stamps",
+    "write_json",
+]
@@ -0,0 +1,215 @@
+import csv
+import json
+from array import array
+
+import numpy as np
+
+from .timestamps import E2E, STAGE_NAMES, critical_path, iter_frames, stage_latencies, time_stamps
+
+PERCENTILES = (50, 90, 99)
+WORST_FRAMES = 10
+
+
+def latency_stats(values):
+    """
+    Returns count, mean, p50, p90, p99, max, std and jitter of the latencies
+    in frame order. Jitter is the mean absolute difference between the
+    latencies of consecutive frames.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"count": 0}
+    stats = {"count": int(len(values)), "mean": float(values.mean())}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{p}"] = float(value)
+    stats["max"] = float(values.max())
+    stats["std"] = float(values.std())
+    stats["jitter"] = float(np.abs(np.diff(values)).mean()) if len(values) > 1 else 0.0
+    return stats
+
+
+class ProfileAnalyzer:
+    """
+    Accumulates the frames of a time stamp log: per-stage latencies, the
+    critical path of every frame and, with budget_ms, the frames whose
+    end-to-end latency exceeds the frame budget.
+
+    Like profiling.py, only frames that went through postFusion are counted.
+    """
+
+    def __init__(self, budget_ms=None):
+        self.budget_ms = budget_ms
+        self.frames = 0
+        self.latencies = {stage: array("d") for stage in STAGE_NAMES}
+        self.critical = {}
+        self.bottlenecks = {}
+        self.branches = {}
+        self.missed = []
+        self.streak = 0
+        self.longest_streak = 0
+
+    def add(self, frame_id, stamps):
+        """ Adds a frame, returns its row for the per-frame output or None if the frame is skipped. """
+        latencies = stage_latencies(stamps)
+        if "postFusion" not in latencies or E2E[0] not in latencies:
+            return None
+        self.frames += 1
+        for stage, latency in latencies.items():
+            self.latencies[stage].append(latency)
+
+        branch, contributions = critical_path(stamps)
+        self.branches[branch] = self.branches.get(branch, 0) + 1
+        for stage, time in contributions.items():
+            self.critical[stage] = self.critical.get(stage, 0) + time
+        bottleneck = max(contributions, key=contributions.get) if contributions else None
+        if bottleneck:
+            self.bottlenecks[bottleneck] = self.bottlenecks.get(bottleneck, 0) + 1
+
+        e2e = latencies[E2E[0]]
+        missed = self.budget_ms is not None and e2e > self.budget_ms
+        if missed:
+            self.missed.append((e2e, frame_id, bottleneck))
+            self.streak += 1
+            self.longest_streak = max(self.longest_streak, self.streak)
+        else:
+            self.streak = 0
+
+        row = {"frame": frame_id}
+        row.update({stage: latencies.get(stage) for stage in STAGE_NAMES})
+        row.update({"critical_branch": branch, "bottleneck": bottleneck, "deadline_miss": int(missed)})
+        return row
+
+    def summary(self):
+        e2e_total = sum(self.latencies[E2E[0]]) or 1
+        summary = {
+            "frames": self.frames,
+            "stages": {stage: latency_stats(values) for stage, values in self.latencies.items() if len(values)},
+            "critical_path": {
+                "branches": dict(self.branches),
+                "stages": {
+                    stage: {
+                        "mean": time / self.frames,
+                        "share": time / e2e_total,
+                        "bottleneck_frames": self.bottlenecks.get(stage, 0),
+                    }
+                    for stage, time in sorted(self.critical.items(), key=lambda item: -item[1])
+                },
+            },
+        }
+        if self.budget_ms is not None:
+            worst = sorted(self.missed, key=lambda miss: -miss[0])[:WORST_FRAMES]
+            missed_bottlenecks = {}
+            for _, _, bottleneck in self.missed:
+                missed_bottlenecks[bottleneck] = missed_bottlenecks.get(bottleneck, 0) + 1
+            summary["deadline"] = {
+                "budget_ms": self.budget_ms,
+                "misses": len(self.missed),
+                "miss_rate": len(self.missed) / self.frames if self.frames else 0.0,
+                "longest_streak": self.longest_streak,
+                "bottlenecks": missed_bottlenecks,
+                "worst": [{"frame": frame_id, "e2e": e2e, "bottleneck": bottleneck}
+                          for e2e, frame_id, bottleneck in worst],
+            }
+        return summary
+
+
+def analyze(path, budget_ms=None, csv_path=None):
+    """
+    Streams the time stamp log at path through a ProfileAnalyzer and returns
+    its summary. With csv_path, also writes one row per frame.
+    """
+    analyzer = ProfileAnalyzer(budget_ms)
+    csv_file = open(csv_path, "w", newline="") if csv_path else None
+    try:
+        writer = None
+        if csv_file:
+            writer = csv.DictWriter(csv_file, ["frame"] + STAGE_NAMES + ["critical_branch", "bottleneck",
+                                                                        "deadline_miss"])
+            writer.writeheader()
+        for index, frame in enumerate(iter_frames(path)):
+            row = analyzer.add(frame.get("frameId", index), time_stamps(frame))
+            if writer and row:
+                writer.writerow(row)
+    finally:
+        if csv_file:
+            csv_file.close()
+    return analyzer.summary()
+
+
+def load_summary(path, budget_ms=None):
+    """ Returns the summary in a JSON file written by write_json, or analyzes a time stamp log. """
+    with open(path) as f:
+        head = f.read(4096)
+    if '"TimeStamps"' not in head:
+        with open(path) as f:
+            summary = json.load(f)
+        if "stages" in summary:
+            return summary
+    return analyze(path, budget_ms)
+
+
+def write_json(summary, path):
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+
+def compare(base, new, threshold_pct=10.0, metrics=("p50", "p90", "p99"), min_delta=0.0):
+    """
+    Compares the stage latencies of two summaries. Returns one row per stage
+    and metric of both, with the change in percent and whether it is a
+    regression: an increase of more than threshold_pct percent and more
+    than min_delta.
+    """
+    rows = []
+    for stage, new_stats in new["stages"].items():
+        base_stats = base["stages"].get(stage)
+        if not base_stats or not base_stats.get("count") or not new_stats.get("count"):
+            continue
+        for metric in metrics:
+            before, after = base_stats[metric], new_stats[metric]
+            change = (after - before) / before * 100 if before else (0.0 if after == before else float("inf"))
+            rows.append({
+                "stage": stage,
+                "metric": metric,
+                "base": before,
+                "new": after,
+                "change_pct": change,
+                "regression": change > threshold_pct and after - before > min_delta,
+            })
+    return rows
+
+
+def format_summary(summary):
+    lines = [f"{summary['frames']} frames"]
+    lines.append(f"{'stage':<16} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'jitter':>8}  (ms)")
+    for stage, stats in summary["stages"].items():
+        lines.append(f"{stage:<16} {stats['mean']:>8.2f} {stats['p50']:>8.2f} {stats['p90']:>8.2f}"
+                     f" {stats['p99']:>8.2f} {stats['max']:>8.2f} {stats['jitter']:>8.2f}")
+
+    critical = summary["critical_path"]
+    branches = ", ".join(f"{branch} {count}" for branch, count in critical["branches"].items())
+    lines.append(f"critical path (frames per branch: {branches})")
+    lines.append(f"{'stage':<16} {'mean':>8} {'share':>8} {'bottleneck':>10}")
+    for stage, stats in critical["stages"].items():
+        lines.append(f"{stage:<16} {stats['mean']:>8.2f} {stats['share']:>8.1%} {stats['bottleneck_frames']:>10}")
+
+    deadline = summary.get("deadline")
+    if deadline:
+        lines.append(f"deadline misses over {deadline['budget_ms']} ms: {deadline['misses']}"
+                     f" ({deadline['miss_rate']:.2%}), longest streak {deadline['longest_streak']} frames")
+        if deadline["bottlenecks"]:
+            lines.append("  bottleneck of the missed frames: " + ", ".join(
+                f"{stage} {count}" for stage, count in deadline["bottlenecks"].items()))
+        for miss in deadline["worst"]:
+            lines.append(f"  frame {miss['frame']}: {miss['e2e']:.2f} ms, bottleneck {miss['bottleneck']}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows):
+    lines = [f"{'stage':<16} {'metric':>6} {'base':>8} {'new':>8} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['stage']:<16} {row['metric']:>6} {row['base']:>8.2f} {row['new']:>8.2f}"
+                     f" {row['change_pct']:>+7.1f}%{flag}")
+    return "\n".join(lines)
+
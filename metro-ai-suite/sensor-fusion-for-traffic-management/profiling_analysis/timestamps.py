@@ -0,0 +1,138 @@
+import json
+
+# Stage name -> (start time stamp, end time stamp) recorded by the pipeline nodes
+STAGES = {
+    "decode": ("decodeIn", "decodeOut"),
+    "detection": ("detectionIn", "detectionOut"),
+    "RadarPreprocess": ("RadarPreprocessIn", "RadarPreprocessOut"),
+    "RadarDetection": ("RadarDetectionIn", "RadarDetectionOut"),
+    "RadarClustering": ("RadarClusteringIn", "RadarClusteringOut"),
+    "RadarTracking": ("RadarTrackingIn", "RadarTrackingOut"),
+    "RadarReader": ("RadarReaderIn", "RadarReaderOut"),
+    "MediaTracker": ("MediaTrackerIn", "MediaTrackerOut"),
+    "coordinateTrans": ("coordinateTransIn", "coordinateTransOut"),
+    "track2track": ("track2trackIn", "track2trackOut"),
+    "postFusion": ("postFusionIn", "postFusionOut"),
+}
+E2E = ("e2e", "decodeIn", "postFusionOut")
+STAGE_NAMES = list(STAGES) + [E2E[0]]
+
+# Branches that meet at the fusion stages, and the fusion stages themselves
+BRANCHES = {
+    "camera": ["decode", "detection", "MediaTracker"],
+    "radar": ["RadarPreprocess", "RadarDetection", "RadarClustering", "RadarTracking", "RadarReader"],
+}
+FUSION = ["coordinateTrans", "track2track", "postFusion"]
+# Pseudo stage for the time a frame spends between stages on its critical path
+QUEUE = "queue"
+
+CHUNK_SIZE = 1 << 20
+
+
+def iter_frames(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the frames of the "TimeStamps" array of a time stamp log one by
+    one, reading the file in chunks, so that logs of any length are parsed
+    in constant memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path) as f:
+        buf = ""
+        eof = False
+
+        def read_more():
+            nonlocal buf, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+            return not eof
+
+        # Find the opening bracket of the TimeStamps array
+        while True:
+            key = buf.find('"TimeStamps"')
+            bracket = buf.find("[", key) if key >= 0 else -1
+            if bracket >= 0:
+                pos = bracket + 1
+                break
+            if not read_more():
+                raise ValueError(f"{path} has no TimeStamps array")
+
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                if not read_more():
+                    raise ValueError(f"{path} ends inside the TimeStamps array")
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                frame, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # The frame continues in the next chunk
+                if not read_more():
+                    raise
+                continue
+            yield frame
+            pos = end
+            if pos >= chunk_size:
+                buf = buf[pos:]
+                pos = 0
+
+
+def time_stamps(frame):
+    """ Returns {time stamp name: time stamp} of a frame of the log. """
+    return {ts["name"]: int(ts["timeStamp"]) for ts in frame["TimeStamp"]}
+
+
+def stage_latencies(stamps):
+    """ Returns {stage: latency} of the stages whose both time stamps are in stamps. """
+    latencies = {}
+    for stage, (start, end) in STAGES.items():
+        if start in stamps and end in stamps:
+            latencies[stage] = stamps[end] - stamps[start]
+    name, start, end = E2E
+    if start in stamps and end in stamps:
+        latencies[name] = stamps[end] - stamps[start]
+    return latencies
+
+
+def critical_path(stamps):
+    """
+    Attributes the end-to-end latency of a frame to the stages on its
+    critical path: the branch that reached the fusion stages last, then the
+    fusion stages. Time between two stages on the path is attributed to
+    QUEUE. Returns (branch, {stage: time}), or (None, {}) if the frame has
+    no end-to-end latency.
+    """
+    _, e2e_start, e2e_end = E2E
+    if e2e_start not in stamps or e2e_end not in stamps:
+        return None, {}
+
+    def present(stages):
+        return [s for s in stages if STAGES[s][0] in stamps and STAGES[s][1] in stamps]
+
+    branch, branch_end = None, None
+    for name, stages in BRANCHES.items():
+        stages = present(stages)
+        if stages:
+            end = max(stamps[STAGES[s][1]] for s in stages)
+            if branch_end is None or end > branch_end:
+                branch, branch_end = name, end
+    path = present(BRANCHES[branch]) if branch else []
+    path = sorted(path + present(FUSION), key=lambda s: stamps[STAGES[s][0]])
+
+    start, end = stamps[e2e_start], stamps[e2e_end]
+    contributions = {}
+    cursor = start
+    for stage in path:
+        stage_start = min(max(stamps[STAGES[stage][0]], cursor), end)
+        stage_end = min(stamps[STAGES[stage][1]], end)
+        if stage_start > cursor:
+            contributions[QUEUE] = contributions.get(QUEUE, 0) + stage_start - cursor
+        if stage_end > stage_start:
+            contributions[stage] = contributions.get(stage, 0) + stage_end - stage_start
+        cursor = max(cursor, stage_end)
+    if end > cursor:
+        contributions[QUEUE] = contributions.get(QUEUE, 0) + end - cursor
+    return branch, contributions
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployments", "benchmark_tools"))
+import accuracy_benchmark  # noqa: E402
+from accuracy_benchmark import MotAccumulator, assign, candidate_pairs  # noqa: E402
+
+
+def run(frames, max_distance=1.0):
+    """ frames: (gt {id: (x, y)}, tracks {id: (x, y)}) per frame """
+    accumulator = MotAccumulator(max_distance)
+    for gts, tracks in frames:
+        accumulator.update(np.array(list(gts.values()), dtype=float).reshape(-1, 2), np.array(list(gts), dtype=np.int64),
+                           np.array(list(tracks.values()), dtype=float).reshape(-1, 2),
+                           np.array(list(tracks), dtype=np.int64))
+    return accumulator.summary()
+
+
+def test_perfect_tracks():
+    frames = [({1: (10 + t, 0), 2: (20, 5 - t)}, {7: (10 + t, 0), 8: (20, 5 - t)}) for t in range(5)]
+    summary = run(frames)
+    assert summary["mota"] == 1
+    assert summary["motp"] == 0
+    assert summary["idf1"] == 1
+    assert summary["id_switches"] == 0
+
+
+def test_golden_miss_false_positive_and_swap():
+    # gt 1 drives along y = 0, gt 2 along y = 5
+    frames = [
+        ({1: (10, 0), 2: (10, 5)}, {100: (10.1, 0), 200: (10, 5.2)}),
+        ({1: (11, 0), 2: (11, 5)}, {100: (11.1, 0)}),
+        ({1: (12, 0), 2: (12, 5)}, {100: (12.1, 0), 200: (12, 5.2), 300: (30, -8)}),
+        # the tracker swaps the ids of the two objects
+        ({1: (13, 0), 2: (13, 5)}, {200: (13.1, 0), 100: (13, 5.1)}),
+    ]
+    summary = run(frames)
+    assert summary["gt"] == 8 and summary["tracks"] == 8 and summary["matches"] == 7
+    assert summary["misses"] == 1
+    assert summary["false_positives"] == 1
+    assert summary["id_switches"] == 2
+    assert summary["mota"] == pytest.approx(1 - (1 + 1 + 2) / 8)
+    assert summary["motp"] == pytest.approx((0.1 + 0.2 + 0.1 + 0.1 + 0.2 + 0.1 + 0.1) / 7)
+    # gt 1 with track 100 in frames 0 to 2, gt 2 with track 200 in frames 0 and 2
+    assert summary["idf1"] == pytest.approx(2 * 5 / 16)
+    assert summary["idp"] == summary["idr"] == pytest.approx(5 / 8)
+
+
+def test_previous_match_is_kept_within_the_gate():
+    frames = [
+        ({1: (0, 0), 2: (0, 1)}, {100: (0, 0), 200: (0, 1)}),
+        # matching 1 with 200 and 2 with 100 would be closer, but both previous matches are within the gate
+        ({1: (0, 0), 2: (0, 1)}, {100: (0, 0.9), 200: (0, 0.2)}),
+    ]
+    summary = run(frames, max_distance=2.0)
+    assert summary["id_switches"] == 0
+    assert summary["motp"] == pytest.approx((0.9 + 0.8) / 4)
+
+    # out of the gate, the previous matches are dropped
+    frames = [
+        ({1: (0, 0), 2: (0, 3)}, {100: (0, 0), 200: (0, 3)}),
+        ({1: (0, 0), 2: (0, 3)}, {100: (0, 2.5), 200: (0, 0.2)}),
+    ]
+    summary = run(frames, max_distance=2.0)
+    assert summary["id_switches"] == 2
+    assert summary["matches"] == 4
+
+
+def test_without_gt_ids():
+    accumulator = MotAccumulator(1.0)
+    accumulator.update(np.array([[10.0, 0.0]]), None, np.array([[10.5, 0.0], [20.0, 0.0]]), np.array([1, 2]))
+    summary = accumulator.summary()
+    assert summary["id_switches"] is None and summary["idf1"] is None
+    assert summary["mota"] == 0
+    assert summary["average_error"] == pytest.approx(0.5 / 10.5 * 100)
+    assert summary["gated_average_error"] == pytest.approx(0.5 / 10.5 * 100)
+
+
+def test_average_error_has_no_gate():
+    # the second track is out of the gate and the third one shares its nearest gt with the first one,
+    # only the average error of the original benchmark counts them
+    accumulator = MotAccumulator(1.0)
+    gts = np.array([[10.0, 0.0], [20.0, 0.0]])
+    tracks = np.array([[10.5, 0.0], [23.0, 0.0], [10.0, 1.0]])
+    accumulator.update(gts, None, tracks, None)
+    summary = accumulator.summary()
+    assert summary["matches"] == 1
+    assert summary["gated_average_error"] == pytest.approx(0.5 / 10.5 * 100)
+    expected = [0.5 / 10.5 * 100, 3 / 23 * 100, 1 / np.hypot(10, 1) * 100]
+    assert summary["average_error"] == pytest.approx(np.mean(expected))
+
+    # the same nearest distances through the KD-tree
+    rng = np.random.default_rng(2)
+    gts, tracks = rng.uniform(1, 100, (200, 2)), rng.uniform(1, 100, (150, 2))
+    full = np.sqrt(((gts[:, None] - tracks[None]) ** 2).sum(axis=2)).min(axis=0)
+    np.testing.assert_allclose(accuracy_benchmark.nearest_distances(gts, tracks), full)
+
+
+def test_kdtree_and_components_match_the_dense_assignment(monkeypatch):
+    rng = np.random.default_rng(1)
+    gts = rng.uniform(0, 100, (400, 2))
+    tracks = np.vstack([gts + rng.normal(0, 0.8, gts.shape), rng.uniform(0, 100, (50, 2))])
+    rng.shuffle(tracks)
+
+    rows, cols, distances = candidate_pairs(gts, tracks, 2.0)
+    full = np.sqrt(((gts[:, None] - tracks[None]) ** 2).sum(axis=2))
+    assert len(rows) == np.count_nonzero(full <= 2.0)
+    np.testing.assert_allclose(distances, full[rows, cols])
+
+    chosen = assign(rows, cols, distances, 1e6)
+    dense = np.where(full <= 2.0, full, 1e6)
+    expected = dense[linear_sum_assignment(dense)]
+    expected = expected[expected < 1e6]
+    assert len(chosen) == len(expected)
+    assert distances[chosen].sum() == pytest.approx(expected.sum())
+    # one-to-one
+    assert len(set(rows[chosen])) == len(set(cols[chosen])) == len(chosen)
+
+    # the same without splitting into components
+    monkeypatch.setattr(accuracy_benchmark, "DENSE_ASSIGNMENT_CELLS", 10 ** 9)
+    assert distances[assign(rows, cols, distances, 1e6)].sum() == pytest.approx(expected.sum())
+
+
+def test_command_line_files(tmp_path, capsys):
+    with open(tmp_path / "radarResults.csv", "w") as f:
+        f.write("frameId,radarRoi,radarSize,radarState,radarID,\n")
+        f.write("0 ,0.000000 0.000000 0.000000 0.000000   10.100000 -5.000000 1.0 0.0   ,0.0 0.0   4.2 1.7   ,0 2 ,0 4 ,\n")
+        f.write("1 ,11.000000 -5.000000 1.0 0.0   ,4.2 1.7   ,2 ,4 ,\n")
+    with open(tmp_path / "radar_gt.csv", "w") as f:
+        f.write("Frame Num,radar_rois,Class Lables\n")
+        # boxes around (xc, yc) = (-5, 10) and (-5, 11), that is x = 10 and 11, y = 5 for the tracker
+        f.write('000559,"[[-6.0, 8.0, -4.0, 12.0, -5.0, 10.0]]","[\'car\']"\n')
+        f.write('000560,"[[-6.0, 9.0, -4.0, 13.0, -5.0, 11.0], [-20.0, 30.0, -18.0, 34.0, -19.0, 32.0]]",'
+                '"[\'car\', \'car\']"\n')
+
+    summary = accuracy_benchmark.accuracy_benchmark(str(tmp_path / "radar_gt.csv"), str(tmp_path / "radarResults.csv"),
+                                                    quiet=True)
+    out = capsys.readouterr().out
+    assert summary["matches"] == 2 and summary["misses"] == 1 and summary["false_positives"] == 0
+    assert summary["motp"] == pytest.approx(0.05)
+    assert summary["id_switches"] is None
+    assert "MOTA: 66.67%" in out
+    assert "frameId" not in out
+    json.dumps(summary)
+
+    accuracy_benchmark.accuracy_benchmark(str(tmp_path / "radar_gt.csv"), str(tmp_path / "radarResults.csv"))
+    assert "frameId: 0 gt: 1 tracks: 1 matches: [4->1:0.10]" in capsys.readouterr().out
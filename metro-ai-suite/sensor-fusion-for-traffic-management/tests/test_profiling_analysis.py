@@ -0,0 +1,146 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import profiling  # noqa: E402
+from profiling_analysis import ProfileAnalyzer, analyze, compare, critical_path, iter_frames  # noqa: E402
+from profiling_analysis.timestamps import QUEUE  # noqa: E402
+
+FRAMES = 1000
+# Frames with a 80 ms detection instead of 8 ms; 500 to 502 in a row
+OUTLIERS = {100, 250, 500, 501, 502, 640, 777, 850, 901, 999}
+
+
+def frame_stamps(i, detection=8, track2track=3, radar_tracking=4):
+    """ Time stamps of a frame; the camera branch ends at +22 ms, the radar branch at +18 ms. """
+    t = i * 100
+    stamps = {}
+
+    def stage(name, start, duration):
+        stamps[f"{name}In"] = start
+        stamps[f"{name}Out"] = start + duration
+        return start + duration
+
+    end = stage("decode", t, 2)
+    end = stage("detection", end, detection)
+    camera_end = stage("MediaTracker", end + 1, 11)
+    end = stage("RadarPreprocess", t, 3)
+    end = stage("RadarDetection", end, 5)
+    end = stage("RadarClustering", end, 6)
+    radar_end = stage("RadarTracking", end, radar_tracking)
+    end = stage("coordinateTrans", max(camera_end, radar_end) + 1, 2)
+    end = stage("track2track", end, track2track)
+    stage("postFusion", end, 1)
+    return stamps
+
+
+def write_log(path, frames=FRAMES, **kwargs):
+    log = {"TimeStamps": []}
+    for i in range(frames):
+        detection = 80 if i in OUTLIERS else 8
+        stamps = frame_stamps(i, detection=detection, **kwargs)
+        log["TimeStamps"].append({"frameId": i, "TimeStamp": [{"name": name, "timeStamp": str(value)}
+                                                               for name, value in stamps.items()]})
+    with open(path, "w") as f:
+        json.dump(log, f, indent=1)
+    return str(path)
+
+
+@pytest.fixture
+def log(tmp_path):
+    return write_log(tmp_path / "timestamps.json")
+
+
+def test_streaming_parser_matches_json_load(log):
+    with open(log) as f:
+        expected = json.load(f)["TimeStamps"]
+    # Tiny chunks split every frame across reads
+    assert list(iter_frames(log, chunk_size=64)) == expected
+    assert list(iter_frames(log)) == expected
+
+
+def test_percentiles_show_the_outliers(log):
+    summary = analyze(log)
+    assert summary["frames"] == FRAMES
+    detection = summary["stages"]["detection"]
+    assert detection["p50"] == detection["p90"] == 8
+    # 990 frames at 8 ms, 10 at 80 ms: p99 lies between the two
+    assert 8 < detection["p99"] < 80
+    assert detection["max"] == 80
+    assert detection["mean"] == pytest.approx(8 + 72 * len(OUTLIERS) / FRAMES)
+    # Each isolated outlier is a jump up and down, the run of three only one of each
+    assert detection["jitter"] == pytest.approx(72 * (2 * (len(OUTLIERS) - 2) - 1) / (FRAMES - 1))
+    assert summary["stages"]["decode"]["jitter"] == 0
+    assert summary["stages"]["e2e"]["max"] == 22 + 72 + 1 + 6
+
+
+def test_critical_path_attribution():
+    stamps = frame_stamps(0)
+    branch, contributions = critical_path(stamps)
+    assert branch == "camera"
+    assert contributions == {"decode": 2, "detection": 8, QUEUE: 2, "MediaTracker": 11, "coordinateTrans": 2,
+                             "track2track": 3, "postFusion": 1}
+    assert sum(contributions.values()) == stamps["postFusionOut"] - stamps["decodeIn"]
+
+    # A slow radar tracker puts the radar branch on the critical path
+    stamps = frame_stamps(0, radar_tracking=30)
+    branch, contributions = critical_path(stamps)
+    assert branch == "radar"
+    assert contributions["RadarTracking"] == 30
+    assert "detection" not in contributions
+    assert sum(contributions.values()) == stamps["postFusionOut"] - stamps["decodeIn"]
+
+
+def test_deadline_misses(log, tmp_path):
+    csv_path = tmp_path / "frames.csv"
+    summary = analyze(log, budget_ms=40, csv_path=csv_path)
+    deadline = summary["deadline"]
+    assert deadline["misses"] == len(OUTLIERS)
+    assert deadline["miss_rate"] == len(OUTLIERS) / FRAMES
+    assert deadline["longest_streak"] == 3
+    assert deadline["bottlenecks"] == {"detection": len(OUTLIERS)}
+    assert {miss["frame"] for miss in deadline["worst"]} == OUTLIERS
+
+    with open(csv_path) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == FRAMES
+    assert {int(row["frame"]) for row in rows if row["deadline_miss"] == "1"} == OUTLIERS
+    assert rows[0]["critical_branch"] == "camera"
+    assert rows[0]["bottleneck"] == "MediaTracker"
+    assert rows[100]["bottleneck"] == "detection"
+
+
+def test_frames_without_post_fusion_are_skipped():
+    analyzer = ProfileAnalyzer()
+    stamps = frame_stamps(0)
+    del stamps["postFusionOut"]
+    assert analyzer.add(0, stamps) is None
+    assert analyzer.summary()["frames"] == 0
+
+
+def test_compare_flags_regressions(log, tmp_path):
+    baseline = analyze(log)
+    slower = analyze(write_log(tmp_path / "slower.json", track2track=6))
+    rows = compare(baseline, slower, threshold_pct=10)
+    regressions = {(row["stage"], row["metric"]) for row in rows if row["regression"]}
+    assert ("track2track", "p50") in regressions
+    assert {stage for stage, _ in regressions} == {"track2track", "e2e"}
+    # 3 ms more on a 29 ms e2e is 10.3%, below a 15% threshold
+    regressions = {row["stage"] for row in compare(baseline, slower, threshold_pct=15) if row["regression"]}
+    assert regressions == {"track2track"}
+    assert not any(row["regression"] for row in compare(baseline, baseline))
+
+
+def test_command_line_outputs(log, tmp_path, capsys):
+    summary_path = tmp_path / "summary.json"
+    summary = profiling.main(log, budget_ms=40, summary_file=summary_path, plot=False)
+    out = capsys.readouterr().out
+    assert "decode_avg_latency: 2.0 ms" in out
+    assert "e2e_avg_latency: 29.72 ms" in out
+    assert "deadline misses over 40 ms: 10" in out
+    with open(summary_path) as f:
+        assert json.load(f) == json.loads(json.dumps(summary))
@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployments", "raddet_tools"))
+from disparity_benchmark import generate_stereo_dataset  # noqa: E402
+from generate_disparity import stereo_reconstruct  # noqa: E402
+from image2bin import image2bin, radar2bin  # noqa: E402
+from pipeline import Manifest  # noqa: E402
+
+PAIRS = 3
+HEIGHT, WIDTH = 128, 256
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    stereo_image_folder, sensors_para_folder = generate_stereo_dataset(str(tmp_path), 2, PAIRS, HEIGHT, WIDTH,
+                                                                       disparity=16)
+    return tmp_path, stereo_image_folder, sensors_para_folder
+
+
+def center_and_background(disparity):
+    height, width = disparity.shape
+    center = disparity[3 * height // 8:5 * height // 8, 3 * width // 8:5 * width // 8]
+    # right of the box, away from the invalid band of numDisparities columns on the left
+    background = disparity[height // 16:height // 5, 13 * width // 16:15 * width // 16]
+    return np.median(center), np.median(background)
+
+
+@pytest.mark.parametrize("mode,downscale", [("sgbm", 1), ("wls", 1), ("sgbm", 2)])
+def test_disparity_shards(dataset, mode, downscale):
+    root, stereo_image_folder, sensors_para_folder = dataset
+    processed = stereo_reconstruct(stereo_image_folder, sensors_para_folder, 2, mode, downscale)
+    assert processed == {"part1": PAIRS, "part2": PAIRS}
+
+    for part in ["part1", "part2"]:
+        shard = np.load(root / "disparity" / f"{part}.npy", mmap_mode="r")
+        assert shard.shape == (PAIRS, HEIGHT // downscale, WIDTH // downscale)
+        assert shard.dtype == np.float32
+        with open(root / "disparity" / f"{part}.txt") as f:
+            names = f.read().split()
+        assert names == sorted(os.listdir(root / "stereo_image" / part))
+        for disparity in shard:
+            # in pixels of the full size images, whatever the downscale
+            assert center_and_background(disparity) == pytest.approx((32, 16), abs=1)
+
+        left = sorted(name for name in os.listdir(root / "left" / part) if name.endswith(".jpg"))
+        assert left == names
+        assert cv2.imread(str(root / "left" / part / left[0])).shape == (HEIGHT, WIDTH, 3)
+
+
+def test_workers_write_the_same_shard(dataset):
+    root, stereo_image_folder, sensors_para_folder = dataset
+    stereo_reconstruct(stereo_image_folder, sensors_para_folder, 1, "sgbm")
+    serial = np.load(root / "disparity" / "part2.npy")
+    stereo_reconstruct(stereo_image_folder, sensors_para_folder, 3, "sgbm")
+    np.testing.assert_array_equal(np.load(root / "disparity" / "part2.npy"), serial)
+
+
+def test_resume_skips_processed_pairs(dataset):
+    root, stereo_image_folder, sensors_para_folder = dataset
+    stereo_reconstruct(stereo_image_folder, sensors_para_folder, 2, "sgbm")
+    expected = np.load(root / "disparity" / "part1.npy")
+
+    # interrupted after the first pair of part1, in the middle of writing the second line
+    manifest_path = root / "left" / "part1" / "manifest.jsonl"
+    lines = manifest_path.read_text().splitlines()
+    manifest_path.write_text("\n".join(lines[:2]) + "\n" + lines[2][:5])
+    # the workers finish in any order, the kept record is not necessarily the first pair
+    kept = {json.loads(line)["index"] for line in lines[1:2]}
+    shard = np.load(root / "disparity" / "part1.npy", mmap_mode="r+")
+    shard[[index for index in range(PAIRS) if index not in kept]] = 0
+    shard.flush()
+    del shard
+
+    processed = stereo_reconstruct(stereo_image_folder, sensors_para_folder, 2, "sgbm", resume=True)
+    assert processed == {"part1": PAIRS - 1, "part2": 0}
+    np.testing.assert_array_equal(np.load(root / "disparity" / "part1.npy"), expected)
+    with open(manifest_path) as f:
+        records = [json.loads(line) for line in f if line.startswith('{"name"')]
+    assert sorted(record["index"] for record in records) == list(range(PAIRS))
+
+    # other options start over
+    processed = stereo_reconstruct(stereo_image_folder, sensors_para_folder, 2, "sgbm", downscale=2, resume=True)
+    assert processed == {"part1": PAIRS, "part2": PAIRS}
+    assert np.load(root / "disparity" / "part1.npy", mmap_mode="r").shape == (PAIRS, HEIGHT // 2, WIDTH // 2)
+
+
+def test_manifest_parameters(tmp_path):
+    path = str(tmp_path / "manifest.jsonl")
+    with Manifest(path, {"a": 1}) as manifest:
+        manifest.add("x", index=0)
+    with Manifest(path, {"a": 1}, resume=True) as manifest:
+        assert manifest.resumed and set(manifest.done) == {"x"}
+        manifest.add("y")
+    with Manifest(path, {"a": 1}, resume=True) as manifest:
+        assert set(manifest.done) == {"x", "y"}
+    with Manifest(path, {"a": 2}, resume=True) as manifest:
+        assert not manifest.resumed
+    with Manifest(path, {"a": 2}, resume=True) as manifest:
+        assert not manifest.done
+
+
+def test_image2bin(dataset):
+    root, stereo_image_folder, sensors_para_folder = dataset
+    rng = np.random.default_rng(0)
+    os.makedirs(root / "raddet_adc" / "ADC")
+    for i in range(3):
+        adc = (rng.normal(size=(256, 8, 64)) + 1j * rng.normal(size=(256, 8, 64))).astype(np.complex128)
+        np.save(root / "raddet_adc" / "ADC" / f"{i:06}.npy", adc)
+    (root / "train").mkdir()
+    (root / "test").mkdir()
+    os.rename(root / "stereo_image", root / "train" / "stereo_image")
+    stereo_reconstruct(str(root / "train" / "stereo_image"), sensors_para_folder, 2)
+    os.makedirs(root / "test" / "left")
+
+    save_folder = root / "bin_files"
+    assert image2bin(str(root), str(save_folder), workers=2) == 3 + 2 * PAIRS
+    assert len(os.listdir(save_folder / "radar")) == 3
+    assert len(os.listdir(save_folder / "bgr")) == 2 * PAIRS
+    expected = str(root / "expected.bin")
+    radar2bin(str(root / "raddet_adc" / "ADC" / "000001.npy"), expected)
+    assert (save_folder / "radar" / "000001.bin").read_bytes() == open(expected, "rb").read()
+    image = np.fromfile(save_folder / "bgr" / "000000.bin", dtype=np.uint8)
+    assert cv2.imdecode(image, cv2.IMREAD_COLOR).shape == (HEIGHT, WIDTH, 3)
+
+    os.remove(save_folder / "radar" / "000002.bin")
+    # only the missing file is converted again
+    assert image2bin(str(root), str(save_folder), workers=2, resume=True) == 1
+    assert image2bin(str(root), str(save_folder), workers=2) == 3 + 2 * PAIRS
+    assert os.path.exists(save_folder / "radar" / "000002.bin")
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployments", "profile_tools"))
+from record_cpu_usage import ProcSampler, open_writer, parse_stat, read_binary  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="samples /proc")
+
+# Two threads: the main one spins, the other sleeps
+WORKLOAD = """
+import threading, time
+threading.Thread(target=time.sleep, args=(30,), daemon=True).start()
+end = time.time() + 30
+while time.time() < end:
+    pass
+"""
+
+
+@pytest.fixture
+def workload():
+    process = subprocess.Popen([sys.executable, "-c", WORKLOAD])
+    # Let the second thread start
+    time.sleep(0.3)
+    yield process
+    process.kill()
+    process.wait()
+
+
+def test_parse_stat_handles_spaces_and_parentheses_in_the_name():
+    data = b"42 (a (b) c) R 1 2 3 4 5 6 7 8 9 10 120 30 0 0 20 0 3 0 100 4096 250 18446744073709551615\n"
+    assert parse_stat(data) == ("a (b) c", 150, 250)
+
+
+def test_sampler_measures_the_workload_with_little_overhead(workload):
+    pid = workload.pid
+    sampler = ProcSampler(pids=[pid], interval=0.1, threads=True)
+    samples = []
+    thread = threading.Thread(target=sampler.run, args=(samples.append,))
+    cpu_before, start = time.process_time(), time.monotonic()
+    thread.start()
+    time.sleep(3)
+    sampler.stop()
+    thread.join()
+    cpu, elapsed = time.process_time() - cpu_before, time.monotonic() - start
+    sampler.close()
+
+    # Sampling on a timer instead of polling top: the sampler thread is idle between samples
+    assert cpu < 0.01 * elapsed
+    assert 25 <= len(samples) <= 32
+    last = samples[-1]
+    process = [row for row in last if row[2] == 0]
+    threads = [row for row in last if row[2] != 0]
+    assert len(process) == 1 and process[0][1] == pid
+    assert len(threads) == 2
+    assert {row[2] for row in threads} >= {pid}
+    # The spinning thread is busy, unless the test runner competes for the same core
+    spinning = sum(row[4] for rows in samples[1:] for row in rows if row[2] == pid) / (len(samples) - 1)
+    assert spinning > 30
+    assert process[0][5] > 0
+
+
+def test_sampler_forgets_exited_processes(workload):
+    sampler = ProcSampler(pids=[workload.pid])
+    assert len(sampler.sample()) == 1
+    workload.kill()
+    workload.wait()
+    assert sampler.sample() == []
+    assert sampler.pids == set() and sampler.files == {}
+
+
+def test_rescan_forgets_processes_that_no_longer_match(workload, monkeypatch):
+    found = [workload.pid]
+    monkeypatch.setattr("record_cpu_usage.find_pids", lambda name: list(found))
+    sampler = ProcSampler(process_name="python", threads=True, rescan_interval=0)
+    assert len(sampler.sample()) == 3
+    assert sampler.files and sampler.previous
+
+    # the process still runs but is no longer found, e.g. renamed
+    found.clear()
+    assert sampler.sample() == []
+    assert sampler.pids == set() and sampler.files == {} and sampler.previous == {}
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".bin"])
+def test_writers(workload, tmp_path, suffix):
+    sampler = ProcSampler(pids=[workload.pid], threads=True)
+    path = str(tmp_path / f"samples{suffix}")
+    writer = open_writer(path)
+    rows = sampler.sample() + sampler.sample()
+    writer.write(rows)
+    writer.close()
+    sampler.close()
+
+    if suffix == ".bin":
+        records = list(read_binary(path))
+        assert [record[1:3] for record in records] == [row[1:3] for row in rows]
+        assert [record[4:] for record in records] == [row[5:] for row in rows]
+        assert records[0][0] == pytest.approx(time.time(), abs=60)
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+        assert lines[0].startswith("time,pid,tid,name,cpu_percent,rss_kb")
+        assert len(lines) == len(rows) + 1
+        assert lines[1].split(",")[1:3] == [str(workload.pid), "0"]
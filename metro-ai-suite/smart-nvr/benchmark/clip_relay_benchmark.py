@@ -0,0 +1,197 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+"""
+Time-to-summary-id and peak RSS of VmsService.summarize for long clips.
+
+Serves a synthetic clip of each --durations length from a local Frigate stub
+at --frigate-mbps, accepts the upload on a local summarizer stub that drains
+it at --vss-mbps, and runs VmsService.summarize in a fresh worker process per
+measurement so the reported peak RSS belongs to that run alone.
+
+Pass --baseline-src to measure another checkout of the router side by side,
+for example the revision before the streaming relay:
+
+    git worktree add /tmp/nvr-before <rev>
+    python benchmark/clip_relay_benchmark.py \\
+        --baseline-src /tmp/nvr-before/metro-ai-suite/smart-nvr/src
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+from aiohttp import web
+
+DEFAULT_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+BLOCK = os.urandom(64 * 1024)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def paced_sleep(start, sent, mbps):
+    """Sleeps until `sent` bytes are on schedule for a link of `mbps` megabits/s."""
+    delay = start + sent * 8 / (mbps * 1_000_000) - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def frigate_stub(bitrate_mbps: float, link_mbps: float) -> web.Application:
+    async def clip_mp4(request):
+        duration = int(request.match_info["end"]) - int(request.match_info["start"])
+        size = int(duration * bitrate_mbps * 1_000_000 / 8)
+        response = web.StreamResponse(
+            headers={"Content-Type": "video/mp4", "Content-Length": str(size)}
+        )
+        await response.prepare(request)
+        start = time.perf_counter()
+        sent = 0
+        while sent < size:
+            block = BLOCK[: min(len(BLOCK), size - sent)]
+            await response.write(block)
+            sent += len(block)
+            await paced_sleep(start, sent, link_mbps)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/api/{camera}/start/{start}/end/{end}/clip.mp4", clip_mp4)
+    return app
+
+
+def summarizer_stub(link_mbps: float, received: dict) -> web.Application:
+    async def upload(request):
+        start = time.perf_counter()
+        size = 0
+        async for chunk in request.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            await paced_sleep(start, size, link_mbps)
+        received["bytes"] = size
+        return web.json_response({"videoId": uuid.uuid4().hex})
+
+    async def create_summary(request):
+        await request.json()
+        return web.json_response({"summaryPipelineId": uuid.uuid4().hex})
+
+    app = web.Application(client_max_size=0)
+    app.router.add_post("/manager/videos/", upload)
+    app.router.add_post("/manager/summary", create_summary)
+    return app
+
+
+async def start_stub(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def worker(duration: int):
+    """Runs one summarize call with the router modules on sys.path and prints the result as JSON."""
+    import logging
+
+    from api.endpoints.frigate_api import FrigateService
+    from api.endpoints.summarization_api import SummarizationService
+    from service.vms_service import VmsService
+
+    logging.disable(logging.CRITICAL)
+    service = VmsService(FrigateService(), SummarizationService())
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = 1_700_000_000
+
+    begin = time.perf_counter()
+    result = asyncio.run(service.summarize("cam1", start_time, start_time + duration))
+    elapsed = time.perf_counter() - begin
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "status": result["status"],
+                "seconds": round(elapsed, 3),
+                "peak_rss_mb": round(peak / 1024, 1),
+                "rss_growth_mb": round((peak - rss_before) / 1024, 1),
+            }
+        )
+    )
+
+
+def run_worker(src, duration, frigate_port, vss_port):
+    env = {
+        **os.environ,
+        "FRIGATE_BASE_URL": f"http://127.0.0.1:{frigate_port}",
+        "VSS_SUMMARY_URL": f"http://127.0.0.1:{vss_port}",
+        "VSS_SEARCH_URL": f"http://127.0.0.1:{vss_port}",
+        "HOST_IP": "127.0.0.1",
+        "no_proxy": "127.0.0.1,localhost",
+        "NO_PROXY": "127.0.0.1,localhost",
+        "PYTHONPATH": os.path.abspath(src),
+    }
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", str(duration)],
+        cwd=os.path.abspath(src),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def run(args):
+    frigate_port, vss_port = free_port(), free_port()
+    received = {}
+    runners = [
+        await start_stub(frigate_stub(args.bitrate_mbps, args.frigate_mbps), frigate_port),
+        await start_stub(summarizer_stub(args.vss_mbps, received), vss_port),
+    ]
+    sources = [("current", args.src)]
+    if args.baseline_src:
+        sources.insert(0, ("baseline", args.baseline_src))
+
+    print("source,clip_seconds,clip_mb,status,time_to_summary_id_s,peak_rss_mb,rss_growth_mb")
+    try:
+        for duration in args.durations:
+            for label, src in sources:
+                for _ in range(args.repeat):
+                    result = await asyncio.to_thread(run_worker, src, duration, frigate_port, vss_port)
+                    print(
+                        f"{label},{duration},{received.get('bytes', 0) / 1e6:.1f},{result['status']},"
+                        f"{result['seconds']},{result['peak_rss_mb']},{result['rss_growth_mb']}",
+                        flush=True,
+                    )
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=DEFAULT_SRC, help="Router source directory to measure")
+    parser.add_argument("--baseline-src", help="Another router source directory to compare against")
+    parser.add_argument("--durations", type=int, nargs="+", default=[60, 300], help="Clip lengths in seconds")
+    parser.add_argument("--bitrate-mbps", type=float, default=4, help="Clip bitrate, sets the clip size")
+    parser.add_argument("--frigate-mbps", type=float, default=400, help="Frigate stub send rate")
+    parser.add_argument("--vss-mbps", type=float, default=200, help="Summarizer stub receive rate")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
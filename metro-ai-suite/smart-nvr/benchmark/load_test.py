@@ -0,0 +1,261 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+"""
+Load test for the NVR Event Router endpoints that call Frigate and VSS.
+
+Starts local aiohttp stubs for Frigate and the summarizer (with configurable
+latency), launches the router from --src with uvicorn pointed at the stubs,
+then drives each endpoint with 1..64 concurrent clients and reports p50/p99
+latency and throughput.
+
+Redis and MQTT are not needed for the measured endpoints; the MQTT listener
+logs a connection error at startup and is otherwise idle.
+
+To compare two revisions, run the harness against a checkout of each and diff
+the CSV files:
+
+    git worktree add /tmp/nvr-before <rev>
+    python benchmark/load_test.py --src /tmp/nvr-before/metro-ai-suite/smart-nvr/src \\
+        --label before --csv before.csv
+    python benchmark/load_test.py --label after --csv after.csv
+    python benchmark/load_test.py --compare before.csv after.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+DEFAULT_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+FIELDS = ["label", "endpoint", "concurrency", "requests", "errors", "p50_ms", "p99_ms", "rps"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def frigate_stub(latency: float, clip_bytes: int) -> web.Application:
+    clip = os.urandom(clip_bytes)
+
+    async def config(request):
+        await asyncio.sleep(latency)
+        return web.json_response({"cameras": {"cam1": {"objects": {"track": ["person", "car"]}}}})
+
+    async def events(request):
+        await asyncio.sleep(latency)
+        camera = request.query.get("camera")
+        return web.json_response(
+            [{"id": f"{i}", "camera": camera, "label": "person", "start_time": i} for i in range(20)]
+        )
+
+    async def clip_mp4(request):
+        await asyncio.sleep(latency)
+        response = web.StreamResponse(headers={"Content-Type": "video/mp4"})
+        await response.prepare(request)
+        for offset in range(0, len(clip), 64 * 1024):
+            await response.write(clip[offset:offset + 64 * 1024])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/api/config", config)
+    app.router.add_get("/api/events", events)
+    app.router.add_get("/api/{camera}/start/{start}/end/{end}/clip.mp4", clip_mp4)
+    return app
+
+
+def summarizer_stub(latency: float) -> web.Application:
+    async def upload(request):
+        # Drain the multipart body like a real upload would
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response({"videoId": uuid.uuid4().hex})
+
+    async def create_summary(request):
+        await request.json()
+        await asyncio.sleep(latency)
+        return web.json_response({"summaryPipelineId": uuid.uuid4().hex})
+
+    async def summary_result(request):
+        await asyncio.sleep(latency)
+        return web.json_response({"summary": "A person walks past the camera.", "frameSummaries": []})
+
+    async def search_embeddings(request):
+        await asyncio.sleep(latency)
+        return web.json_response({"message": "Embeddings created"})
+
+    app = web.Application(client_max_size=1024**3)
+    app.router.add_post("/manager/videos/", upload)
+    app.router.add_post("/manager/summary", create_summary)
+    app.router.add_get("/manager/summary/{pipeline_id}", summary_result)
+    app.router.add_post("/manager/videos/search-embeddings/{video_id}", search_embeddings)
+    return app
+
+
+async def start_stub(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def start_router(src: str, port: int, frigate_port: int, vss_port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "FRIGATE_BASE_URL": f"http://127.0.0.1:{frigate_port}",
+        "VSS_SUMMARY_URL": f"http://127.0.0.1:{vss_port}",
+        "VSS_SEARCH_URL": f"http://127.0.0.1:{vss_port}",
+        "HOST_IP": "127.0.0.1",
+        "no_proxy": "127.0.0.1,localhost",
+        "NO_PROXY": "127.0.0.1,localhost",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.abspath(src),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(session: aiohttp.ClientSession, url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Router did not become ready at {url}")
+
+
+async def run_level(session, url, concurrency, total):
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            begin = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - begin
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+        "rps": round(len(latencies) / elapsed, 1),
+    }
+
+
+async def run(args):
+    frigate_port, vss_port, router_port = free_port(), free_port(), free_port()
+    runners = [
+        await start_stub(frigate_stub(args.frigate_latency / 1000, args.clip_kb * 1024), frigate_port),
+        await start_stub(summarizer_stub(args.vss_latency / 1000), vss_port),
+    ]
+    router = start_router(args.src, router_port, frigate_port, vss_port)
+    base = f"http://127.0.0.1:{router_port}"
+    endpoints = {
+        "events": "/events?camera=cam1",
+        "cameras": "/cameras",
+        "summary-status": "/summary-status/abc",
+        "summary": "/summary/cam1?start_time=1700000000&end_time=1700000030",
+        "search-embeddings": "/search-embeddings/cam1?start_time=1700000000&end_time=1700000030",
+    }
+    selected = args.endpoints or list(endpoints)
+    rows = []
+    try:
+        timeout = aiohttp.ClientTimeout(total=args.timeout)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await wait_ready(session, base + "/")
+            print(",".join(FIELDS))
+            for name in selected:
+                for concurrency in args.concurrency:
+                    total = max(concurrency, args.requests)
+                    result = await run_level(session, base + endpoints[name], concurrency, total)
+                    row = {"label": args.label, "endpoint": name, "concurrency": concurrency, **result}
+                    print(",".join(str(row[f]) for f in FIELDS), flush=True)
+                    rows.append(row)
+    finally:
+        router.terminate()
+        router.wait(timeout=10)
+        for runner in runners:
+            await runner.cleanup()
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def compare(before_path, after_path):
+    def load(path):
+        with open(path, newline="") as f:
+            return {(r["endpoint"], int(r["concurrency"])): r for r in csv.DictReader(f)}
+
+    before, after = load(before_path), load(after_path)
+    print(f"{'endpoint':<18} {'clients':>7} {'p50 before':>11} {'p50 after':>10} {'p99 before':>11} {'p99 after':>10}")
+    for key in sorted(before.keys() & after.keys()):
+        b, a = before[key], after[key]
+        print(
+            f"{key[0]:<18} {key[1]:>7} {b['p50_ms']:>11} {a['p50_ms']:>10} {b['p99_ms']:>11} {a['p99_ms']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=DEFAULT_SRC, help="Router source directory to launch")
+    parser.add_argument("--label", default="current", help="Label written to every CSV row")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(c) for c in s.split(",")],
+        default=[1, 2, 4, 8, 16, 32, 64],
+        help="Comma-separated concurrent client counts",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--endpoints", nargs="*", help="Subset of endpoints to test")
+    parser.add_argument("--frigate-latency", type=float, default=20, help="Frigate stub latency (ms)")
+    parser.add_argument("--vss-latency", type=float, default=50, help="Summarizer stub latency (ms)")
+    parser.add_argument("--clip-kb", type=int, default=512, help="Size of the clip served by the Frigate stub")
+    parser.add_argument("--timeout", type=float, default=120, help="Client timeout per request (s)")
+    parser.add_argument("--csv", help="Write results to this CSV file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two CSV files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+"""
+Per-event rule matching cost: previous full scan versus the in-memory RuleIndex.
+
+Stores --rules rules in fakeredis, then replays events at --rate events per
+second through both paths and reports matching latency (p50/p99) and Redis
+round-trips per event:
+
+  scan   SMEMBERS plus one GET per rule for every event, then a linear match
+  index  RuleIndex kept coherent over pub/sub, dict lookup per event
+
+Afterwards rules are added and deleted through redis_store, and a sample of
+events is re-matched against a full scan to confirm the index followed the
+published changes.
+
+Requires fakeredis (pip install fakeredis).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import fakeredis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from service import redis_store  # noqa: E402
+from service.rule_index import RuleIndex  # noqa: E402
+
+LABELS = ["person", "car", "bicycle", "dog", "cat", "truck", "bus", "motorcycle"]
+ACTIONS = ["summarize", "add to search"]
+
+
+class CountingRedis(fakeredis.FakeAsyncRedis):
+    """Counts round-trips: one per command, one per pipeline execution."""
+
+    round_trips = 0
+
+    async def execute_command(self, *args, **options):
+        CountingRedis.round_trips += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        execute = pipe.execute
+
+        async def counted_execute(*args, **kwargs):
+            CountingRedis.round_trips += 1
+            return await execute(*args, **kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+
+def make_rule(i, cameras):
+    camera = random.choice(cameras) if random.random() < 0.9 else None
+    return {
+        "id": f"rule-{i}",
+        "label": random.choice(LABELS),
+        "action": random.choice(ACTIONS),
+        "camera": camera,
+    }
+
+
+def make_event(cameras):
+    return {"camera": random.choice(cameras), "label": random.choice(LABELS)}
+
+
+async def scan_match(redis_client, event):
+    """The matching done per event before the index existed."""
+    rule_ids = await redis_client.smembers("rules")
+    rules = []
+    for rid in rule_ids:
+        data = await redis_client.get(f"rule:{rid}")
+        if data:
+            rules.append(json.loads(data))
+    return [
+        rule
+        for rule in rules
+        if rule["label"] == event.get("label")
+        and (not rule.get("camera") or rule["camera"] == event.get("camera"))
+    ]
+
+
+async def paced(events, rate, handle):
+    """Calls handle(event) at a fixed rate and returns per-event latencies."""
+    latencies = []
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        begin = time.perf_counter()
+        await handle(i, event)
+        latencies.append(time.perf_counter() - begin)
+    achieved = len(events) / (time.perf_counter() - start)
+    return latencies, achieved
+
+
+def report(name, latencies, achieved, round_trips):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<6} events={len(latencies):<6} rate={achieved:9.1f}/s "
+        f"p50={statistics.median(latencies) * 1e6:10.1f}us p99={p99 * 1e6:10.1f}us "
+        f"round-trips/event={round_trips / len(latencies):.1f}"
+    )
+
+
+async def run(args):
+    random.seed(args.seed)
+    cameras = [f"cam{i}" for i in range(args.cameras)]
+    redis_client = CountingRedis(decode_responses=True)
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(redis_client=redis_client)))
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for i in range(args.rules):
+            rule = make_rule(i, cameras)
+            pipe.set(f"rule:{rule['id']}", json.dumps(rule))
+            pipe.sadd("rules", rule["id"])
+        await pipe.execute()
+
+    scan_events = [make_event(cameras) for _ in range(args.scan_events)]
+    CountingRedis.round_trips = 0
+
+    async def handle_scan(i, event):
+        await scan_match(redis_client, event)
+
+    latencies, achieved = await paced(scan_events, args.rate, handle_scan)
+    report("scan", latencies, achieved, CountingRedis.round_trips)
+
+    index = RuleIndex(redis_client)
+    CountingRedis.round_trips = 0
+    begin = time.perf_counter()
+    await index.load()
+    print(
+        f"index load: {len(index.rules)} rules in {(time.perf_counter() - begin) * 1000:.1f}ms, "
+        f"{CountingRedis.round_trips} round-trips"
+    )
+    listener = asyncio.create_task(index.listen())
+    await asyncio.sleep(0.5)
+
+    events = [make_event(cameras) for _ in range(int(args.rate * args.duration))]
+    next_id = args.rules
+    mismatches = 0
+
+    async def handle_index(i, event):
+        index.match(event)
+
+    CountingRedis.round_trips = 0
+    latencies, achieved = await paced(events, args.rate, handle_index)
+    report("index", latencies, achieved, CountingRedis.round_trips)
+
+    # Churn rules through the CRUD helpers and verify the index follows
+    for _ in range(args.churn):
+        if random.random() < 0.5:
+            rule = make_rule(next_id, cameras)
+            next_id += 1
+            await redis_store.add_rule(request, rule["id"], rule)
+        else:
+            await redis_store.delete_rule(request, random.choice(list(index.rules)))
+    await asyncio.sleep(1.5)
+    for event in random.sample(events, min(len(events), args.verify)):
+        expected = {r["id"] for r in await scan_match(redis_client, event)}
+        if {r["id"] for r in index.match(event)} != expected:
+            mismatches += 1
+    print(f"after {args.churn} rule changes: {mismatches} mismatches in {min(len(events), args.verify)} checked events")
+
+    listener.cancel()
+    try:
+        await listener
+    except asyncio.CancelledError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--cameras", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=1000, help="Events per second")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds of events for the index path")
+    parser.add_argument("--scan-events", type=int, default=20, help="Events for the scan path, which is far slower")
+    parser.add_argument("--churn", type=int, default=200, help="Rule adds/deletes applied after the run")
+    parser.add_argument("--verify", type=int, default=50, help="Events re-checked against a full scan")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
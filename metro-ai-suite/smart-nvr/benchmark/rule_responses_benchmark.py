@@ -0,0 +1,126 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+"""
+Latency of GET /rules/responses/ for 10, 100 and 1000 stored summary ids.
+
+Runs the router in-process against fakeredis, with a mocked summarizer that
+answers every summary request after --latency ms. Each size is measured as:
+
+  sequential  one summary request at a time, no cache (previous behaviour)
+  cold        bounded fan-out, empty cache
+  warm        bounded fan-out, completed summaries cached, --pending share
+              of summaries still in progress and re-fetched after the TTL
+
+Requires fakeredis (pip install fakeredis).
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import fakeredis
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import api.endpoints.summarization_api as summarization_api  # noqa: E402
+from api import router as router_module  # noqa: E402
+from service.http_pool import HttpPool  # noqa: E402
+from service.summary_fetcher import SummaryFetcher  # noqa: E402
+
+VSS_URL = "http://summarizer"
+
+
+def make_summarizer(latency, pending):
+    async def handler(request):
+        summary_id = request.url.path.rsplit("/", 1)[-1]
+        await asyncio.sleep(latency)
+        if summary_id in pending:
+            return httpx.Response(200, json={"summary": "", "frameSummaries": []})
+        return httpx.Response(200, json={"summary": f"summary of {summary_id}"})
+
+    return handler
+
+
+async def seed(redis_client, total, rules):
+    await redis_client.flushall()
+    per_rule = total // rules
+    for r in range(rules):
+        rule_id = f"rule-{r:03d}"
+        await redis_client.set(
+            f"rule:{rule_id}", json.dumps({"id": rule_id, "label": "person", "action": "summarize"})
+        )
+        await redis_client.sadd("rules", rule_id)
+        count = per_rule + (1 if r < total % rules else 0)
+        if count:
+            await redis_client.rpush(f"summary_ids:{rule_id}", *(f"{rule_id}-s{i}" for i in range(count)))
+
+
+async def timed(client, repeat, new_fetcher=None):
+    latencies = []
+    for _ in range(repeat):
+        if new_fetcher:
+            router_module.summary_fetcher = new_fetcher()
+        begin = time.perf_counter()
+        response = await client.get("/rules/responses/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - begin)
+    return statistics.median(latencies) * 1000
+
+
+async def run(args):
+    logging.disable(logging.INFO)
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    app = FastAPI()
+    app.include_router(router_module.router)
+    app.state.redis_client = redis_client
+    router_module.vms_service.vss_summary_url = VSS_URL
+
+    print(f"{'ids':>6} {'sequential ms':>14} {'cold ms':>10} {'warm ms':>10}")
+    for total in args.sizes:
+        await seed(redis_client, total, args.rules)
+        ids = [sid for r in range(args.rules) for sid in await redis_client.lrange(f"summary_ids:rule-{r:03d}", 0, -1)]
+        pending = set(ids[: int(len(ids) * args.pending)])
+
+        pool = HttpPool(transport=httpx.MockTransport(make_summarizer(args.latency / 1000, pending)))
+        pool.register("summarizer", 60)
+        summarization_api.http_pool = pool
+        transport = httpx.ASGITransport(app=app)
+        def new_fetcher(concurrency):
+            return lambda: SummaryFetcher(
+                router_module.vms_service.summary, max_concurrency=concurrency, ttl=args.ttl
+            )
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://router") as client:
+            sequential = await timed(client, 1, new_fetcher(1))
+            cold = await timed(client, args.repeat, new_fetcher(args.concurrency))
+
+            router_module.summary_fetcher = new_fetcher(args.concurrency)()
+            await client.get("/rules/responses/")
+            # Expire pending entries so every warm request re-fetches them
+            router_module.summary_fetcher.ttl = 0
+            warm = await timed(client, args.repeat)
+        await pool.aclose()
+        print(f"{total:>6} {sequential:>14.1f} {cold:>10.1f} {warm:>10.1f}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Stored summary ids")
+    parser.add_argument("--rules", type=int, default=10, help="Rules the summary ids are spread over")
+    parser.add_argument("--latency", type=float, default=20, help="Mocked summarizer latency (ms)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Fan-out concurrency")
+    parser.add_argument("--pending", type=float, default=0.1, help="Share of summaries still in progress")
+    parser.add_argument("--ttl", type=float, default=5, help="Cache TTL for pending summaries (s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+"""
+Soak test of summary status updates for many open UI sessions: polling vs push.
+
+Starts the router under uvicorn against fakeredis and a mocked summarizer.
+--summaries summaries are started and --sessions UI sessions watch them
+(tabs open on the same summaries). Each summary gains a frame summary every
+--stage seconds, from a random phase, and completes after --stages stages.
+
+  polling  every session calls GET /summary-status/{id} every --poll-interval
+           seconds through the UI's api_client (previous behaviour)
+  push     the UI process holds one /updates subscription (UpdateStream); the
+           router watches each summary every --watch-interval seconds and every
+           session renders the pushed state every --tick seconds
+
+Reports requests received by the router, requests sent to the summarizer, and
+the latency from a summary changing upstream (frame summary added or final
+summary ready) to a session rendering it.
+
+Requires fakeredis (pip install fakeredis). Run from the smart-nvr directory.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import warnings
+
+import fakeredis
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+logging.disable(logging.WARNING)
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, ROOT)
+
+import api.endpoints.summarization_api as summarization_api  # noqa: E402
+from api import router as router_module  # noqa: E402
+from service import redis_store  # noqa: E402
+from service.http_pool import HttpPool  # noqa: E402
+from service.summary_fetcher import SummaryFetcher  # noqa: E402
+from service.updates import SummaryWatcher, UpdateBroadcaster  # noqa: E402
+
+PORT = 8765
+os.environ["API_BASE_URL"] = f"http://127.0.0.1:{PORT}"
+from ui.services import api_client  # noqa: E402
+from ui.services.update_stream import UpdateStream  # noqa: E402
+
+VSS_URL = "http://summarizer"
+
+
+class Summarizer:
+    """Mocked summarizer whose summaries advance one stage every `stage` seconds."""
+
+    def __init__(self, stage, stages, seed=0):
+        self.stage = stage
+        self.stages = stages
+        self.started = {}
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def start(self, summary_id):
+        # Random phase, so changes do not line up with the polling interval
+        self.started[summary_id] = time.monotonic() - self._random.uniform(0, self.stage)
+
+    def stage_of(self, summary_id):
+        elapsed = time.monotonic() - self.started[summary_id]
+        return min(int(elapsed // self.stage), self.stages)
+
+    def changed_at(self, summary_id, stage):
+        return self.started[summary_id] + stage * self.stage
+
+    async def __call__(self, request):
+        self.calls += 1
+        summary_id = request.url.path.rsplit("/", 1)[-1]
+        stage = self.stage_of(summary_id)
+        if stage == self.stages:
+            return httpx.Response(200, json={"summary": f"summary of {summary_id}"})
+        frames = [{"startFrame": i, "endFrame": i + 1, "status": "COMPLETE", "summary": "..."} for i in range(stage)]
+        return httpx.Response(200, json={"summary": "", "frameSummaries": frames})
+
+
+def stage_of_result(result, stages):
+    if "frameSummaries" not in result:
+        return stages
+    return len(result["frameSummaries"])
+
+
+def make_app(mode, args, summarizer, counter):
+    app = FastAPI()
+    app.include_router(router_module.router)
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next):
+        path = request.url.path.split("/")[1]
+        counter[path] = counter.get(path, 0) + 1
+        return await call_next(request)
+
+    @app.on_event("startup")
+    async def startup():
+        redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        app.state.redis_client = redis_client
+        redis_store.fallback_redis_client = redis_client
+        pool = HttpPool(transport=httpx.MockTransport(summarizer))
+        pool.register("summarizer", 60)
+        summarization_api.http_pool = pool
+        router_module.vms_service.vss_summary_url = VSS_URL
+        router_module.summary_fetcher = SummaryFetcher(router_module.vms_service.summary, ttl=args.ttl)
+        app.state.updates_task = None
+        if mode != "push":
+            return
+        app.state.summary_watcher = SummaryWatcher(
+            redis_client, router_module.summary_fetcher, interval=args.watch_interval
+        )
+        app.state.updates = UpdateBroadcaster(redis_client, app.state.summary_watcher)
+        app.state.updates_task = asyncio.create_task(app.state.updates.run())
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        if app.state.updates_task is None:
+            return
+        app.state.updates_task.cancel()
+        await app.state.summary_watcher.aclose()
+
+    @app.post("/soak/start/{summary_id}")
+    async def start(summary_id: str, request: Request):
+        # Same publish as a successful POST /summary/{camera}
+        summarizer.start(summary_id)
+        await redis_store.publish_update("summary_id", request, rule_id=None, summary_id=summary_id)
+
+    return app
+
+
+def polling_session(summary_id, args, summarizer, latencies, stop):
+    seen = 0
+    while not stop.is_set():
+        result = api_client.fetch_summary_status(summary_id)
+        now = time.monotonic()
+        if isinstance(result, dict):
+            stage = stage_of_result(result, args.stages)
+            if stage > seen:
+                latencies.extend(now - summarizer.changed_at(summary_id, s) for s in range(seen + 1, stage + 1))
+                seen = stage
+            if stage == args.stages:
+                return
+        stop.wait(args.poll_interval)
+
+
+def push_session(summary_id, args, summarizer, stream, latencies, stop):
+    seen = 0
+    while not stop.is_set():
+        status = stream.summary_status(summary_id)
+        now = time.monotonic()
+        if status is not None:
+            stage = stage_of_result(status[0], args.stages)
+            if stage > seen:
+                latencies.extend(now - summarizer.changed_at(summary_id, s) for s in range(seen + 1, stage + 1))
+                seen = stage
+            if status[1]:
+                return
+        stop.wait(args.tick)
+
+
+def run_mode(mode, args):
+    summarizer = Summarizer(args.stage, args.stages)
+    counter = {}
+    server = uvicorn.Server(uvicorn.Config(make_app(mode, args, summarizer, counter), port=PORT, log_level="warning"))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    stream = None
+    if mode == "push":
+        stream = UpdateStream().start()
+        while not stream.connected:
+            time.sleep(0.05)
+
+    latencies = []
+    stop = threading.Event()
+    sessions = []
+    begin = time.monotonic()
+    for i in range(args.summaries):
+        httpx.post(f"{os.environ['API_BASE_URL']}/soak/start/{mode}-{i}").raise_for_status()
+    for i in range(args.sessions):
+        summary_id = f"{mode}-{i % args.summaries}"
+        if mode == "push":
+            target, extra = push_session, (stream,)
+        else:
+            target, extra = polling_session, ()
+        thread = threading.Thread(
+            target=target, args=(summary_id, args, summarizer, *extra, latencies, stop), daemon=True
+        )
+        thread.start()
+        sessions.append(thread)
+        # Spread session start-up over one polling interval
+        time.sleep(args.poll_interval / args.sessions)
+
+    for thread in sessions:
+        thread.join(timeout=args.stage * (args.stages + 2) + args.poll_interval)
+    stop.set()
+    elapsed = time.monotonic() - begin
+    if stream:
+        stream.stop()
+    server.should_exit = True
+    server_thread.join()
+
+    requests_received = sum(count for path, count in counter.items() if path != "soak")
+    return {
+        "mode": mode,
+        "backend_rps": requests_received / elapsed,
+        "upstream_rps": summarizer.calls / elapsed,
+        "updates": len(latencies),
+        "p50": statistics.median(latencies),
+        "p95": statistics.quantiles(latencies, n=20)[-1],
+        "max": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="Open UI sessions")
+    parser.add_argument("--summaries", type=int, default=10, help="Summaries watched by the sessions")
+    parser.add_argument("--stage", type=float, default=10, help="Seconds between summary changes")
+    parser.add_argument("--stages", type=int, default=4, help="Changes until a summary completes")
+    parser.add_argument("--poll-interval", type=float, default=5, help="UI polling interval (s)")
+    parser.add_argument("--watch-interval", type=float, default=5, help="SUMMARY_WATCH_INTERVAL (s)")
+    parser.add_argument("--tick", type=float, default=1, help="UPDATE_TICK_INTERVAL (s)")
+    parser.add_argument("--ttl", type=float, default=5, help="SUMMARY_CACHE_TTL (s)")
+    parser.add_argument("--modes", nargs="+", default=["polling", "push"], choices=["polling", "push"])
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'router req/s':>13} {'VSS req/s':>10} {'updates':>8} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+    for mode in args.modes:
+        r = run_mode(mode, args)
+        print(
+            f"{r['mode']:>8} {r['backend_rps']:>13.2f} {r['upstream_rps']:>10.2f} {r['updates']:>8}"
+            f" {r['p50']:>7.2f} {r['p95']:>7.2f} {r['max']:>7.2f}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,22 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
-import requests
+import httpx
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Dict
-from fastapi.responses import FileResponse
 from config import FRIGATE_BASE_URL
+from service.http_pool import http_pool
 
 
 class FrigateService:
     def __init__(self, base_url: str = FRIGATE_BASE_URL):
         self.base_url = base_url
 
-    def get_camera_names(self) -> Dict[str, list]:
+    async def get_camera_names(self) -> Dict[str, list]:
         """Get mapping of camera names to detected objects from Frigate"""
         try:
-            response = requests.get(f"{self.base_url}/api/config")
+            response = await http_pool.get("frigate", f"{self.base_url}/api/config")
             response.raise_for_status()
             config = response.json()
             cameras = config.get("cameras", {})
@@ -27,7 +28,7 @@ class FrigateService:
             print(camera_object_map)
             return camera_object_map
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise HTTPException(
                 status_code=502, detail=f"Failed to connect to Frigate: {str(e)}"
             )
@@ -46,25 +47,27 @@ class FrigateService:
 
     async def get_camera_events(self, camera_name: str) -> dict:
         """Get list of events for a specific camera"""
-        url = f"{self.base_url}/api/events?camera={camera_name}"
+        url = f"{self.base_url}/api/events"
 
         try:
-            response = requests.get(url, timeout=10)
+            response = await http_pool.get(
+                "frigate", url, params={"camera": camera_name}, timeout=10
+            )
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             raise HTTPException(
                 status_code=e.response.status_code,
                 detail=f"Frigate events API error: {e.response.text}",
             )
-        except requests.exceptions.RequestException as e:
+        except httpx.RequestError as e:
             raise HTTPException(
                 status_code=502, detail=f"Failed to contact Frigate: {str(e)}"
             )
 
     MEDIA_BASE_PATH = "/media/exports"
 
-    def get_clip_from_timestamps(
+    async def get_clip_from_timestamps(
         self, camera_name: str, start_time: int, end_time: int, download: bool = False
     ) -> StreamingResponse:
         """
@@ -77,7 +80,8 @@ class FrigateService:
             download (bool): If True, download the file.
 
         Returns:
-            StreamingResponse: Video stream response.
+            StreamingResponse: Video stream response. The upstream connection
+            is released back to the pool once the body has been consumed.
         """
         if end_time <= start_time:
             raise HTTPException(
@@ -89,26 +93,30 @@ class FrigateService:
             url += "?download=1"
 
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            return StreamingResponse(
-                response.iter_content(chunk_size=8192),
-                media_type="video/mp4",
-                headers={
-                    "Content-Disposition": response.headers.get(
-                        "Content-Disposition", "inline"
-                    )
-                },
+            response = await http_pool.get("frigate", url, stream=True)
+        except httpx.RequestError as e:
+            raise HTTPException(
+                status_code=502, detail=f"Failed to connect to Frigate: {str(e)}"
             )
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
+
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            if response.status_code == 404:
                 raise HTTPException(
                     status_code=404, detail="Clip not found for specified time range"
                 )
             raise HTTPException(
-                status_code=502, detail=f"Frigate error: {e.response.text}"
+                status_code=502, detail=f"Frigate error: {response.text}"
             )
-        except requests.exceptions.RequestException as e:
-            raise HTTPException(
-                status_code=502, detail=f"Failed to connect to Frigate: {str(e)}"
-            )
\ No newline at end of file
+
+        return StreamingResponse(
+            response.aiter_bytes(chunk_size=8192),
+            media_type="video/mp4",
+            headers={
+                "Content-Disposition": response.headers.get(
+                    "Content-Disposition", "inline"
+                )
+            },
+            background=BackgroundTask(response.aclose),
+        )
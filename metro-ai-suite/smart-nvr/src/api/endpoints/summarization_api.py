@@ -3,13 +3,15 @@
 import os
 import json
 import logging
-import requests
-from typing import Union
+import httpx
+import uuid
+from typing import AsyncIterator, Union
 from pathlib import Path
 from typing import Optional
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse, FileResponse
 from model.model import SummaryPayload
+from service.http_pool import http_pool
 import traceback
 
 # Setup logger
@@ -24,7 +26,9 @@ class SummarizationService:
     def __init__(self):
         logger.debug(f"SummarizationService initialized")
 
-    def video_upload(self, video_path: Union[str, Path], base_url: str) -> dict:
+    async def video_upload(
+        self, video_path: Union[str, Path], base_url: str, upstream: str = "summarizer"
+    ) -> dict:
         logger.debug(f"Starting video upload: {video_path}")
 
         try:
@@ -47,9 +51,7 @@ class SummarizationService:
                 upload_url = f"{base_url}/manager/videos/"
                 logger.debug(f"Sending POST request to {upload_url}")
 
-                response = requests.post(
-                    upload_url, files=files, timeout=30
-                )
+                response = await http_pool.post(upstream, upload_url, files=files)
 
             response.raise_for_status()
             logger.info(f"Video uploaded successfully: {video_path}")
@@ -65,31 +67,91 @@ class SummarizationService:
             logger.error(f"I/O error while reading file: {e}")
             raise HTTPException(status_code=500, detail="Error reading video file.")
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Failed to upload video: {type(e).__name__} - {e}")
+            logger.debug(traceback.format_exc())
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Failed to upload video: {e.response.text}",
+            )
+
+        except httpx.RequestError as e:
             logger.error(f"Failed to upload video: {type(e).__name__} - {e}")
             logger.debug(traceback.format_exc())
-            status = e.response.status_code if e.response else 502
-            detail = e.response.text if e.response else str(e)
-            raise HTTPException(status_code=status, detail=f"Failed to upload video: {detail}")
+            raise HTTPException(status_code=502, detail=f"Failed to upload video: {e}")
+
+    async def video_upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        base_url: str,
+        upstream: str = "summarizer",
+    ) -> dict:
+        """
+        Uploads a video from an async byte stream as the same multipart form
+        as video_upload, sent with chunked transfer encoding so the video
+        never has to be fully buffered or written to disk.
+        """
+        boundary = uuid.uuid4().hex
+        upload_url = f"{base_url}/manager/videos/"
+        logger.debug(f"Streaming {filename} to {upload_url}")
+
+        async def body():
+            yield (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="video"; filename="{filename}"\r\n'
+                "Content-Type: video/mp4\r\n\r\n"
+            ).encode()
+            async for chunk in chunks:
+                yield chunk
+            yield f"\r\n--{boundary}--\r\n".encode()
 
-    def create_summary(self, payload: SummaryPayload, base_url: str) -> dict:
+        try:
+            response = await http_pool.post(
+                upstream,
+                upload_url,
+                content=body(),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            )
+            response.raise_for_status()
+            logger.info(f"Video streamed successfully: {filename}")
+            logger.debug(f"Upload response: {response.json()}")
+            return response.json()
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Failed to upload video: {type(e).__name__} - {e}")
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Failed to upload video: {e.response.text}",
+            )
+
+        except httpx.RequestError as e:
+            logger.error(f"Failed to upload video: {type(e).__name__} - {e}")
+            logger.debug(traceback.format_exc())
+            raise HTTPException(status_code=502, detail=f"Failed to upload video: {e}")
+
+    async def create_summary(self, payload: SummaryPayload, base_url: str) -> dict:
         logger.debug(f"Creating summary for payload: {payload}")
         try:
-            response = requests.post(f"{base_url}/manager/summary", json=payload.dict())
+            response = await http_pool.post(
+                "summarizer", f"{base_url}/manager/summary", json=payload.dict()
+            )
             response.raise_for_status()
             logger.info("Summary creation request successful.")
             logger.debug(f"Summary creation response: {response.json()}")
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to create summary: {e}")
             raise HTTPException(
                 status_code=502, detail=f"Failed to create summary: {str(e)}"
             )
 
-    def get_summary_result(self, pipeline_id: str, base_url: str) -> dict:
+    async def get_summary_result(self, pipeline_id: str, base_url: str) -> dict:
         logger.debug(f"Fetching summary result for pipeline_id: {pipeline_id}")
         try:
-            response = requests.get(f"{base_url}/manager/summary/{pipeline_id}")
+            response = await http_pool.get(
+                "summarizer", f"{base_url}/manager/summary/{pipeline_id}"
+            )
             response.raise_for_status()
 
             json_data = response.json()
@@ -99,7 +161,7 @@ class SummarizationService:
             # logger.debug(f"Summary result JSON: {json.dumps(json_data, indent=2)}")
 
             return json_data  # ✅ This returns the full parsed response
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(
                 f"Failed to get summary result for pipeline_id {pipeline_id}: {e}"
             )
@@ -1,9 +1,18 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
-from fastapi import APIRouter, Depends, HTTPException, Request
+import asyncio
+import base64
+import binascii
+import json
+from bisect import bisect_left
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from api.endpoints.frigate_api import FrigateService
 from api.endpoints.summarization_api import SummarizationService
+from config import SSE_KEEPALIVE, SUMMARY_CACHE_TTL, SUMMARY_FETCH_CONCURRENCY
+from service.summary_fetcher import SummaryFetcher
 from service.vms_service import VmsService
 from service import redis_store
 
@@ -11,11 +20,16 @@ router = APIRouter()
 frigate_service = FrigateService()
 summarization_service = SummarizationService()
 vms_service = VmsService(frigate_service, summarization_service)
+summary_fetcher = SummaryFetcher(
+    vms_service.summary,
+    max_concurrency=SUMMARY_FETCH_CONCURRENCY,
+    ttl=SUMMARY_CACHE_TTL,
+)
 
 
 @router.get("/cameras", summary="Get list of camera names")
 async def get_cameras():
-    return frigate_service.get_camera_names()
+    return await frigate_service.get_camera_names()
 
 
 @router.get("/events", summary="Get list of events for a specific camera")
@@ -24,9 +38,19 @@ async def get_camera_events(camera: str):
 
 @router.get("/summary/{camera_name}", summary="Stream video using clip.mp4 API")
 async def summarize_video(
-    camera_name: str, start_time: float, end_time: float, download: bool = False
+    request: Request,
+    camera_name: str,
+    start_time: float,
+    end_time: float,
+    download: bool = False,
 ):
-    return await vms_service.summarize(camera_name, start_time, end_time)
+    result = await vms_service.summarize(camera_name, start_time, end_time)
+    if result["status"] == 200:
+        # Start pushing status updates for this summary to /updates clients
+        await redis_store.publish_update(
+            "summary_id", request, rule_id=None, summary_id=result["message"]
+        )
+    return result
 
 
 @router.get(
@@ -40,39 +64,134 @@ async def search_video_embeddings(
 
 @router.get("/summary-status/{summary_id}", summary="Get the summary using id")
 async def get_summary(summary_id: str):
-    return vms_service.summary(summary_id)
+    return await summary_fetcher.get(summary_id)
+
+
+@router.get("/updates", summary="Stream rule responses and summary status as server-sent events")
+async def stream_updates(request: Request):
+    """
+    Server-sent events for every update published by the router:
+
+    - `response`: a rule stored a new response (rule_id)
+    - `summary_id`: a summary was started (rule_id, or null for manual requests)
+    - `summary_status`: a summary changed (summary_id, result, complete)
+
+    The latest status of recent summaries is sent first on every connection.
+    """
+    updates = request.app.state.updates
+    queue = updates.subscribe()
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            updates.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 from service.redis_store import (
     get_rules,
     get_summary_ids,
+    get_summary_ids_for_rules,
     get_summary_result,
     get_search_results_by_rule,
 )
 
 
-@router.get("/rules/responses/")
-async def get_all_rule_summaries(request: Request):
-    rules = await get_rules(request)
-    output = {}
+def _encode_cursor(rule_id: str, offset: int) -> str:
+    raw = json.dumps({"rule": rule_id, "offset": offset}).encode()
+    return base64.urlsafe_b64encode(raw).decode()
 
-    for rule in rules:
-        rule_id = rule["id"]
 
-        # Skip rules where the action contains "search"
-        if "search" in rule.get("action", "").lower():
-            continue
+def _decode_cursor(cursor: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(data["rule"]), int(data["offset"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        summary_ids = await get_summary_ids(request, rule_id)
-        summaries = {}
 
-        for sid in summary_ids:
-            result = vms_service.summary(sid)
-            summaries[sid] = result or "Pending"
+async def _summary_ids_page(request: Request, rule_ids: list, cursor: Optional[str], limit: int):
+    """
+    Returns ({rule_id: [summary_id, ...]}, next_cursor) for up to `limit` summary
+    ids, walking rules in id order and each rule's ids in insertion order.
+    """
+    start_rule, offset = _decode_cursor(cursor) if cursor else (None, 0)
+    index = bisect_left(rule_ids, start_rule) if start_rule is not None else 0
+    if index < len(rule_ids) and rule_ids[index] != start_rule:
+        # The cursor's rule was deleted, continue from the next one
+        offset = 0
+
+    page = {}
+    remaining = limit
+    for i in range(index, len(rule_ids)):
+        rule_id = rule_ids[i]
+        # One extra id tells whether this rule continues on the next page
+        batch = await get_summary_ids(request, rule_id, offset, offset + remaining)
+        if len(batch) > remaining:
+            page[rule_id] = batch[:remaining]
+            return page, _encode_cursor(rule_id, offset + remaining)
+        page[rule_id] = batch
+        remaining -= len(batch)
+        offset = 0
+        if remaining == 0:
+            if i + 1 < len(rule_ids):
+                return page, _encode_cursor(rule_ids[i + 1], 0)
+            return page, None
+    return page, None
 
-        output[rule_id] = summaries
 
-    return output
+@router.get("/rules/responses/")
+async def get_all_rule_summaries(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+):
+    """
+    Summaries of every summarize rule as {rule_id: {summary_id: summary}}.
+
+    Without `limit` all summaries are returned. With `limit`, at most that many
+    summaries are returned as {"rules": {...}, "next_cursor": ...}; pass
+    next_cursor back to get the following page until it is null.
+    """
+    # Skip rules where the action contains "search"
+    rule_ids = sorted(
+        rule["id"]
+        for rule in await get_rules(request)
+        if "search" not in rule.get("action", "").lower()
+    )
+
+    if limit is None:
+        summary_ids = await get_summary_ids_for_rules(request, rule_ids)
+        next_cursor = None
+    else:
+        summary_ids, next_cursor = await _summary_ids_page(request, rule_ids, cursor, limit)
+
+    results = await summary_fetcher.get_many(
+        sid for sids in summary_ids.values() for sid in sids
+    )
+    output = {
+        rule_id: {sid: results[sid] or "Pending" for sid in sids}
+        for rule_id, sids in summary_ids.items()
+    }
+
+    if limit is None:
+        return output
+    return {"rules": output, "next_cursor": next_cursor}
 
 
 @router.get("/rules/search-responses/")
@@ -21,3 +21,21 @@ REDIS_HOST = os.getenv("HOST_IP", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 MQTT_USER = os.getenv("MQTT_USER")
 MQTT_PASSWORD = os.getenv("MQTT_PASSWORD")
+# Shared HTTP client pool for Frigate and VSS
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", 5))
+HTTP_BREAKER_RESET = float(os.getenv("HTTP_BREAKER_RESET", 30))
+FRIGATE_TIMEOUT = float(os.getenv("FRIGATE_TIMEOUT", 30))
+VSS_TIMEOUT = float(os.getenv("VSS_TIMEOUT", 60))
+# Clip relay from Frigate to VSS: buffered 8 KiB chunks, optional copy on disk
+CLIP_RELAY_BUFFER_CHUNKS = int(os.getenv("CLIP_RELAY_BUFFER_CHUNKS", 64))
+CLIP_TEE_DIR = os.getenv("CLIP_TEE_DIR")
+# Summary aggregation for /rules/responses/
+SUMMARY_FETCH_CONCURRENCY = int(os.getenv("SUMMARY_FETCH_CONCURRENCY", 16))
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", 5))
+# Push updates to UI clients over /updates
+SUMMARY_WATCH_INTERVAL = float(os.getenv("SUMMARY_WATCH_INTERVAL", 5))
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", 15))
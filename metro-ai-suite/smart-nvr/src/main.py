@@ -5,7 +5,10 @@ from api.router import router  # your custom route logic (rules, results, etc.)
 from service.mqtt_listener import start_mqtt
 import asyncio
 import logging
-from config import REDIS_HOST, REDIS_PORT
+from config import REDIS_HOST, REDIS_PORT, SUMMARY_WATCH_INTERVAL
+from api.router import summary_fetcher
+from service.http_pool import http_pool
+from service.updates import SummaryWatcher, UpdateBroadcaster
 import redis.asyncio as redis
 
 # Configure global logger
@@ -29,13 +32,23 @@ async def startup_event():
     app.state.redis_client = redis.from_url(
         f"redis://{REDIS_HOST}:{REDIS_PORT}", decode_responses=True
     )
+    app.state.summary_watcher = SummaryWatcher(
+        app.state.redis_client, summary_fetcher, interval=SUMMARY_WATCH_INTERVAL
+    )
+    app.state.updates = UpdateBroadcaster(
+        app.state.redis_client, app.state.summary_watcher
+    )
+    app.state.updates_task = asyncio.create_task(app.state.updates.run())
     logger.info("🚀 FastAPI starting up... launching MQTT listener")
     asyncio.create_task(start_mqtt())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.updates_task.cancel()
+    await app.state.summary_watcher.aclose()
     await app.state.redis_client.close()
+    await http_pool.aclose()
 
 
 @app.get("/")
@@ -0,0 +1,107 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Optional
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+_EOF = object()
+
+
+class ClipRelay:
+    """
+    Relays a clip from one async byte stream to another through a bounded buffer.
+
+    A producer task reads the source into a queue of at most `max_chunks`
+    chunks. When the consumer (the upload) falls behind, the producer blocks
+    and stops reading from the source, so memory stays bounded and TCP flow
+    control slows the sender down instead.
+
+    If `tee_path` is set, every chunk is also written to that file, which is
+    useful to inspect exactly what was sent upstream.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[bytes],
+        max_chunks: int = 64,
+        tee_path: Optional[str] = None,
+    ):
+        self.source = source
+        self.tee_path = tee_path
+        self.bytes_read = 0
+        self._queue = asyncio.Queue(maxsize=max_chunks)
+        self._head = []
+        self._eof = False
+        self._producer = None
+
+    def start(self) -> "ClipRelay":
+        self._producer = asyncio.create_task(self._produce())
+        return self
+
+    async def _produce(self):
+        tee = None
+        try:
+            if self.tee_path:
+                os.makedirs(os.path.dirname(self.tee_path) or ".", exist_ok=True)
+                tee = await aiofiles.open(self.tee_path, "wb")
+            async for chunk in self.source:
+                if not chunk:
+                    continue
+                self.bytes_read += len(chunk)
+                if tee:
+                    await tee.write(chunk)
+                await self._queue.put(chunk)
+            await self._queue.put(_EOF)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put(e)
+        finally:
+            if tee:
+                await tee.close()
+
+    async def _next(self):
+        item = await self._queue.get()
+        if item is _EOF:
+            self._eof = True
+            return None
+        if isinstance(item, Exception):
+            self._eof = True
+            raise item
+        return item
+
+    async def peek(self, min_bytes: int) -> int:
+        """
+        Buffers the start of the clip until more than `min_bytes` arrived or
+        the source ended, without consuming it. Returns the buffered size.
+        """
+        size = sum(len(c) for c in self._head)
+        while size <= min_bytes and not self._eof:
+            chunk = await self._next()
+            if chunk is None:
+                break
+            self._head.append(chunk)
+            size += len(chunk)
+        return size
+
+    async def __aiter__(self):
+        while self._head:
+            yield self._head.pop(0)
+        while not self._eof:
+            chunk = await self._next()
+            if chunk is None:
+                break
+            yield chunk
+
+    async def aclose(self):
+        if self._producer and not self._producer.done():
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,269 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import httpx
+
+from config import (
+    FRIGATE_TIMEOUT,
+    HTTP_BREAKER_RESET,
+    HTTP_BREAKER_THRESHOLD,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_RETRIES,
+    VSS_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+# Errors raised before any byte of the request reached the upstream, so even a
+# POST can be sent again without the risk of creating something twice.
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without touching the network while an upstream's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls are
+    rejected for `reset_timeout` seconds. The first call after that is let
+    through as a probe: success closes the circuit, failure opens it again.
+    A probe that has not finished after `probe_timeout` seconds (by default
+    `reset_timeout`) is considered lost and the next call probes instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        probe_timeout: float = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = reset_timeout if probe_timeout is None else probe_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError if the call is rejected, returns whether it is the probe."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half-open":
+                now = time.monotonic()
+                if self._probing and now - self._probe_started >= self.probe_timeout:
+                    logger.warning(f"Probe of upstream '{self.name}' timed out, probing again")
+                    self._probing = False
+                if not self._probing:
+                    self._probing = True
+                    self._probe_started = now
+                    return True
+        raise CircuitOpenError(f"Circuit for upstream '{self.name}' is open")
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit for upstream '{self.name}' closed")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probing:
+                    logger.warning(
+                        f"Circuit for upstream '{self.name}' opened after {self.failures} failures"
+                    )
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class Upstream:
+    def __init__(self, name: str, timeout: httpx.Timeout, breaker: CircuitBreaker):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker
+
+
+class HttpPool:
+    """
+    Shared async HTTP client for every upstream the router talks to.
+
+    Connections are kept alive and reused across requests. Each registered
+    upstream has its own timeouts and circuit breaker. Failed requests are
+    retried with jittered exponential backoff: idempotent methods on any
+    transport error or 502/503/504, other methods only when the request was
+    never sent.
+
+    httpx clients are bound to the event loop they were created on, and the
+    MQTT listener runs its own loop in a separate thread, so one client is
+    kept per loop. They all share the same limits, timeouts and breakers.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        transport: httpx.AsyncBaseTransport = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.transport = transport
+        self.upstreams = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, timeout: float, connect_timeout: float = 5.0) -> Upstream:
+        upstream = Upstream(
+            name,
+            httpx.Timeout(timeout, connect=min(connect_timeout, timeout)),
+            # A probe may legitimately take as long as a request to the upstream
+            CircuitBreaker(name, self.failure_threshold, self.reset_timeout, max(timeout, self.reset_timeout)),
+        )
+        self.upstreams[name] = upstream
+        return upstream
+
+    def client(self) -> httpx.AsyncClient:
+        """Returns the client for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(limits=self.limits, transport=self.transport)
+                self._clients[loop] = client
+            return client
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: a random delay up to the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def request(
+        self,
+        upstream: str,
+        method: str,
+        url: str,
+        *,
+        stream: bool = False,
+        timeout: float = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Sends a request to a registered upstream and returns the response.
+
+        Non-2xx responses are returned as-is once retries are exhausted, so
+        callers keep deciding how to surface them. With stream=True the body
+        is not read and the caller must close the response.
+        """
+        target = self.upstreams[upstream]
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        client = self.client()
+        request_timeout = httpx.Timeout(timeout, connect=target.timeout.connect) if timeout else target.timeout
+
+        attempt = 0
+        while True:
+            probe = target.breaker.before_call()
+            try:
+                request = client.build_request(method, url, timeout=request_timeout, **kwargs)
+                response = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                target.breaker.record_failure()
+                retryable = idempotent or isinstance(e, NOT_SENT_ERRORS)
+                if not retryable or attempt >= self.retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({type(e).__name__}: {e}), retrying")
+            except BaseException:
+                # Cancelled, or failed without a transport error: the probe is over
+                # either way, and a circuit must not stay half-open with no probe
+                if probe:
+                    target.breaker.record_failure()
+                raise
+            else:
+                if response.status_code < 500:
+                    target.breaker.record_success()
+                    return response
+                target.breaker.record_failure()
+                if not idempotent or response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    return response
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+                await response.aclose()
+
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def get(self, upstream: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(upstream, "GET", url, **kwargs)
+
+    async def post(self, upstream: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(upstream, "POST", url, **kwargs)
+
+    async def aclose(self):
+        """Closes every client. Clients of other running loops are closed on their own loop."""
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        current = asyncio.get_running_loop()
+        for loop, client in clients:
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), timeout=5)
+                except Exception as e:
+                    logger.warning(f"Failed to close HTTP client: {e}")
+
+
+http_pool = HttpPool(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    retries=HTTP_RETRIES,
+    failure_threshold=HTTP_BREAKER_THRESHOLD,
+    reset_timeout=HTTP_BREAKER_RESET,
+)
+http_pool.register("frigate", FRIGATE_TIMEOUT)
+http_pool.register("summarizer", VSS_TIMEOUT)
+http_pool.register("search", VSS_TIMEOUT)
@@ -5,6 +5,7 @@ from cProfile import label
 import json
 import paho.mqtt.client as mqtt
 from service.rule_engine import process_event
+from service.rule_index import rule_index
 from config import MQTT_BROKER, MQTT_PORT, MQTT_TOPIC, MQTT_USER, MQTT_PASSWORD
 import logging
 import threading
@@ -86,6 +87,9 @@ def on_message(client, userdata, msg):
 
 
 async def start_mqtt():
+    # The rule index lives on the same loop that runs process_event
+    asyncio.run_coroutine_threadsafe(rule_index.listen(), event_loop)
+
     client = mqtt.Client()
     client.username_pw_set(MQTT_USER, MQTT_PASSWORD)
     client.on_connect = on_connect
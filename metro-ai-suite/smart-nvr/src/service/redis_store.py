@@ -1,16 +1,45 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 import json
+import logging
 from fastapi import Request
 from config import REDIS_HOST, REDIS_PORT
 import redis.asyncio as redis
 
+logger = logging.getLogger(__name__)
+
 # --- RULE MANAGEMENT ---
 # Fallback client for non-FastAPI contexts (like MQTT)
 fallback_redis_client = redis.from_url(
     f"redis://{REDIS_HOST}:{REDIS_PORT}", decode_responses=True
 )
 
+# Rule changes are published here so in-memory rule indexes stay coherent
+RULES_CHANNEL = "rules:changed"
+
+
+def rule_change_message(op: str, rule_id: str, rule_data: dict = None) -> str:
+    return json.dumps({"op": op, "id": rule_id, "rule": rule_data})
+
+
+# Responses, new summary ids and summary status changes are published here
+# and streamed to UI clients by the /updates endpoint
+UPDATES_CHANNEL = "nvr:updates"
+
+
+def update_message(kind: str, **data) -> str:
+    return json.dumps({"type": kind, **data})
+
+
+async def publish_update(kind: str, request=None, **data):
+    """Publishes an update of the given kind to UPDATES_CHANNEL."""
+    redis_client = (
+        getattr(request.app.state, "redis_client", None)
+        if request
+        else fallback_redis_client
+    )
+    await redis_client.publish(UPDATES_CHANNEL, update_message(kind, **data))
+
 
 async def add_rule(request: Request, rule_id: str, rule_data: dict) -> bool:
     """Adds a new rule if it doesn't already exist. Returns True if added, False if exists."""
@@ -18,16 +47,18 @@ async def add_rule(request: Request, rule_id: str, rule_data: dict) -> bool:
     key = f"rule:{rule_id}"
     if await redis_client.exists(key):
         return False
-    await redis_client.set(key, json.dumps(rule_data))
-    await redis_client.sadd("rules", rule_id)
+    await store_rule(request, rule_id, rule_data)
     return True
 
 
 async def store_rule(request: Request, rule_id: str, rule_data: dict):
     """Overwrites an existing rule and adds the rule ID to the 'rules' set."""
     redis_client = request.app.state.redis_client
-    await redis_client.set(f"rule:{rule_id}", json.dumps(rule_data))
-    await redis_client.sadd("rules", rule_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(f"rule:{rule_id}", json.dumps(rule_data))
+        pipe.sadd("rules", rule_id)
+        pipe.publish(RULES_CHANNEL, rule_change_message("set", rule_id, rule_data))
+        await pipe.execute()
 
 
 async def get_rule(request: Request, rule_id: str):
@@ -37,24 +68,20 @@ async def get_rule(request: Request, rule_id: str):
     return json.loads(data) if data else None
 
 
-async def get_rules(request=None):
-    """Fetches all rules from Redis."""
-    redis_client = (
-        getattr(request.app.state, "redis_client", None)
-        if request
-        else fallback_redis_client
-    )
+async def get_rules(request=None, redis_client=None):
+    """Fetches all rules from Redis in two round-trips (SMEMBERS, then one MGET)."""
+    if redis_client is None:
+        redis_client = (
+            getattr(request.app.state, "redis_client", None)
+            if request
+            else fallback_redis_client
+        )
     rule_ids = await redis_client.smembers("rules")
-    rules = []
-    for rid in rule_ids:
-        data = await redis_client.get(f"rule:{rid}")
-        if data:
-            rules.append(json.loads(data))
-    return rules
-
+    if not rule_ids:
+        return []
+    values = await redis_client.mget([f"rule:{rid}" for rid in rule_ids])
+    return [json.loads(data) for data in values if data]
 
-import json
-from fastapi import Request
 
 
 async def delete_rule(request: Request, rule_id: str) -> bool:
@@ -67,9 +94,12 @@ async def delete_rule(request: Request, rule_id: str) -> bool:
         return False
 
     # Delete the rule and its related keys
-    await redis_client.delete(f"rule:{rule_id}")
-    await redis_client.delete(f"search_results:{rule_id}")
-    await redis_client.srem("rules", rule_id)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(f"rule:{rule_id}")
+        pipe.delete(f"search_results:{rule_id}")
+        pipe.srem("rules", rule_id)
+        pipe.publish(RULES_CHANNEL, rule_change_message("delete", rule_id))
+        await pipe.execute()
 
     # Delete associated summary_result keys from response list
     response_key = f"response:{rule_id}"
@@ -106,7 +136,10 @@ async def store_response(rule_id: str, response: dict, request=None):
         if request
         else fallback_redis_client
     )
-    await redis_client.rpush(f"response:{rule_id}", json.dumps(response))
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.rpush(f"response:{rule_id}", json.dumps(response))
+        pipe.publish(UPDATES_CHANNEL, update_message("response", rule_id=rule_id))
+        await pipe.execute()
 
 
 async def get_responses(request: Request, rule_id: str):
@@ -125,7 +158,13 @@ async def save_summary_id(rule_id: str, summary_id: str, request=None):
         if request
         else fallback_redis_client
     )
-    await redis_client.rpush(f"summary_ids:{rule_id}", summary_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.rpush(f"summary_ids:{rule_id}", summary_id)
+        pipe.publish(
+            UPDATES_CHANNEL,
+            update_message("summary_id", rule_id=rule_id, summary_id=summary_id),
+        )
+        await pipe.execute()
 
 
 async def save_search(rule_id: str, search_output: dict, request=None):
@@ -149,10 +188,20 @@ async def save_search(rule_id: str, search_output: dict, request=None):
     await redis_client.rpush(f"search_results:{rule_id}", entry)
 
 
-async def get_summary_ids(request: Request, rule_id: str):
-    """Get all summary IDs for a rule."""
+async def get_summary_ids(request: Request, rule_id: str, start: int = 0, stop: int = -1):
+    """Get the summary IDs for a rule, all of them by default (stop is inclusive)."""
+    redis_client = request.app.state.redis_client
+    return await redis_client.lrange(f"summary_ids:{rule_id}", start, stop)
+
+
+async def get_summary_ids_for_rules(request: Request, rule_ids: list) -> dict:
+    """Get all summary IDs for several rules in one round-trip."""
     redis_client = request.app.state.redis_client
-    return await redis_client.lrange(f"summary_ids:{rule_id}", 0, -1)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for rule_id in rule_ids:
+            pipe.lrange(f"summary_ids:{rule_id}", 0, -1)
+        results = await pipe.execute()
+    return dict(zip(rule_ids, results))
 
 
 async def save_summary_result(summary_id: str, summary_result: str, request=None):
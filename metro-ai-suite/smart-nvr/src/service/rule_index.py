@@ -0,0 +1,110 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import json
+import logging
+import time
+
+from service.redis_store import RULES_CHANNEL, fallback_redis_client, get_rules
+
+logger = logging.getLogger(__name__)
+
+
+class RuleIndex:
+    """
+    In-memory index of rules keyed by (camera, label).
+
+    All rules are loaded once from Redis, then kept up to date from the
+    rule-change messages that redis_store publishes on RULES_CHANNEL, so
+    matching an event needs no Redis round-trips. Rules without a camera
+    are indexed under (None, label) and match events from any camera.
+
+    The index is only touched from the event loop that runs `listen`, so it
+    needs no locking.
+    """
+
+    def __init__(self, redis_client=None, resync_interval: float = 300.0):
+        self.redis_client = redis_client or fallback_redis_client
+        self.resync_interval = resync_interval
+        self.rules = {}
+        self._by_key = {}
+        self.loaded = False
+
+    @staticmethod
+    def _key(rule: dict):
+        return (rule.get("camera") or None, rule["label"])
+
+    def _add(self, rule: dict):
+        self._remove(rule["id"])
+        self.rules[rule["id"]] = rule
+        self._by_key.setdefault(self._key(rule), []).append(rule)
+
+    def _remove(self, rule_id: str):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return
+        key = self._key(rule)
+        bucket = [r for r in self._by_key.get(key, []) if r["id"] != rule_id]
+        if bucket:
+            self._by_key[key] = bucket
+        else:
+            self._by_key.pop(key, None)
+
+    async def load(self):
+        """Replaces the index with the rules currently stored in Redis."""
+        rules = await get_rules(redis_client=self.redis_client)
+        self.rules = {}
+        self._by_key = {}
+        for rule in rules:
+            self._add(rule)
+        self.loaded = True
+        logger.info(f"Rule index loaded with {len(self.rules)} rules")
+
+    def apply(self, message: str):
+        """Applies one rule-change message published by redis_store."""
+        change = json.loads(message)
+        if change["op"] == "set":
+            self._add(change["rule"])
+        elif change["op"] == "delete":
+            self._remove(change["id"])
+
+    def match(self, event: dict) -> list:
+        label = event.get("label")
+        specific = self._by_key.get((event.get("camera") or None, label), [])
+        if event.get("camera") is None:
+            return list(specific)
+        return specific + self._by_key.get((None, label), [])
+
+    async def listen(self):
+        """
+        Subscribes to rule changes and keeps the index coherent until cancelled.
+
+        The subscription is made before every full load, so changes made while
+        loading are queued and replayed in order afterwards. The index is also
+        reloaded every `resync_interval` seconds to pick up rules written to
+        Redis without going through redis_store.
+        """
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(RULES_CHANNEL)
+                await self.load()
+                next_resync = time.monotonic() + self.resync_interval
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.apply(message["data"])
+                    if time.monotonic() >= next_resync:
+                        await self.load()
+                        next_resync = time.monotonic() + self.resync_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Rule index subscription failed, retrying: {e}")
+                self.loaded = False
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+rule_index = RuleIndex()
@@ -0,0 +1,110 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def is_complete(result: dict) -> bool:
+    """VmsService.summary only includes frameSummaries while the final summary is pending."""
+    return bool(result) and "frameSummaries" not in result
+
+
+class SummaryFetcher:
+    """
+    Fetches many summaries concurrently with a bounded fan-out and a result cache.
+
+    At most `max_concurrency` fetches run at once across all callers, and
+    concurrent requests for the same id share one fetch. Pending results are
+    cached for `ttl` seconds. Completed summaries never change, so they are
+    kept and never fetched again. Both caches hold up to `max_entries`
+    summaries, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[dict]],
+        max_concurrency: int = 16,
+        ttl: float = 5.0,
+        max_entries: int = 10000,
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._semaphore = None
+        self._max_concurrency = max_concurrency
+        self._completed = OrderedDict()
+        self._pending = OrderedDict()
+        self._inflight = {}
+
+    def _cached(self, summary_id: str):
+        if summary_id in self._completed:
+            self._completed.move_to_end(summary_id)
+            return self._completed[summary_id]
+        entry = self._pending.get(summary_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def _store(self, summary_id: str, result: dict):
+        if is_complete(result):
+            self._pending.pop(summary_id, None)
+            self._completed[summary_id] = result
+            if len(self._completed) > self.max_entries:
+                self._completed.popitem(last=False)
+        else:
+            self._pending[summary_id] = (time.monotonic(), result)
+            self._pending.move_to_end(summary_id)
+            if len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+
+    async def _fetch(self, summary_id: str) -> dict:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            result = await self.fetch(summary_id)
+        self._store(summary_id, result)
+        return result
+
+    async def get(self, summary_id: str) -> dict:
+        cached = self._cached(summary_id)
+        if cached is not None:
+            return cached
+        return await self._get_fresh(summary_id)
+
+    async def refresh(self, summary_id: str) -> dict:
+        """Like get, but re-fetches pending summaries even if their cache entry is still valid."""
+        if summary_id in self._completed:
+            return self._cached(summary_id)
+        return await self._get_fresh(summary_id)
+
+    async def _get_fresh(self, summary_id: str) -> dict:
+        task = self._inflight.get(summary_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(summary_id))
+            self._inflight[summary_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(summary_id, None))
+        return await asyncio.shield(task)
+
+    async def get_many(self, summary_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Returns {summary_id: result} in input order. A failed fetch does not
+        fail the others; its entry carries the error and is retried next time.
+        """
+        summary_ids = list(dict.fromkeys(summary_ids))
+        results = await asyncio.gather(
+            *(self.get(sid) for sid in summary_ids), return_exceptions=True
+        )
+        output = {}
+        for sid, result in zip(summary_ids, results):
+            if isinstance(result, Exception):
+                detail = getattr(result, "detail", None) or str(result)
+                logger.error(f"Failed to retrieve summary {sid}: {detail}")
+                output[sid] = {"summary": "Summary unavailable, will retry.", "error": detail}
+            else:
+                output[sid] = result
+        return output
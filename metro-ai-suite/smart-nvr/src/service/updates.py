@@ -0,0 +1,139 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from service.redis_store import UPDATES_CHANNEL, update_message
+from service.summary_fetcher import is_complete
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryWatcher:
+    """
+    Polls VSS for summaries until they complete and publishes each change.
+
+    One watcher per summary serves every connected UI, instead of every open
+    tab polling VSS on its own. A short-lived Redis lock, renewed on every
+    poll, keeps several router replicas from watching the same summary.
+    """
+
+    def __init__(self, redis_client, fetcher, interval: float = 5.0, timeout: float = 3600.0):
+        self.redis_client = redis_client
+        self.fetcher = fetcher
+        self.interval = interval
+        self.timeout = timeout
+        self._tasks = {}
+
+    def watch(self, summary_id: str):
+        if summary_id in self._tasks:
+            return
+        task = asyncio.create_task(self._watch(summary_id))
+        self._tasks[summary_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(summary_id, None))
+
+    async def _watch(self, summary_id: str):
+        lock = f"summary_watch:{summary_id}"
+        lock_ttl = max(1, int(self.interval * 3))
+        if not await self.redis_client.set(lock, "1", nx=True, ex=lock_ttl):
+            return
+        deadline = time.monotonic() + self.timeout
+        last = None
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    result = await self.fetcher.refresh(summary_id)
+                except Exception as e:
+                    logger.warning(f"Failed to poll summary {summary_id}: {e}")
+                    result = None
+                complete = bool(result) and is_complete(result)
+                if result is not None and result != last:
+                    last = result
+                    await self.redis_client.publish(
+                        UPDATES_CHANNEL,
+                        update_message(
+                            "summary_status", summary_id=summary_id, result=result, complete=complete
+                        ),
+                    )
+                if complete:
+                    return
+                await asyncio.sleep(self.interval)
+                await self.redis_client.expire(lock, lock_ttl)
+        finally:
+            await self.redis_client.delete(lock)
+
+    async def aclose(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+class UpdateBroadcaster:
+    """
+    Fans UPDATES_CHANNEL messages out to every connected /updates stream.
+
+    The router holds a single Redis subscription however many clients are
+    connected. Each client gets a bounded queue; a client that stops reading
+    loses its oldest updates rather than slowing down the others. The latest
+    status of recent summaries is kept and replayed to new clients.
+    """
+
+    def __init__(self, redis_client, watcher: SummaryWatcher, queue_size: int = 100, max_statuses: int = 1000):
+        self.redis_client = redis_client
+        self.watcher = watcher
+        self.queue_size = queue_size
+        self.max_statuses = max_statuses
+        self.statuses = OrderedDict()
+        self._queues = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for message in self.statuses.values():
+            self._offer(queue, message)
+        self._queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._queues)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: dict):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def dispatch(self, message: dict):
+        if message["type"] == "summary_id":
+            self.watcher.watch(message["summary_id"])
+        elif message["type"] == "summary_status":
+            self.statuses[message["summary_id"]] = message
+            self.statuses.move_to_end(message["summary_id"])
+            if len(self.statuses) > self.max_statuses:
+                self.statuses.popitem(last=False)
+        for queue in self._queues:
+            self._offer(queue, message)
+
+    async def run(self):
+        """Relays UPDATES_CHANNEL to the subscribers until cancelled, resubscribing on errors."""
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(UPDATES_CHANNEL)
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Update subscription failed, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
@@ -1,10 +1,7 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
-import requests
+import httpx
 import os
-import tempfile
-import subprocess
-import aiofiles
 import logging
 from pathlib import Path
 from typing import Optional
@@ -14,6 +11,9 @@ from model.model import Sampling, Evam, SummaryPayload
 from api.endpoints.summarization_api import SummarizationService
 from config import VSS_SUMMARY_URL
 from config import VSS_SEARCH_URL
+from config import CLIP_RELAY_BUFFER_CHUNKS, CLIP_TEE_DIR
+from service.clip_relay import ClipRelay
+from service.http_pool import http_pool
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -37,9 +37,9 @@ class VmsService:
     async def upload_video_to_summarizer(
         self, camera_name: str, start_time: float, end_time: float, is_search: bool
     ) -> dict:
-        """Fetches clip from Frigate, writes to temp file, uploads it, and returns videoId."""
+        """Relays the clip from Frigate straight into the summarizer upload and returns videoId."""
         try:
-            stream_response = self.frigate_service.get_clip_from_timestamps(
+            stream_response = await self.frigate_service.get_clip_from_timestamps(
                 camera_name, start_time, end_time, download=True
             )
             logger.info("Clip retrieved from Frigate.")
@@ -50,65 +50,60 @@ class VmsService:
                 "message": "Failed to retrieve video clip from camera",
             }
 
-        # Write stream to temp file while checking size
-        temp_file_size = 0
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-        logger.info(f"Temporary file created at: {tmp_path}")
+        filename = f"{camera_name}_{int(start_time)}_{int(end_time)}.mp4"
+        tee_path = os.path.join(CLIP_TEE_DIR, filename) if CLIP_TEE_DIR else None
+        relay = ClipRelay(
+            stream_response.body_iterator,
+            max_chunks=CLIP_RELAY_BUFFER_CHUNKS,
+            tee_path=tee_path,
+        ).start()
 
         try:
-            async with aiofiles.open(tmp_path, "wb") as f:
-                async for chunk in stream_response.body_iterator:
-                    await f.write(chunk)
-                    temp_file_size += len(chunk)
+            # Check if video is too small (likely empty) before starting the upload
+            try:
+                head_size = await relay.peek(100)
+            except Exception as e:
+                logger.error(f"Failed to process video stream: {e}")
+                return {"status": 500, "message": "Failed to process video stream"}
 
-            # Check if video is too small (likely empty)
-            if temp_file_size <= 100:
+            if head_size <= 100:
                 logger.warning(
-                    f"No video found for given timestamps (file size: {temp_file_size} bytes)"
+                    f"No video found for given timestamps (file size: {head_size} bytes)"
                 )
-                os.remove(tmp_path)
                 return {
                     "status": 404,
                     "message": "No video footage available for the selected time range. Please try different timestamps.",
                 }
 
-            logger.info(
-                f"Stream written to temporary file. Size: {temp_file_size} bytes"
-            )
-        except Exception as e:
-            logger.error(f"Failed to process video stream: {e}")
-            return {"status": 500, "message": "Failed to process video stream"}
+            try:
+                if is_search:
+                    upload_result = await self.summarization_service.video_upload_stream(
+                        relay, filename, self.vss_search_url, upstream="search"
+                    )
+                else:
+                    upload_result = await self.summarization_service.video_upload_stream(
+                        relay, filename, self.vss_summary_url
+                    )
+
+                if not upload_result or "videoId" not in upload_result:
+                    return {
+                        "status": 500,
+                        "message": "Video upload failed - no videoId returned",
+                    }
 
-        # Upload file
-        try:
-            if is_search:
-                upload_result = self.summarization_service.video_upload(
-                    tmp_path, self.vss_search_url
-                )
-            else:
-                upload_result = self.summarization_service.video_upload(
-                    tmp_path, self.vss_summary_url
+                logger.info(
+                    f"Video uploaded ({relay.bytes_read} bytes), videoId: {upload_result.get('videoId')}"
                 )
-
-            if not upload_result or "videoId" not in upload_result:
-                return {
-                    "status": 500,
-                    "message": "Video upload failed - no videoId returned",
-                }
-
-            logger.info(f"Video uploaded, videoId: {upload_result.get('videoId')}")
-            return {"status": 200, "message": upload_result["videoId"]}
-        except Exception as e:
-            logger.error(f"Video upload failed: {e}")
-            return {"status": 500, "message": "Video upload failed"}
-        finally:
-            try:
-                if os.path.exists(tmp_path):
-                    logger.info(f"Cleaning up temporary file: {tmp_path}")
-                    os.remove(tmp_path)
+                return {"status": 200, "message": upload_result["videoId"]}
             except Exception as e:
-                logger.warning(f"Failed to remove temporary file: {e}")
+                logger.error(f"Video upload failed: {e}")
+                return {"status": 500, "message": "Video upload failed"}
+        finally:
+            await relay.aclose()
+            # Release the Frigate connection back to the pool
+            await stream_response.background()
+            if tee_path:
+                logger.info(f"Relayed clip written to {tee_path}")
 
     async def summarize(
         self, camera_name: str, start_time: float, end_time: float
@@ -131,7 +126,7 @@ class VmsService:
                 sampling=Sampling(chunkDuration=8, samplingFrame=8),
                 evam=Evam(evamPipeline="object_detection"),
             )
-            pipeline = self.summarization_service.create_summary(
+            pipeline = await self.summarization_service.create_summary(
                 payload, self.vss_summary_url
             )
 
@@ -149,10 +144,10 @@ class VmsService:
             logger.error(f"Failed to create summary: {e}")
             return {"status": 500, "message": "Failed to create video summary"}
 
-    def summary(self, summary_id: str):
+    async def summary(self, summary_id: str):
         logger.info(f"Fetching summary result for ID: {summary_id}")
         try:
-            result = summarization_service.get_summary_result(
+            result = await self.summarization_service.get_summary_result(
                 summary_id, self.vss_summary_url
             )
         except Exception as e:
@@ -216,7 +211,7 @@ class VmsService:
         logger.info(f"Calling search-embeddings API: {url}")
 
         try:
-            response = requests.post(url)
+            response = await http_pool.post("search", url)
             response.raise_for_status()
             message = response.json().get("message", "No message in response.")
             logger.info(f"Embedding search response: {message}")
@@ -225,6 +220,6 @@ class VmsService:
                 "video_id": upload_resp["message"],
                 "message": message,
             }
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Search embeddings API failed: {e}")
             raise
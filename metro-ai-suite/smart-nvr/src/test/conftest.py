@@ -0,0 +1,7 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import os
+import sys
+
+# Backend modules import each other relative to src/, as they do in the container
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from service.http_pool import CircuitBreaker, CircuitOpenError, HttpPool
+
+URL = "http://frigate/api/version"
+
+
+class FlakyFrigate:
+    """Frigate stub for httpx.MockTransport: refuses connections, then hangs or answers."""
+
+    def __init__(self, failures=1, hang=False):
+        self.failures = failures
+        self.hang = hang
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise httpx.ConnectError("connection refused", request=request)
+        if self.hang:
+            await asyncio.sleep(60)
+        return httpx.Response(200, text="0.14")
+
+
+def make_pool(frigate, reset_timeout=0.05):
+    pool = HttpPool(retries=0, failure_threshold=1, reset_timeout=reset_timeout, transport=httpx.MockTransport(frigate))
+    pool.register("frigate", 5)
+    return pool
+
+
+async def open_circuit(pool):
+    with pytest.raises(httpx.ConnectError):
+        await pool.get("frigate", URL)
+    assert pool.upstreams["frigate"].breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        await pool.get("frigate", URL)
+    await asyncio.sleep(pool.reset_timeout)
+
+
+def test_cancelled_probe_reopens_the_circuit():
+    frigate = FlakyFrigate(hang=True)
+    pool = make_pool(frigate)
+    breaker = pool.upstreams["frigate"].breaker
+
+    async def run():
+        await open_circuit(pool)
+        probe = asyncio.create_task(pool.get("frigate", URL))
+        await asyncio.sleep(0.01)
+        with pytest.raises(CircuitOpenError):
+            await pool.get("frigate", URL)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert breaker.state == "open"
+
+        # the next probe goes through once the circuit is half-open again
+        frigate.hang = False
+        await asyncio.sleep(pool.reset_timeout)
+        response = await pool.get("frigate", URL)
+        await pool.aclose()
+        return response
+
+    assert asyncio.run(run()).text == "0.14"
+    assert breaker.state == "closed"
+
+
+def test_probe_failing_to_build_the_request_reopens_the_circuit():
+    pool = make_pool(FlakyFrigate())
+    breaker = pool.upstreams["frigate"].breaker
+
+    async def run():
+        await open_circuit(pool)
+        with pytest.raises(TypeError):
+            await pool.post("frigate", URL, json=object())
+        assert breaker.state == "open"
+        await asyncio.sleep(pool.reset_timeout)
+        response = await pool.get("frigate", URL)
+        await pool.aclose()
+        return response
+
+    assert asyncio.run(run()).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_stale_probe_expires():
+    breaker = CircuitBreaker("frigate", failure_threshold=1, reset_timeout=0.01, probe_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.01)
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.05)
+    assert breaker.before_call() is True
+    breaker.record_success()
+    assert breaker.before_call() is False
@@ -0,0 +1,207 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.endpoints.summarization_api import SummarizationService
+from service.http_pool import HttpPool
+from service.summary_fetcher import SummaryFetcher
+from service.vms_service import VmsService
+
+VSS_URL = "http://summarizer"
+
+
+class MockSummarizer:
+    """Summarizer stub for httpx.MockTransport that records how many requests overlap."""
+
+    def __init__(self, delay=0.02, pending=(), failing=()):
+        self.delay = delay
+        self.pending = set(pending)
+        self.failing = set(failing)
+        self.calls = {}
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        summary_id = request.url.path.rsplit("/", 1)[-1]
+        self.calls[summary_id] = self.calls.get(summary_id, 0) + 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if summary_id in self.failing:
+            return httpx.Response(404, text="unknown summary")
+        if summary_id in self.pending:
+            return httpx.Response(200, json={"summary": "", "frameSummaries": [{"status": "IN_PROGRESS"}]})
+        return httpx.Response(200, json={"summary": f"summary of {summary_id}"})
+
+
+@pytest.fixture
+def summarizer(monkeypatch):
+    summarizer = MockSummarizer()
+    pool = HttpPool(retries=0, transport=httpx.MockTransport(summarizer))
+    pool.register("summarizer", 5)
+    monkeypatch.setattr("api.endpoints.summarization_api.http_pool", pool)
+    return summarizer
+
+
+@pytest.fixture
+def vms_service():
+    service = VmsService(None, SummarizationService())
+    service.vss_summary_url = VSS_URL
+    return service
+
+
+def test_fan_out_is_bounded(summarizer, vms_service):
+    fetcher = SummaryFetcher(vms_service.summary, max_concurrency=4)
+    ids = [f"s{i}" for i in range(40)]
+
+    results = asyncio.run(fetcher.get_many(ids))
+
+    assert list(results) == ids
+    assert all(results[sid] == {"summary": f"summary of {sid}"} for sid in ids)
+    assert summarizer.max_active == 4
+
+
+def test_completed_summaries_are_never_refetched(summarizer, vms_service):
+    summarizer.pending = {"p1"}
+    fetcher = SummaryFetcher(vms_service.summary, ttl=0.01)
+
+    async def run():
+        await fetcher.get_many(["done", "p1"])
+        await asyncio.sleep(0.05)
+        return await fetcher.get_many(["done", "p1"])
+
+    results = asyncio.run(run())
+
+    assert summarizer.calls == {"done": 1, "p1": 2}
+    assert results["p1"]["summary"] == "Final summary is being generated please wait for a while."
+
+
+def test_pending_summaries_are_cached_for_ttl(summarizer, vms_service):
+    summarizer.pending = {"p1"}
+    fetcher = SummaryFetcher(vms_service.summary, ttl=60)
+
+    async def run():
+        await fetcher.get("p1")
+        await fetcher.get("p1")
+
+    asyncio.run(run())
+    assert summarizer.calls == {"p1": 1}
+
+
+def test_caches_hold_at_most_max_entries(summarizer, vms_service):
+    summarizer.pending = {f"p{i}" for i in range(5)}
+    fetcher = SummaryFetcher(vms_service.summary, ttl=60, max_entries=2)
+
+    async def run():
+        for i in range(5):
+            await fetcher.get(f"p{i}")
+            await fetcher.get(f"s{i}")
+
+    asyncio.run(run())
+
+    assert list(fetcher._pending) == ["p3", "p4"]
+    assert list(fetcher._completed) == ["s3", "s4"]
+
+
+def test_concurrent_requests_share_one_fetch(summarizer, vms_service):
+    fetcher = SummaryFetcher(vms_service.summary)
+
+    async def run():
+        return await asyncio.gather(*(fetcher.get("s1") for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert summarizer.calls == {"s1": 1}
+    assert all(r == {"summary": "summary of s1"} for r in results)
+
+
+def test_failed_fetch_does_not_fail_the_others(summarizer, vms_service):
+    summarizer.failing = {"bad"}
+    fetcher = SummaryFetcher(vms_service.summary)
+
+    results = asyncio.run(fetcher.get_many(["ok", "bad"]))
+    assert results["ok"] == {"summary": "summary of ok"}
+    assert "error" in results["bad"]
+
+    asyncio.run(fetcher.get_many(["bad"]))
+    assert summarizer.calls["bad"] == 2
+
+
+@pytest.fixture
+def client(monkeypatch, summarizer):
+    fakeredis = pytest.importorskip("fakeredis")
+    from api import router as router_module
+
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    rules = {
+        "rule-a": [f"a{i}" for i in range(5)],
+        "rule-b": [],
+        "rule-c": [f"c{i}" for i in range(3)],
+    }
+
+    async def seed():
+        for rule_id, summary_ids in rules.items():
+            await redis_client.set(
+                f"rule:{rule_id}",
+                json.dumps({"id": rule_id, "label": "person", "action": "summarize"}),
+            )
+            await redis_client.sadd("rules", rule_id)
+            if summary_ids:
+                await redis_client.rpush(f"summary_ids:{rule_id}", *summary_ids)
+        await redis_client.set(
+            "rule:rule-s",
+            json.dumps({"id": "rule-s", "label": "car", "action": "add to search"}),
+        )
+        await redis_client.sadd("rules", "rule-s")
+
+    asyncio.run(seed())
+    monkeypatch.setattr(router_module.vms_service, "vss_summary_url", VSS_URL)
+    monkeypatch.setattr(
+        router_module,
+        "summary_fetcher",
+        SummaryFetcher(router_module.vms_service.summary, max_concurrency=2),
+    )
+    app = FastAPI()
+    app.include_router(router_module.router)
+    app.state.redis_client = redis_client
+    return TestClient(app)
+
+
+def test_rule_responses_without_limit(client, summarizer):
+    response = client.get("/rules/responses/")
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data) == ["rule-a", "rule-b", "rule-c"]
+    assert list(data["rule-a"]) == [f"a{i}" for i in range(5)]
+    assert data["rule-b"] == {}
+    assert data["rule-c"]["c2"] == {"summary": "summary of c2"}
+    assert summarizer.max_active == 2
+
+
+def test_rule_responses_cursor_pagination(client):
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/rules/responses/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page["rules"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    seen = [(rule_id, sid) for page in pages for rule_id, sids in page.items() for sid in sids]
+    assert seen == [("rule-a", f"a{i}") for i in range(5)] + [("rule-c", f"c{i}") for i in range(3)]
+    assert all(sum(len(sids) for sids in page.values()) <= 3 for page in pages)
+
+
+def test_rule_responses_invalid_cursor(client):
+    response = client.get("/rules/responses/", params={"limit": 3, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
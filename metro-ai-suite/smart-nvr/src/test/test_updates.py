@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from service import redis_store
+from service.updates import SummaryWatcher, UpdateBroadcaster
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class StubFetcher:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def refresh(self, summary_id):
+        self.calls += 1
+        return self.results[min(self.calls, len(self.results)) - 1]
+
+
+async def drain(pubsub, count, timeout=2.0):
+    messages = []
+    deadline = asyncio.get_running_loop().time() + timeout
+    while len(messages) < count and asyncio.get_running_loop().time() < deadline:
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+        if message:
+            messages.append(json.loads(message["data"]))
+    return messages
+
+
+def test_writes_publish_updates(monkeypatch):
+    async def run():
+        redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        monkeypatch.setattr(redis_store, "fallback_redis_client", redis_client)
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(redis_store.UPDATES_CHANNEL)
+
+        await redis_store.store_response("rule-a", {"status": 200})
+        await redis_store.save_summary_id("rule-a", "s1")
+
+        assert await redis_client.lrange("summary_ids:rule-a", 0, -1) == ["s1"]
+        return await drain(pubsub, 2)
+
+    assert asyncio.run(run()) == [
+        {"type": "response", "rule_id": "rule-a"},
+        {"type": "summary_id", "rule_id": "rule-a", "summary_id": "s1"},
+    ]
+
+
+def test_watcher_publishes_changes_until_complete():
+    pending = {"summary": "", "frameSummaries": [{"status": "IN_PROGRESS"}]}
+    done = {"summary": "done"}
+    fetcher = StubFetcher([pending, pending, done])
+
+    async def run():
+        redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(redis_store.UPDATES_CHANNEL)
+        watcher = SummaryWatcher(redis_client, fetcher, interval=0.01)
+
+        watcher.watch("s1")
+        watcher.watch("s1")
+        messages = await drain(pubsub, 2)
+        await asyncio.sleep(0.05)
+        assert not watcher._tasks
+        assert await redis_client.get("summary_watch:s1") is None
+        return messages
+
+    messages = asyncio.run(run())
+    assert [(m["result"], m["complete"]) for m in messages] == [(pending, False), (done, True)]
+    assert fetcher.calls == 3
+
+
+def test_broadcaster_fans_out_and_replays_statuses():
+    async def run():
+        redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        fetcher = StubFetcher([{"summary": "done"}])
+        broadcaster = UpdateBroadcaster(
+            redis_client, SummaryWatcher(redis_client, fetcher, interval=0.01), queue_size=2
+        )
+        task = asyncio.create_task(broadcaster.run())
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        await asyncio.sleep(0.05)
+
+        await redis_client.publish(
+            redis_store.UPDATES_CHANNEL,
+            redis_store.update_message("summary_id", rule_id="rule-a", summary_id="s1"),
+        )
+        received = [await asyncio.wait_for(first.get(), 2) for _ in range(2)]
+        assert second.qsize() == 2
+
+        late = broadcaster.subscribe()
+        replayed = late.get_nowait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return received, replayed
+
+    received, replayed = asyncio.run(run())
+    assert [m["type"] for m in received] == ["summary_id", "summary_status"]
+    assert replayed["summary_id"] == "s1" and replayed["complete"] is True
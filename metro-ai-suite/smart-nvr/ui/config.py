@@ -8,6 +8,10 @@ load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL")
 EVENT_POLL_INTERVAL = int(os.getenv("EVENT_POLL_INTERVAL", "10"))
+# How often the UI renders state pushed over the update stream (seconds)
+UPDATE_TICK_INTERVAL = float(os.getenv("UPDATE_TICK_INTERVAL", "1"))
+# How often the UI polls a summary while the update stream is disconnected (seconds)
+SUMMARY_POLL_INTERVAL = float(os.getenv("SUMMARY_POLL_INTERVAL", "5"))
 
 # Logging setup
 logging.basicConfig(
@@ -17,9 +17,10 @@ from services.api_client import (
     fetch_search_responses,
     fetch_summary_status,
 )
+from services.update_stream import get_update_stream, summary_complete
 from services.video_processor import process_video
 from services.event_utils import display_events
-from config import logger
+from config import SUMMARY_POLL_INTERVAL, UPDATE_TICK_INTERVAL, logger
 import json
 
 camera_list = []
@@ -102,62 +103,6 @@ def render_rule_rows(rules, response_output):
     return rule_column
 
 
-polling_threads = {}
-
-
-def poll_summary_status(summary_id, status_output, stop_event):
-    while not stop_event.is_set():
-        try:
-            raw_response = fetch_summary_status(summary_id)
-            logger.info(f"raw_response : {raw_response}")
-            if isinstance(raw_response, str):
-                if not raw_response.strip():
-                    logger.warning(f"Empty response for summary_id={summary_id}")
-                    raise ValueError(
-                        "Empty response received from fetch_summary_status."
-                    )
-                logger.info(f"raw_response : {raw_response}")
-                response = json.loads(raw_response)
-            elif isinstance(raw_response, dict):
-                response = raw_response
-            else:
-                raise ValueError(f"Invalid response type: {type(raw_response)}")
-
-            status = response.get("status", "unknown")
-            logger.info(f"Polled summary {summary_id} status: {status}")
-
-            # Format response as markdown
-            markdown_output = f"## Summary Status (Auto-Polling)\n\n"
-            markdown_output += f"**Summary ID:** `{summary_id}`\n\n"
-            for key, value in response.items():
-                if key == "status":
-                    status_emoji = (
-                        "✅"
-                        if value == "completed"
-                        else "❌" if value == "failed" else "⏳"
-                    )
-                    markdown_output += f"**Status:** {status_emoji} {value}\n\n"
-                else:
-                    markdown_output += (
-                        f"**{key.replace('_', ' ').title()}:** {value}\n\n"
-                    )
-
-            # Safely update the status_output (Gradio Markdown)
-            logger.info(f"status_output : {status_output} and markdown_output {markdown_output}")
-            status_output=markdown_output
-
-            if status in ("completed", "failed"):
-                break
-
-        except Exception as e:
-            logger.error(f"Error polling summary status: {e}", exc_info=True)
-            error_markdown = f"## Error\n\n❌ **Error fetching status:** {str(e)}"
-            status_output =error_markdown
-            break
-
-        time.sleep(10)
-
-
 def extract_summary_id(raw_id):
     if not raw_id:
         return None
@@ -166,27 +111,12 @@ def extract_summary_id(raw_id):
     return raw_id
 
 
-def process_and_poll(camera, start, duration, action, status_output):
-    result = process_video(camera, start, duration, action)
-    if action == "Add to Search":
-        return result
-    raw_id = result.get("summary_id")
-    summary_id = extract_summary_id(raw_id)
+def process_and_watch(camera, start, duration, action):
+    # Status updates for the new summary arrive over the shared update
+    # stream and are rendered by the polling_timer tick
+    return process_video(camera, start, duration, action)
 
-    if result["status"] == "success" and summary_id:
-        if summary_id in polling_threads:
-            polling_threads[summary_id]["stop"].set()
 
-        stop_event = threading.Event()
-        thread = threading.Thread(
-            target=poll_summary_status,
-            args=(summary_id, status_output, stop_event),
-            daemon=True,
-        )
-        thread.start()
-        polling_threads[summary_id] = {"thread": thread, "stop": stop_event}
-
-    return result
 def wrapper_fn(
     camera,
     start,
@@ -260,7 +190,7 @@ def wrapper_fn(
             False
         )
     # Call processing function
-    result_dict = process_and_poll(camera, start, duration, action, status_output_box)
+    result_dict = process_and_watch(camera, start, duration, action)
 
     message = result_dict.get("message", json.dumps(result_dict, indent=2))
 
@@ -309,28 +239,50 @@ def refresh_summary_status(summary_id):
     except Exception as e:
         return f"## Error\n\n❌ **Error fetching status:** {str(e)}", gr.update(visible=True), gr.update(visible=True)
 
-def auto_refresh_summary_status(summary_id):
+def auto_refresh_summary_status(summary_id, rendered, polled_at):
+    """
+    Renders the latest pushed status of the summary. Nothing is sent to the
+    browser until the status changes, and the timer stops once the summary
+    is complete. Falls back to polling the backend every
+    SUMMARY_POLL_INTERVAL seconds while the update stream is disconnected.
+    """
     if not summary_id:
-        return "", gr.update(visible=False), gr.update(visible=False)
+        return "", gr.update(visible=False), gr.update(visible=False), gr.update(active=False), None, 0.0
+
+    stream = get_update_stream()
+    if stream.connected:
+        status = stream.summary_status(summary_id)
+        if status is None or status == rendered:
+            return gr.skip(), gr.skip(), gr.skip(), gr.skip(), rendered, polled_at
+        response, complete = status
+    else:
+        now = time.monotonic()
+        if now - (polled_at or 0.0) < SUMMARY_POLL_INTERVAL:
+            return gr.skip(), gr.skip(), gr.skip(), gr.skip(), rendered, polled_at
+        status, polled_at = None, now
 
     try:
-        response = fetch_summary_status(summary_id)
+        if status is None:
+            response = fetch_summary_status(summary_id)
+            complete = summary_complete(response)
+        timer = gr.update(active=not complete)
         if isinstance(response, dict):
             markdown_output = f"## Summary Status\n\n"
             markdown_output += f"**Summary ID:** `{summary_id}`\n\n"
             for key, value in response.items():
                 markdown_output += f"**{key.replace('_', ' ').title()}:** {value}\n\n"
             # Hide toast on success
-            return markdown_output, gr.update(visible=False), gr.update(visible=False)
+            return markdown_output, gr.update(visible=False), gr.update(visible=False), timer, status, polled_at
         else:
-            return f"## Summary Status\n\n```json\n{json.dumps(response, indent=2)}\n```", gr.update(visible=False), gr.update(visible=False)
+            return f"## Summary Status\n\n```json\n{json.dumps(response, indent=2)}\n```", gr.update(visible=False), gr.update(visible=False), timer, status, polled_at
     except Exception as e:
-        return f"## Error\n\n❌ **Error fetching status:** {str(e)}", f"❌ Error: {str(e)}", gr.update(visible=True)
+        return f"## Error\n\n❌ **Error fetching status:** {str(e)}", f"❌ Error: {str(e)}", gr.update(visible=True), gr.skip(), rendered, polled_at
 
 def create_ui():
     show_genai_tab = os.getenv("NVR_GENAI", "false").lower() == "true"
     time.sleep(5)  # Ensure the environment is fully initialized
     camera_data = fetch_cameras()
+    update_stream = get_update_stream()
     camera_list = list(camera_data.keys())
     recent_events = []
     def get_labels_for_camera(camera_name):
@@ -365,6 +317,13 @@ def create_ui():
 
         return rows
 
+    def refresh_summary_responses(seen_version):
+        # One /rules/responses/ request per change, shared by all sessions
+        version = update_stream.responses_version
+        if version == seen_version:
+            return gr.skip(), seen_version
+        return update_stream.rows(format_summary_responses), version
+
     def format_search_responses():
         data = fetch_search_responses()
         rows = []
@@ -416,9 +375,13 @@ def create_ui():
 
                 with gr.Row():
                     status_output = gr.Markdown(value="", label="Summary Status")
-                polling_timer = gr.Timer(value=5.0, active=False)  # 5 seconds interval, initially inactive
+                # Reads the pushed summary status, initially inactive
+                polling_timer = gr.Timer(value=UPDATE_TICK_INTERVAL, active=False)
 
                 polling_enabled_state = gr.State(value=False)
+                rendered_status_state = gr.State(value=None)
+                # When the summary status was last fetched, while the update stream is down
+                polled_at_state = gr.State(value=0.0)
                 result = gr.JSON(visible=False)
 
                 # Turn timer visibility ON or OFF based on state
@@ -440,8 +403,15 @@ def create_ui():
                 # Register the tick event
                 polling_timer.tick(
                     fn=auto_refresh_summary_status,
-                    inputs=[summary_id_state],
-                    outputs=[status_output, toast_output, close_toast_btn],
+                    inputs=[summary_id_state, rendered_status_state, polled_at_state],
+                    outputs=[
+                        status_output,
+                        toast_output,
+                        close_toast_btn,
+                        polling_timer,
+                        rendered_status_state,
+                        polled_at_state,
+                    ],
                 )
 
                 process_btn.click(
@@ -682,6 +652,14 @@ def create_ui():
                     fn=format_summary_responses, outputs=[summary_response_table]
                 )
 
+                # Refresh the table whenever the update stream reports a change
+                responses_version_state = gr.State(value=None)
+                gr.Timer(value=UPDATE_TICK_INTERVAL).tick(
+                    fn=refresh_summary_responses,
+                    inputs=[responses_version_state],
+                    outputs=[summary_response_table, responses_version_state],
+                )
+
                 search_response_table = gr.Dataframe(
                     headers=["Rule ID", "Video ID", "Message"],
                     datatype=["str", "str", "str"],
@@ -0,0 +1,141 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+import json
+import threading
+from typing import Callable, Optional
+
+import requests
+
+from ui.config import API_BASE_URL, logger
+
+
+class UpdateStream:
+    """
+    Single subscription to the router's /updates server-sent events.
+
+    One background thread per UI process holds the stream and keeps the
+    latest state in memory; Gradio callbacks of every session read it
+    without calling the backend. The stream reconnects with exponential
+    backoff, and `connected` tells callers when to fall back to polling.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, max_backoff: float = 30.0, read_timeout: float = 60.0):
+        self.url = f"{base_url}/updates"
+        self.max_backoff = max_backoff
+        self.read_timeout = read_timeout
+        self.connected = False
+        self.summaries = {}
+        self.responses_version = 0
+        self._rows = (None, None)
+        self._rows_lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._response = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="update-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            response.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with requests.get(
+                    self.url,
+                    stream=True,
+                    timeout=(5, self.read_timeout),
+                    headers={"Accept": "text/event-stream"},
+                ) as response:
+                    response.raise_for_status()
+                    self._response = response
+                    self.connected = True
+                    backoff = 1.0
+                    logger.info(f"Subscribed to {self.url}")
+                    self._read(response)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"Update stream disconnected ({e}), reconnecting in {backoff:.0f}s")
+            finally:
+                self._response = None
+                self.connected = False
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _read(self, response):
+        data = []
+        for line in response.iter_lines(decode_unicode=True):
+            if self._stop.is_set():
+                return
+            if line is None:
+                continue
+            if not line:
+                # A blank line ends the event
+                if data:
+                    self._handle(json.loads("\n".join(data)))
+                data = []
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip())
+            # "event:", "retry:" and ":" comment lines carry nothing the
+            # payload does not already include
+
+    def _handle(self, message: dict):
+        with self._changed:
+            if message["type"] == "summary_status":
+                self.summaries[message["summary_id"]] = (message["result"], message["complete"])
+                self.responses_version += 1
+            elif message["type"] == "response" or message.get("rule_id"):
+                self.responses_version += 1
+            self._changed.notify_all()
+
+    def summary_status(self, summary_id: str):
+        """Returns (result, complete) for the summary, or None if no update has arrived yet."""
+        return self.summaries.get(summary_id)
+
+    def wait(self, predicate: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """Blocks until predicate() is true or the timeout expires."""
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+    def rows(self, loader: Callable[[], list]) -> list:
+        """
+        Returns loader() for the current responses version. The loader runs
+        at most once per version, however many sessions ask for it.
+        """
+        with self._rows_lock:
+            version = self.responses_version
+            cached_version, rows = self._rows
+            if cached_version != version:
+                rows = loader()
+                self._rows = (version, rows)
+            return rows
+
+
+def summary_complete(result) -> bool:
+    """Same rule as the router's `complete` flag, for results fetched while the stream is down."""
+    return isinstance(result, dict) and bool(result) and "frameSummaries" not in result
+
+
+_update_stream = None
+_update_stream_lock = threading.Lock()
+
+
+def get_update_stream() -> UpdateStream:
+    """Returns the process-wide UpdateStream, starting it on first use."""
+    global _update_stream
+    with _update_stream_lock:
+        if _update_stream is None:
+            _update_stream = UpdateStream().start()
+        return _update_stream
@@ -0,0 +1,56 @@
+# test/test_update_stream.py
+
+import json
+from unittest.mock import MagicMock
+
+from ui.services.update_stream import UpdateStream, summary_complete
+
+
+def sse(*messages):
+    lines = ["retry: 3000", "", ": keep-alive", ""]
+    for message in messages:
+        lines += [f"event: {message['type']}", f"data: {json.dumps(message)}", ""]
+    return MagicMock(iter_lines=lambda decode_unicode: iter(lines))
+
+
+def test_read_tracks_summary_status_and_responses():
+    stream = UpdateStream(base_url="http://router")
+    stream._read(
+        sse(
+            {"type": "summary_id", "rule_id": None, "summary_id": "manual"},
+            {"type": "summary_id", "rule_id": "rule-a", "summary_id": "s1"},
+            {"type": "summary_status", "summary_id": "s1", "result": {"summary": "done"}, "complete": True},
+            {"type": "response", "rule_id": "rule-a"},
+        )
+    )
+    assert stream.summary_status("s1") == ({"summary": "done"}, True)
+    assert stream.summary_status("manual") is None
+    assert stream.responses_version == 3
+
+
+def test_rows_load_once_per_version():
+    stream = UpdateStream(base_url="http://router")
+    loader = MagicMock(return_value=[["rule-a", "s1", "done"]])
+
+    assert stream.rows(loader) == [["rule-a", "s1", "done"]]
+    stream.rows(loader)
+    assert loader.call_count == 1
+
+    stream._read(sse({"type": "response", "rule_id": "rule-a"}))
+    stream.rows(loader)
+    assert loader.call_count == 2
+
+
+def test_wait_returns_when_update_arrives():
+    stream = UpdateStream(base_url="http://router")
+    stream._read(sse({"type": "response", "rule_id": "rule-a"}))
+    assert stream.wait(lambda: stream.responses_version == 1, timeout=0.1)
+    assert not stream.wait(lambda: stream.responses_version == 2, timeout=0.01)
+
+
+def test_summary_complete_matches_the_pushed_flag():
+    assert summary_complete({"summary": "done"})
+    assert not summary_complete({"summary": "", "frameSummaries": []})
+    # empty or error responses of fetch_summary_status keep the timer running
+    assert not summary_complete({})
+    assert not summary_complete("connection refused")